@@ -9,6 +9,7 @@ https://docs.djangoproject.com/en/5.2/topics/settings/
 For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
+import copy
 import os
 from pathlib import Path
 
@@ -45,12 +46,17 @@ INSTALLED_APPS = [
     ]
 
 MIDDLEWARE = [
+    "core.middleware.InstrumentacionMiddleware",
+    "core.middleware.ReplicasMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "personal.middleware.AccesoUsuarioMiddleware",
     "personal.middleware.ForcePasswordChangeMiddleware",
+    "comunicacion.middleware.GroupSyncMiddleware",
+    "personal.middleware.NotificacionesDiferidasMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -80,12 +86,86 @@ WSGI_APPLICATION = "LaCasaDeLaPradera.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+# Por defecto SQLite. Con POSTGRES_DB definido se usa PostgreSQL (psycopg 3):
+#   POSTGRES_DB, POSTGRES_USER, POSTGRES_PASSWORD, POSTGRES_HOST, POSTGRES_PORT
+#   POSTGRES_POOL=1 (por defecto): pool de conexiones de psycopg por proceso,
+#     de POSTGRES_POOL_MIN a POSTGRES_POOL_MAX conexiones.
+#   POSTGRES_POOL=0: conexiones persistentes de Django (POSTGRES_CONN_MAX_AGE
+#     segundos). Útil detrás de PgBouncer.
+# En ambos casos CONN_HEALTH_CHECKS verifica la conexión antes de reutilizarla.
+# Para pasar los datos de db.sqlite3: python manage.py copiar_sqlite db.sqlite3
+
+if os.environ.get("POSTGRES_DB"):
+    _POOL = os.environ.get("POSTGRES_POOL", "1") == "1"
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": os.environ["POSTGRES_DB"],
+            "USER": os.environ.get("POSTGRES_USER", ""),
+            "PASSWORD": os.environ.get("POSTGRES_PASSWORD", ""),
+            "HOST": os.environ.get("POSTGRES_HOST", ""),
+            "PORT": os.environ.get("POSTGRES_PORT", ""),
+            # El pool de psycopg no admite conexiones persistentes de Django
+            "CONN_MAX_AGE": 0 if _POOL else int(os.environ.get("POSTGRES_CONN_MAX_AGE", "60")),
+            "CONN_HEALTH_CHECKS": True,
+            "OPTIONS": {
+                "pool": {
+                    "min_size": int(os.environ.get("POSTGRES_POOL_MIN", "2")),
+                    "max_size": int(os.environ.get("POSTGRES_POOL_MAX", "10")),
+                    "timeout": 10,
+                },
+            } if _POOL else {},
+        }
+    }
+    # Réplicas de lectura: POSTGRES_REPLICAS=host1[:puerto],host2[:puerto]
+    for _i, _host in enumerate(filter(None, os.environ.get("POSTGRES_REPLICAS", "").split(",")), 1):
+        _host, _, _puerto = _host.strip().partition(":")
+        DATABASES[f"replica{_i}"] = {
+            **copy.deepcopy(DATABASES["default"]),
+            "HOST": _host,
+            "PORT": _puerto or DATABASES["default"]["PORT"],
+            "TEST": {"MIRROR": "default"},
+        }
+else:
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": BASE_DIR / "db.sqlite3",
+            "OPTIONS": {
+                # Las transacciones toman el bloqueo de escritura al empezar (ver core.utils_sqlite);
+                # los PRAGMAs (WAL, busy_timeout, ...) se aplican en core.signals
+                "transaction_mode": "IMMEDIATE",
+            },
+        }
+    }
+
+# Lecturas en réplicas (ver core.utils_replicas): alias de DATABASES usados
+# por las vistas de solo lectura; la primaria es siempre "default"
+DATABASE_ROUTERS = ["core.routers.RouterReplicas"]
+CORE_REPLICAS = [alias for alias in DATABASES if alias.startswith("replica")]
+CORE_REPLICAS_FIJAR_SEGUNDOS = 5
+CORE_REPLICAS_RETRASO_MAXIMO = 5
+
+# Caché: contadores de insignias (core.utils_contadores) y versión de los
+# datos de recomendación (personal.utils_recomendacion). Las invalidaciones
+# deben verlas todos los procesos que sirven la aplicación.
+#   REDIS_URL=redis://host:6379/0: caché compartida (requiere el paquete redis).
+#   Sin REDIS_URL: memoria de cada proceso. Solo válido con un único proceso
+#     (runserver o un worker); con varios, cada uno mostraría sus contadores
+#     hasta que venzan.
+if os.environ.get("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.environ["REDIS_URL"],
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
     }
-}
 
 
 # Password validation
@@ -143,5 +223,16 @@ app_name = 'LaCasaDeLaPradera'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Archivos de las importaciones de trabajadores lanzadas desde el admin y sus
+# resultados (ver personal.utils_importacion). Fuera de MEDIA_ROOT: contienen
+# datos personales y no deben servirse.
+PERSONAL_DIR_IMPORTACIONES = BASE_DIR / 'importaciones'
+
 # Forzar cambio de password inicial en entorno de desarrollo/des pruebas
-PERSONAL_FORCE_PASSWORD_CHANGE = True
\ No newline at end of file
+PERSONAL_FORCE_PASSWORD_CHANGE = True
+
+# Instrumentación de peticiones (consultas SQL, plantillas y tiempos; ver core.middleware):
+# cabecera Server-Timing, log de peticiones lentas y agregado por endpoint muestreado
+CORE_INSTRUMENTACION = True
+CORE_INSTRUMENTACION_UMBRAL_MS = 500
+CORE_INSTRUMENTACION_MUESTREO = 0.1
\ No newline at end of file
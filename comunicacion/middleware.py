@@ -0,0 +1,15 @@
+from .sync import group_sync_batch
+
+
+class GroupSyncMiddleware:
+    """
+    Middleware que agrupa la sincronización de conversaciones de cuadrilla.
+    Todas las asignaciones modificadas durante la petición se reconcilian una
+    sola vez por cuadrilla al terminar (ver `comunicacion.sync`).
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with group_sync_batch():
+            return self.get_response(request)
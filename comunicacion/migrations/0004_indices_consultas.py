@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-17 02:24
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comunicacion', '0003_chatarchivado_participants_snapshot'),
+        ('personal', '0013_indices_consultas'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='conversation',
+            index=models.Index(fields=['is_group', 'cuadrilla', 'archived'], name='conv_grupo_cuadrilla_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='incidentnotice',
+            index=models.Index(fields=['cuadrilla', 'acknowledged', '-created_at'], name='incidente_cuadrilla_ack_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['conversation', 'created_at'], name='msg_conv_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workerrequest',
+            index=models.Index(fields=['cuadrilla', '-created_at'], name='solicitud_cuadrilla_fecha_idx'),
+        ),
+    ]
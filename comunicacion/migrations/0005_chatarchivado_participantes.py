@@ -0,0 +1,88 @@
+# Generated by Django 5.2.7 on 2026-10-17 03:05
+
+import json
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+LOTE = 1000
+
+
+def _ids_json(texto, clave=None):
+    try:
+        datos = json.loads(texto or '[]')
+    except ValueError:
+        return set()
+    if not isinstance(datos, list):
+        return set()
+    if clave:
+        datos = [d.get(clave) for d in datos if isinstance(d, dict)]
+    return {i for i in datos if isinstance(i, int)}
+
+
+def poblar_participantes(apps, schema_editor):
+    """
+    Llena el índice de acceso de los archivos existentes con las mismas reglas
+    que aplicaban las vistas: participantes de la conversación (o del
+    snapshot), autores de mensajes, quien archivó y el líder de la cuadrilla.
+    Recorre los archivos por lotes de clave primaria.
+    """
+    ChatArchivado = apps.get_model('comunicacion', 'ChatArchivado')
+    Conversation = apps.get_model('comunicacion', 'Conversation')
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    Through = ChatArchivado.participantes.through
+    Participante = Conversation.participants.through
+    db = schema_editor.connection.alias
+
+    ultimo = 0
+    while True:
+        lote = list(
+            ChatArchivado.objects.using(db).filter(pk__gt=ultimo).order_by('pk').values_list(
+                'pk', 'conversation_id', 'archived_by_id', 'conversation__cuadrilla__lider_id',
+                'participants_snapshot', 'messages_snapshot',
+            )[:LOTE]
+        )
+        if not lote:
+            return
+        ultimo = lote[-1][0]
+
+        en_conversacion = {}
+        for conv_id, user_id in Participante.objects.using(db).filter(
+            conversation_id__in={fila[1] for fila in lote if fila[1]}
+        ).values_list('conversation_id', 'user_id'):
+            en_conversacion.setdefault(conv_id, set()).add(user_id)
+
+        acceso = {}
+        for pk, conv_id, archivado_por, lider, snapshot, mensajes in lote:
+            ids = _ids_json(snapshot) | _ids_json(mensajes, 'sender_id')
+            ids |= en_conversacion.get(conv_id, set())
+            ids |= {archivado_por, lider}
+            acceso[pk] = ids - {None}
+
+        # Los snapshots pueden citar usuarios ya eliminados
+        existentes = set(User.objects.using(db).filter(
+            pk__in={i for ids in acceso.values() for i in ids}
+        ).values_list('pk', flat=True))
+        Through.objects.using(db).bulk_create([
+            Through(chatarchivado_id=pk, user_id=user_id)
+            for pk, ids in acceso.items()
+            for user_id in ids & existentes
+        ], ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comunicacion', '0004_indices_consultas'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatarchivado',
+            name='participantes',
+            field=models.ManyToManyField(blank=True, related_name='chats_archivados', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(poblar_participantes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-17 03:21
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comunicacion', '0005_chatarchivado_participantes'),
+        ('personal', '0015_indices_vistas'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='conversation',
+            name='conv_grupo_cuadrilla_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='incidentnotice',
+            name='incidente_cuadrilla_ack_idx',
+        ),
+        migrations.AddIndex(
+            model_name='conversation',
+            index=models.Index(condition=models.Q(('is_group', True)), fields=['cuadrilla', '-created_at'], name='conv_canal_cuadrilla_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='incidentnotice',
+            index=models.Index(fields=['cuadrilla', '-created_at'], name='incidente_cuadrilla_fecha_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.7 on 2026-10-17 03:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comunicacion', '0006_indices_vistas'),
+        ('personal', '0016_sin_indices_redundantes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='incidentnotice',
+            name='cuadrilla',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='incidentes', to='personal.cuadrilla'),
+        ),
+        migrations.AlterField(
+            model_name='message',
+            name='conversation',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='mensajes', to='comunicacion.conversation'),
+        ),
+        migrations.AlterField(
+            model_name='workerrequest',
+            name='cuadrilla',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, to='personal.cuadrilla'),
+        ),
+    ]
@@ -54,6 +54,17 @@ class Conversation(models.Model):
     class Meta:
         # Orden por más reciente primero para listar conversaciones activas
         ordering = ['-created_at']
+        indexes = [
+            # Canal de una cuadrilla, el más reciente primero
+            # (`sincronizar_cuadrillas`: is_group=True, cuadrilla__in=...). Parcial:
+            # en SQLite `is_group=True` se compila como `"is_group"` y no sirve
+            # como columna inicial de un índice
+            models.Index(
+                fields=['cuadrilla', '-created_at'],
+                condition=models.Q(is_group=True),
+                name='conv_canal_cuadrilla_idx',
+            ),
+        ]
 
     def __str__(self):
         # Representación legible de la conversación para admin y debugging
@@ -90,10 +101,11 @@ class Conversation(models.Model):
         """Asegura que exista una conversación grupal para una `cuadrilla`.
 
         Comportamiento:
-        - Busca `Asignacion` en `personal.models` para obtener los miembros
-          actuales de la cuadrilla.
+        - Los miembros son los `trabajador` de las `Asignacion` de la cuadrilla
+          más su líder (si tiene).
         - Si el número de miembros >= `min_members`, crea la conversación
-          grupal si no existe y añade todos los `trabajador` como participantes.
+          grupal si no existe y deja como participantes exactamente a los
+          miembros actuales.
         - Si el número de miembros es < `min_members` y existe conversación,
           la elimina (se asume que no tiene sentido conservarla vacía o con pocos
           miembros).
@@ -103,45 +115,124 @@ class Conversation(models.Model):
           miembros.
         - `None` si la conversación no debe existir (menos de `min_members`).
 
-        Notas de rendimiento y concurrencia:
-        - La consulta `Asignacion.objects.filter(...)` puede traer muchos
-          registros; si se usa en ciclos frecuentes, considerar optimizar con
-          `.values_list('trabajador', flat=True)` o señales que actualicen
-          incrementalmente.
-        - No utiliza transacciones explícitas; si la consistencia es crítica,
-          envolver en `transaction.atomic()` desde el lugar que invoque este
-          método.
+        Es un atajo sobre `sync_groups_for_cuadrillas` para una sola cuadrilla;
+        para sincronizar varias cuadrillas de una vez usar ese método (o el
+        mecanismo diferido de `comunicacion.sync`).
+        """
+        return cls.sync_groups_for_cuadrillas([cuadrilla.pk], min_members=min_members).get(cuadrilla.pk)
+
+    @classmethod
+    def sync_groups_for_cuadrillas(cls, cuadrilla_ids, min_members=2):
+        """Reconcilia las conversaciones grupales de varias cuadrillas en una pasada.
+
+        Para cada cuadrilla compara el conjunto de miembros esperado
+        (asignaciones + líder) con los participantes actuales de su
+        conversación grupal y aplica solo la diferencia:
+        - crea las conversaciones que falten con un único `bulk_create`,
+        - inserta los participantes nuevos con un `bulk_create` sobre la
+          tabla intermedia de `participants`,
+        - elimina los participantes sobrantes con un único `DELETE`,
+        - elimina las conversaciones de cuadrillas con menos de `min_members`.
+
+        El número de consultas no depende del número de cuadrillas ni de
+        miembros. Las cuadrillas que ya no existen se ignoran.
+
+        Retorno:
+        - dict `{cuadrilla_id: Conversation | None}` para las cuadrillas
+          existentes.
+
+        Notas:
+        - Al escribir directamente en la tabla intermedia no se emiten
+          señales `m2m_changed`.
+        - Si existen varias conversaciones grupales para una cuadrilla se
+          reconcilia la más reciente (igual que `.first()` con el orden por
+          defecto); el resto no se modifica.
         """
         # Importación local para evitar ciclo de imports al cargar apps
-        from personal.models import Asignacion
-
-        miembros = Asignacion.objects.filter(cuadrilla=cuadrilla)
-        # Lista de usuarios asignados
-        users = [a.trabajador for a in miembros if a.trabajador]
-        # Incluir al líder si no está en la lista
-        if cuadrilla.lider and cuadrilla.lider not in users:
-            users.append(cuadrilla.lider)
-        total = len(users)
-
-        # Buscar conversación grupal existente para esta cuadrilla
-        conv = cls.objects.filter(is_group=True, cuadrilla=cuadrilla).first()
-
-        if total >= min_members:
-            if not conv:
-                # Crear conversación grupal nombrada con el nombre de la cuadrilla
-                conv = cls.objects.create(
-                    is_group=True,
-                    cuadrilla=cuadrilla,
-                    nombre=f"Cuadrilla {cuadrilla.nombre}"
+        from personal.models import Asignacion, Cuadrilla
+
+        cuadrilla_ids = {cid for cid in cuadrilla_ids if cid is not None}
+        if not cuadrilla_ids:
+            return {}
+
+        cuadrillas = {
+            c.pk: c for c in Cuadrilla.objects.filter(pk__in=cuadrilla_ids).only('id', 'nombre', 'lider_id')
+        }
+        if not cuadrillas:
+            return {}
+
+        # Miembros esperados por cuadrilla: asignados + líder
+        miembros = {cid: set() for cid in cuadrillas}
+        asignaciones = Asignacion.objects.filter(cuadrilla_id__in=cuadrillas.keys()).values_list(
+            'cuadrilla_id', 'trabajador_id'
+        )
+        for cid, user_id in asignaciones:
+            miembros[cid].add(user_id)
+        for cid, cuadrilla in cuadrillas.items():
+            if cuadrilla.lider_id:
+                miembros[cid].add(cuadrilla.lider_id)
+
+        # Conversación grupal vigente por cuadrilla (la más reciente)
+        convs = {}
+        for conv in cls.objects.filter(is_group=True, cuadrilla_id__in=cuadrillas.keys()):
+            convs.setdefault(conv.cuadrilla_id, conv)
+
+        # Eliminar conversaciones de cuadrillas con pocos miembros
+        sobrantes = [
+            conv.pk for cid, conv in convs.items() if len(miembros[cid]) < min_members
+        ]
+        if sobrantes:
+            cls.objects.filter(pk__in=sobrantes).delete()
+
+        # Crear las conversaciones que falten
+        nuevas = [
+            cls(is_group=True, cuadrilla_id=cid, nombre=f"Cuadrilla {cuadrillas[cid].nombre}")
+            for cid in cuadrillas
+            if len(miembros[cid]) >= min_members and cid not in convs
+        ]
+        if nuevas:
+            cls.objects.bulk_create(nuevas)
+            if any(conv.pk is None for conv in nuevas):
+                # Backends sin RETURNING: recuperar las filas recién creadas
+                nuevas = cls.objects.filter(
+                    is_group=True, cuadrilla_id__in=[conv.cuadrilla_id for conv in nuevas]
                 )
-            # Añadir usuarios asignados y líder
-            conv.add_participants(users)
-            return conv
-        else:
-            # Menos miembros de los necesarios: eliminar conversación si existe
-            if conv:
-                conv.delete()
-            return None
+            for conv in nuevas:
+                convs.setdefault(conv.cuadrilla_id, conv)
+
+        resultado = {cid: None for cid in cuadrillas}
+        activas = {
+            conv.pk: cid for cid, conv in convs.items() if len(miembros[cid]) >= min_members
+        }
+        if not activas:
+            return resultado
+
+        # Diff de participantes sobre la tabla intermedia
+        Through = cls.participants.through
+        actuales = {pk: set() for pk in activas}
+        filas_a_borrar = []
+        for row_id, conv_id, user_id in Through.objects.filter(
+            conversation_id__in=activas.keys()
+        ).values_list('id', 'conversation_id', 'user_id'):
+            if user_id in miembros[activas[conv_id]]:
+                actuales[conv_id].add(user_id)
+            else:
+                filas_a_borrar.append(row_id)
+
+        if filas_a_borrar:
+            Through.objects.filter(pk__in=filas_a_borrar).delete()
+
+        filas_nuevas = [
+            Through(conversation_id=conv_id, user_id=user_id)
+            for conv_id, cid in activas.items()
+            for user_id in miembros[cid] - actuales[conv_id]
+        ]
+        if filas_nuevas:
+            Through.objects.bulk_create(filas_nuevas, ignore_conflicts=True)
+
+        for conv_id, cid in activas.items():
+            resultado[cid] = convs[cid]
+        return resultado
 
 
 def archive_conversation(conversation, archived_by=None, reason=''):
@@ -183,6 +274,13 @@ def archive_conversation(conversation, archived_by=None, reason=''):
         participant_ids = [u.id for u in conversation.participants.all() if u]
     except Exception:
         participant_ids = []
+    # Índice de acceso: participantes, autores de mensajes, quien archiva y
+    # el líder de la cuadrilla (ver `ChatArchivado.participantes`)
+    con_acceso = set(participant_ids) | {m['sender_id'] for m in msgs}
+    con_acceso.add(getattr(archived_by, 'pk', None))
+    if conversation.cuadrilla_id:
+        con_acceso.add(conversation.cuadrilla.lider_id)
+    con_acceso.discard(None)
 
     # Crear registro de archivado
     archived = ChatArchivado.objects.create(
@@ -193,6 +291,7 @@ def archive_conversation(conversation, archived_by=None, reason=''):
         messages_snapshot=json.dumps(msgs, ensure_ascii=False),
         participants_snapshot=json.dumps(participant_ids),
     )
+    archived.participantes.add(*con_acceso)
 
     # Marcar conversación como archivada (pero conservar registro)
     conversation.archived = True
@@ -201,6 +300,36 @@ def archive_conversation(conversation, archived_by=None, reason=''):
     return archived
 
 
+def cambiar_lider_archivados(cuadrilla_id, lider_anterior_id, lider_id):
+    """Traspasa el acceso por liderazgo a los archivos de una cuadrilla.
+
+    El nuevo líder gana acceso a los chats archivados de las conversaciones de
+    la cuadrilla; el anterior lo pierde salvo en los archivos donde participó
+    (ver `ChatArchivado.acceso_propio`). Los archivos cuya conversación fue
+    eliminada ya no están ligados a la cuadrilla y no cambian.
+    """
+    archivos = ChatArchivado.objects.filter(conversation__cuadrilla_id=cuadrilla_id)
+    Through = ChatArchivado.participantes.through
+
+    if lider_anterior_id:
+        sin_acceso_propio = [
+            archivo.pk for archivo in archivos.only(
+                'id', 'archived_by_id', 'participants_snapshot', 'messages_snapshot'
+            )
+            if lider_anterior_id not in archivo.acceso_propio()
+        ]
+        if sin_acceso_propio:
+            Through.objects.filter(
+                chatarchivado_id__in=sin_acceso_propio, user_id=lider_anterior_id
+            ).delete()
+
+    if lider_id:
+        Through.objects.bulk_create([
+            Through(chatarchivado_id=pk, user_id=lider_id)
+            for pk in archivos.values_list('pk', flat=True)
+        ], ignore_conflicts=True)
+
+
 class Message(models.Model):
     """Mensaje dentro de una `Conversation`.
 
@@ -220,7 +349,8 @@ class Message(models.Model):
         ('request', 'Solicitud'),
         ('incident', 'Incidente'),
     ]
-    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='mensajes')
+    # Sin índice propio: lo cubre el índice compuesto que empieza por esta columna
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='mensajes', db_index=False)
     sender = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name='mensajes_enviados')
     content = models.TextField()
     message_type = models.CharField(max_length=20, choices=MESSAGE_TYPES, default='text')
@@ -232,6 +362,10 @@ class Message(models.Model):
     class Meta:
         # Orden natural por fecha ascendente (cronológico) dentro de una conversación
         ordering = ['created_at']
+        indexes = [
+            # Historial de una conversación en orden cronológico sin ordenar en memoria
+            models.Index(fields=['conversation', 'created_at'], name='msg_conv_fecha_idx'),
+        ]
 
     def __str__(self):
         sender = self.sender.username if self.sender else 'Sistema'
@@ -239,6 +373,13 @@ class Message(models.Model):
         return f"{sender} @ {self.created_at}: {self.content[:40]}"
 
 
+class ChatArchivadoQuerySet(models.QuerySet):
+
+    def accesibles_para(self, user):
+        """Archivos que el usuario puede ver (un JOIN por el índice de participantes)."""
+        return self.filter(participantes=user)
+
+
 class ChatArchivado(models.Model):
     """Registro de conversaciones archivadas.
 
@@ -248,6 +389,11 @@ class ChatArchivado(models.Model):
     - `archived_by`: usuario que solicitó el archivado (opcional).
     - `reason`: texto corto describiendo motivo.
     - `messages_snapshot`: JSON serializado con los mensajes en el momento del archivado.
+    - `participantes`: usuarios con acceso al archivo: participantes de la
+      conversación, autores de mensajes y quien archivó (fijados al archivar)
+      y el líder actual de la cuadrilla (ver `cambiar_lider_archivados`). Es
+      el índice por el que se filtran la lista, el detalle y el contador, sin
+      leer los snapshots JSON.
     """
     conversation = models.ForeignKey(
         Conversation,
@@ -271,6 +417,9 @@ class ChatArchivado(models.Model):
     # consultas rápidas sobre quiénes pueden acceder al archivo sin depender
     # de la existencia de la Conversation original.
     participants_snapshot = models.TextField(blank=True, null=True)
+    participantes = models.ManyToManyField(User, related_name='chats_archivados', blank=True)
+
+    objects = ChatArchivadoQuerySet.as_manager()
 
     class Meta:
         ordering = ['-archived_at']
@@ -278,6 +427,19 @@ class ChatArchivado(models.Model):
     def __str__(self):
         return f"ChatArchivado {self.id} - Conversacion {self.conversation_id} @ {self.archived_at}"
 
+    def acceso_propio(self):
+        """IDs con acceso que no depende del liderazgo: participantes y autores del snapshot y quien archivó."""
+        import json
+
+        ids = {getattr(self, 'archived_by_id', None)}
+        try:
+            ids.update(json.loads(self.participants_snapshot or '[]'))
+            ids.update(m.get('sender_id') for m in json.loads(self.messages_snapshot or '[]'))
+        except (ValueError, TypeError, AttributeError):
+            pass
+        ids.discard(None)
+        return ids
+
 
 class WorkerRequest(models.Model):
     """Modelo para peticiones/solicitudes realizadas por un trabajador.
@@ -300,7 +462,8 @@ class WorkerRequest(models.Model):
         ('rejected', 'Rechazada'),
     ]
     trabajador = models.ForeignKey(User, on_delete=models.CASCADE, related_name='solicitudes')
-    cuadrilla = models.ForeignKey('personal.Cuadrilla', on_delete=models.SET_NULL, null=True, blank=True)
+    # Sin índice propio: lo cubre el índice compuesto que empieza por esta columna
+    cuadrilla = models.ForeignKey('personal.Cuadrilla', on_delete=models.SET_NULL, null=True, blank=True, db_index=False)
     asunto = models.CharField(max_length=150)
     descripcion = models.TextField(blank=True)
     estado = models.CharField(max_length=20, choices=STATE_CHOICES, default='pending')
@@ -308,6 +471,10 @@ class WorkerRequest(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Solicitudes de las cuadrillas de un líder, más recientes primero
+            models.Index(fields=['cuadrilla', '-created_at'], name='solicitud_cuadrilla_fecha_idx'),
+        ]
 
     def __str__(self):
         return f"Solicitud {self.asunto} - {self.trabajador.username} ({self.estado})"
@@ -332,12 +499,14 @@ class IncidentNotice(models.Model):
         ('medium', 'Media'),
         ('high', 'Alta'),
     ]
+    # Sin índice propio: lo cubre el índice compuesto que empieza por esta columna
     cuadrilla = models.ForeignKey(
         'personal.Cuadrilla',
         on_delete=models.SET_NULL,
         null=True,
         blank=True,
-        related_name='incidentes'
+        related_name='incidentes',
+        db_index=False,
     )
     reporter = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='incidentes_reportados')
     descripcion = models.TextField()
@@ -348,6 +517,10 @@ class IncidentNotice(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Incidentes de las cuadrillas de un líder, más recientes primero
+            models.Index(fields=['cuadrilla', '-created_at'], name='incidente_cuadrilla_fecha_idx'),
+        ]
 
     def __str__(self):
         return f"Incidente ({self.severidad}) - {self.cuadrilla or 'Sin cuadrilla'}"
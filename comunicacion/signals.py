@@ -1,8 +1,10 @@
-from django.db.models.signals import post_save, post_delete
+from django.db.models.signals import m2m_changed, post_save, post_delete
 from django.dispatch import receiver
-from personal.models import Asignacion
-from .models import Conversation
-from .models import archive_conversation
+from personal.models import Asignacion, Cuadrilla
+from core.utils_contadores import CONTADOR_ARCHIVADOS, invalidar_contadores
+from .models import ChatArchivado, Conversation
+from .models import archive_conversation, cambiar_lider_archivados
+from .sync import schedule_group_sync
 from proyectos.models import Proyecto
 from django.db.models.signals import pre_save
 
@@ -15,13 +17,14 @@ def gestionar_conversacion_cuadrilla(sender, instance, created, **kwargs):
       se crea una y se agregan todos los participantes.
     - Si existe la conversación, se asegura que el trabajador esté agregado.
     - Si la cuadrilla queda con menos de 2 participantes, se elimina la conversación.
+
+    La reconciliación se difiere al cierre del lote en curso (ver
+    `comunicacion.sync`), de modo que se ejecuta una vez por cuadrilla.
     """
-    cuadrilla = instance.cuadrilla
-    if not cuadrilla:
+    if not instance.cuadrilla_id:
         return
 
-    # Centralizar la lógica en el modelo Conversation
-    Conversation.ensure_group_for_cuadrilla(cuadrilla, min_members=2)
+    schedule_group_sync(instance.cuadrilla_id)
 
 
 @receiver(post_delete, sender=Asignacion)
@@ -34,7 +37,7 @@ def manejar_baja_trabajador(sender, instance, **kwargs):
         return
 
     # Reconstruir/limpiar la conversación según el estado actual de asignaciones
-    Conversation.ensure_group_for_cuadrilla(cuadrilla, min_members=2)
+    schedule_group_sync(cuadrilla.pk)
 
     # Archivado automático: cuando un trabajador deja una cuadrilla, archivar
     # sus conversaciones privadas para preservarlas.
@@ -66,3 +69,31 @@ def proyecto_pre_save(sender, instance, **kwargs):
             convs = Conversation.objects.filter(cuadrilla=c, archived=False)
             for conv in convs:
                 archive_conversation(conv, archived_by=None, reason=f"Proyecto '{instance.nombre}' finalizado")
+
+
+@receiver(post_save, sender=ChatArchivado)
+@receiver(post_delete, sender=ChatArchivado)
+@receiver(m2m_changed, sender=ChatArchivado.participantes.through)
+def invalidar_contador_archivados(sender, **kwargs):
+    """Archivar es poco frecuente: se invalida el contador de todos los usuarios."""
+    invalidar_contadores(CONTADOR_ARCHIVADOS)
+
+
+@receiver(pre_save, sender=Cuadrilla)
+def recordar_lider_anterior(sender, instance, **kwargs):
+    """Guarda el líder previo en BD para comparar en `post_save`."""
+    instance._lider_anterior_id = (
+        Cuadrilla.objects.filter(pk=instance.pk).values_list('lider_id', flat=True).first()
+        if instance.pk else None
+    )
+
+
+@receiver(post_save, sender=Cuadrilla)
+def traspasar_acceso_archivados(sender, instance, **kwargs):
+    """El líder actual de la cuadrilla ve sus chats archivados (ver `ChatArchivado.participantes`)."""
+    anterior = getattr(instance, '_lider_anterior_id', None)
+    if anterior == instance.lider_id:
+        return
+    cambiar_lider_archivados(instance.pk, anterior, instance.lider_id)
+    # Escritura directa en la tabla intermedia: no emite m2m_changed
+    invalidar_contadores(CONTADOR_ARCHIVADOS)
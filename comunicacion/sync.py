@@ -0,0 +1,75 @@
+"""Sincronización diferida de las conversaciones grupales de cuadrilla.
+
+Cada alta, baja o cambio de `Asignacion` afecta a la conversación grupal de
+su cuadrilla. Reconciliar la conversación en cada señal cuesta O(n) consultas
+por asignación, es decir O(n²) al asignar n trabajadores en una misma
+petición. Este módulo permite acumular las cuadrillas afectadas y
+reconciliar cada una una sola vez:
+
+- `group_sync_batch()`: context manager (también usable como decorador) que
+  abre un lote. Dentro del lote, `schedule_group_sync` solo acumula IDs de
+  cuadrilla. Al cerrar el lote más externo se registra una única
+  reconciliación con `transaction.on_commit`, de modo que se ejecuta cuando
+  la transacción en curso se confirma (o de inmediato si no hay ninguna) y
+  se descarta si se revierte.
+- `schedule_group_sync(cuadrilla_id)`: punto de entrada para señales y
+  operaciones en bloque (`bulk_create`, `update`) que no emiten señales.
+  Fuera de un lote sincroniza de inmediato, como antes.
+
+`GroupSyncMiddleware` abre un lote por petición.
+"""
+import threading
+from contextlib import contextmanager
+from functools import partial
+
+from django.db import transaction
+
+from .models import Conversation
+
+
+_state = threading.local()
+
+
+def _pending():
+    pending = getattr(_state, 'pending', None)
+    if pending is None:
+        pending = _state.pending = set()
+    return pending
+
+
+def sync_now(cuadrilla_ids, min_members=2):
+    """Reconcilia inmediatamente las conversaciones de las cuadrillas dadas."""
+    return Conversation.sync_groups_for_cuadrillas(cuadrilla_ids, min_members=min_members)
+
+
+def schedule_group_sync(cuadrilla_id):
+    """Marca la conversación grupal de una cuadrilla como pendiente de sincronizar.
+
+    Dentro de un `group_sync_batch` la sincronización se difiere hasta el
+    cierre del lote; fuera de él se ejecuta en el momento.
+    """
+    if cuadrilla_id is None:
+        return
+    if getattr(_state, 'depth', 0) > 0:
+        _pending().add(cuadrilla_id)
+    else:
+        sync_now([cuadrilla_id])
+
+
+@contextmanager
+def group_sync_batch():
+    """Agrupa las sincronizaciones de conversación hasta el final del bloque.
+
+    Los lotes se pueden anidar; solo el más externo dispara la
+    reconciliación.
+    """
+    _state.depth = getattr(_state, 'depth', 0) + 1
+    try:
+        yield
+    finally:
+        _state.depth -= 1
+        if _state.depth == 0:
+            pending = _pending()
+            _state.pending = set()
+            if pending:
+                transaction.on_commit(partial(sync_now, pending))
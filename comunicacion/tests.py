@@ -1,8 +1,16 @@
+import importlib
+from types import SimpleNamespace
+
+from django.apps import apps
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth.models import User
+from django.urls import reverse
 
 from personal.models import Cuadrilla, Asignacion
-from .models import Conversation
+from .models import ChatArchivado, Conversation, Message, archive_conversation
+from .sync import group_sync_batch
 
 
 class ConversationSignalsTest(TestCase):
@@ -35,6 +43,35 @@ class ConversationSignalsTest(TestCase):
         self.assertFalse(Conversation.objects.filter(cuadrilla=self.cuad, is_group=True).exists())
 
 
+class GroupSyncBatchTest(TestCase):
+    """Tests para la sincronización diferida de conversaciones de cuadrilla."""
+
+    def setUp(self):
+        self.cuad = Cuadrilla.objects.create(nombre='Cuadrilla Lote')
+        self.users = [
+            User.objects.create_user(username=f'lote{i}', password='pass') for i in range(5)
+        ]
+
+    def test_batch_syncs_once_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with group_sync_batch():
+                for u in self.users:
+                    Asignacion.objects.create(trabajador=u, cuadrilla=self.cuad)
+                # Nada se sincroniza hasta cerrar el lote
+                self.assertFalse(Conversation.objects.filter(cuadrilla=self.cuad).exists())
+
+        self.assertEqual(len(callbacks), 1)
+        conv = Conversation.objects.get(cuadrilla=self.cuad, is_group=True)
+        self.assertEqual(set(conv.participants.values_list('id', flat=True)), {u.id for u in self.users})
+
+    def test_removed_member_leaves_group(self):
+        asignaciones = [Asignacion.objects.create(trabajador=u, cuadrilla=self.cuad) for u in self.users]
+        asignaciones[0].delete()
+        conv = Conversation.objects.get(cuadrilla=self.cuad, is_group=True)
+        self.assertNotIn(self.users[0], conv.participants.all())
+        self.assertEqual(conv.participants.count(), 4)
+
+
 class PrivateConversationTest(TestCase):
     """Tests para asegurar que solo miembros de la misma cuadrilla pueden iniciar mensajes privados."""
 
@@ -74,3 +111,92 @@ class PrivateConversationTest(TestCase):
         self.assertEqual(resp.status_code, 200)
         # Debe contener enlace para crear privada con u2
         self.assertIn(f'/comunicacion/crear_privada/{self.u2.pk}/', resp.content.decode())
+
+
+class ChatArchivadoAccesoTest(TestCase):
+    """Acceso a chats archivados por el índice `ChatArchivado.participantes`."""
+
+    def setUp(self):
+        self.lider = User.objects.create_user(username='arch_lider', password='pass')
+        self.u1 = User.objects.create_user(username='arch1', password='pass', first_name='Ana')
+        self.u2 = User.objects.create_user(username='arch2', password='pass', first_name='Beto')
+        self.ajeno = User.objects.create_user(username='arch_ajeno', password='pass')
+        self.cuad = Cuadrilla.objects.create(nombre='Cuadrilla Archivo', lider=self.lider)
+
+    def _archivar(self, borrar=False):
+        conv = Conversation.objects.create(is_group=False, cuadrilla=self.cuad)
+        conv.participants.add(self.u1, self.u2)
+        for texto in ('hola', 'chao'):
+            Message.objects.create(conversation=conv, sender=self.u1, content=texto)
+        archivo = archive_conversation(conv, archived_by=self.u2)
+        if borrar:
+            conv.delete()
+            archivo.refresh_from_db()
+        return archivo
+
+    def test_indice_al_archivar(self):
+        archivo = self._archivar()
+        self.assertEqual(
+            set(archivo.participantes.values_list('username', flat=True)),
+            {'arch1', 'arch2', 'arch_lider'},
+        )
+
+    def test_cambio_de_lider(self):
+        archivo = self._archivar()
+        nuevo = User.objects.create_user(username='arch_nuevo', password='pass')
+        self.cuad.lider = nuevo
+        self.cuad.save()
+        self.assertEqual(
+            set(archivo.participantes.values_list('username', flat=True)),
+            {'arch1', 'arch2', 'arch_nuevo'},
+        )
+
+        # Un líder que participó en la conversación conserva el acceso
+        self.cuad.lider = self.u1
+        self.cuad.save()
+        self.assertEqual(
+            set(archivo.participantes.values_list('username', flat=True)),
+            {'arch1', 'arch2'},
+        )
+        self.client.force_login(nuevo)
+        detalle = reverse('comunicacion:archived_detail', args=[archivo.pk])
+        self.assertEqual(self.client.get(detalle).status_code, 302)
+
+    def test_lista_y_detalle_sin_conversacion(self):
+        archivo = self._archivar(borrar=True)
+        self.client.force_login(self.u1)
+        respuesta = self.client.get(reverse('comunicacion:archived_list'))
+        self.assertEqual([a.pk for a in respuesta.context['archivos']], [archivo.pk])
+        self.assertEqual(respuesta.context['archivos'][0].display_name, 'Ana, Beto')
+        detalle = reverse('comunicacion:archived_detail', args=[archivo.pk])
+        self.assertEqual(self.client.get(detalle).status_code, 200)
+
+        self.client.force_login(self.ajeno)
+        self.assertEqual(list(self.client.get(reverse('comunicacion:archived_list')).context['archivos']), [])
+        self.assertEqual(self.client.get(detalle).status_code, 302)
+
+    def test_consultas_de_la_lista_no_crecen(self):
+        self._archivar(borrar=True)
+        self.client.force_login(self.u1)
+        self.client.get(reverse('comunicacion:archived_list'))
+        with CaptureQueriesContext(connection) as antes:
+            self.client.get(reverse('comunicacion:archived_list'))
+        for _ in range(3):
+            self._archivar(borrar=True)
+        with CaptureQueriesContext(connection) as despues:
+            respuesta = self.client.get(reverse('comunicacion:archived_list'))
+        self.assertEqual(len(respuesta.context['archivos']), 4)
+        self.assertEqual(len(despues), len(antes))
+
+    def test_migracion_puebla_el_indice(self):
+        archivo = self._archivar(borrar=True)
+        archivo.participantes.clear()
+        migracion = importlib.import_module('comunicacion.migrations.0005_chatarchivado_participantes')
+        migracion.poblar_participantes(apps, SimpleNamespace(connection=connection))
+        self.assertEqual(
+            set(ChatArchivado.objects.accesibles_para(self.u1).values_list('pk', flat=True)), {archivo.pk}
+        )
+        # Sin la conversación original ya no se conoce la cuadrilla (ni su líder)
+        self.assertEqual(
+            set(archivo.participantes.values_list('username', flat=True)), {'arch1', 'arch2'}
+        )
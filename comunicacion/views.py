@@ -7,9 +7,13 @@ from .forms import MessageForm, WorkerRequestForm, IncidentForm
 from django.db.models import Q
 from personal.models import Asignacion, Cuadrilla
 from personal.utils import es_jefe_proyecto, es_lider_cuadrilla
+from personal.utils_acceso import obtener_acceso
+from core.utils_replicas import solo_lectura
+from core.utils_sqlite import reintentar_si_bloqueada
 
 
 @login_required
+@solo_lectura
 def conversations_list(request):
     """Lista las conversaciones en las que participa el usuario y muestra
     las cuadrillas donde participa para iniciar conversaciones privadas.
@@ -18,36 +22,39 @@ def conversations_list(request):
     qs = Conversation.objects.filter(
         participants=request.user,
         archived=False
-    ).select_related('cuadrilla')
+    ).select_related('cuadrilla').prefetch_related('participants')
 
     from personal.models import Asignacion, Cuadrilla
 
-    cuad_ids = set(Asignacion.objects.filter(trabajador=request.user).values_list('cuadrilla_id', flat=True))
-    lider_ids = set(Cuadrilla.objects.filter(lider=request.user).values_list('id', flat=True))
-    cuad_ids |= lider_ids
+    acceso = obtener_acceso(request.user)
+    cuad_ids = acceso.cuadrillas
 
     mis_cuadrillas = []
     if cuad_ids:
-        cuad_qs = Cuadrilla.objects.filter(id__in=cuad_ids)
+        # Miembros de todas las cuadrillas en una sola consulta
+        miembros_por_cuadrilla = {}
+        asigns = (Asignacion.objects
+                  .filter(cuadrilla_id__in=cuad_ids)
+                  .exclude(trabajador=request.user)
+                  .select_related('trabajador', 'rol'))
+        for a in asigns:
+            miembros_por_cuadrilla.setdefault(a.cuadrilla_id, []).append({
+                'user': a.trabajador,
+                'rol': a.rol.nombre if a.rol else None
+            })
+        cuad_qs = Cuadrilla.objects.filter(id__in=cuad_ids).select_related('lider')
         for c in cuad_qs:
-            asigns = Asignacion.objects.filter(cuadrilla=c).select_related('trabajador', 'rol').exclude(trabajador=request.user)
-            miembros = []
-            for a in asigns:
-                miembros.append({
-                    'user': a.trabajador,
-                    'rol': a.rol.nombre if a.rol else None
-                })
-            mis_cuadrillas.append({'cuadrilla': c, 'miembros': miembros})
+            mis_cuadrillas.append({'cuadrilla': c, 'miembros': miembros_por_cuadrilla.get(c.pk, [])})
 
     # Si el usuario es Jefe de Proyecto, obtener líderes de cuadrillas de sus proyectos
     is_jefe = es_jefe_proyecto(request.user)
     # Determinar si el usuario es líder de alguna cuadrilla
-    is_lider = Cuadrilla.objects.filter(lider=request.user).exists()
+    is_lider = acceso.lidera_alguna
     lideres_proyecto = []
     if is_jefe:
-        proyectos_cuadrillas = Cuadrilla.objects.filter(proyecto__jefe=request.user)
+        proyectos_cuadrillas = Cuadrilla.objects.filter(proyecto__jefe=request.user).select_related('lider')
         for c in proyectos_cuadrillas:
-            if c.lider and c.lider != request.user:
+            if c.lider and c.lider_id != request.user.pk:
                 lideres_proyecto.append(c.lider)
 
     return render(request, 'comunicacion/conversations_list.html', {
@@ -59,6 +66,18 @@ def conversations_list(request):
     })
 
 
+@reintentar_si_bloqueada
+def _publicar_mensaje(conv, sender, form):
+    """Guarda el mensaje y lo marca como leído por el emisor en una sola transacción."""
+    msg = form.save(commit=False)
+    msg.conversation = conv
+    msg.sender = sender
+    msg.save()
+    # marcar que el emisor ya leyó su propio mensaje
+    msg.read_by.add(sender)
+    return msg
+
+
 @login_required
 def conversation_detail(request, conversation_id):
     """Detalle de una conversación.
@@ -73,12 +92,7 @@ def conversation_detail(request, conversation_id):
     if request.method == 'POST':
         form = MessageForm(request.POST)
         if form.is_valid():
-            msg = form.save(commit=False)
-            msg.conversation = conv
-            msg.sender = request.user
-            msg.save()
-            # marcar que el emisor ya leyó su propio mensaje
-            msg.read_by.add(request.user)
+            _publicar_mensaje(conv, request.user, form)
             return redirect('comunicacion:conversation_detail', conversation_id=conv.pk)
     else:
         form = MessageForm()
@@ -97,22 +111,24 @@ def create_private_conversation(request, user_id):
     from personal.models import Asignacion, Cuadrilla
 
 
+    acceso = obtener_acceso(request.user)
+
     # Permitir mensajes privados si comparten cuadrilla
-    cuadras_mias = Asignacion.objects.filter(trabajador=request.user).values_list('cuadrilla_id', flat=True)
+    cuadras_mias = acceso.cuadrillas_asignadas.keys()
     cuadras_otro = Asignacion.objects.filter(trabajador=other).values_list('cuadrilla_id', flat=True)
-    comparte_cuadrilla = bool(set(cuadras_mias) & set(cuadras_otro))
+    comparte_cuadrilla = bool(cuadras_mias & set(cuadras_otro))
 
     permitido = comparte_cuadrilla or request.user.is_staff or request.user.is_superuser
 
     # Permitir si el usuario es líder de una cuadrilla y el otro es miembro de esa cuadrilla
-    cuadrillas_lideradas = Cuadrilla.objects.filter(lider=request.user)
-    es_miembro = Asignacion.objects.filter(trabajador=other, cuadrilla__in=cuadrillas_lideradas).exists()
-    if not permitido and cuadrillas_lideradas.exists() and es_miembro:
-        permitido = True
+    cuadrillas_lideradas = acceso.cuadrillas_lideradas.keys()
+    if not permitido and cuadrillas_lideradas:
+        if Asignacion.objects.filter(trabajador=other, cuadrilla_id__in=cuadrillas_lideradas).exists():
+            permitido = True
 
     # Permitir si el otro es líder de una cuadrilla en la que el usuario es miembro
     if not permitido:
-        lider_de_mi_cuadrilla = Cuadrilla.objects.filter(lider=other, asignaciones__trabajador=request.user).exists()
+        lider_de_mi_cuadrilla = Cuadrilla.objects.filter(lider=other, id__in=cuadras_mias).exists()
         if lider_de_mi_cuadrilla:
             permitido = True
 
@@ -143,10 +159,8 @@ def miembros_cuadrilla(request):
 
     Muestra enlaces para iniciar conversación privada con cada miembro (si procede).
     """
-    # Obtener cuadrillas donde el usuario tiene asignación
-    cuad_ids = set(Asignacion.objects.filter(trabajador=request.user).values_list('cuadrilla_id', flat=True))
-    # Añadir cuadrillas donde el usuario es líder
-    cuad_ids |= set(Cuadrilla.objects.filter(lider=request.user).values_list('id', flat=True))
+    # Cuadrillas donde el usuario tiene asignación o es líder
+    cuad_ids = obtener_acceso(request.user).cuadrillas
 
     members = User.objects.none()
     if cuad_ids:
@@ -213,8 +227,7 @@ def solicitudes_list(request):
     cuadrillas = []
     if es_lider_cuadrilla(request.user):
         # Los líderes vienen definidos en el FK `Cuadrilla.lider`
-        from personal.models import Cuadrilla
-        cuadrillas = list(Cuadrilla.objects.filter(lider=request.user))
+        cuadrillas = list(obtener_acceso(request.user).cuadrillas_lideradas)
     elif es_jefe_proyecto(request.user):
         # Los jefes de proyecto ven todas las solicitudes
         from personal.models import Cuadrilla
@@ -258,8 +271,7 @@ def incidentes_list(request):
     # Obtener las cuadrillas donde el usuario es líder
     cuadrillas = []
     if es_lider_cuadrilla(request.user):
-        from personal.models import Cuadrilla
-        cuadrillas = list(Cuadrilla.objects.filter(lider=request.user))
+        cuadrillas = list(obtener_acceso(request.user).cuadrillas_lideradas)
     elif es_jefe_proyecto(request.user):
         # Los jefes de proyecto ven todos los incidentes
         from personal.models import Cuadrilla
@@ -271,61 +283,25 @@ def incidentes_list(request):
 
 
 @login_required
+@solo_lectura
 def archived_chats_list(request):
     """Lista de chats archivados accesibles para el usuario.
 
-    Reglas simples de permiso:
-    - Chats personales: accesibles si el usuario fue participante.
-    - Chats grupales: accesibles si el usuario fue participante o es líder/jefe
-      del proyecto/cuadrilla asociada.
+    El acceso se resuelve con el índice `ChatArchivado.participantes`
+    (participantes, autores de mensajes, quien archivó y líder de la
+    cuadrilla), aunque la conversación original ya no exista.
     """
-    from django.db.models import Q
-
-    qs = ChatArchivado.objects.filter(
-        Q(conversation__participants=request.user) |
-        Q(conversation__cuadrilla__lider=request.user) |
-        Q(archived_by=request.user)
-    ).distinct()
-
-    # Además: si la conversación original fue eliminada tras el archivado,
-    # `conversation` puede ser NULL y la búsqueda por relaciones fallará.
-    # En ese caso buscamos en los snapshots JSON aquellos archivos donde
-    # el usuario aparece en `participants_snapshot` (preferente) o como
-    # `sender_id` en los mensajes. Esto cubre casos donde la conversación
-    # fue borrada y aun así debe estar accesible para los participantes originales.
     import json
-    extra = []
-    null_convs = ChatArchivado.objects.filter(conversation__isnull=True)
-    for a in null_convs:
-        added = False
-        # Preferente: comprobar participants_snapshot
-        try:
-            parts = json.loads(a.participants_snapshot or '[]')
-            if isinstance(parts, (list, tuple)) and request.user.id in parts:
-                extra.append(a)
-                added = True
-        except Exception:
-            pass
-        if added:
-            continue
-        # Fallback: comprobar sender_id dentro de messages_snapshot
-        try:
-            msgs = json.loads(a.messages_snapshot or '[]')
-        except Exception:
-            msgs = []
-        sender_ids = {m.get('sender_id') for m in msgs if m.get('sender_id') is not None}
-        if request.user.id in sender_ids:
-            extra.append(a)
 
-    # Combinar queryset y lista de objetos extra (convertir queryset a lista)
-    archivos = list(qs) + extra
+    archivos = list(
+        ChatArchivado.objects.accesibles_para(request.user)
+        .select_related('conversation__cuadrilla', 'archived_by')
+        .prefetch_related('conversation__participants', 'participantes')
+    )
 
     # Preparar `display_name` para cada archivo: si la conversación existe,
     # usar su representación; si no, reconstruir a partir de
-    # `participants_snapshot` buscando los usuarios correspondientes.
-    import json
-    from django.contrib.auth.models import User
-
+    # `participants_snapshot` con los usuarios ya precargados del índice.
     for a in archivos:
         # Si hay conversación, la representación ya cubre nombres
         if getattr(a, 'conversation', None):
@@ -339,13 +315,14 @@ def archived_chats_list(request):
         a.display_name = None
         try:
             parts = json.loads(a.participants_snapshot or '[]')
-            if isinstance(parts, (list, tuple)) and parts:
-                users = User.objects.filter(id__in=parts)
-                names = [u.get_full_name() or u.username for u in users]
-                if names:
-                    a.display_name = ', '.join(names)
         except Exception:
-            a.display_name = None
+            parts = []
+        usuarios = {u.pk: u for u in a.participantes.all()}
+        if isinstance(parts, (list, tuple)):
+            users = [usuarios[uid] for uid in parts if uid in usuarios]
+            names = [u.get_full_name() or u.username for u in users]
+            if names:
+                a.display_name = ', '.join(names)
 
         if not a.display_name:
             # Fallback textual label
@@ -358,31 +335,9 @@ def archived_chats_list(request):
 def archived_chat_detail(request, archivo_id):
     archivo = get_object_or_404(ChatArchivado, pk=archivo_id)
 
-    # Permisos: permitir si el usuario participó en la conversación original,
-    # o si es líder de la cuadrilla asociada, o si fue quien archivó.
-    conv = archivo.conversation
-    allowed = False
-    if conv:
-        if conv.participants.filter(pk=request.user.pk).exists():
-            allowed = True
-        if conv.cuadrilla and conv.cuadrilla.lider_id == request.user.id:
-            allowed = True
-    if archivo.archived_by_id == request.user.id:
-        allowed = True
-    # Si no está permitido por relaciones directas, comprobar si el usuario
-    # aparece en el snapshot de mensajes (útil cuando la Conversation fue
-    # eliminada tras el archivado y no quedan relaciones). Esto permite que
-    # participantes originales sigan accediendo.
-    if not allowed:
-        try:
-            import json
-            msgs_tmp = json.loads(archivo.messages_snapshot or '[]')
-            sender_ids = {m.get('sender_id') for m in msgs_tmp if m.get('sender_id') is not None}
-            if request.user.id in sender_ids:
-                allowed = True
-        except Exception:
-            pass
-
+    # Permisos: participantes del chat original (incluidos los autores de
+    # mensajes), líder de la cuadrilla o quien archivó; ver `ChatArchivado.participantes`
+    allowed = archivo.participantes.filter(pk=request.user.pk).exists()
     if not allowed and not (request.user.is_staff or request.user.is_superuser):
         return redirect('comunicacion:conversations_list')
 
@@ -407,10 +362,10 @@ def marcar_incidente_visto(request, incidente_id):
     # Verificar permisos
     from personal.models import Asignacion
     tiene_permiso = False
-    if request.user.groups.filter(name='LiderCuadrilla').exists():
+    if es_lider_cuadrilla(request.user):
         if incidente.cuadrilla and incidente.cuadrilla.lider_id == request.user.id:
             tiene_permiso = True
-    elif request.user.groups.filter(name='JefeProyecto').exists():
+    elif es_jefe_proyecto(request.user):
         tiene_permiso = True
 
     if tiene_permiso:
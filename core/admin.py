@@ -1,3 +1,19 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import EstadisticasDashboard
+
+
+@admin.register(EstadisticasDashboard)
+class EstadisticasDashboardAdmin(admin.ModelAdmin):
+    """Solo lectura: los contadores se mantienen desde `core.utils_estadisticas`."""
+    list_display = (
+        'proyectos_activos', 'proyectos_finalizados', 'cuadrillas_con_proyecto',
+        'cuadrillas_sin_proyecto', 'trabajadores_total', 'trabajadores_asignados',
+        'trabajadores_disponibles', 'actualizado',
+    )
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from core.utils_sqlite import benchmark_concurrencia
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara el rendimiento de SQLite con y sin el perfil de producción "
+        "(WAL, synchronous=NORMAL, BEGIN IMMEDIATE, ...) bajo lecturas y "
+        "escrituras concurrentes, sobre una base temporal."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hilos', type=int, default=8, help='Conexiones concurrentes (por defecto 8)')
+        parser.add_argument('--segundos', type=float, default=3.0, help='Duración de cada medición (por defecto 3)')
+        parser.add_argument(
+            '--escrituras', type=float, default=0.2,
+            help='Fracción de transacciones de escritura (por defecto 0.2)',
+        )
+
+    def handle(self, *args, **options):
+        resultados = {}
+        for nombre, perfil in (('por defecto', False), ('perfil', True)):
+            r = benchmark_concurrencia(
+                hilos=options['hilos'], segundos=options['segundos'],
+                escrituras=options['escrituras'], perfil=perfil,
+            )
+            resultados[nombre] = r
+            self.stdout.write(
+                f"{nombre:>12}: {r['ops_por_segundo']:>9.1f} ops/s · "
+                f"{r['operaciones']} operaciones · {r['bloqueos']} 'database is locked'"
+            )
+        base = resultados['por defecto']['ops_por_segundo'] or 1
+        self.stdout.write(self.style.SUCCESS(
+            f"Mejora: x{resultados['perfil']['ops_por_segundo'] / base:.1f}"
+        ))
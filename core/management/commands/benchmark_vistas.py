@@ -0,0 +1,73 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.utils_benchmark import REPETICIONES, TAMANOS, comparar, ejecutar_benchmark
+
+
+def _tamanos(valor):
+    return [int(t) for t in valor.split(',') if t.strip()]
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide latencia (p50/p95), consultas, tiempo SQL y pico de memoria de las vistas "
+        "principales por rol, sobre datasets sintéticos de varios tamaños creados en "
+        "bases de prueba desechables."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tamanos', type=_tamanos, default=list(TAMANOS),
+            help=f"Trabajadores por dataset, separados por coma (por defecto {','.join(map(str, TAMANOS))})",
+        )
+        parser.add_argument(
+            '--repeticiones', type=int, default=REPETICIONES,
+            help=f'Peticiones cronometradas por vista (por defecto {REPETICIONES})',
+        )
+        parser.add_argument('--semilla', type=int, default=1, help='Semilla del generador de datos')
+        parser.add_argument('--salida', help='Archivo JSON donde guardar los resultados')
+        parser.add_argument('--comparar', help='Archivo JSON de una ejecución anterior (línea base)')
+        parser.add_argument(
+            '--tolerancia', type=float, default=0.25,
+            help='Aumento relativo permitido de latencia y memoria (por defecto 0.25)',
+        )
+
+    def handle(self, *args, **options):
+        base = None
+        if options['comparar']:
+            try:
+                with open(options['comparar'], encoding='utf-8') as archivo:
+                    base = json.load(archivo)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"No se pudo leer la línea base: {e}")
+
+        try:
+            resultado = ejecutar_benchmark(
+                tamanos=options['tamanos'],
+                repeticiones=options['repeticiones'],
+                semilla=options['semilla'],
+                progreso=self.stdout.write if options['verbosity'] > 1 else None,
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(f"{'tamaño':>7} {'rol':<10} {'vista':<34} {'p50':>8} {'p95':>8} {'SQL':>5} {'SQL ms':>8} {'KB':>8}")
+        for r in resultado['resultados']:
+            self.stdout.write(
+                f"{r['tamano']:>7} {r['rol']:<10} {r['vista']:<34} {r['p50_ms']:>8.1f} "
+                f"{r['p95_ms']:>8.1f} {r['consultas']:>5} {r['sql_ms']:>8.1f} {r['memoria_kb']:>8.0f}"
+            )
+
+        if options['salida']:
+            with open(options['salida'], 'w', encoding='utf-8') as archivo:
+                json.dump(resultado, archivo, ensure_ascii=False, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Resultados guardados en {options['salida']}"))
+
+        if base is not None:
+            regresiones = comparar(resultado, base, options['tolerancia'])
+            for texto in regresiones:
+                self.stderr.write(self.style.ERROR(texto))
+            if regresiones:
+                raise CommandError(f'Regresiones respecto de la línea base: {len(regresiones)}')
+            self.stdout.write(self.style.SUCCESS('Sin regresiones respecto de la línea base.'))
@@ -0,0 +1,54 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from core.utils_copia_bd import TAMANO_LOTE, CopiaError, copiar_base_datos, registrar_sqlite
+
+
+class Command(BaseCommand):
+    help = (
+        "Copia todos los datos de un archivo SQLite (p. ej. db.sqlite3) a la base configurada "
+        "(p. ej. PostgreSQL), por lotes y en una sola transacción. Reemplaza los datos del "
+        "destino, que debe estar migrado."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('origen', help='Ruta del archivo SQLite de origen')
+        parser.add_argument('--database', default='default', help='Alias de la base de destino (por defecto default)')
+        parser.add_argument('--lote', type=int, default=TAMANO_LOTE, help=f'Filas por lote (por defecto {TAMANO_LOTE})')
+        parser.add_argument(
+            '--reemplazar', action='store_true',
+            help='Permite copiar aunque el destino ya tenga usuarios (se borran)',
+        )
+
+    def handle(self, *args, **options):
+        if not os.path.isfile(options['origen']):
+            raise CommandError(f"No existe el archivo {options['origen']}.")
+        destino = options['database']
+        origen = registrar_sqlite(os.path.abspath(options['origen']))
+        if connections[destino].settings_dict['NAME'] == connections[origen].settings_dict['NAME']:
+            raise CommandError('El origen y el destino son la misma base de datos.')
+
+        from django.contrib.auth.models import User
+        if not options['reemplazar'] and User.objects.using(destino).exists():
+            raise CommandError(
+                f"La base '{destino}' ya tiene usuarios; use --reemplazar para borrar sus datos."
+            )
+
+        inicio = time.monotonic()
+        try:
+            copiadas = copiar_base_datos(
+                origen, destino, tamano_lote=options['lote'],
+                progreso=self.stdout.write if options['verbosity'] > 1 else None,
+            )
+        except CopiaError as e:
+            raise CommandError(str(e))
+        finally:
+            connections[origen].close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{sum(copiadas.values())} filas de {len(copiadas)} tablas copiadas a '{destino}' "
+            f"({connections[destino].vendor}) en {time.monotonic() - inicio:.1f} s"
+        ))
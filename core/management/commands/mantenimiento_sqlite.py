@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from core.utils_sqlite import mantenimiento
+
+
+class Command(BaseCommand):
+    help = (
+        "Mantenimiento periódico de la base SQLite: PRAGMA optimize (o ANALYZE completo) "
+        "y checkpoint del WAL. Pensado para ejecutarse desde cron (p. ej. cada hora)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default', help='Alias de la base (por defecto default)')
+        parser.add_argument('--analizar', action='store_true', help='ANALYZE completo en vez de PRAGMA optimize')
+        parser.add_argument('--sin-checkpoint', action='store_true', help='No traspasar ni truncar el WAL')
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if connection.vendor != 'sqlite':
+            raise CommandError(f"La base '{options['database']}' no es SQLite ({connection.vendor}).")
+
+        estado = mantenimiento(
+            connection, analizar=options['analizar'], checkpoint=not options['sin_checkpoint']
+        )
+        checkpoint = estado.get('checkpoint')
+        if checkpoint and checkpoint['bloqueado']:
+            self.stderr.write(self.style.WARNING('Checkpoint incompleto: había lectores activos.'))
+        self.stdout.write(self.style.SUCCESS(
+            f"Journal: {estado['journal_mode']} · Tamaño: {estado['tamano_mb']} MB · "
+            f"Páginas libres: {estado['freelist_count']}"
+            + (f" · Páginas WAL traspasadas: {checkpoint['traspasadas']}" if checkpoint else '')
+        ))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from core.utils_estadisticas import reconstruir_estadisticas
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula desde cero los contadores del dashboard (p. ej. tras cambios "
+        "masivos hechos fuera de la aplicación)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=None, help='Alias de la base (por defecto, la de escritura)')
+
+    def handle(self, *args, **options):
+        e = reconstruir_estadisticas(using=options['database'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Proyectos: {e.proyectos_activos} activos, {e.proyectos_finalizados} finalizados · "
+            f"Cuadrillas: {e.cuadrillas_con_proyecto} con proyecto, {e.cuadrillas_sin_proyecto} sin proyecto · "
+            f"Trabajadores: {e.trabajadores_total} ({e.trabajadores_asignados} asignados, "
+            f"{e.trabajadores_disponibles} disponibles)"
+        ))
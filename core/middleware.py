@@ -0,0 +1,75 @@
+import json
+import random
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from .utils_instrumentacion import (
+    MUESTREO, UMBRAL_MS, MedicionPeticion, agregado, instrumentar_plantillas, logger,
+)
+from .utils_replicas import COOKIE, FIJAR_SEGUNDOS, contexto_peticion, replicas
+
+
+class InstrumentacionMiddleware:
+    """
+    Middleware que mide cada petición (consultas SQL, tiempo SQL, plantillas y
+    total; ver `core.utils_instrumentacion`) y agrega la cabecera
+    `Server-Timing`. Las peticiones que superan `CORE_INSTRUMENTACION_UMBRAL_MS`
+    se registran en el log con sus consultas más lentas, y una fracción
+    `CORE_INSTRUMENTACION_MUESTREO` alimenta el agregado por endpoint.
+    Si `CORE_INSTRUMENTACION` está desactivado Django lo quita de la cadena.
+    Debe ir primero en MIDDLEWARE para medir también al resto.
+    """
+    def __init__(self, get_response):
+        if not getattr(settings, 'CORE_INSTRUMENTACION', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.umbral_ms = getattr(settings, 'CORE_INSTRUMENTACION_UMBRAL_MS', UMBRAL_MS)
+        self.muestreo = getattr(settings, 'CORE_INSTRUMENTACION_MUESTREO', MUESTREO)
+        instrumentar_plantillas()
+
+    def __call__(self, request):
+        with MedicionPeticion() as medicion:
+            response = self.get_response(request)
+
+        response['Server-Timing'] = medicion.server_timing()
+
+        match = request.resolver_match
+        endpoint = (match.view_name if match else None) or request.path
+        if medicion.total_ms >= self.umbral_ms:
+            logger.warning(json.dumps({
+                'evento': 'peticion_lenta',
+                'metodo': request.method,
+                'ruta': request.path,
+                'endpoint': endpoint,
+                'estado': response.status_code,
+                'usuario': getattr(getattr(request, 'user', None), 'pk', None),
+                **medicion.como_dict(),
+            }, ensure_ascii=False))
+        if self.muestreo and random.random() < self.muestreo:
+            agregado.registrar(endpoint, medicion)
+        return response
+
+
+class ReplicasMiddleware:
+    """
+    Estado de réplicas por petición (ver `core.utils_replicas`). Si la petición
+    escribe, deja la cookie `fijar_primaria` para que las siguientes del mismo
+    navegador lean de la primaria durante `CORE_REPLICAS_FIJAR_SEGUNDOS`.
+    Debe ir antes de SessionMiddleware para ver también el guardado de la
+    sesión. Sin `CORE_REPLICAS` Django lo quita de la cadena.
+    """
+    def __init__(self, get_response):
+        if not replicas():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.fijar_segundos = getattr(settings, 'CORE_REPLICAS_FIJAR_SEGUNDOS', FIJAR_SEGUNDOS)
+
+    def __call__(self, request):
+        with contexto_peticion(fijada=COOKIE in request.COOKIES) as contexto:
+            response = self.get_response(request)
+        if contexto.escribio:
+            response.set_cookie(
+                COOKIE, '1', max_age=self.fijar_segundos, httponly=True, samesite='Lax',
+            )
+        return response
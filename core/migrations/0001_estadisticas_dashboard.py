@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-17 03:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EstadisticasDashboard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('proyectos_activos', models.PositiveIntegerField(default=0)),
+                ('proyectos_finalizados', models.PositiveIntegerField(default=0)),
+                ('cuadrillas_con_proyecto', models.PositiveIntegerField(default=0)),
+                ('cuadrillas_sin_proyecto', models.PositiveIntegerField(default=0)),
+                ('trabajadores_total', models.PositiveIntegerField(default=0)),
+                ('trabajadores_asignados', models.PositiveIntegerField(default=0)),
+                ('trabajadores_disponibles', models.PositiveIntegerField(default=0)),
+                ('actualizado', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Estadísticas del dashboard',
+                'verbose_name_plural': 'Estadísticas del dashboard',
+            },
+        ),
+    ]
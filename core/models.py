@@ -1,3 +1,26 @@
 from django.db import models
 
-# Create your models here.
+
+class EstadisticasDashboard(models.Model):
+    """Contadores del dashboard en una única fila (pk=1).
+
+    Se mantienen al día por grupos (proyectos, cuadrillas, trabajadores) desde
+    las señales; ver `core.utils_estadisticas`. El dashboard los lee con una
+    sola consulta por clave primaria en vez de contar en cada carga.
+    """
+    proyectos_activos = models.PositiveIntegerField(default=0)
+    proyectos_finalizados = models.PositiveIntegerField(default=0)
+    cuadrillas_con_proyecto = models.PositiveIntegerField(default=0)
+    cuadrillas_sin_proyecto = models.PositiveIntegerField(default=0)
+    # Trabajadores activos de tipo 'trabajador'
+    trabajadores_total = models.PositiveIntegerField(default=0)
+    trabajadores_asignados = models.PositiveIntegerField(default=0)
+    trabajadores_disponibles = models.PositiveIntegerField(default=0)
+    actualizado = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Estadísticas del dashboard'
+        verbose_name_plural = 'Estadísticas del dashboard'
+
+    def __str__(self):
+        return f"Estadísticas del dashboard @ {self.actualizado}"
@@ -0,0 +1,36 @@
+from django.db import DEFAULT_DB_ALIAS
+
+from .utils_replicas import elegir_replica, leer_de_replica, marcar_escritura, replicas
+
+
+class RouterReplicas:
+    """
+    Envía a una réplica las lecturas de las vistas de solo lectura y las
+    escrituras siempre a la primaria (ver `core.utils_replicas`).
+    Sin `CORE_REPLICAS` no cambia nada.
+    """
+
+    def db_for_read(self, model, **hints):
+        if leer_de_replica():
+            return elegir_replica()
+        return None
+
+    def db_for_write(self, model, **hints):
+        marcar_escritura()
+        # Un objeto leído de una réplica se guarda en la primaria
+        instancia = hints.get('instance')
+        if instancia is not None and instancia._state.db in replicas():
+            return DEFAULT_DB_ALIAS
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        bases = {DEFAULT_DB_ALIAS, *replicas()}
+        if obj1._state.db in bases and obj2._state.db in bases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Las réplicas reciben el esquema por replicación
+        if db in replicas():
+            return False
+        return None
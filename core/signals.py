@@ -0,0 +1,10 @@
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from .utils_sqlite import aplicar_perfil
+
+
+@receiver(connection_created)
+def perfil_sqlite(sender, connection, **kwargs):
+    """PRAGMAs de rendimiento en cada conexión SQLite nueva (ver `core.utils_sqlite`)."""
+    aplicar_perfil(connection)
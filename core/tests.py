@@ -1,3 +1,764 @@
-from django.test import TestCase
+import io
+import json
+import os
+import re
+import shutil
+import tempfile
+from collections import Counter
+from unittest import skipUnless
 
-# Create your tests here.
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import OperationalError, connection, connections, transaction
+from django.db.models import Max
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from comunicacion.models import (
+    ChatArchivado, Conversation, IncidentNotice, Message, WorkerRequest, archive_conversation,
+)
+from personal.utils_notificaciones import crear_notificacion
+from personal.models import (
+    Asignacion, CertificacionTrabajador, CompetenciaTrabajador, Cuadrilla, Notificacion, Rol,
+    Trabajador,
+)
+from proyectos.models import Proyecto
+from .models import EstadisticasDashboard
+from .routers import RouterReplicas
+from .context_processors import archivos_archivados_count, notificaciones_no_leidas
+from .utils_contadores import CONTADOR_NOTIFICACIONES, obtener_contador
+from .utils_copia_bd import CopiaError, copiar_base_datos, registrar_sqlite
+from .utils_estadisticas import actualizar_estadisticas, obtener_estadisticas, reconstruir_estadisticas
+from .utils_benchmark import VISTAS, comparar, medir_escenario, preparar_escenario
+from .utils_instrumentacion import AgregadoEndpoints, MedicionPeticion, huella_sql
+from .utils_replicas import COOKIE, estado_replicas, lectura_replica
+from .utils_sqlite import benchmark_concurrencia, reintentar_si_bloqueada
+
+
+FAST_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+
+# Backends cuyo EXPLAIN nombra los índices usados
+# ("USING INDEX x" en SQLite, "Index Scan using x" en PostgreSQL)
+EXPLAIN_CON_INDICES = ('sqlite', 'postgresql')
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS)
+class PlanesConsultaTest(TestCase):
+    """
+    Verifica con EXPLAIN que las vistas usan los índices compuestos de
+    `Meta.indexes`.
+
+    Cada caso hace la petición real como el rol indicado, captura sus
+    consultas con CaptureQueriesContext, ejecuta EXPLAIN sobre las que leen la
+    tabla del caso y exige que alguna use el índice esperado. Si se elimina
+    el índice o la vista cambia el filtro, el test falla mostrando los planes.
+    """
+
+    # (rol, método, nombre de URL, tabla, índice esperado)
+    CASOS = [
+        ('trabajador', 'get', 'comunicacion:conversation_detail', 'comunicacion_message', 'msg_conv_fecha_idx'),
+        ('trabajador', 'get', 'comunicacion:conversations_list', 'personal_asignacion', 'asig_trab_cuadrilla_idx'),
+        ('trabajador', 'get', 'proyectos:panel', 'personal_notificacion', 'notif_user_leida_fecha_idx'),
+        ('lider', 'get', 'proyectos:panel', 'personal_cuadrilla', 'cuadrilla_lider_proy_idx'),
+        ('lider', 'get', 'comunicacion:solicitudes_list', 'comunicacion_workerrequest', 'solicitud_cuadrilla_fecha_idx'),
+        ('lider', 'get', 'comunicacion:incidentes_list', 'comunicacion_incidentnotice', 'incidente_cuadrilla_fecha_idx'),
+        ('lider', 'get', 'personal:detalle_trabajador', 'personal_certificaciontrabajador', 'cert_trab_trab_exp_idx'),
+        ('jefe', 'get', 'personal:api_trabajadores', 'personal_trabajador', 'trab_activo_tipo_estado_idx'),
+        # Sincronización del canal de la cuadrilla al agregar un miembro
+        ('jefe', 'post', 'personal:editar_cuadrilla', 'comunicacion_conversation', 'conv_canal_cuadrilla_idx'),
+    ]
+
+    def setUp(self):
+        self.secuencia = 0
+        self.jefe = self._trabajador(tipo_trabajador='jefe')
+        self.lider = self._trabajador(tipo_trabajador='lider')
+        self.trabajador = self._trabajador()
+        self.libre = self._trabajador()
+
+        self.proyecto = Proyecto.objects.create(
+            nombre='P1', fecha_inicio=timezone.localdate(), jefe=self.jefe.user
+        )
+        self.cuadrilla = Cuadrilla.objects.create(nombre='C1', proyecto=self.proyecto, lider=self.lider.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            Asignacion.objects.create(trabajador=self.trabajador.user, cuadrilla=self.cuadrilla)
+        self.grupo = Conversation.objects.get(cuadrilla=self.cuadrilla, is_group=True)
+        Message.objects.create(conversation=self.grupo, sender=self.trabajador.user, content='Hola')
+        Notificacion.objects.create(user=self.trabajador.user, mensaje='Aviso')
+        WorkerRequest.objects.create(trabajador=self.trabajador.user, cuadrilla=self.cuadrilla, asunto='Permiso')
+        IncidentNotice.objects.create(cuadrilla=self.cuadrilla, reporter=self.trabajador.user, descripcion='Caída')
+        CertificacionTrabajador.objects.create(
+            trabajador=self.trabajador, nombre='Altura', fecha_emision=timezone.localdate()
+        )
+
+    def _trabajador(self, **extra):
+        self.secuencia += 1
+        rut = f'{50000000 + self.secuencia}{self.secuencia}'
+        trabajador = Trabajador.objects.create(
+            rut=rut, nombre=f'N{self.secuencia}', apellido='Plan', email=f'{rut}@example.com', **extra,
+        )
+        Trabajador.objects.filter(pk=trabajador.pk).update(password_inicial=False)
+        trabajador.refresh_from_db()
+        # Segundo save: `sincronizar_usuario` asigna el grupo según el tipo
+        trabajador.save()
+        return trabajador
+
+    def _peticion(self, metodo, nombre):
+        """Hace la petición del caso y devuelve el SQL ejecutado."""
+        if nombre == 'comunicacion:conversation_detail':
+            url = reverse(nombre, args=[self.grupo.pk])
+        elif nombre == 'personal:detalle_trabajador':
+            url = reverse(nombre, args=[self.trabajador.pk])
+        elif nombre == 'personal:editar_cuadrilla':
+            url = reverse(nombre, args=[self.cuadrilla.pk])
+        else:
+            url = reverse(nombre)
+        datos = {}
+        if nombre == 'personal:editar_cuadrilla':
+            datos = {
+                'nombre': 'C1', 'proyecto': str(self.proyecto.pk),
+                'trabajadores': [str(self.trabajador.user_id), str(self.libre.user_id)],
+            }
+        # Sin caché: los contadores de la cabecera consultan la base
+        cache.clear()
+        with CaptureQueriesContext(connection) as capturadas, \
+                self.captureOnCommitCallbacks(execute=True):
+            respuesta = getattr(self.client, metodo)(url, datos)
+        self.assertLess(respuesta.status_code, 400, f'{metodo.upper()} {url}')
+        return [q['sql'] for q in capturadas.captured_queries]
+
+    def _plan(self, sql):
+        with transaction.atomic(), connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                # Con tablas de prueba tan pequeñas el planificador prefiere
+                # el recorrido secuencial, o un bitmap sobre cualquier índice
+                # seguido de un Sort, aunque exista el índice que da el orden
+                cursor.execute('SET LOCAL enable_seqscan = off')
+                cursor.execute('SET LOCAL enable_bitmapscan = off')
+            cursor.execute(f'{connection.ops.explain_query_prefix()} {sql}')
+            return '\n'.join(str(fila[-1]) for fila in cursor.fetchall())
+
+    def test_vistas_usan_indices(self):
+        if connection.vendor not in EXPLAIN_CON_INDICES:
+            self.skipTest(f'Sin verificación de planes para {connection.vendor}')
+        usuarios = {'jefe': self.jefe.user, 'lider': self.lider.user, 'trabajador': self.trabajador.user}
+
+        for rol, metodo, nombre, tabla, indice in self.CASOS:
+            with self.subTest(rol=rol, vista=nombre, indice=indice):
+                self.client.force_login(usuarios[rol])
+                lee_tabla = re.compile(rf'\b(?:FROM|JOIN) "{tabla}"')
+                consultas = [
+                    sql for sql in self._peticion(metodo, nombre)
+                    if sql.lstrip().startswith('SELECT') and lee_tabla.search(sql)
+                ]
+                self.assertTrue(consultas, f'{nombre} no consultó {tabla}')
+                planes = [self._plan(sql) for sql in consultas]
+                self.assertTrue(
+                    any(re.search(rf'\b{indice}\b', plan) for plan in planes),
+                    f'{nombre}: ninguna consulta a {tabla} usa {indice}\n\n'
+                    + '\n\n'.join(f'{sql}\n{plan}' for sql, plan in zip(consultas, planes)),
+                )
+
+
+# ===================================================================
+# PRESUPUESTO DE CONSULTAS POR VISTA
+# ===================================================================
+
+# Máximo de consultas por petición (sesión, usuario, permisos, context
+# processors y la propia vista). Lo importante es que no crezca con los datos.
+PRESUPUESTO_CONSULTAS = 25
+
+# Vistas que se omiten en GET porque modifican datos aunque no sea POST
+OMITIR_GET = {'personal:disolver_cuadrilla'}
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS)
+class PresupuestoConsultasTest(TestCase):
+    """
+    Recorre las URLs de personal, proyectos, comunicacion y core como jefe,
+    líder y trabajador, con los datos a dos escalas, y verifica que el número
+    de consultas no crezca con el volumen ni supere PRESUPUESTO_CONSULTAS.
+
+    Si una vista falla, el mensaje indica el rol, la URL y los patrones de
+    SQL cuya cantidad aumentó (típicamente una consulta dentro de un bucle).
+    """
+
+    ESCALA_INICIAL = 2
+    ESCALA_AMPLIADA = 6
+
+    def setUp(self):
+        for nombre in ('Trabajador', 'LiderCuadrilla', 'JefeProyecto'):
+            Group.objects.get_or_create(name=nombre)
+        self.secuencia = 0
+        self.rol = Rol.objects.create(nombre='Operario')
+
+        self.jefe = self._trabajador(tipo_trabajador='jefe').user
+        self.lider = self._trabajador(tipo_trabajador='lider').user
+        self.trabajador = self._trabajador()
+
+        self.proyecto = self._proyecto()
+        self.cuadrilla = Cuadrilla.objects.create(nombre='Base', proyecto=self.proyecto, lider=self.lider)
+        self._asignar(self.trabajador.user, self.cuadrilla)
+        self._asignar(self._trabajador().user, self.cuadrilla)
+        self.grupo = Conversation.objects.get(cuadrilla=self.cuadrilla, is_group=True)
+        self.solicitud = WorkerRequest.objects.create(
+            trabajador=self.trabajador.user, cuadrilla=self.cuadrilla, asunto='Permiso'
+        )
+        self.incidente = IncidentNotice.objects.create(
+            cuadrilla=self.cuadrilla, reporter=self.trabajador.user, descripcion='Caída'
+        )
+        # Conversaciones privadas existentes: crear_privada solo las busca
+        for a, b in ((self.trabajador.user, self.lider), (self.jefe, self.lider)):
+            Conversation.objects.create(is_group=False).participants.add(a, b)
+        self.archivo = self._archivar()
+        self.escala = 0
+
+    # ---------------------------------------------------------------
+    # Datos
+    # ---------------------------------------------------------------
+    def _trabajador(self, **extra):
+        self.secuencia += 1
+        rut = f'{40000000 + self.secuencia}{self.secuencia % 10}'
+        trabajador = Trabajador.objects.create(
+            rut=rut, nombre=f'N{self.secuencia}', apellido='Prueba',
+            email=f'{rut}@example.com', **extra,
+        )
+        Trabajador.objects.filter(pk=trabajador.pk).update(password_inicial=False)
+        trabajador.refresh_from_db()
+        # Segundo save: `sincronizar_usuario` asigna el grupo según el tipo
+        trabajador.save()
+        CompetenciaTrabajador.objects.create(trabajador=trabajador, nombre='Soldadura', nivel='medio')
+        CertificacionTrabajador.objects.create(
+            trabajador=trabajador, nombre='Altura', fecha_emision=timezone.localdate()
+        )
+        return trabajador
+
+    def _proyecto(self, activo=True):
+        self.secuencia += 1
+        return Proyecto.objects.create(
+            nombre=f'P{self.secuencia}', fecha_inicio=timezone.localdate(),
+            jefe=self.jefe, created_by=self.jefe, activo=activo,
+        )
+
+    def _asignar(self, user, cuadrilla):
+        with self.captureOnCommitCallbacks(execute=True):
+            Asignacion.objects.create(trabajador=user, cuadrilla=cuadrilla, rol=self.rol)
+
+    def _archivar(self, borrar=False):
+        conversacion = Conversation.objects.create(is_group=False)
+        conversacion.participants.add(self.trabajador.user, self.lider)
+        for user in (self.lider, self.trabajador.user):
+            Message.objects.create(conversation=conversacion, sender=user, content='Hola')
+        archivo = archive_conversation(conversacion, archived_by=self.lider, reason='Prueba')
+        if borrar:
+            # El archivo queda solo con los snapshots
+            conversacion.delete()
+        return archivo
+
+    def ampliar(self, escala):
+        """Agrega unidades de datos hasta llegar a `escala` (por rol)."""
+        while self.escala < escala:
+            self.escala += 1
+            # Jefe: un proyecto activo y uno finalizado con cuadrillas
+            for activo in (True, False):
+                proyecto = self._proyecto(activo=activo)
+                cuadrilla = Cuadrilla.objects.create(
+                    nombre=f'C{self.secuencia}', proyecto=proyecto, lider=self.lider
+                )
+                for _ in range(2):
+                    self._asignar(self._trabajador().user, cuadrilla)
+            # Líder: una cuadrilla sin proyecto
+            Cuadrilla.objects.create(nombre=f'L{self.secuencia}', lider=self.lider)
+            # Trabajador: un compañero más en su cuadrilla
+            self._asignar(self._trabajador().user, self.cuadrilla)
+            # Uno sin cuadrilla: candidatos en las vistas de asignación
+            self._trabajador()
+
+            for user in (self.jefe, self.lider, self.trabajador.user):
+                Notificacion.objects.create(user=user, mensaje='Aviso')
+            Message.objects.create(conversation=self.grupo, sender=self.trabajador.user, content='Hola')
+            WorkerRequest.objects.create(
+                trabajador=self.trabajador.user, cuadrilla=self.cuadrilla, asunto='Permiso'
+            )
+            IncidentNotice.objects.create(
+                cuadrilla=self.cuadrilla, reporter=self.trabajador.user, descripcion='Caída'
+            )
+            self._archivar()
+            self._archivar(borrar=True)
+
+    # ---------------------------------------------------------------
+    # Medición
+    # ---------------------------------------------------------------
+    def urls(self):
+        """(nombre, args) de cada URL a recorrer."""
+        return [
+            ('inicio', []),
+            ('dashboard', []),
+            ('personal:crear_cuadrilla', []),
+            ('personal:detalle_cuadrilla', [self.cuadrilla.pk]),
+            ('personal:editar_cuadrilla', [self.cuadrilla.pk]),
+            ('personal:editar_estado_trabajador', [self.trabajador.pk]),
+            ('personal:detalle_trabajador', [self.trabajador.pk]),
+            ('personal:mover_trabajador', []),
+            ('personal:quitar_trabajador', []),
+            ('personal:disolver_cuadrilla', [self.cuadrilla.pk]),
+            ('personal:api_trabajadores', []),
+            ('personal:api_recomendaciones', []),
+            ('personal:exportar_datos', ['proyectos']),
+            ('personal:mi_cuadrilla', []),
+            ('personal:mis_notificaciones', []),
+            ('personal:notifs_leidas', []),
+            ('proyectos:panel', []),
+            ('proyectos:nuevo', []),
+            ('proyectos:asignar_cuadrillas', [self.proyecto.pk]),
+            ('proyectos:editar', [self.proyecto.pk]),
+            ('proyectos:finalizar', [self.proyecto.pk]),
+            ('comunicacion:conversations_list', []),
+            ('comunicacion:conversation_detail', [self.grupo.pk]),
+            ('comunicacion:crear_privada', [self.lider.pk]),
+            ('comunicacion:miembros_cuadrilla', []),
+            ('comunicacion:enviar_solicitud', []),
+            ('comunicacion:reportar_incidente', []),
+            ('comunicacion:solicitudes_list', []),
+            ('comunicacion:actualizar_solicitud', [self.solicitud.pk]),
+            ('comunicacion:incidentes_list', []),
+            ('comunicacion:marcar_incidente_visto', [self.incidente.pk]),
+            ('comunicacion:archived_list', []),
+            ('comunicacion:archived_detail', [self.archivo.pk]),
+        ]
+
+    def medir(self):
+        """{(rol, nombre): [sql, ...]} de una pasada por todas las URLs."""
+        roles = {'jefe': self.jefe, 'lider': self.lider, 'trabajador': self.trabajador.user}
+        resultado = {}
+        for rol, user in roles.items():
+            self.client.force_login(user)
+            for nombre, args in self.urls():
+                if nombre in OMITIR_GET:
+                    continue
+                url = reverse(nombre, args=args)
+                with CaptureQueriesContext(connection) as capturadas:
+                    respuesta = self.client.get(url)
+                    if respuesta.streaming:
+                        b''.join(respuesta.streaming_content)
+                self.assertLess(respuesta.status_code, 500, f'{rol} {url}')
+                resultado[rol, nombre] = [q['sql'] for q in capturadas.captured_queries]
+        return resultado
+
+    def test_consultas_no_crecen_con_los_datos(self):
+        self.ampliar(self.ESCALA_INICIAL)
+        inicial = self.medir()
+        self.ampliar(self.ESCALA_AMPLIADA)
+        ampliada = self.medir()
+
+        errores = []
+        for (rol, nombre), consultas in ampliada.items():
+            antes = inicial[rol, nombre]
+            if len(consultas) <= len(antes) and len(consultas) <= PRESUPUESTO_CONSULTAS:
+                continue
+            crecieron = Counter(map(huella_sql, consultas))
+            crecieron.subtract(Counter(map(huella_sql, antes)))
+            detalle = '\n'.join(
+                f'      +{n} x {patron[:200]}' for patron, n in crecieron.most_common() if n > 0
+            )
+            errores.append(
+                f'{rol} {nombre}: {len(antes)} -> {len(consultas)} consultas '
+                f'(presupuesto {PRESUPUESTO_CONSULTAS})\n{detalle}'
+            )
+        if errores:
+            self.fail('Vistas fuera de presupuesto:\n' + '\n'.join(errores))
+
+
+class BenchmarkVistasTest(TestCase):
+    """Tests del benchmark de latencia de vistas."""
+
+    def test_mide_todas_las_vistas_por_rol(self):
+        escenario = preparar_escenario(60)
+        resultados = medir_escenario(escenario, repeticiones=2)
+
+        self.assertEqual(len(resultados), 3 * len(VISTAS))
+        for r in resultados:
+            self.assertLess(r['estado'], 500, f"{r['rol']} {r['vista']}")
+            self.assertGreater(r['consultas'], 0)
+            self.assertLessEqual(r['p50_ms'], r['p95_ms'])
+
+        actual = {'resultados': resultados}
+        self.assertEqual(comparar(actual, actual), [])
+
+        peor = {'resultados': [dict(r) for r in resultados]}
+        peor['resultados'][0]['consultas'] += 1
+        peor['resultados'][1]['p95_ms'] = peor['resultados'][1]['p95_ms'] * 2 + 10
+        regresiones = comparar(peor, actual)
+        self.assertEqual(len(regresiones), 2)
+        self.assertIn('consultas', regresiones[0])
+        self.assertIn('p95', regresiones[1])
+
+    def test_dataset_sin_cuadrilla_medible(self):
+        # Con 5 trabajadores (1 jefe, 3 líderes) las cuadrillas quedan sin miembros
+        with self.assertRaisesMessage(ValueError, 'no tiene una cuadrilla'):
+            preparar_escenario(5)
+
+
+class BaseSqliteAuxiliar:
+    """
+    Registra, durante los tests de la clase, una base SQLite temporal y
+    migrada con el alias `alias_auxiliar`. Se registra al preparar la clase:
+    el runner no la conoce (no crea una base de prueba para ella) y se
+    migra fuera de las transacciones de los tests.
+    """
+    alias_auxiliar = 'auxiliar_test'
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directorio = tempfile.mkdtemp()
+        registrar_sqlite(os.path.join(cls.directorio, 'auxiliar.sqlite3'), alias=cls.alias_auxiliar)
+        call_command('migrate', database=cls.alias_auxiliar, verbosity=0)
+        cls._databases_originales = cls.databases
+        cls.databases = {*cls.databases, cls.alias_auxiliar}
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections[cls.alias_auxiliar].close()
+        del connections[cls.alias_auxiliar]
+        del connections.settings[cls.alias_auxiliar]
+        cls.databases = cls._databases_originales
+        shutil.rmtree(cls.directorio)
+
+
+class CopiaBaseDatosTest(BaseSqliteAuxiliar, TestCase):
+    """Copia de una base completa a otra (aquí, a un archivo SQLite temporal)."""
+
+    alias_auxiliar = destino = 'copia_test'
+
+    def test_copia_filas_ids_y_fechas(self):
+        preparar_escenario(40)
+        copiadas = copiar_base_datos('default', self.destino, tamano_lote=50)
+
+        self.assertEqual(copiadas['comunicacion.Message'], Message.objects.count())
+        self.assertEqual(copiadas['auth.User'], User.objects.count())
+        self.assertGreater(copiadas['comunicacion.Conversation_participants'], 0)
+        ultimo = Message.objects.order_by('-id').first()
+        copia = Message.objects.using(self.destino).get(pk=ultimo.pk)
+        self.assertEqual((copia.content, copia.created_at), (ultimo.content, ultimo.created_at))
+        # Las secuencias siguen a los IDs copiados
+        self.assertGreater(Group.objects.using(self.destino).create(name='nuevo').pk,
+                           Group.objects.aggregate(m=Max('pk'))['m'])
+
+    def test_exige_destino_migrado(self):
+        with connections[self.destino].cursor() as cursor:
+            cursor.execute("DELETE FROM django_migrations WHERE app = 'comunicacion'")
+        with self.assertRaisesMessage(CopiaError, 'Faltan'):
+            copiar_base_datos('default', self.destino)
+
+
+@override_settings(CORE_REPLICAS=['replica_test'], CORE_REPLICAS_RETRASO_MAXIMO=5)
+class ReplicasTest(BaseSqliteAuxiliar, TransactionTestCase):
+    """
+    Router de réplicas con una "réplica" SQLite separada que no recibe los
+    datos de la primaria: lo que lee cada vista delata de qué base leyó.
+    TransactionTestCase porque dentro de una transacción se lee de la primaria.
+    """
+
+    alias_auxiliar = 'replica_test'
+
+    def setUp(self):
+        estado_replicas.reiniciar()
+        self.addCleanup(estado_replicas.reiniciar)
+        self.jefe = User.objects.create_user(username='jefe_replicas', password='clave-segura-1')
+        Group.objects.get_or_create(name='JefeProyecto')[0].user_set.add(self.jefe)
+        Proyecto.objects.create(
+            nombre='Primaria', fecha_inicio=timezone.localdate(), jefe=self.jefe, created_by=self.jefe,
+        )
+        # La réplica tiene sus propios contadores (vacíos)
+        reconstruir_estadisticas(using='replica_test')
+
+    def proyectos_en_dashboard(self):
+        return self.client.get(reverse('dashboard')).context['proyectos_activos']
+
+    def test_router(self):
+        self.assertEqual(Proyecto.objects.all().db, 'default')
+        with lectura_replica():
+            self.assertEqual(Proyecto.objects.all().db, 'replica_test')
+            with transaction.atomic():
+                self.assertEqual(Proyecto.objects.all().db, 'default')
+            Proyecto.objects.create(
+                nombre='Escrito', fecha_inicio=timezone.localdate(), jefe=self.jefe, created_by=self.jefe,
+            )
+            # Tras escribir, el resto del bloque lee de la primaria
+            self.assertEqual(Proyecto.objects.count(), 2)
+        self.assertEqual(Proyecto.objects.using('replica_test').count(), 0)
+        self.assertFalse(RouterReplicas().allow_migrate('replica_test', 'proyectos'))
+
+    def test_vista_de_solo_lectura_usa_la_replica(self):
+        self.client.force_login(self.jefe)
+        self.assertEqual(self.proyectos_en_dashboard(), 0)
+
+    def test_fija_la_primaria_tras_escribir(self):
+        respuesta = self.client.post(reverse('usuarios:login'), {
+            'username': 'jefe_replicas', 'password': 'clave-segura-1',
+        })
+        self.assertIn(COOKIE, respuesta.cookies)
+        self.assertEqual(self.proyectos_en_dashboard(), 1)
+
+        del self.client.cookies[COOKIE]
+        self.assertEqual(self.proyectos_en_dashboard(), 0)
+
+    def test_replica_atrasada_usa_la_primaria(self):
+        self.client.force_login(self.jefe)
+        estado_replicas.registrar('replica_test', 60)
+        self.assertEqual(self.proyectos_en_dashboard(), 1)
+
+    def test_contadores_cacheados_se_cuentan_en_la_primaria(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        crear_notificacion(self.jefe, 'Aviso')
+        with lectura_replica():
+            self.assertEqual(obtener_contador(CONTADOR_NOTIFICACIONES, self.jefe), 1)
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS)
+class EstadisticasDashboardTest(TestCase):
+    """Contadores materializados del dashboard."""
+
+    def setUp(self):
+        Group.objects.get_or_create(name='JefeProyecto')
+        self.jefe = User.objects.create_user(username='jefe_estadisticas', password='x')
+        Group.objects.get(name='JefeProyecto').user_set.add(self.jefe)
+
+    def _trabajador(self, rut, **extra):
+        return Trabajador.objects.create(
+            rut=rut, nombre='N', apellido='Prueba', tipo_trabajador='trabajador', **extra
+        )
+
+    def _contadores(self):
+        e = EstadisticasDashboard.objects.get()
+        return (
+            e.proyectos_activos, e.proyectos_finalizados, e.cuadrillas_con_proyecto,
+            e.cuadrillas_sin_proyecto, e.trabajadores_total, e.trabajadores_asignados,
+            e.trabajadores_disponibles,
+        )
+
+    def test_actualizacion_incremental(self):
+        reconstruir_estadisticas()
+        self.assertEqual(self._contadores(), (0, 0, 0, 0, 0, 0, 0))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            proyecto = Proyecto.objects.create(
+                nombre='P', fecha_inicio=timezone.localdate(), jefe=self.jefe, created_by=self.jefe,
+            )
+            cuadrilla = Cuadrilla.objects.create(nombre='C', proyecto=proyecto)
+            Cuadrilla.objects.create(nombre='Libre')
+            asignado = self._trabajador('11111111-1')
+            self._trabajador('22222222-2')
+            self._trabajador('33333333-3', estado='licencia')
+            asignado.refresh_from_db()
+            Asignacion.objects.create(cuadrilla=cuadrilla, trabajador=asignado.user)
+        self.assertEqual(self._contadores(), (1, 0, 1, 1, 3, 1, 1))
+
+        # Finalizar el proyecto: libera la cuadrilla con update() (sin señales)
+        self.client.force_login(self.jefe)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('proyectos:finalizar', args=[proyecto.pk]))
+        self.assertEqual(self._contadores(), (0, 1, 0, 2, 3, 0, 2))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            asignado.delete()
+        self.assertEqual(self._contadores()[4:], (2, 0, 1))
+
+    def test_dashboard_lee_una_fila(self):
+        self.client.force_login(self.jefe)
+        Proyecto.objects.create(
+            nombre='P', fecha_inicio=timezone.localdate(), jefe=self.jefe, created_by=self.jefe,
+        )
+        # Sin fila (p. ej. recién migrado) se calcula en la primera lectura
+        self.assertEqual(self.client.get(reverse('dashboard')).context['proyectos_activos'], 1)
+
+        with CaptureQueriesContext(connection) as consultas:
+            self.assertEqual(obtener_estadisticas().proyectos_activos, 1)
+        self.assertEqual(len(consultas), 1)
+
+    def test_recalculo_con_la_fila_bloqueada(self):
+        reconstruir_estadisticas()
+        with CaptureQueriesContext(connection) as consultas:
+            actualizar_estadisticas(['proyectos'])
+        sql = [q['sql'] for q in consultas.captured_queries]
+        bloqueo = next(i for i, q in enumerate(sql) if q.startswith('SELECT') and 'core_estadisticasdashboard' in q)
+        conteo = next(i for i, q in enumerate(sql) if 'COUNT(' in q)
+        # El conteo se hace después de bloquear la fila, dentro de la misma transacción
+        self.assertLess(bloqueo, conteo)
+        if connection.features.has_select_for_update:
+            self.assertIn('FOR UPDATE', sql[bloqueo])
+
+    def test_comando_reconstruir(self):
+        reconstruir_estadisticas()
+        # Cambio hecho fuera de la aplicación (sin señales)
+        Proyecto.objects.bulk_create([
+            Proyecto(nombre=f'P{i}', fecha_inicio=timezone.localdate(), jefe=self.jefe, created_by=self.jefe)
+            for i in range(3)
+        ])
+        self.assertEqual(self._contadores()[0], 0)
+        salida = io.StringIO()
+        call_command('reconstruir_estadisticas', stdout=salida)
+        self.assertEqual(self._contadores()[0], 3)
+        self.assertIn('3 activos', salida.getvalue())
+
+
+class ContadoresInsigniasTest(TestCase):
+    """Contadores cacheados de notificaciones y chats archivados."""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.usuario = User.objects.create_user(username='insignias', password='x')
+        self.otro = User.objects.create_user(username='insignias_2', password='x')
+        self.request = RequestFactory().get('/')
+        self.request.user = self.usuario
+
+    def contadores(self):
+        return (
+            notificaciones_no_leidas(self.request)['notifs_no_leidas'],
+            archivos_archivados_count(self.request)['archivos_archivados_count'],
+        )
+
+    def test_perezosos_y_cacheados(self):
+        crear_notificacion(self.usuario, 'Hola')
+        with CaptureQueriesContext(connection) as consultas:
+            notifs, archivados = self.contadores()
+        self.assertEqual(len(consultas), 0)
+
+        with CaptureQueriesContext(connection) as consultas:
+            self.assertEqual(notifs, 1)
+            self.assertEqual(archivados, 0)
+        self.assertGreater(len(consultas), 0)
+
+        with CaptureQueriesContext(connection) as consultas:
+            self.assertEqual(tuple(map(str, self.contadores())), ('1', '0'))
+        self.assertEqual(len(consultas), 0)
+
+    def test_invalidacion_al_escribir(self):
+        self.assertEqual(self.contadores(), (0, 0))
+
+        crear_notificacion(self.usuario, 'Uno')
+        Notificacion.objects.create(user=self.usuario, mensaje='Dos')
+        self.assertEqual(self.contadores()[0], 2)
+
+        self.client.force_login(self.usuario)
+        self.client.get(reverse('personal:notifs_leidas'))
+        self.assertEqual(self.contadores()[0], 0)
+
+        conversacion = Conversation.objects.create(is_group=False)
+        conversacion.participants.add(self.usuario, self.otro)
+        for texto in ('a', 'b'):
+            Message.objects.create(conversation=conversacion, sender=self.otro, content=texto)
+        archive_conversation(conversacion, archived_by=self.otro)
+        self.assertEqual(self.contadores()[1], 1)
+
+    def test_insignia_en_la_cabecera(self):
+        crear_notificacion(self.usuario, 'Pendiente')
+        self.client.force_login(self.usuario)
+        respuesta = self.client.get(reverse('personal:mis_notificaciones'))
+        self.assertContains(respuesta, '<span class="badge badge--danger">1</span>', html=True)
+
+
+@override_settings(CORE_INSTRUMENTACION=True, CORE_INSTRUMENTACION_MUESTREO=0)
+class InstrumentacionTest(TestCase):
+    """Tests del middleware de instrumentación de peticiones."""
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_user(username='medido', password='x'))
+
+    def test_cabecera_server_timing(self):
+        respuesta = self.client.get(reverse('dashboard'))
+        cabecera = respuesta['Server-Timing']
+        self.assertRegex(cabecera, r'^sql;dur=[\d.]+;desc="\d+ consultas", tpl;dur=[\d.]+, total;dur=[\d.]+$')
+        self.assertNotIn('desc="0 consultas"', cabecera)
+
+    @override_settings(CORE_INSTRUMENTACION_UMBRAL_MS=0)
+    def test_log_de_peticion_lenta(self):
+        with self.assertLogs('core.instrumentacion', 'WARNING') as logs:
+            self.client.get(reverse('dashboard'))
+        registro = json.loads(logs.records[0].getMessage())
+        self.assertEqual(registro['endpoint'], 'dashboard')
+        self.assertGreater(registro['consultas'], 0)
+        self.assertLessEqual(len(registro['lentas']), 5)
+        self.assertNotIn("'", registro['lentas'][0]['sql'])
+
+    @override_settings(CORE_INSTRUMENTACION=False)
+    def test_desactivado(self):
+        self.assertFalse(self.client.get(reverse('dashboard')).has_header('Server-Timing'))
+
+    def test_medicion_y_agregado(self):
+        with MedicionPeticion(consultas_lentas=2) as medicion:
+            list(User.objects.all())
+            list(User.objects.filter(username='x'))
+            User.objects.count()
+        self.assertEqual(medicion.consultas, 3)
+        self.assertEqual(len(medicion.lentas), 2)
+        self.assertGreaterEqual(medicion.total_ms, medicion.sql_ms)
+
+        agregado = AgregadoEndpoints(intervalo=3600)
+        agregado.registrar('vista', medicion)
+        agregado.registrar('vista', medicion)
+        self.assertEqual(agregado.resumen()['vista']['peticiones'], 2)
+        with self.assertLogs('core.instrumentacion', 'INFO') as logs:
+            agregado.emitir()
+        self.assertIn('agregado_endpoints', logs.output[0])
+        self.assertEqual(agregado.resumen(), {})
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Perfil exclusivo de SQLite')
+class PerfilSqliteTest(TransactionTestCase):
+    """
+    Perfil de SQLite: PRAGMAs al abrir la conexión y reintento de
+    transacciones bloqueadas. TransactionTestCase porque el reintento solo
+    actúa en la transacción más externa.
+    """
+
+    def test_pragmas_aplicados(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 5000)
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+            cursor.execute('PRAGMA temp_store')
+            self.assertEqual(cursor.fetchone()[0], 2)  # MEMORY
+
+    def test_reintenta_transaccion_bloqueada(self):
+        llamadas = []
+
+        @reintentar_si_bloqueada(espera=0)
+        def escribir():
+            llamadas.append(connection.in_atomic_block)
+            if len(llamadas) < 3:
+                raise OperationalError('database is locked')
+            return Group.objects.create(name='reintentado')
+
+        self.assertEqual(escribir().name, 'reintentado')
+        self.assertEqual(llamadas, [True, True, True])
+
+    def test_no_reintenta_otros_errores_ni_anidadas(self):
+        llamadas = []
+
+        @reintentar_si_bloqueada(espera=0)
+        def fallar(mensaje):
+            llamadas.append(mensaje)
+            raise OperationalError(mensaje)
+
+        with self.assertRaises(OperationalError):
+            fallar('no such table: x')
+        with self.assertRaises(OperationalError), transaction.atomic():
+            fallar('database is locked')
+        with self.assertRaises(OperationalError):
+            reintentar_si_bloqueada(fallar, intentos=2, espera=0)('database is locked')
+        self.assertEqual(llamadas, ['no such table: x', 'database is locked'] + ['database is locked'] * 2)
+
+    def test_mantenimiento_y_benchmark(self):
+        call_command('mantenimiento_sqlite', '--analizar', stdout=io.StringIO())
+        resultado = benchmark_concurrencia(hilos=2, segundos=0.2, filas=200)
+        self.assertGreater(resultado['operaciones'], 0)
+        self.assertEqual(resultado['bloqueos'], 0)
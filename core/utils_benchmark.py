@@ -0,0 +1,302 @@
+"""
+Benchmark de latencia de extremo a extremo de las vistas principales.
+
+Para cada tamaño de dataset se crea una base de datos de prueba desechable,
+se llena con el generador de datos sintéticos (`personal.utils_datos_sinteticos`)
+y se recorren las vistas con el cliente de pruebas de Django como jefe, líder
+y trabajador. Por cada (tamaño, rol, vista) se registra:
+
+- `p50_ms` / `p95_ms`: latencia de `repeticiones` peticiones (tras un
+  calentamiento), sin instrumentación.
+- `consultas` / `sql_ms`: consultas y tiempo SQL de una petición adicional
+  (cronometradas con `connection.execute_wrapper`).
+- `memoria_kb`: pico de memoria asignada (`tracemalloc`) durante esa misma
+  petición.
+
+Los resultados se guardan en JSON y se pueden comparar con una línea base
+(`comparar`) para detectar regresiones.
+
+Uso: `python manage.py benchmark_vistas --tamanos 500,5000 --salida bench.json`.
+"""
+
+import math
+import platform
+import time
+import tracemalloc
+from dataclasses import dataclass
+
+import django
+from django.db import connection
+from django.db.models import Count, Exists, OuterRef
+from django.test import Client
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from django.utils import timezone
+
+from comunicacion.models import Conversation
+from personal.models import Cuadrilla
+from personal.utils_datos_sinteticos import generar_datos
+
+
+TAMANOS = (500, 5000)
+REPETICIONES = 20
+# Una regresión de latencia debe superar la tolerancia relativa y este margen
+MARGEN_MS = 2.0
+MARGEN_MEMORIA_KB = 64
+
+
+# (nombre de la URL, función que arma los argumentos a partir del escenario)
+VISTAS = (
+    ('dashboard', lambda e: []),
+    ('proyectos:panel', lambda e: []),
+    ('personal:detalle_cuadrilla', lambda e: [e.cuadrilla.pk]),
+    ('personal:mi_cuadrilla', lambda e: []),
+    ('personal:mis_notificaciones', lambda e: []),
+    ('comunicacion:conversations_list', lambda e: []),
+    ('comunicacion:conversation_detail', lambda e: [e.conversacion.pk]),
+    ('comunicacion:archived_list', lambda e: []),
+)
+
+
+@dataclass
+class Escenario:
+    """Usuarios y objetos sobre los que se miden las vistas."""
+    tamano: int
+    cuadrilla: Cuadrilla
+    conversacion: Conversation
+    usuarios: dict
+
+
+def parametros_dataset(trabajadores, semilla=1):
+    """
+    Parámetros del generador para un tamaño dado (proporciones fijas).
+
+    Args:
+        trabajadores: Cantidad de trabajadores
+        semilla: Semilla del generador
+
+    Returns:
+        dict: kwargs para `generar_datos`
+    """
+    return {
+        'proyectos': max(1, trabajadores // 50),
+        'cuadrillas': 3,
+        'trabajadores': trabajadores,
+        'mensajes': 10 * trabajadores,
+        'semilla': semilla,
+    }
+
+
+def preparar_escenario(trabajadores, semilla=1):
+    """
+    Genera los datos en la base actual y elige los usuarios a medir.
+
+    La cuadrilla medida es la más grande de un proyecto activo; sus líder,
+    jefe de proyecto y un miembro son los usuarios de cada rol. Solo se
+    consideran cuadrillas con los tres roles y canal grupal.
+
+    Returns:
+        Escenario
+
+    Raises:
+        ValueError: Si ninguna cuadrilla del dataset se puede medir
+    """
+    generar_datos(**parametros_dataset(trabajadores, semilla))
+    cuadrillas = Cuadrilla.objects.select_related('lider', 'proyecto__jefe').annotate(
+        num_asignaciones=Count('asignaciones')
+    ).filter(
+        Exists(Conversation.objects.filter(cuadrilla=OuterRef('pk'), is_group=True)),
+        num_asignaciones__gt=0, lider__isnull=False, proyecto__jefe__isnull=False,
+    ).order_by('-proyecto__activo', '-num_asignaciones', 'id')
+    cuadrilla = cuadrillas.first()
+    if cuadrilla is None:
+        raise ValueError(
+            f'El dataset de {trabajadores} trabajadores no tiene una cuadrilla con '
+            'proyecto, líder y miembros para medir.'
+        )
+    miembro = cuadrilla.asignaciones.select_related('trabajador').order_by('id').first()
+    return Escenario(
+        tamano=trabajadores,
+        cuadrilla=cuadrilla,
+        conversacion=Conversation.objects.filter(cuadrilla=cuadrilla, is_group=True).first(),
+        usuarios={
+            'jefe': cuadrilla.proyecto.jefe,
+            'lider': cuadrilla.lider,
+            'trabajador': miembro.trabajador,
+        },
+    )
+
+
+# ===================================================================
+# MEDICIÓN
+# ===================================================================
+
+def _percentil(valores, p):
+    """Percentil por rango más cercano de una lista no vacía."""
+    ordenados = sorted(valores)
+    return ordenados[max(0, math.ceil(p / 100 * len(ordenados)) - 1)]
+
+
+def _pedir(cliente, url):
+    respuesta = cliente.get(url)
+    if respuesta.streaming:
+        b''.join(respuesta.streaming_content)
+    return respuesta
+
+
+def medir_vista(cliente, url, repeticiones=REPETICIONES):
+    """
+    Mide una URL con un cliente ya autenticado.
+
+    Returns:
+        dict: estado, p50_ms, p95_ms, consultas, sql_ms y memoria_kb
+    """
+    _pedir(cliente, url)
+
+    # Consultas y tiempo SQL con un execute_wrapper: el registro de Django
+    # (`CaptureQueriesContext`) guarda la duración con resolución de milisegundos
+    sql = {'consultas': 0, 'segundos': 0.0}
+
+    def cronometro(execute, consulta, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(consulta, params, many, context)
+        finally:
+            sql['consultas'] += 1
+            sql['segundos'] += time.perf_counter() - inicio
+
+    tracemalloc.start()
+    try:
+        with connection.execute_wrapper(cronometro):
+            respuesta = _pedir(cliente, url)
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        _pedir(cliente, url)
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+
+    return {
+        'estado': respuesta.status_code,
+        'p50_ms': round(_percentil(tiempos, 50), 3),
+        'p95_ms': round(_percentil(tiempos, 95), 3),
+        'consultas': sql['consultas'],
+        'sql_ms': round(sql['segundos'] * 1000, 3),
+        'memoria_kb': round(pico / 1024, 1),
+    }
+
+
+def medir_escenario(escenario, repeticiones=REPETICIONES, progreso=None):
+    """
+    Recorre VISTAS con cada rol del escenario.
+
+    Returns:
+        list: Un dict por (rol, vista) con `tamano`, `rol`, `vista` y las
+              métricas de `medir_vista`
+    """
+    progreso = progreso or (lambda texto: None)
+    resultados = []
+    for rol, user in escenario.usuarios.items():
+        cliente = Client()
+        cliente.force_login(user)
+        for nombre, argumentos in VISTAS:
+            metricas = medir_vista(cliente, reverse(nombre, args=argumentos(escenario)), repeticiones)
+            resultados.append({'tamano': escenario.tamano, 'rol': rol, 'vista': nombre, **metricas})
+            progreso(
+                f"{escenario.tamano} {rol} {nombre}: p95 {metricas['p95_ms']} ms, "
+                f"{metricas['consultas']} consultas"
+            )
+    return resultados
+
+
+def ejecutar_benchmark(tamanos=TAMANOS, repeticiones=REPETICIONES, semilla=1, progreso=None):
+    """
+    Ejecuta el benchmark completo, con una base de prueba desechable por tamaño.
+
+    Args:
+        tamanos: Cantidades de trabajadores de cada dataset
+        repeticiones: Peticiones cronometradas por vista
+        semilla: Semilla del generador de datos
+        progreso: Callable opcional que recibe un texto por vista medida
+
+    Returns:
+        dict: {'meta': {...}, 'resultados': [...]}
+    """
+    resultados = []
+    # Igual que el test runner: DEBUG desactivado (sin registro de consultas
+    # fuera de CaptureQueriesContext ni páginas de error de depuración)
+    setup_test_environment(debug=False)
+    try:
+        # Sin réplicas: apuntan a las bases reales, no a la base de prueba
+        # desechable, y las vistas de solo lectura leerían de ellas
+        with override_settings(CORE_REPLICAS=[]):
+            for tamano in tamanos:
+                nombre_original = connection.creation.create_test_db(
+                    verbosity=0, autoclobber=True, serialize=False
+                )
+                try:
+                    escenario = preparar_escenario(tamano, semilla)
+                    resultados += medir_escenario(escenario, repeticiones, progreso)
+                finally:
+                    connection.creation.destroy_test_db(nombre_original, verbosity=0)
+    finally:
+        teardown_test_environment()
+
+    return {
+        'meta': {
+            'fecha': timezone.now().isoformat(),
+            'motor': connection.vendor,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'repeticiones': repeticiones,
+            'semilla': semilla,
+        },
+        'resultados': resultados,
+    }
+
+
+# ===================================================================
+# COMPARACIÓN
+# ===================================================================
+
+def comparar(actual, base, tolerancia=0.25):
+    """
+    Compara dos resultados de `ejecutar_benchmark`.
+
+    Se marca regresión cuando, para el mismo (tamaño, rol, vista):
+    - aumenta el número de consultas,
+    - el p95 supera al de la base en más de `tolerancia` (relativa) y MARGEN_MS,
+    - el pico de memoria supera al de la base en más de `tolerancia` y
+      MARGEN_MEMORIA_KB,
+    - la vista deja de responder sin error (estado >= 500).
+
+    Args:
+        actual: dict con la clave 'resultados'
+        base: dict con la clave 'resultados' (línea base)
+        tolerancia: Aumento relativo permitido para latencia y memoria
+
+    Returns:
+        list: Textos con las regresiones encontradas (vacía si no hay)
+    """
+    def clave(r):
+        return r['tamano'], r['rol'], r['vista']
+
+    previos = {clave(r): r for r in base['resultados']}
+    regresiones = []
+    for r in actual['resultados']:
+        b = previos.get(clave(r))
+        if b is None:
+            continue
+        etiqueta = '{} {} {}'.format(*clave(r))
+        if r['estado'] >= 500 > b['estado']:
+            regresiones.append(f"{etiqueta}: estado {b['estado']} -> {r['estado']}")
+        if r['consultas'] > b['consultas']:
+            regresiones.append(f"{etiqueta}: consultas {b['consultas']} -> {r['consultas']}")
+        if r['p95_ms'] > b['p95_ms'] * (1 + tolerancia) + MARGEN_MS:
+            regresiones.append(f"{etiqueta}: p95 {b['p95_ms']} ms -> {r['p95_ms']} ms")
+        if r['memoria_kb'] > b['memoria_kb'] * (1 + tolerancia) + MARGEN_MEMORIA_KB:
+            regresiones.append(f"{etiqueta}: memoria {b['memoria_kb']} KB -> {r['memoria_kb']} KB")
+    return regresiones
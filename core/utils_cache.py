@@ -0,0 +1,30 @@
+"""
+Claves versionadas en la caché de Django.
+
+Una versión guardada en la caché permite invalidar de una vez todos los
+valores derivados de ella (claves que la incluyen, datos cargados en
+memoria por cada proceso) sin recorrerlos: basta con subirla. Las
+invalidaciones llegan a otros procesos solo si comparten la caché (ver
+CACHES en settings).
+"""
+
+from django.core.cache import cache
+
+
+def version_cache(clave):
+    """
+    Versión actual guardada en `clave` (la crea en 1 si no existe).
+
+    Returns:
+        int
+    """
+    return cache.get_or_set(clave, 1, None)
+
+
+def subir_version_cache(clave):
+    """Sube la versión guardada en `clave`, dejando obsoleto lo que dependía de ella."""
+    try:
+        cache.incr(clave)
+    except ValueError:
+        # La clave no existía (o se desalojó): cualquier valor distinto de 1 sirve
+        cache.set(clave, 2, None)
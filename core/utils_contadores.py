@@ -0,0 +1,108 @@
+"""
+Contadores por usuario de la barra lateral y la cabecera (insignias).
+
+Los context processors se ejecutan en cada página renderizada. En vez de
+contar en la base en cada una:
+
+- Los contadores se guardan en la caché de Django por usuario
+  (`contadores:<nombre>:<versión>:<user_id>`) durante `TIEMPO` segundos.
+- Se invalidan al escribir: los puntos que crean, marcan o borran
+  notificaciones y archivan chats llaman a `invalidar_contadores` (también
+  vía señales). La clave se borra en el momento y otra vez al confirmarse la
+  transacción, para que una lectura concurrente no deje cacheado el valor
+  anterior al commit.
+- `invalidar_contadores(nombre)` sin usuarios sube la versión del contador
+  (todas las claves anteriores quedan obsoletas), p. ej. tras cargas masivas.
+- Los context processors devuelven objetos perezosos: las páginas que no
+  muestran la insignia no consultan ni la caché ni la base.
+- Al faltar en la caché, el valor se cuenta en la primaria aunque la vista
+  lea de una réplica: un valor atrasado quedaría cacheado `TIEMPO` segundos
+  después de que la réplica se ponga al día.
+
+El vencimiento acota el desfase ante escrituras que no pasan por la
+aplicación. Las invalidaciones solo llegan a otros procesos si comparten la
+caché (REDIS_URL en settings); con la caché en memoria por defecto, la
+aplicación debe servirse desde un único proceso.
+"""
+
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from .utils_cache import subir_version_cache, version_cache
+
+
+TIEMPO = 600
+CONTADOR_NOTIFICACIONES = 'notificaciones'
+CONTADOR_ARCHIVADOS = 'archivados'
+
+
+# ===================================================================
+# CÁLCULO
+# ===================================================================
+
+def _contar_notificaciones(user, using):
+    return user.notificaciones.using(using).filter(leida=False).count()
+
+
+def _contar_archivados(user, using):
+    """Chats archivados accesibles (índice `ChatArchivado.participantes`)."""
+    from comunicacion.models import ChatArchivado
+    return ChatArchivado.objects.using(using).accesibles_para(user).count()
+
+
+CALCULOS = {
+    CONTADOR_NOTIFICACIONES: _contar_notificaciones,
+    CONTADOR_ARCHIVADOS: _contar_archivados,
+}
+
+
+# ===================================================================
+# CACHÉ
+# ===================================================================
+
+def _clave_version(nombre):
+    return f'contadores:{nombre}:version'
+
+
+def _clave(nombre, user_id, version=None):
+    return f'contadores:{nombre}:{version or version_cache(_clave_version(nombre))}:{user_id}'
+
+
+def obtener_contador(nombre, user):
+    """
+    Valor de un contador para el usuario (de la caché, o calculado y guardado).
+
+    Args:
+        nombre: CONTADOR_NOTIFICACIONES o CONTADOR_ARCHIVADOS
+        user: User autenticado
+
+    Returns:
+        int
+    """
+    clave = _clave(nombre, user.pk)
+    valor = cache.get(clave)
+    if valor is None:
+        # En la primaria (no `router.db_for_write`: fijaría al usuario a ella)
+        valor = CALCULOS[nombre](user, DEFAULT_DB_ALIAS)
+        cache.set(clave, valor, TIEMPO)
+    return valor
+
+
+def invalidar_contadores(nombre, user_ids=None):
+    """
+    Descarta los valores cacheados de un contador.
+
+    Args:
+        nombre: CONTADOR_NOTIFICACIONES o CONTADOR_ARCHIVADOS
+        user_ids: IDs de los usuarios afectados; None invalida a todos
+    """
+    if user_ids is None:
+        subir_version_cache(_clave_version(nombre))
+        transaction.on_commit(lambda: subir_version_cache(_clave_version(nombre)))
+        return
+    version = version_cache(_clave_version(nombre))
+    claves = [_clave(nombre, uid, version) for uid in set(user_ids) if uid is not None]
+    if not claves:
+        return
+    cache.delete_many(claves)
+    transaction.on_commit(lambda: cache.delete_many(claves))
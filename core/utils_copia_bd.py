@@ -0,0 +1,155 @@
+"""
+Copia de todos los datos de una base a otra (p. ej. de db.sqlite3 a PostgreSQL).
+
+La base de destino debe estar migrada con las mismas migraciones que la de
+origen. La copia:
+
+- recorre los modelos (incluidas las tablas intermedias de los M2M) y cada
+  tabla por lotes de claves primarias (keyset), sin cargar la tabla
+  completa en memoria. El orden de las tablas no importa: Django crea las
+  claves foráneas diferibles y se verifican al final;
+- inserta las filas tal cual, con sus IDs, mediante `executemany` con los
+  valores preparados para el motor de destino (sin `save()` ni señales, y
+  sin que `auto_now`/`auto_now_add` reescriban las fechas);
+- vacía antes las tablas de destino (también los tipos de contenido y
+  permisos que crea `migrate`), y al final reinicia las secuencias y
+  compara el número de filas de cada tabla.
+
+Todo ocurre en una sola transacción del destino: si algo falla, el destino
+queda como estaba.
+
+Uso: `python manage.py copiar_sqlite db.sqlite3`.
+"""
+
+from django.apps import apps
+from django.core.management.color import no_style
+from django.db import DEFAULT_DB_ALIAS, connections, router, transaction
+from django.db.migrations.recorder import MigrationRecorder
+
+
+TAMANO_LOTE = 2000
+ALIAS_ORIGEN = 'origen_sqlite'
+
+
+class CopiaError(Exception):
+    """La copia no se puede hacer o el resultado no coincide con el origen."""
+
+
+def registrar_sqlite(ruta, alias=ALIAS_ORIGEN):
+    """
+    Registra un archivo SQLite como conexión adicional.
+
+    Args:
+        ruta: Ruta del archivo
+        alias: Alias de la conexión
+
+    Returns:
+        str: El alias registrado
+    """
+    # configure_settings completa las claves por omisión (exige un 'default')
+    connections.settings[alias] = connections.configure_settings({
+        DEFAULT_DB_ALIAS: {},
+        alias: {'ENGINE': 'django.db.backends.sqlite3', 'NAME': str(ruta)},
+    })[alias]
+    return alias
+
+
+def modelos_a_copiar():
+    """Modelos con tabla propia (incluidas las intermedias de los M2M)."""
+    return [
+        m for m in apps.get_models(include_auto_created=True)
+        if m._meta.managed and not m._meta.proxy
+    ]
+
+
+def _verificar_migraciones(origen, destino):
+    aplicadas = {
+        alias: MigrationRecorder(connections[alias]).applied_migrations().keys()
+        for alias in (origen, destino)
+    }
+    faltantes = sorted(set(aplicadas[origen]) - set(aplicadas[destino]))
+    if faltantes:
+        app, nombre = faltantes[0]
+        raise CopiaError(
+            f"Faltan {len(faltantes)} migraciones en '{destino}' (p. ej. {app}.{nombre}); "
+            f"ejecute 'migrate --database {destino}' antes de copiar."
+        )
+
+
+def _copiar_modelo(modelo, origen, destino, tamano_lote):
+    campos = modelo._meta.concrete_fields
+    conexion = connections[destino]
+    qn = conexion.ops.quote_name
+    sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+        qn(modelo._meta.db_table),
+        ', '.join(qn(c.column) for c in campos),
+        ', '.join(['%s'] * len(campos)),
+    )
+    pk = modelo._meta.pk.attname
+    qs = modelo._base_manager.using(origen).order_by(pk).values_list(*(c.attname for c in campos))
+    indice_pk = [c.attname for c in campos].index(pk)
+
+    total = 0
+    ultimo = None
+    while True:
+        lote = list((qs.filter(**{f'{pk}__gt': ultimo}) if ultimo is not None else qs)[:tamano_lote])
+        if not lote:
+            return total
+        filas = [
+            [campo.get_db_prep_save(valor, conexion) for campo, valor in zip(campos, fila)]
+            for fila in lote
+        ]
+        with conexion.cursor() as cursor:
+            cursor.executemany(sql, filas)
+        total += len(lote)
+        ultimo = lote[-1][indice_pk]
+
+
+def copiar_base_datos(origen, destino='default', tamano_lote=TAMANO_LOTE, progreso=None):
+    """
+    Copia todas las filas de `origen` a `destino`, reemplazando las del destino.
+
+    Args:
+        origen: Alias de la base de origen
+        destino: Alias de la base de destino (ya migrada)
+        tamano_lote: Filas por lote
+        progreso: Callable opcional que recibe un texto por tabla copiada
+
+    Returns:
+        dict: {'app.Modelo': filas copiadas}
+
+    Raises:
+        CopiaError: Si faltan migraciones en el destino o los conteos no coinciden
+    """
+    progreso = progreso or (lambda texto: None)
+    _verificar_migraciones(origen, destino)
+    modelos = [m for m in modelos_a_copiar() if router.allow_migrate_model(destino, m)]
+    conexion = connections[destino]
+
+    copiadas = {}
+    with transaction.atomic(using=destino):
+        tablas = [m._meta.db_table for m in modelos]
+        with conexion.cursor() as cursor:
+            for sql in conexion.ops.sql_flush(no_style(), tablas, allow_cascade=True):
+                cursor.execute(sql)
+
+        for modelo in modelos:
+            etiqueta = modelo._meta.label
+            copiadas[etiqueta] = _copiar_modelo(modelo, origen, destino, tamano_lote)
+            progreso(f'{etiqueta}: {copiadas[etiqueta]}')
+
+        with conexion.cursor() as cursor:
+            for sql in conexion.ops.sequence_reset_sql(no_style(), modelos):
+                cursor.execute(sql)
+
+        # Claves foráneas diferidas: los errores aparecen aquí y no al confirmar
+        conexion.check_constraints(table_names=tablas)
+
+        for modelo in modelos:
+            en_destino = modelo._base_manager.using(destino).count()
+            if en_destino != copiadas[modelo._meta.label]:
+                raise CopiaError(
+                    f'{modelo._meta.label}: {copiadas[modelo._meta.label]} filas copiadas '
+                    f'pero {en_destino} en el destino.'
+                )
+    return copiadas
@@ -0,0 +1,173 @@
+"""
+Contadores materializados del dashboard (`EstadisticasDashboard`).
+
+Los contadores se agrupan según el modelo del que dependen:
+
+- `proyectos`: activos y finalizados.
+- `cuadrillas`: con y sin proyecto.
+- `trabajadores`: activos de tipo 'trabajador' (total), los asignados a una
+  cuadrilla con proyecto (columna desnormalizada `ocupado`) y los
+  disponibles (estado 'disponible' y no ocupados). Se cuenta sobre el
+  modelo Trabajador y no sobre grupos de usuarios, así el resultado nunca
+  es negativo.
+
+Las señales (`personal/signals.py`, sección 7) y `recalcular_ocupacion`
+marcan con `programar_actualizacion` los grupos afectados; al confirmarse la
+transacción cada grupo marcado se recalcula una sola vez (una consulta de
+agregación por grupo, sobre índices) y se escribe con un único UPDATE. Las
+operaciones en bloque sin señales (`QuerySet.update`, `bulk_create`) llaman
+a `programar_actualizacion` explícitamente.
+
+El recálculo bloquea la fila (`select_for_update`) antes de contar: los
+recálculos de transacciones concurrentes se serializan y cada uno cuenta
+después de obtener el bloqueo, de modo que uno más viejo no puede escribir
+sobre uno más nuevo. En SQLite el bloqueo de escritura de la transacción
+(`transaction_mode` IMMEDIATE) cumple el mismo papel.
+
+`python manage.py reconstruir_estadisticas` recalcula todos los grupos.
+"""
+
+import threading
+
+from django.db import router, transaction
+from django.db.models import Count, Q
+
+
+GRUPOS = ('proyectos', 'cuadrillas', 'trabajadores')
+PK = 1
+
+_estado = threading.local()
+
+
+# ===================================================================
+# CÁLCULO
+# ===================================================================
+
+def _contar_proyectos(using):
+    from proyectos.models import Proyecto
+    return Proyecto.objects.using(using).aggregate(
+        proyectos_activos=Count('pk', filter=Q(activo=True)),
+        proyectos_finalizados=Count('pk', filter=Q(activo=False)),
+    )
+
+
+def _contar_cuadrillas(using):
+    from personal.models import Cuadrilla
+    return Cuadrilla.objects.using(using).aggregate(
+        cuadrillas_con_proyecto=Count('pk', filter=Q(proyecto__isnull=False)),
+        cuadrillas_sin_proyecto=Count('pk', filter=Q(proyecto__isnull=True)),
+    )
+
+
+def _contar_trabajadores(using):
+    from personal.models import Trabajador
+    return Trabajador.objects.using(using).filter(
+        activo=True, tipo_trabajador='trabajador'
+    ).aggregate(
+        trabajadores_total=Count('pk'),
+        trabajadores_asignados=Count('pk', filter=Q(ocupado=True)),
+        trabajadores_disponibles=Count('pk', filter=Q(estado='disponible', ocupado=False)),
+    )
+
+
+CALCULOS = {
+    'proyectos': _contar_proyectos,
+    'cuadrillas': _contar_cuadrillas,
+    'trabajadores': _contar_trabajadores,
+}
+
+
+def calcular(grupos=GRUPOS, using=None):
+    """
+    Cuenta los grupos indicados en la base de datos.
+
+    Args:
+        grupos: Nombres de grupos (ver GRUPOS)
+        using: Alias de base de datos (por defecto, la de escritura)
+
+    Returns:
+        dict: {campo: valor} de EstadisticasDashboard
+    """
+    from .models import EstadisticasDashboard
+    # Se cuenta en la base de escritura: en una réplica atrasada el resultado
+    # sobrescribiría la fila buena con valores viejos
+    using = using or router.db_for_write(EstadisticasDashboard)
+    valores = {}
+    for grupo in grupos:
+        valores.update(CALCULOS[grupo](using))
+    return valores
+
+
+def reconstruir_estadisticas(using=None):
+    """
+    Recalcula todos los contadores y crea la fila si no existe.
+
+    Returns:
+        EstadisticasDashboard
+    """
+    from .models import EstadisticasDashboard
+    using = using or router.db_for_write(EstadisticasDashboard)
+    estadisticas, _ = EstadisticasDashboard.objects.using(using).update_or_create(
+        pk=PK, defaults=calcular(using=using)
+    )
+    return estadisticas
+
+
+def actualizar_estadisticas(grupos):
+    """Recalcula solo los grupos indicados (la fila debe existir; si no, se crea completa)."""
+    from django.utils import timezone
+    from .models import EstadisticasDashboard
+
+    using = router.db_for_write(EstadisticasDashboard)
+    fila = EstadisticasDashboard.objects.using(using).filter(pk=PK)
+    with transaction.atomic(using=using):
+        # Contar con la fila bloqueada: el conteo ve todo lo confirmado
+        # antes de obtener el bloqueo
+        if not list(fila.select_for_update().values_list('pk', flat=True)):
+            reconstruir_estadisticas(using)
+            return
+        fila.update(**calcular(grupos, using), actualizado=timezone.now())
+
+
+def obtener_estadisticas():
+    """
+    Contadores del dashboard con una consulta por clave primaria. La primera
+    vez (tabla vacía) los calcula y guarda.
+
+    Returns:
+        EstadisticasDashboard
+    """
+    from .models import EstadisticasDashboard
+    estadisticas = EstadisticasDashboard.objects.filter(pk=PK).first()
+    if estadisticas is None:
+        estadisticas = reconstruir_estadisticas()
+    return estadisticas
+
+
+# ===================================================================
+# ACTUALIZACIÓN INCREMENTAL
+# ===================================================================
+
+def _actualizar_pendientes():
+    pendientes = getattr(_estado, 'pendientes', None)
+    _estado.pendientes = None
+    if pendientes:
+        actualizar_estadisticas([g for g in GRUPOS if g in pendientes])
+
+
+def programar_actualizacion(*grupos):
+    """
+    Marca grupos de contadores para recalcular al confirmarse la transacción.
+
+    Como en el índice de búsqueda, varios cambios de una transacción se
+    aplican juntos: el primer callback `on_commit` recalcula todo lo
+    pendiente y los siguientes no encuentran nada que hacer.
+
+    Args:
+        grupos: Nombres de GRUPOS (sin argumentos, todos)
+    """
+    pendientes = getattr(_estado, 'pendientes', None)
+    if pendientes is None:
+        pendientes = _estado.pendientes = set()
+    pendientes.update(grupos or GRUPOS)
+    transaction.on_commit(_actualizar_pendientes)
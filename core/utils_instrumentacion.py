@@ -0,0 +1,226 @@
+"""
+Instrumentación de peticiones: consultas SQL, plantillas y tiempos.
+
+`core.middleware.InstrumentacionMiddleware` abre una `MedicionPeticion` por
+petición y la cierra al obtener la respuesta:
+
+- SQL: un `execute_wrapper` en cada conexión cuenta las consultas, suma su
+  duración y conserva las `CONSULTAS_LENTAS` más lentas. La huella
+  normalizada (`huella_sql`) solo se calcula para esas, al cerrar.
+- Plantillas: `Template.render` del backend de Django se envuelve una sola
+  vez y suma el tiempo a la medición activa (variable de contexto). Incluye
+  las consultas que se ejecuten al renderizar.
+- Salidas: cabecera `Server-Timing`, una línea de log JSON (logger
+  `core.instrumentacion`) si la petición supera el umbral, y un agregado por
+  endpoint de una muestra de las peticiones, que se emite al log cada
+  `INTERVALO_AGREGADO` segundos.
+
+Se activa con `CORE_INSTRUMENTACION` (settings); `CORE_INSTRUMENTACION_UMBRAL_MS`
+y `CORE_INSTRUMENTACION_MUESTREO` ajustan el umbral de log y la fracción
+de peticiones agregadas.
+"""
+
+import hashlib
+import heapq
+import json
+import logging
+import re
+import threading
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.db import connections
+
+
+logger = logging.getLogger('core.instrumentacion')
+
+CONSULTAS_LENTAS = 5
+UMBRAL_MS = 500
+MUESTREO = 0.1
+INTERVALO_AGREGADO = 60
+
+_medicion_actual = ContextVar('medicion_peticion', default=None)
+
+
+def huella_sql(sql):
+    """SQL sin literales, para agrupar consultas repetidas (N+1)."""
+    sql = re.sub(r"'(?:[^']|'')*'", '?', sql)
+    sql = re.sub(r'\b\d+\b', '?', sql)
+    return re.sub(r'\(\?(?:, \?)*\)', '(...)', sql)
+
+
+def id_huella(huella):
+    """Identificador corto y estable de una huella, para agrupar en los logs."""
+    return hashlib.sha1(huella.encode()).hexdigest()[:12]
+
+
+# ===================================================================
+# MEDICIÓN
+# ===================================================================
+
+class MedicionPeticion:
+    """
+    Tiempos de una petición. Se usa como context manager alrededor de la vista.
+
+    Atributos tras cerrar:
+        total_ms, sql_ms, plantillas_ms: float
+        consultas: int
+        lentas: lista de (ms, sql) de las consultas más lentas, de mayor a menor
+    """
+
+    def __init__(self, consultas_lentas=CONSULTAS_LENTAS):
+        self.consultas_lentas = consultas_lentas
+        self.consultas = 0
+        self.sql_ms = 0.0
+        self.plantillas_ms = 0.0
+        self.total_ms = 0.0
+        self._lentas = []
+        self._secuencia = 0
+
+    def _ejecutar(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            ms = (time.perf_counter() - inicio) * 1000
+            self.consultas += 1
+            self.sql_ms += ms
+            # Montículo acotado: (ms, desempate, sql)
+            self._secuencia += 1
+            if len(self._lentas) < self.consultas_lentas:
+                heapq.heappush(self._lentas, (ms, self._secuencia, sql))
+            elif ms > self._lentas[0][0]:
+                heapq.heapreplace(self._lentas, (ms, self._secuencia, sql))
+
+    def __enter__(self):
+        self._pila = ExitStack()
+        for conexion in connections.all():
+            self._pila.enter_context(conexion.execute_wrapper(self._ejecutar))
+        self._token = _medicion_actual.set(self)
+        self._inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.total_ms = (time.perf_counter() - self._inicio) * 1000
+        _medicion_actual.reset(self._token)
+        self._pila.close()
+        return False
+
+    @property
+    def lentas(self):
+        return [(ms, sql) for ms, _, sql in sorted(self._lentas, reverse=True)]
+
+    def server_timing(self):
+        """Valor de la cabecera `Server-Timing`."""
+        return (
+            f'sql;dur={self.sql_ms:.1f};desc="{self.consultas} consultas", '
+            f'tpl;dur={self.plantillas_ms:.1f}, '
+            f'total;dur={self.total_ms:.1f}'
+        )
+
+    def como_dict(self):
+        """Resumen serializable, con las consultas lentas identificadas por huella."""
+        lentas = []
+        for ms, sql in self.lentas:
+            huella = huella_sql(sql)
+            lentas.append({'huella': id_huella(huella), 'ms': round(ms, 2), 'sql': huella[:500]})
+        return {
+            'total_ms': round(self.total_ms, 2),
+            'sql_ms': round(self.sql_ms, 2),
+            'consultas': self.consultas,
+            'plantillas_ms': round(self.plantillas_ms, 2),
+            'lentas': lentas,
+        }
+
+
+def instrumentar_plantillas():
+    """
+    Envuelve `Template.render` del backend de Django (una sola vez) para sumar
+    el tiempo de render a la medición activa. Sin medición activa solo añade
+    una lectura de la variable de contexto.
+    """
+    from django.template.backends.django import Template
+
+    if getattr(Template.render, '_instrumentado', False):
+        return
+    original = Template.render
+
+    def render(self, context=None, request=None):
+        medicion = _medicion_actual.get()
+        if medicion is None:
+            return original(self, context, request)
+        inicio = time.perf_counter()
+        try:
+            return original(self, context, request)
+        finally:
+            medicion.plantillas_ms += (time.perf_counter() - inicio) * 1000
+
+    render._instrumentado = True
+    Template.render = render
+
+
+# ===================================================================
+# AGREGADO POR ENDPOINT
+# ===================================================================
+
+class AgregadoEndpoints:
+    """
+    Acumula, por endpoint, una muestra de peticiones del proceso y la emite
+    al log (nivel INFO) cada `intervalo` segundos.
+    """
+
+    def __init__(self, intervalo=INTERVALO_AGREGADO):
+        self.intervalo = intervalo
+        self._lock = threading.Lock()
+        self._datos = {}
+        self._desde = time.monotonic()
+
+    def registrar(self, endpoint, medicion):
+        with self._lock:
+            d = self._datos.setdefault(endpoint, {
+                'peticiones': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'sql_ms': 0.0, 'consultas': 0,
+            })
+            d['peticiones'] += 1
+            d['total_ms'] += medicion.total_ms
+            d['max_ms'] = max(d['max_ms'], medicion.total_ms)
+            d['sql_ms'] += medicion.sql_ms
+            d['consultas'] += medicion.consultas
+            vencido = time.monotonic() - self._desde >= self.intervalo
+        if vencido:
+            self.emitir()
+
+    @staticmethod
+    def _resumir(datos):
+        return {
+            endpoint: {
+                'peticiones': d['peticiones'],
+                'media_ms': round(d['total_ms'] / d['peticiones'], 2),
+                'max_ms': round(d['max_ms'], 2),
+                'sql_media_ms': round(d['sql_ms'] / d['peticiones'], 2),
+                'consultas_media': round(d['consultas'] / d['peticiones'], 1),
+            }
+            for endpoint, d in datos.items()
+        }
+
+    def resumen(self):
+        """
+        Returns:
+            dict: {endpoint: {peticiones, media_ms, max_ms, sql_media_ms, consultas_media}}
+        """
+        with self._lock:
+            datos = {k: dict(v) for k, v in self._datos.items()}
+        return self._resumir(datos)
+
+    def emitir(self):
+        """Escribe el agregado al log y lo reinicia."""
+        with self._lock:
+            datos, self._datos = self._datos, {}
+            self._desde = time.monotonic()
+        if datos:
+            logger.info(json.dumps(
+                {'evento': 'agregado_endpoints', 'endpoints': self._resumir(datos)}, ensure_ascii=False
+            ))
+
+
+agregado = AgregadoEndpoints()
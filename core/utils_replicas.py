@@ -0,0 +1,195 @@
+"""
+Lecturas en réplicas de la base de datos.
+
+Las lecturas van a una réplica solo donde se pide explícitamente: en las
+vistas decoradas con `solo_lectura` y dentro de `lectura_replica()` (p. ej.
+los context processors). El resto del código sigue leyendo de la primaria.
+`core.routers.RouterReplicas` aplica estas reglas:
+
+- Dentro de una transacción de la primaria se lee de la primaria.
+- Lectura tras escritura: cuando una petición escribe (el router recibe
+  `db_for_write`), el resto de la petición lee de la primaria y
+  `ReplicasMiddleware` deja una cookie que mantiene al usuario en la primaria
+  durante `CORE_REPLICAS_FIJAR_SEGUNDOS`.
+- Retraso: una réplica cuyo retraso supera `CORE_REPLICAS_RETRASO_MAXIMO`
+  segundos (o que no responde) no se usa. El retraso se mide como mucho
+  cada `INTERVALO_MEDICION` segundos por proceso.
+
+`CORE_REPLICAS` (settings) lista los alias de las réplicas; vacío desactiva
+todo lo anterior.
+"""
+
+import functools
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+
+logger = logging.getLogger('core.replicas')
+
+COOKIE = 'fijar_primaria'
+FIJAR_SEGUNDOS = 5
+RETRASO_MAXIMO = 5.0
+INTERVALO_MEDICION = 2.0
+
+_contexto = ContextVar('contexto_replicas', default=None)
+
+
+class ContextoReplicas:
+    """Estado de la petición (o del bloque) en curso."""
+
+    def __init__(self, fijada=False):
+        self.lectura = False
+        self.fijada = fijada
+        self.escribio = False
+
+
+def replicas():
+    """Alias de las réplicas configuradas."""
+    return getattr(settings, 'CORE_REPLICAS', ())
+
+
+# ===================================================================
+# CONTEXTO
+# ===================================================================
+
+@contextmanager
+def contexto_peticion(fijada=False):
+    """
+    Abre el estado de una petición (lo usa `ReplicasMiddleware`).
+
+    Args:
+        fijada: True si el usuario escribió hace poco y debe leer de la primaria
+
+    Yields:
+        ContextoReplicas
+    """
+    contexto = ContextoReplicas(fijada)
+    token = _contexto.set(contexto)
+    try:
+        yield contexto
+    finally:
+        _contexto.reset(token)
+
+
+@contextmanager
+def lectura_replica():
+    """Dentro del bloque, las lecturas pueden ir a una réplica."""
+    contexto = _contexto.get()
+    token = None
+    if contexto is None:
+        contexto = ContextoReplicas()
+        token = _contexto.set(contexto)
+    anterior, contexto.lectura = contexto.lectura, True
+    try:
+        yield
+    finally:
+        contexto.lectura = anterior
+        if token is not None:
+            _contexto.reset(token)
+
+
+def solo_lectura(vista):
+    """Decorador de vistas que solo leen: sus consultas pueden ir a una réplica."""
+    @functools.wraps(vista)
+    def envoltura(request, *args, **kwargs):
+        with lectura_replica():
+            return vista(request, *args, **kwargs)
+    return envoltura
+
+
+def marcar_escritura():
+    """Registra una escritura: desde aquí la petición lee de la primaria."""
+    contexto = _contexto.get()
+    if contexto is not None:
+        contexto.fijada = True
+        contexto.escribio = True
+
+
+def leer_de_replica():
+    """True si las lecturas del contexto actual pueden ir a una réplica."""
+    contexto = _contexto.get()
+    return (
+        contexto is not None and contexto.lectura and not contexto.fijada
+        and not connections[DEFAULT_DB_ALIAS].in_atomic_block
+    )
+
+
+# ===================================================================
+# RETRASO DE LAS RÉPLICAS
+# ===================================================================
+
+SQL_RETRASO_POSTGRESQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        -- Sin WAL pendiente de aplicar la réplica está al día aunque la
+        -- última transacción aplicada sea antigua (primaria sin escrituras)
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+
+def medir_retraso(alias):
+    """
+    Segundos de retraso de una réplica respecto de la primaria.
+
+    En PostgreSQL se consulta el estado de la replicación; otros motores
+    (p. ej. dos archivos SQLite en desarrollo) no replican y se consideran al
+    día. Si la réplica no responde devuelve infinito.
+    """
+    conexion = connections[alias]
+    if conexion.vendor != 'postgresql':
+        return 0.0
+    try:
+        with conexion.cursor() as cursor:
+            cursor.execute(SQL_RETRASO_POSTGRESQL)
+            return float(cursor.fetchone()[0])
+    except DatabaseError as e:
+        logger.warning('Réplica %s no disponible: %s', alias, e)
+        return float('inf')
+
+
+class EstadoReplicas:
+    """Último retraso medido de cada réplica, compartido por el proceso."""
+
+    def __init__(self, intervalo=INTERVALO_MEDICION):
+        self.intervalo = intervalo
+        self._lock = threading.Lock()
+        self._medidas = {}
+
+    def registrar(self, alias, segundos):
+        with self._lock:
+            self._medidas[alias] = (time.monotonic(), segundos)
+
+    def retraso(self, alias):
+        with self._lock:
+            medido_en, segundos = self._medidas.get(alias, (None, None))
+        if medido_en is None or time.monotonic() - medido_en >= self.intervalo:
+            segundos = medir_retraso(alias)
+            self.registrar(alias, segundos)
+        return segundos
+
+    def disponibles(self):
+        """Réplicas con retraso aceptable."""
+        maximo = getattr(settings, 'CORE_REPLICAS_RETRASO_MAXIMO', RETRASO_MAXIMO)
+        return [alias for alias in replicas() if self.retraso(alias) <= maximo]
+
+    def reiniciar(self):
+        with self._lock:
+            self._medidas.clear()
+
+
+estado_replicas = EstadoReplicas()
+
+
+def elegir_replica():
+    """Una réplica al azar entre las disponibles, o None (usar la primaria)."""
+    disponibles = estado_replicas.disponibles()
+    return random.choice(disponibles) if disponibles else None
@@ -0,0 +1,257 @@
+"""
+Perfil de rendimiento para SQLite en producción.
+
+Con la configuración por defecto (journal en modo DELETE y transacciones
+diferidas) un lector bloquea a los escritores, y dos transacciones que
+intentan pasar de lectura a escritura a la vez fallan con "database is
+locked" sin esperar. El perfil:
+
+- `PRAGMAS` (señal `connection_created`, `core/signals.py`): journal WAL
+  (lectores y un escritor en paralelo), `synchronous=NORMAL` (seguro con
+  WAL; solo se pierde la última transacción ante un corte de energía),
+  caché de páginas y mmap más grandes, tablas temporales en memoria y
+  `busy_timeout` para esperar el bloqueo en vez de fallar.
+- `transaction_mode: IMMEDIATE` en `DATABASES['default']['OPTIONS']`: cada
+  `transaction.atomic()` toma el bloqueo de escritura al empezar, donde
+  `busy_timeout` sí aplica.
+- `reintentar_si_bloqueada`: si aun así vence la espera, reintenta la
+  transacción completa unas pocas veces.
+
+`CORE_SQLITE_PRAGMAS` (settings) permite cambiar o agregar PRAGMAs.
+El mantenimiento periódico (`optimize`, `ANALYZE`, checkpoint del WAL) está
+en `python manage.py mantenimiento_sqlite`, y `python manage.py
+benchmark_sqlite` compara el rendimiento con y sin el perfil.
+"""
+
+import functools
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.db import OperationalError, transaction
+
+
+PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    # Negativo = KiB: 64 MiB de caché de páginas por conexión
+    'cache_size': -64000,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+    'busy_timeout': 5000,
+}
+
+INTENTOS = 3
+ESPERA_BASE = 0.05
+
+
+def pragmas():
+    """PRAGMAs del perfil, con los cambios de `CORE_SQLITE_PRAGMAS`."""
+    return {**PRAGMAS, **getattr(settings, 'CORE_SQLITE_PRAGMAS', {})}
+
+
+def aplicar_perfil(connection):
+    """
+    Aplica los PRAGMAs del perfil a una conexión SQLite recién abierta.
+
+    En bases en memoria (tests) se omite `journal_mode`, que no admite WAL.
+
+    Args:
+        connection: DatabaseWrapper de Django
+    """
+    if connection.vendor != 'sqlite':
+        return
+    en_memoria = connection.is_in_memory_db()
+    with connection.cursor() as cursor:
+        for nombre, valor in pragmas().items():
+            if nombre == 'journal_mode' and en_memoria:
+                continue
+            cursor.execute(f'PRAGMA {nombre} = {valor}')
+
+
+def _bloqueada(error):
+    return 'database is locked' in str(error) or 'database is busy' in str(error)
+
+
+def reintentar_si_bloqueada(funcion=None, *, intentos=INTENTOS, espera=ESPERA_BASE, using=None):
+    """
+    Decorador: ejecuta la función dentro de `transaction.atomic()` y la
+    reintenta si SQLite responde "database is locked".
+
+    Solo reintenta en la transacción más externa: dentro de otra
+    transacción el error se propaga para que la reintente quien la abrió.
+    La espera entre intentos crece exponencialmente con algo de azar.
+
+    Args:
+        intentos: Cantidad máxima de ejecuciones
+        espera: Segundos de espera antes del segundo intento
+        using: Alias de base de datos
+    """
+    def decorador(f):
+        @functools.wraps(f)
+        def envoltura(*args, **kwargs):
+            for intento in range(1, intentos + 1):
+                try:
+                    with transaction.atomic(using=using):
+                        return f(*args, **kwargs)
+                except OperationalError as e:
+                    anidada = transaction.get_connection(using).in_atomic_block
+                    if anidada or intento == intentos or not _bloqueada(e):
+                        raise
+                    time.sleep(espera * 2 ** (intento - 1) * (1 + random.random()))
+        return envoltura
+
+    return decorador(funcion) if funcion is not None else decorador
+
+
+# ===================================================================
+# MANTENIMIENTO
+# ===================================================================
+
+def mantenimiento(connection, analizar=False, checkpoint=True):
+    """
+    Tareas periódicas sobre una base SQLite.
+
+    Args:
+        connection: DatabaseWrapper de Django
+        analizar: Ejecutar `ANALYZE` completo (por defecto solo `PRAGMA optimize`,
+                  que analiza las tablas que lo necesitan)
+        checkpoint: Traspasar el WAL a la base y truncarlo
+
+    Returns:
+        dict: Estado de la base tras el mantenimiento
+    """
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE' if analizar else 'PRAGMA optimize')
+        resultado = {}
+        if checkpoint:
+            cursor.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+            bloqueado, paginas_wal, traspasadas = cursor.fetchone()
+            resultado['checkpoint'] = {
+                'bloqueado': bool(bloqueado), 'paginas_wal': paginas_wal, 'traspasadas': traspasadas,
+            }
+        for pragma in ('journal_mode', 'page_count', 'page_size', 'freelist_count'):
+            cursor.execute(f'PRAGMA {pragma}')
+            resultado[pragma] = cursor.fetchone()[0]
+    resultado['tamano_mb'] = round(resultado['page_count'] * resultado['page_size'] / 1024 / 1024, 1)
+    return resultado
+
+
+# ===================================================================
+# BENCHMARK DE CONCURRENCIA
+# ===================================================================
+
+ESQUEMA_BENCHMARK = (
+    'CREATE TABLE mensaje (id INTEGER PRIMARY KEY, conversacion INTEGER, autor INTEGER, '
+    'contenido TEXT, creado REAL)',
+    'CREATE INDEX mensaje_conv ON mensaje (conversacion, creado)',
+    'CREATE TABLE asignacion (id INTEGER PRIMARY KEY, cuadrilla INTEGER, trabajador INTEGER)',
+)
+
+
+def _conectar(ruta, perfil):
+    # 5 s de espera en ambos casos: el valor por defecto del módulo sqlite3 (y de Django)
+    conexion = sqlite3.connect(ruta, timeout=5.0, isolation_level=None, check_same_thread=False)
+    if perfil:
+        for nombre, valor in PRAGMAS.items():
+            conexion.execute(f'PRAGMA {nombre} = {valor}')
+    return conexion
+
+
+def _trabajador_benchmark(ruta, perfil, hasta, escrituras, semilla, totales, lock):
+    rng = random.Random(semilla)
+    conexion = _conectar(ruta, perfil)
+    ops = bloqueos = 0
+    inicio_txn = 'BEGIN IMMEDIATE' if perfil else 'BEGIN'
+    while time.perf_counter() < hasta:
+        conversacion = rng.randrange(50)
+        try:
+            if rng.random() < escrituras:
+                # Como publicar un mensaje o editar una cuadrilla: leer y luego escribir
+                conexion.execute(inicio_txn)
+                try:
+                    conexion.execute(
+                        'SELECT count(*) FROM asignacion WHERE cuadrilla = ?', (conversacion,)
+                    ).fetchone()
+                    conexion.execute(
+                        'INSERT INTO mensaje (conversacion, autor, contenido, creado) VALUES (?, ?, ?, ?)',
+                        (conversacion, rng.randrange(500), 'Mensaje de prueba', time.time()),
+                    )
+                    conexion.execute(
+                        'INSERT INTO asignacion (cuadrilla, trabajador) VALUES (?, ?)',
+                        (conversacion, rng.randrange(500)),
+                    )
+                    conexion.execute('COMMIT')
+                except sqlite3.OperationalError:
+                    conexion.execute('ROLLBACK')
+                    raise
+            else:
+                conexion.execute(
+                    'SELECT autor, contenido FROM mensaje WHERE conversacion = ? '
+                    'ORDER BY creado DESC LIMIT 50', (conversacion,)
+                ).fetchall()
+            ops += 1
+        except sqlite3.OperationalError as e:
+            if not _bloqueada(e):
+                raise
+            bloqueos += 1
+    conexion.close()
+    with lock:
+        totales['operaciones'] += ops
+        totales['bloqueos'] += bloqueos
+
+
+def benchmark_concurrencia(hilos=8, segundos=3.0, escrituras=0.2, filas=20000, perfil=True):
+    """
+    Mide operaciones por segundo de una carga mixta de lecturas y
+    transacciones de escritura concurrentes sobre una base SQLite temporal.
+
+    Args:
+        hilos: Conexiones concurrentes (una por hilo)
+        segundos: Duración de la medición
+        escrituras: Fracción de operaciones que son transacciones de escritura
+        filas: Mensajes iniciales
+        perfil: True aplica PRAGMAS y BEGIN IMMEDIATE; False usa los valores
+                por defecto de SQLite (journal DELETE, BEGIN diferido)
+
+    Returns:
+        dict: operaciones, bloqueos ("database is locked") y ops_por_segundo
+    """
+    directorio = tempfile.mkdtemp(prefix='benchmark_sqlite_')
+    ruta = os.path.join(directorio, 'benchmark.sqlite3')
+    try:
+        conexion = _conectar(ruta, perfil)
+        for sentencia in ESQUEMA_BENCHMARK:
+            conexion.execute(sentencia)
+        conexion.execute('BEGIN')
+        conexion.executemany(
+            'INSERT INTO mensaje (conversacion, autor, contenido, creado) VALUES (?, ?, ?, ?)',
+            ((i % 50, i % 500, 'Mensaje inicial', float(i)) for i in range(filas)),
+        )
+        conexion.execute('COMMIT')
+        conexion.close()
+
+        totales = {'operaciones': 0, 'bloqueos': 0}
+        lock = threading.Lock()
+        hasta = time.perf_counter() + segundos
+        hilos_activos = [
+            threading.Thread(
+                target=_trabajador_benchmark,
+                args=(ruta, perfil, hasta, escrituras, semilla, totales, lock),
+            )
+            for semilla in range(hilos)
+        ]
+        for hilo in hilos_activos:
+            hilo.start()
+        for hilo in hilos_activos:
+            hilo.join()
+    finally:
+        for nombre in os.listdir(directorio):
+            os.remove(os.path.join(directorio, nombre))
+        os.rmdir(directorio)
+
+    return {**totales, 'ops_por_segundo': round(totales['operaciones'] / segundos, 1)}
@@ -1,5 +1,10 @@
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
 from django.contrib.auth.models import User
+from django.http import Http404
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path
 from .models import (
     TrabajadorPerfil,
     Competencia,
@@ -14,6 +19,8 @@ from .models import (
     CertificacionTrabajador,
     ExperienciaTrabajador,
 )
+from .utils_busqueda import filtro_busqueda
+from .utils_importacion import lanzar_importacion, leer_csv, resultado_importacion
 
 
 class CompetenciaInline(admin.TabularInline):
@@ -24,6 +31,7 @@ class CompetenciaInline(admin.TabularInline):
 class CertificacionInline(admin.TabularInline):
     model = CertificacionTrabajador
     extra = 1
+    readonly_fields = ('aviso_vencimiento',)
 
 
 class ExperienciaInline(admin.TabularInline):
@@ -40,14 +48,98 @@ def regenerar_usuarios(modeladmin, request, queryset):
             pass
 
 
+class ImportarTrabajadoresForm(forms.Form):
+    archivo = forms.FileField(
+        label='Archivo CSV o XLSX',
+        help_text='Columnas: rut, nombre, apellido, email y opcionales telefono, direccion, '
+                  'fecha_nacimiento, tipo_trabajador, especialidad, fecha_ingreso, anos_experiencia.',
+    )
+
+    def clean_archivo(self):
+        archivo = self.cleaned_data['archivo']
+        if not archivo.name.lower().endswith(('.xlsx', '.xlsm')):
+            # Leer el CSV completo antes de importar: un error de formato a
+            # mitad del archivo dejaría confirmados los lotes anteriores
+            try:
+                for _ in leer_csv(archivo.file):
+                    pass
+            except ValueError as e:
+                raise forms.ValidationError(str(e))
+            archivo.file.seek(0)
+        return archivo
+
+
 @admin.register(Trabajador)
 class TrabajadorAdmin(admin.ModelAdmin):
     list_display = ('rut', 'nombre', 'apellido', 'email', 'tipo_trabajador', 'estado', 'activo', 'has_user')
-    list_filter = ('tipo_trabajador', 'especialidad', 'estado', 'activo')
+    list_filter = ('tipo_trabajador', 'especialidad', 'estado', 'ocupado', 'activo')
     search_fields = ('rut', 'nombre', 'apellido', 'email')
     inlines = [CompetenciaInline, CertificacionInline, ExperienciaInline]
     actions = [regenerar_usuarios]
     readonly_fields = ('username_display', 'initial_password_info')
+    change_list_template = 'admin/personal/trabajador/change_list.html'
+
+    def get_urls(self):
+        urls = [
+            path(
+                'importar/',
+                self.admin_site.admin_view(self.importar_view),
+                name='personal_trabajador_importar',
+            ),
+            path(
+                'importar/<str:trabajo>/',
+                self.admin_site.admin_view(self.estado_importacion_view),
+                name='personal_trabajador_importar_estado',
+            ),
+        ]
+        return urls + super().get_urls()
+
+    def importar_view(self, request):
+        """Carga masiva de trabajadores en segundo plano (ver `utils_importacion`)."""
+        if not self.has_add_permission(request):
+            return redirect('admin:personal_trabajador_changelist')
+
+        form = ImportarTrabajadoresForm(request.POST or None, request.FILES or None)
+        if request.method == 'POST' and form.is_valid():
+            trabajo = lanzar_importacion(form.cleaned_data['archivo'])
+            return redirect('admin:personal_trabajador_importar_estado', trabajo=trabajo)
+        return self._importar_response(request, form=form)
+
+    def estado_importacion_view(self, request, trabajo):
+        """Estado de una importación lanzada desde `importar_view`."""
+        if not self.has_add_permission(request):
+            return redirect('admin:personal_trabajador_changelist')
+        try:
+            resultado = resultado_importacion(trabajo)
+        except ValueError:
+            raise Http404('Importación desconocida')
+
+        if resultado is None:
+            return self._importar_response(request, en_curso=True)
+        if resultado.get('error'):
+            messages.error(request, f"La importación falló: {resultado['error']}")
+        else:
+            messages.success(request, f"Trabajadores creados: {resultado['creados']}.")
+            if resultado['errores']:
+                messages.warning(request, f"{len(resultado['errores'])} fila(s) no se importaron.")
+        return self._importar_response(
+            request, form=ImportarTrabajadoresForm(), errores=resultado.get('errores', []),
+        )
+
+    def _importar_response(self, request, **extra):
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': 'Importar trabajadores',
+            **extra,
+        }
+        return TemplateResponse(request, 'admin/personal/trabajador/importar.html', context)
+
+    def get_search_results(self, request, queryset, search_term):
+        # Usa el índice de búsqueda en vez de LIKE '%x%' sobre cada campo
+        if not search_term:
+            return queryset, False
+        return queryset.filter(filtro_busqueda(search_term)), False
 
     def has_user(self, obj):
         return bool(obj.user)
@@ -1,4 +1,16 @@
-from django.apps import AppConfig
+from django.apps import AppConfig, apps as global_apps
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models.signals import post_migrate
+
+
+GRUPOS = ('Trabajador', 'LiderCuadrilla', 'JefeProyecto')
+
+
+def crear_grupos(sender, using=DEFAULT_DB_ALIAS, apps=global_apps, **kwargs):
+    """Asegura que los grupos necesarios existen tras cada `migrate`."""
+    Group = apps.get_model('auth', 'Group')
+    for nombre in GRUPOS:
+        Group.objects.using(using).get_or_create(name=nombre)
 
 
 class PersonalConfig(AppConfig):
@@ -7,15 +19,8 @@ class PersonalConfig(AppConfig):
 
     def ready(self):
         # importar signals para que se registren
-        try:
-            import personal.signals
-            # Asegurar que los grupos necesarios existen. Mantener simple y seguro.
-            from django.contrib.auth.models import Group
-            from django.db import connection
-            # Solo crear grupos si las migraciones están completas
-            if 'auth_group' in connection.introspection.table_names():
-                Group.objects.get_or_create(name='Trabajador')
-                Group.objects.get_or_create(name='LiderCuadrilla')
-                Group.objects.get_or_create(name='JefeProyecto')
-        except Exception:
-            pass
+        import personal.signals
+        # Los grupos se crean al migrar y no al arrancar: consultar la base en
+        # ready() abriría la conexión (o el pool de PostgreSQL) antes de que
+        # los tests cambien a la base de prueba
+        post_migrate.connect(crear_grupos, sender=self)
@@ -57,6 +57,15 @@ class EstadosSolicitud:
 # ===================================================================
 # MENSAJES DEL SISTEMA
 # ===================================================================
+def _resumen(elementos, maximo=5):
+    """Une hasta `maximo` elementos y resume el resto como "y N más"."""
+    elementos = list(elementos)
+    texto = ', '.join(elementos[:maximo])
+    if len(elementos) > maximo:
+        texto += f" y {len(elementos) - maximo} más"
+    return texto + '.'
+
+
 class MensajesNotificacion:
     """Plantillas de mensajes para notificaciones."""
     
@@ -185,6 +194,49 @@ class MensajesNotificacion:
         """Mensaje cuando un usuario no tiene permiso para quitar trabajadores."""
         return 'No tienes permiso para quitar a este trabajador.'
 
+    @staticmethod
+    def certificaciones_propias(aviso, certificaciones):
+        """
+        Mensaje al trabajador sobre sus certificaciones por vencer o vencidas.
+
+        Args:
+            aviso: AvisosCertificacion.POR_VENCER o AvisosCertificacion.VENCIDA
+            certificaciones: Lista de tuplas (nombre, fecha_expiracion)
+        """
+        if len(certificaciones) == 1:
+            nombre, fecha = certificaciones[0]
+            verbo = 'vence' if aviso == AvisosCertificacion.POR_VENCER else 'venció'
+            return f"Tu certificación '{nombre}' {verbo} el {fecha:%d/%m/%Y}."
+        estado = 'por vencer' if aviso == AvisosCertificacion.POR_VENCER else 'vencidas'
+        return (
+            f"Tienes {len(certificaciones)} certificaciones {estado}: "
+            + _resumen(f"{nombre} ({fecha:%d/%m/%Y})" for nombre, fecha in certificaciones)
+        )
+
+    @staticmethod
+    def certificaciones_equipo(aviso, detalle):
+        """
+        Mensaje a líderes y jefes sobre certificaciones de su personal.
+
+        Args:
+            aviso: AvisosCertificacion.POR_VENCER o AvisosCertificacion.VENCIDA
+            detalle: Lista de textos "Trabajador: certificación (fecha)"
+        """
+        estado = 'por vencer' if aviso == AvisosCertificacion.POR_VENCER else 'vencidas'
+        return f"Certificaciones {estado} en tu equipo ({len(detalle)}): " + _resumen(detalle)
+
+
+# ===================================================================
+# AVISOS DE CERTIFICACIONES
+# ===================================================================
+class AvisosCertificacion:
+    """Avisos de vencimiento de certificaciones (campo aviso_vencimiento)."""
+    POR_VENCER = 'por_vencer'
+    VENCIDA = 'vencida'
+
+    # Días de anticipación con que se avisa un vencimiento próximo
+    DIAS_ANTICIPACION = 30
+
 
 # ===================================================================
 # MENSAJES DE ERROR
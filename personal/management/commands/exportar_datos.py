@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from personal.utils_exportacion import CONJUNTOS, FORMATOS, TAMANO_BLOQUE, exportar
+
+
+class Command(BaseCommand):
+    help = "Exporta trabajadores, asignaciones o proyectos a CSV o JSON Lines, fila a fila."
+
+    def add_arguments(self, parser):
+        parser.add_argument('conjunto', choices=sorted(CONJUNTOS))
+        parser.add_argument('--formato', choices=sorted(FORMATOS), default='csv')
+        parser.add_argument('--salida', help='Archivo de salida (por defecto, la salida estándar)')
+        parser.add_argument(
+            '--bloque', type=int, default=TAMANO_BLOQUE,
+            help=f'Filas leídas por bloque (por defecto {TAMANO_BLOQUE})',
+        )
+
+    def handle(self, *args, **options):
+        lineas = exportar(options['conjunto'], options['formato'], tamano_bloque=options['bloque'])
+        if options['salida']:
+            with open(options['salida'], 'w', encoding='utf-8', newline='') as archivo:
+                archivo.writelines(lineas)
+            self.stderr.write(self.style.SUCCESS(f"Exportado a {options['salida']}"))
+        else:
+            for linea in lineas:
+                self.stdout.write(linea, ending='')
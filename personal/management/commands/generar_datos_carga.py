@@ -0,0 +1,53 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from personal.utils_datos_sinteticos import PASSWORD, TAMANO_LOTE, generar_datos
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera datos sintéticos deterministas (según la semilla) para pruebas de carga: "
+        "proyectos, cuadrillas, trabajadores, competencias, certificaciones, chats con "
+        "mensajes, chats archivados, notificaciones, solicitudes e incidentes. "
+        f"Contraseña de todos los usuarios: {PASSWORD}"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--proyectos', type=int, default=10, help='Cantidad de proyectos (por defecto 10)')
+        parser.add_argument('--cuadrillas', type=int, default=3, help='Cuadrillas por proyecto (por defecto 3)')
+        parser.add_argument('--trabajadores', type=int, default=300, help='Total de trabajadores (por defecto 300)')
+        parser.add_argument('--mensajes', type=int, default=5000, help='Total de mensajes (por defecto 5000)')
+        parser.add_argument('--notificaciones', type=int, default=None, help='Por defecto, 2 por trabajador')
+        parser.add_argument('--solicitudes', type=int, default=None, help='Por defecto, 1 cada 10 trabajadores')
+        parser.add_argument('--incidentes', type=int, default=None, help='Por defecto, 2 por cuadrilla')
+        parser.add_argument('--archivados', type=int, default=None, help='Por defecto, 1 por cuadrilla')
+        parser.add_argument('--semilla', type=int, default=1, help='Semilla aleatoria (por defecto 1)')
+        parser.add_argument(
+            '--lote', type=int, default=TAMANO_LOTE,
+            help=f'Filas por lote (por defecto {TAMANO_LOTE})',
+        )
+
+    def handle(self, *args, **options):
+        inicio = time.monotonic()
+        try:
+            conteos = generar_datos(
+                proyectos=options['proyectos'],
+                cuadrillas=options['cuadrillas'],
+                trabajadores=options['trabajadores'],
+                mensajes=options['mensajes'],
+                notificaciones=options['notificaciones'],
+                solicitudes=options['solicitudes'],
+                incidentes=options['incidentes'],
+                archivados=options['archivados'],
+                semilla=options['semilla'],
+                tamano_lote=options['lote'],
+                progreso=lambda texto: self.stdout.write(texto) if options['verbosity'] > 1 else None,
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        resumen = ' · '.join(f'{entidad}: {cantidad}' for entidad, cantidad in conteos.items())
+        self.stdout.write(self.style.SUCCESS(
+            f'{resumen} ({time.monotonic() - inicio:.1f} s)'
+        ))
@@ -0,0 +1,66 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from personal.utils_importacion import (
+    TAMANO_LOTE,
+    guardar_resultado,
+    importar_trabajadores,
+    leer_filas,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Importa trabajadores desde un CSV o XLSX (columnas: rut, nombre, apellido, "
+        "email y opcionales telefono, direccion, fecha_nacimiento, tipo_trabajador, "
+        "especialidad, fecha_ingreso, anos_experiencia)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help='Ruta del archivo .csv o .xlsx')
+        parser.add_argument(
+            '--lote', type=int, default=TAMANO_LOTE,
+            help=f'Filas por lote (por defecto {TAMANO_LOTE})',
+        )
+        parser.add_argument(
+            '--procesos', type=int, default=None,
+            help='Procesos para hashear contraseñas (por defecto, uno por CPU)',
+        )
+        parser.add_argument(
+            '--resultado', default=None,
+            help='Guarda el resultado como JSON en esta ruta (usado por el admin)',
+        )
+        parser.add_argument(
+            '--borrar', action='store_true',
+            help='Borra el archivo al terminar',
+        )
+
+    def handle(self, *args, **options):
+        ruta = options['archivo']
+        try:
+            with open(ruta, 'rb') as archivo:
+                resultado = importar_trabajadores(
+                    leer_filas(archivo, ruta),
+                    tamano_lote=options['lote'],
+                    procesos=options['procesos'],
+                )
+        except Exception as e:
+            # Cualquier fallo queda en el resultado: la página de estado no
+            # tiene otra forma de saber que el proceso terminó
+            if options['resultado']:
+                guardar_resultado(options['resultado'], error=str(e) or type(e).__name__)
+            if isinstance(e, (OSError, ValueError)):
+                raise CommandError(str(e))
+            raise
+        finally:
+            if options['borrar'] and os.path.exists(ruta):
+                os.remove(ruta)
+
+        if options['resultado']:
+            guardar_resultado(options['resultado'], resultado)
+        for numero, mensaje in resultado.errores:
+            self.stderr.write(f'Fila {numero}: {mensaje}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Trabajadores creados: {resultado.creados} · Filas con error: {len(resultado.errores)}'
+        ))
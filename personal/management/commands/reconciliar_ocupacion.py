@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from personal.utils_ocupacion import recalcular_ocupacion, trabajadores_desfasados
+
+
+class Command(BaseCommand):
+    help = (
+        "Detecta y corrige trabajadores cuya columna `ocupado` no coincide con "
+        "sus asignaciones (p. ej. tras cambios masivos hechos fuera de la aplicación)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--solo-verificar', action='store_true',
+            help='Solo informa cuántos trabajadores están desfasados, sin corregirlos',
+        )
+
+    def handle(self, *args, **options):
+        if options['solo_verificar']:
+            desfasados = trabajadores_desfasados().count()
+            estilo = self.style.WARNING if desfasados else self.style.SUCCESS
+            self.stdout.write(estilo(f"Trabajadores desfasados: {desfasados}"))
+            return
+
+        corregidos = recalcular_ocupacion()
+        self.stdout.write(self.style.SUCCESS(f"Trabajadores corregidos: {corregidos}"))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from personal.utils_busqueda import TAMANO_LOTE, fts_disponible, reconstruir_indice
+
+
+class Command(BaseCommand):
+    help = "Reconstruye el índice de búsqueda de trabajadores (FTS5 en SQLite)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--lote', type=int, default=TAMANO_LOTE,
+            help=f'Trabajadores por lote (por defecto {TAMANO_LOTE})',
+        )
+
+    def handle(self, *args, **options):
+        total = reconstruir_indice(tamano_lote=options['lote'])
+        motor = 'FTS5' if fts_disponible() else 'documentos sin FTS5'
+        self.stdout.write(self.style.SUCCESS(f'Índice reconstruido ({motor}): {total} trabajadores'))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from personal.constants import AvisosCertificacion
+from personal.utils_certificaciones import TAMANO_LOTE, revisar_vencimientos
+
+
+class Command(BaseCommand):
+    help = (
+        "Notifica certificaciones por vencer y vencidas al trabajador, su líder "
+        "y el jefe de proyecto. Pensado para ejecutarse a diario (cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dias', type=int, default=AvisosCertificacion.DIAS_ANTICIPACION,
+            help=f'Días de anticipación del aviso (por defecto {AvisosCertificacion.DIAS_ANTICIPACION})',
+        )
+        parser.add_argument(
+            '--lote', type=int, default=TAMANO_LOTE,
+            help=f'Certificaciones por lote (por defecto {TAMANO_LOTE})',
+        )
+
+    def handle(self, *args, **options):
+        resultado = revisar_vencimientos(dias=options['dias'], tamano_lote=options['lote'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Por vencer: {resultado['por_vencer']} · Vencidas: {resultado['vencidas']} · "
+            f"Notificaciones: {resultado['notificaciones']} · "
+            f"Avisos restablecidos: {resultado['restablecidas']}"
+        ))
@@ -2,6 +2,30 @@ from django.shortcuts import redirect
 from django.urls import reverse
 from django.conf import settings
 
+from .utils_acceso import AccesoUsuario, obtener_acceso
+from .utils_notificaciones import (
+    iniciar_notificaciones_diferidas, descartar_notificaciones_diferidas,
+    vaciar_notificaciones_diferidas,
+)
+
+
+class AccesoUsuarioMiddleware:
+    """
+    Middleware que adjunta a la petición el snapshot de roles y pertenencias
+    del usuario (`request.acceso`, ver `personal.utils_acceso`).
+    Debe ir después de `AuthenticationMiddleware`. Los helpers de permisos lo
+    leen desde `request.user`, por lo que cada dato se consulta una sola vez
+    por petición.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        acceso = AccesoUsuario(request.user)
+        request.acceso = acceso
+        request.user._acceso = acceso
+        return self.get_response(request)
+
 
 class ForcePasswordChangeMiddleware:
     """
@@ -19,7 +43,7 @@ class ForcePasswordChangeMiddleware:
         # Solo aplica si hay usuario autenticado
         if request.user.is_authenticated:
             # Evitar errores si no tiene relación con Trabajador
-            trabajador = getattr(request.user, 'trabajador_profile', None)
+            trabajador = obtener_acceso(request.user).trabajador
             if trabajador and trabajador.password_inicial:
                 path = request.path
                 # Intentamos obtener rutas conocidas; si no existen, ignoramos reverses
@@ -41,3 +65,23 @@ class ForcePasswordChangeMiddleware:
                 if not any(path.startswith(pref) for pref in allowed_prefixes):
                     return redirect('password_change')
         return self.get_response(request)
+
+
+class NotificacionesDiferidasMiddleware:
+    """
+    Middleware que abre un buffer de notificaciones por petición.
+    Las notificaciones creadas con `diferido=True` se escriben con un único
+    `bulk_create` antes de devolver la respuesta, solo las de transacciones
+    confirmadas. Si la vista lanza una excepción se descartan.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        iniciar_notificaciones_diferidas()
+        response = self.get_response(request)
+        vaciar_notificaciones_diferidas()
+        return response
+
+    def process_exception(self, request, exception):
+        descartar_notificaciones_diferidas()
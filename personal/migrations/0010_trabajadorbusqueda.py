@@ -0,0 +1,135 @@
+# Generated by Django 5.2.7 on 2026-10-17 02:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+FTS = "personal_trabajador_fts"
+CONTENIDO = "personal_trabajadorbusqueda"
+
+# Tabla FTS5 "external content": el texto vive en personal_trabajadorbusqueda
+# y los triggers mantienen el índice invertido sincronizado.
+SQLITE_CREAR = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS} USING fts5(
+        documento,
+        content='{CONTENIDO}',
+        content_rowid='trabajador_id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS}_ai AFTER INSERT ON {CONTENIDO} BEGIN
+        INSERT INTO {FTS}(rowid, documento) VALUES (new.trabajador_id, new.documento);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS}_ad AFTER DELETE ON {CONTENIDO} BEGIN
+        INSERT INTO {FTS}({FTS}, rowid, documento) VALUES ('delete', old.trabajador_id, old.documento);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS}_au AFTER UPDATE ON {CONTENIDO} BEGIN
+        INSERT INTO {FTS}({FTS}, rowid, documento) VALUES ('delete', old.trabajador_id, old.documento);
+        INSERT INTO {FTS}(rowid, documento) VALUES (new.trabajador_id, new.documento);
+    END
+    """,
+]
+
+SQLITE_BORRAR = [
+    f"DROP TRIGGER IF EXISTS {FTS}_ai",
+    f"DROP TRIGGER IF EXISTS {FTS}_ad",
+    f"DROP TRIGGER IF EXISTS {FTS}_au",
+    f"DROP TABLE IF EXISTS {FTS}",
+]
+
+POSTGRES_CREAR = [
+    f"CREATE INDEX IF NOT EXISTS {CONTENIDO}_fts_idx ON {CONTENIDO} "
+    "USING GIN (to_tsvector('simple'::regconfig, COALESCE(documento, '')))",
+]
+
+POSTGRES_BORRAR = [
+    f"DROP INDEX IF EXISTS {CONTENIDO}_fts_idx",
+]
+
+
+def _ejecutar(schema_editor, sentencias):
+    for sql in sentencias:
+        schema_editor.execute(sql)
+
+
+def crear_indice(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        _ejecutar(schema_editor, SQLITE_CREAR)
+    elif vendor == "postgresql":
+        _ejecutar(schema_editor, POSTGRES_CREAR)
+
+
+def borrar_indice(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        _ejecutar(schema_editor, SQLITE_BORRAR)
+    elif vendor == "postgresql":
+        _ejecutar(schema_editor, POSTGRES_BORRAR)
+
+
+def poblar_indice(apps, schema_editor):
+    """Indexa los trabajadores existentes por lotes."""
+    from personal.utils_busqueda import TAMANO_LOTE, construir_documentos
+
+    Trabajador = apps.get_model("personal", "Trabajador")
+    modelos = (
+        Trabajador,
+        apps.get_model("personal", "CompetenciaTrabajador"),
+        apps.get_model("personal", "CertificacionTrabajador"),
+    )
+    TrabajadorBusqueda = apps.get_model("personal", "TrabajadorBusqueda")
+    db = schema_editor.connection.alias
+
+    ultimo = 0
+    while True:
+        ids = list(
+            Trabajador.objects.using(db).filter(id__gt=ultimo)
+            .order_by("id").values_list("id", flat=True)[:TAMANO_LOTE]
+        )
+        if not ids:
+            break
+        documentos = construir_documentos(ids, modelos=modelos)
+        TrabajadorBusqueda.objects.using(db).bulk_create(
+            [TrabajadorBusqueda(trabajador_id=tid, documento=doc) for tid, doc in documentos.items()]
+        )
+        ultimo = ids[-1]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("personal", "0009_trabajador_manual_override"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TrabajadorBusqueda",
+            fields=[
+                (
+                    "trabajador",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="indice_busqueda",
+                        serialize=False,
+                        to="personal.trabajador",
+                    ),
+                ),
+                ("documento", models.TextField(blank=True, default="")),
+                ("actualizado", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name": "Índice de búsqueda de trabajador",
+                "verbose_name_plural": "Índice de búsqueda de trabajadores",
+            },
+        ),
+        migrations.RunPython(crear_indice, borrar_indice),
+        migrations.RunPython(poblar_indice, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.7 on 2026-10-17 02:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('personal', '0010_trabajadorbusqueda'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='certificaciontrabajador',
+            name='aviso_vencimiento',
+            field=models.CharField(blank=True, choices=[('por_vencer', 'Aviso de vencimiento próximo'), ('vencida', 'Aviso de vencimiento')], default='', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='certificaciontrabajador',
+            index=models.Index(fields=['fecha_expiracion'], name='cert_trab_expiracion_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='certificaciontrabajador',
+            index=models.Index(fields=['trabajador', 'fecha_expiracion'], name='cert_trab_trab_exp_idx'),
+        ),
+    ]
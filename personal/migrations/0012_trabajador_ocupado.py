@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-17 02:22
+
+from django.db import migrations, models
+from django.db.models import Exists, OuterRef
+
+
+def calcular_ocupacion(apps, schema_editor):
+    """Inicializa la columna con las asignaciones existentes (un UPDATE)."""
+    Trabajador = apps.get_model('personal', 'Trabajador')
+    Asignacion = apps.get_model('personal', 'Asignacion')
+    db = schema_editor.connection.alias
+    Trabajador.objects.using(db).update(ocupado=Exists(
+        Asignacion.objects.using(db).filter(
+            trabajador_id=OuterRef('user_id'), cuadrilla__proyecto__activo=True
+        )
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('personal', '0011_certificacion_vencimiento'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trabajador',
+            name='ocupado',
+            field=models.BooleanField(db_index=True, default=False, editable=False),
+        ),
+        migrations.RunPython(calcular_ocupacion, migrations.RunPython.noop),
+    ]
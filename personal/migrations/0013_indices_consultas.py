@@ -0,0 +1,36 @@
+# Generated by Django 5.2.7 on 2026-10-17 02:24
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('personal', '0012_trabajador_ocupado'),
+        ('proyectos', '0004_proyecto_created_at_proyecto_created_by'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='asignacion',
+            index=models.Index(fields=['trabajador', 'cuadrilla'], name='asig_trab_cuadrilla_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cuadrilla',
+            index=models.Index(fields=['lider', 'proyecto'], name='cuadrilla_lider_proy_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notificacion',
+            index=models.Index(fields=['user', 'leida', '-fecha'], name='notif_user_leida_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notificacion',
+            index=models.Index(condition=models.Q(('leida', False)), fields=['user'], name='notif_no_leidas_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trabajador',
+            index=models.Index(condition=models.Q(('activo', True)), fields=['tipo_trabajador', 'estado'], name='trab_activo_tipo_estado_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-17 04:10
+
+from django.db import migrations
+from django.db.models import Exists, OuterRef
+
+
+def recalcular_ocupacion(apps, schema_editor):
+    """
+    Vuelve a calcular la columna con la regla de `_lider_ocupado` (cuadrilla
+    con proyecto, activo o no). 0012 la llenó con la regla anterior (solo
+    proyectos activos).
+    """
+    Trabajador = apps.get_model('personal', 'Trabajador')
+    Asignacion = apps.get_model('personal', 'Asignacion')
+    db = schema_editor.connection.alias
+    Trabajador.objects.using(db).update(ocupado=Exists(
+        Asignacion.objects.using(db).filter(
+            trabajador_id=OuterRef('user_id'), cuadrilla__proyecto__isnull=False
+        )
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('personal', '0013_indices_consultas'),
+    ]
+
+    operations = [
+        migrations.RunPython(recalcular_ocupacion, migrations.RunPython.noop),
+    ]
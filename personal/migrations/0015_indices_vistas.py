@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-17 03:21
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('personal', '0014_recalcular_ocupacion'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='notificacion',
+            name='notif_no_leidas_idx',
+        ),
+    ]
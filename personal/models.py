@@ -1,13 +1,26 @@
+from datetime import timedelta
+
 from django.db import models
+from django.db.models import Case, Exists, F, OuterRef, Q, Value, When
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import User
+from django.utils import timezone
 from django.core.exceptions import ValidationError
 from django.core.validators import RegexValidator
 from proyectos.models import Proyecto
+from .constants import AvisosCertificacion, EstadosTrabajador
 
 class Cuadrilla(models.Model):
     nombre = models.CharField(max_length=100)
     proyecto = models.ForeignKey(Proyecto, on_delete=models.CASCADE, related_name='cuadrillas', null=True, blank=True)
-    lider = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='cuadrillas_lideradas')
+    # Sin índice propio: lo cubre el índice compuesto que empieza por esta columna
+    lider = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='cuadrillas_lideradas', db_index=False)
+
+    class Meta:
+        indexes = [
+            # Cuadrillas de un líder, con o sin proyecto (panel, disponibilidad de líderes)
+            models.Index(fields=['lider', 'proyecto'], name='cuadrilla_lider_proy_idx'),
+        ]
 
     def __str__(self):
         return f"{self.nombre} ({self.proyecto.nombre if self.proyecto else 'Sin proyecto'})"
@@ -21,14 +34,44 @@ class Rol(models.Model):
 
 
 class Asignacion(models.Model):
-    trabajador = models.ForeignKey(User, on_delete=models.CASCADE)
+    # Sin índice propio: lo cubre el índice compuesto que empieza por esta columna
+    trabajador = models.ForeignKey(User, on_delete=models.CASCADE, db_index=False)
     cuadrilla = models.ForeignKey(Cuadrilla, on_delete=models.CASCADE, related_name='asignaciones')
     rol = models.ForeignKey(Rol, on_delete=models.SET_NULL, null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            # ¿Está el usuario en esta cuadrilla? / cuadrillas de un trabajador
+            models.Index(fields=['trabajador', 'cuadrilla'], name='asig_trab_cuadrilla_idx'),
+        ]
+
     def __str__(self):
         return f"{self.trabajador.username} → {self.rol.nombre if self.rol else 'Sin rol'}"
 
 
+class TrabajadorPerfilQuerySet(models.QuerySet):
+
+    def with_disponibilidad(self):
+        """
+        Anota `disponibilidad` con las reglas de `obtener_disponibilidad_trabajador`:
+        override manual del Trabajador → su `estado`; con alguna asignación →
+        'ocupado'; si no, `estado_manual`.
+        """
+        return self.annotate(
+            disponibilidad=Case(
+                When(
+                    user__trabajador_profile__manual_override=True,
+                    then=F('user__trabajador_profile__estado'),
+                ),
+                When(
+                    Exists(Asignacion.objects.filter(trabajador_id=OuterRef('user_id'))),
+                    then=Value('ocupado'),
+                ),
+                default=F('estado_manual'),
+            ),
+        )
+
+
 # Perfil extendido del trabajador
 class TrabajadorPerfil(models.Model):
     user = models.OneToOneField(
@@ -52,16 +95,25 @@ class TrabajadorPerfil(models.Model):
     def __str__(self):
         return self.user.username
 
+    objects = TrabajadorPerfilQuerySet.as_manager()
+
     @property
     def estado_efectivo(self):
         """
-        Si el trabajador tiene alguna asignación activa, lo consideramos 'ocupado'.
-        Si no, usamos el estado_manual.
+        Disponibilidad efectiva: 'ocupado' si tiene alguna asignación; si no,
+        el estado_manual (y el estado del Trabajador si tiene override manual).
+
+        Los perfiles obtenidos con `TrabajadorPerfil.objects.with_disponibilidad()`
+        traen el valor anotado y no consultan; en otro caso se resuelve con
+        una consulta en cada acceso (sin guardarla: la instancia puede vivir
+        más que el dato, p. ej. tras crear o quitar una asignación).
         """
-        asignado = Asignacion.objects.filter(trabajador=self.user).exists()
-        if asignado:
-            return 'ocupado'
-        return self.estado_manual
+        if 'disponibilidad' in self.__dict__:
+            return self.disponibilidad
+        return (
+            TrabajadorPerfil.objects.with_disponibilidad()
+            .values_list('disponibilidad', flat=True).get(pk=self.pk)
+        )
 
 
 # Competencias por trabajador (p.ej. "Soldadura certificada")
@@ -145,6 +197,62 @@ def rut_valido(value):
         raise ValidationError('El RUT debe contener exactamente 9 dígitos numéricos')
 
 
+class TrabajadorQuerySet(models.QuerySet):
+
+    def with_disponibilidad(self):
+        """
+        Anota en SQL la disponibilidad de cada trabajador, para poder filtrar,
+        ordenar y paginar por ella sin cargar los trabajadores en memoria.
+
+        Anotaciones agregadas:
+        - esta_ocupado: bool (mismas reglas que `esta_trabajador_ocupado`)
+        - estado_real: str (mismas reglas que `obtener_disponibilidad_trabajador`;
+          un perfil inexistente cuenta como 'disponible')
+        - disponibilidad: 'ocupado' si esta_ocupado, si no estado_real
+        - tiene_certificaciones: bool
+        - tiene_certificaciones_vigentes: bool (`CertificacionTrabajador.objects.vigentes()`)
+        """
+        asignado = Exists(Asignacion.objects.filter(trabajador_id=OuterRef('user_id')))
+        return self.annotate(
+            esta_ocupado=Case(
+                When(manual_override=True, then=Value(False)),
+                When(user__isnull=True, then=Value(False)),
+                default=F('ocupado'),
+            ),
+            estado_real=Case(
+                When(manual_override=True, then=F('estado')),
+                When(user__isnull=True, then=Value('—')),
+                When(asignado, then=Value('ocupado')),
+                default=Coalesce(
+                    F('user__perfil_trabajador__estado_manual'),
+                    Value(EstadosTrabajador.DISPONIBLE),
+                ),
+            ),
+            tiene_certificaciones=Exists(
+                CertificacionTrabajador.objects.filter(trabajador_id=OuterRef('pk'))
+            ),
+            tiene_certificaciones_vigentes=Exists(
+                CertificacionTrabajador.objects.vigentes().filter(trabajador_id=OuterRef('pk'))
+            ),
+        ).annotate(
+            disponibilidad=Case(
+                When(esta_ocupado=True, then=Value('ocupado')),
+                default=F('estado_real'),
+            ),
+        )
+
+    def _con_disponibilidad(self):
+        if 'disponibilidad' in self.query.annotations:
+            return self
+        return self.with_disponibilidad()
+
+    def asignables(self):
+        """Solo los que se pueden asignar: no ocupados ni en un estado no asignable."""
+        return self._con_disponibilidad().filter(esta_ocupado=False).exclude(
+            estado_real__in=EstadosTrabajador.ESTADOS_NO_ASIGNABLES
+        )
+
+
 class Trabajador(models.Model):
     TIPO_CHOICES = [
         ('trabajador', 'Trabajador'),
@@ -185,13 +293,26 @@ class Trabajador(models.Model):
     password_inicial = models.BooleanField(default=False)
     # Si True, el campo `estado` en este modelo tiene prioridad sobre la lógica automática
     manual_override = models.BooleanField(default=False)
+    # Asignado a una cuadrilla con proyecto. Columna desnormalizada que
+    # mantiene personal/utils_ocupacion.py (no se edita a mano).
+    ocupado = models.BooleanField(default=False, db_index=True, editable=False)
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = TrabajadorQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Trabajador'
         verbose_name_plural = 'Trabajadores'
+        indexes = [
+            # Índice parcial: los listados y contadores solo consideran trabajadores activos
+            models.Index(
+                fields=['tipo_trabajador', 'estado'],
+                condition=Q(activo=True),
+                name='trab_activo_tipo_estado_idx',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.rut} - {self.nombre} {self.apellido}"
@@ -270,18 +391,54 @@ class CompetenciaTrabajador(models.Model):
         return f"{self.nombre} ({self.trabajador.rut})"
 
 
+class CertificacionTrabajadorQuerySet(models.QuerySet):
+    """Filtros por vigencia resueltos en SQL (usan el índice de fecha_expiracion)."""
+
+    def vigentes(self, fecha=None):
+        """Sin fecha de expiración o que expiran en `fecha` (hoy) o después."""
+        fecha = fecha or timezone.localdate()
+        return self.filter(Q(fecha_expiracion__isnull=True) | Q(fecha_expiracion__gte=fecha))
+
+    def vencidas(self, fecha=None):
+        """Con fecha de expiración anterior a `fecha` (hoy)."""
+        fecha = fecha or timezone.localdate()
+        return self.filter(fecha_expiracion__lt=fecha)
+
+    def por_vencer(self, dias, fecha=None):
+        """Aún vigentes que expiran dentro de los próximos `dias` días."""
+        fecha = fecha or timezone.localdate()
+        return self.filter(fecha_expiracion__range=(fecha, fecha + timedelta(days=dias)))
+
+
 class CertificacionTrabajador(models.Model):
-    trabajador = models.ForeignKey(Trabajador, on_delete=models.CASCADE, related_name='certificaciones_trabajador')
+    AVISO_CHOICES = [
+        (AvisosCertificacion.POR_VENCER, 'Aviso de vencimiento próximo'),
+        (AvisosCertificacion.VENCIDA, 'Aviso de vencimiento'),
+    ]
+
+    # Sin índice propio: lo cubre el índice compuesto que empieza por esta columna
+    trabajador = models.ForeignKey(Trabajador, on_delete=models.CASCADE, related_name='certificaciones_trabajador', db_index=False)
     nombre = models.CharField(max_length=150)
     entidad = models.CharField(max_length=150, blank=True, null=True)
     archivo = models.FileField(upload_to='certificaciones/', blank=True, null=True)
     fecha_emision = models.DateField()
     fecha_expiracion = models.DateField(null=True, blank=True)
+    # Último aviso enviado por el barrido `revisar_certificaciones`
+    # (evita repetir la notificación en cada ejecución).
+    aviso_vencimiento = models.CharField(max_length=20, choices=AVISO_CHOICES, blank=True, default='')
+
+    objects = CertificacionTrabajadorQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['fecha_expiracion'], name='cert_trab_expiracion_idx'),
+            models.Index(fields=['trabajador', 'fecha_expiracion'], name='cert_trab_trab_exp_idx'),
+        ]
 
     def vigente(self):
+        # Misma regla que CertificacionTrabajador.objects.vigentes()
         if not self.fecha_expiracion:
             return True
-        from django.utils import timezone
         return self.fecha_expiracion >= timezone.localdate()
 
     def __str__(self):
@@ -301,13 +458,37 @@ class ExperienciaTrabajador(models.Model):
         return f"{self.trabajador.rut} - {self.proyecto or self.empresa_externa or 'Experiencia'}"
     
 
+# Índice de búsqueda de trabajadores (ver personal/utils_busqueda.py).
+# Un documento de texto normalizado por trabajador con nombre, RUT, email,
+# especialidad, competencias y certificaciones. En SQLite lo indexa la tabla
+# virtual FTS5 `personal_trabajador_fts` (creada en la migración 0010).
+class TrabajadorBusqueda(models.Model):
+    trabajador = models.OneToOneField(
+        Trabajador,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='indice_busqueda'
+    )
+    documento = models.TextField(blank=True, default='')
+    actualizado = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Índice de búsqueda de trabajador'
+        verbose_name_plural = 'Índice de búsqueda de trabajadores'
+
+    def __str__(self):
+        return f"Índice {self.trabajador_id}"
+    
+
 #  NOTIFICACIONES INTERNAS DEL SISTEMA
 
 class Notificacion(models.Model):
+    # Sin índice propio: lo cubre el índice compuesto que empieza por esta columna
     user = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
-        related_name="notificaciones"
+        related_name="notificaciones",
+        db_index=False,
     )
 
     mensaje = models.TextField()
@@ -318,6 +499,11 @@ class Notificacion(models.Model):
 
     class Meta:
         ordering = ["-fecha"]
+        indexes = [
+            # Contador de no leídas de cada página (índice de cobertura) y
+            # marcado de leídas
+            models.Index(fields=['user', 'leida', '-fecha'], name='notif_user_leida_fecha_idx'),
+        ]
 
     def __str__(self):
         return f"{self.user.username} -> {self.mensaje[:40]}"
@@ -1,7 +1,16 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.contrib.auth.models import User, Group
-from .models import Trabajador, TrabajadorPerfil
+from core.utils_contadores import CONTADOR_NOTIFICACIONES, invalidar_contadores
+from core.utils_estadisticas import programar_actualizacion
+from proyectos.models import Proyecto
+from .models import (
+    Trabajador, TrabajadorPerfil, CompetenciaTrabajador, CertificacionTrabajador,
+    ExperienciaTrabajador, Asignacion, Cuadrilla, Notificacion,
+)
+from .utils_busqueda import programar_indexacion
+from .utils_recomendacion import invalidar_recomendaciones
+from .utils_ocupacion import recalcular_ocupacion
 
 
 # ============================================================
@@ -92,3 +101,99 @@ def crear_perfil_trabajador(sender, instance, created, **kwargs):
 
     if trabajador:
         TrabajadorPerfil.objects.create(user=instance)
+
+
+# ============================================================
+# 4. Mantener el índice de búsqueda de trabajadores
+# ============================================================
+@receiver(post_save, sender=Trabajador)
+def indexar_trabajador(sender, instance: Trabajador, **kwargs):
+    """Reindexa el trabajador al confirmarse la transacción."""
+    programar_indexacion(instance.pk)
+
+
+@receiver(post_save, sender=CompetenciaTrabajador)
+@receiver(post_delete, sender=CompetenciaTrabajador)
+@receiver(post_save, sender=CertificacionTrabajador)
+@receiver(post_delete, sender=CertificacionTrabajador)
+def indexar_trabajador_relacionado(sender, instance, **kwargs):
+    """Competencias y certificaciones forman parte del documento indexado."""
+    programar_indexacion(instance.trabajador_id)
+
+
+# ============================================================
+# 5. Invalidar los datos del motor de recomendación
+# ============================================================
+@receiver(post_save, sender=Trabajador)
+@receiver(post_delete, sender=Trabajador)
+@receiver(post_save, sender=CompetenciaTrabajador)
+@receiver(post_delete, sender=CompetenciaTrabajador)
+@receiver(post_save, sender=CertificacionTrabajador)
+@receiver(post_delete, sender=CertificacionTrabajador)
+@receiver(post_save, sender=ExperienciaTrabajador)
+@receiver(post_delete, sender=ExperienciaTrabajador)
+def invalidar_datos_recomendacion(sender, **kwargs):
+    """Los arreglos del motor se recargan en la próxima recomendación."""
+    invalidar_recomendaciones()
+
+
+# ============================================================
+# 6. Mantener la ocupación desnormalizada (Trabajador.ocupado)
+# ============================================================
+@receiver(post_save, sender=Asignacion)
+@receiver(post_delete, sender=Asignacion)
+def ocupacion_por_asignacion(sender, instance, **kwargs):
+    recalcular_ocupacion(user_ids=[instance.trabajador_id])
+
+
+@receiver(post_save, sender=Cuadrilla)
+def ocupacion_por_cuadrilla(sender, instance, **kwargs):
+    """La cuadrilla pudo cambiar de proyecto."""
+    recalcular_ocupacion(cuadrilla_ids=[instance.pk])
+
+
+@receiver(post_save, sender=Trabajador)
+def ocupacion_por_trabajador(sender, instance, **kwargs):
+    """
+    Un save() completo pudo escribir un valor leído antes de un cambio, y al
+    crearse puede vincularse a un User que ya tenía asignaciones.
+    """
+    recalcular_ocupacion(trabajador_ids=[instance.pk])
+
+
+# ============================================================
+# 7. Mantener los contadores del dashboard (core.EstadisticasDashboard)
+#    Las asignaciones llegan por recalcular_ocupacion (sección 6)
+# ============================================================
+@receiver(post_save, sender=Proyecto)
+def estadisticas_por_proyecto(sender, **kwargs):
+    programar_actualizacion('proyectos')
+
+
+@receiver(post_delete, sender=Proyecto)
+def estadisticas_por_proyecto_eliminado(sender, **kwargs):
+    """El borrado arrastra sus cuadrillas (y sus asignaciones) sin señales por fila."""
+    programar_actualizacion()
+
+
+@receiver(post_save, sender=Cuadrilla)
+@receiver(post_delete, sender=Cuadrilla)
+def estadisticas_por_cuadrilla(sender, **kwargs):
+    programar_actualizacion('cuadrillas')
+
+
+@receiver(post_save, sender=Trabajador)
+@receiver(post_delete, sender=Trabajador)
+def estadisticas_por_trabajador(sender, **kwargs):
+    """Cambios de estado, tipo o `activo`."""
+    programar_actualizacion('trabajadores')
+
+
+# ============================================================
+# 8. Invalidar el contador de notificaciones no leídas
+#    (las escrituras en bloque lo hacen en utils_notificaciones)
+# ============================================================
+@receiver(post_save, sender=Notificacion)
+@receiver(post_delete, sender=Notificacion)
+def contador_por_notificacion(sender, instance, **kwargs):
+    invalidar_contadores(CONTADOR_NOTIFICACIONES, [instance.user_id])
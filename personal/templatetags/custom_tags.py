@@ -1,5 +1,7 @@
 from django import template
 
+from personal.utils_acceso import obtener_acceso
+
 register = template.Library()
 
 # --- Filtro 1: obtener item desde un diccionario ---
@@ -10,7 +12,7 @@ def get_item(dictionary, key):
 # --- Filtro 2: verificar si el usuario pertenece a un grupo ---
 @register.filter
 def has_group(user, group_name):
-    return user.groups.filter(name=group_name).exists()
+    return obtener_acceso(user).tiene_grupo(group_name)
 
 # --- Filtro opcional (comentado): obtener asignación ---
 # @register.filter
@@ -1,3 +1,959 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import os
+import tempfile
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.contrib.auth.models import User, Group
+from django.utils import timezone
+
+from comunicacion.models import Conversation, IncidentNotice, Message, WorkerRequest
+from proyectos.models import Proyecto
+from .models import (
+    Cuadrilla, Asignacion, Rol, Trabajador, TrabajadorPerfil, CertificacionTrabajador,
+    CompetenciaTrabajador, ExperienciaTrabajador, Notificacion, TrabajadorBusqueda,
+)
+from .utils import (
+    enriquecer_trabajadores_con_info, preparar_lideres_disponibles, validar_disponibilidad_lider,
+    es_jefe_proyecto, es_lider_cuadrilla, puede_gestionar_cuadrilla, puede_ver_cuadrilla,
+    esta_trabajador_ocupado,
+)
+from .utils_acceso import AccesoUsuario
+from .utils_selector import pagina_trabajadores
+from .utils_busqueda import _palabras, filtro_busqueda, fts_disponible, reconstruir_indice
+from .utils_recomendacion import obtener_datos, recomendar_trabajadores
+from .utils_certificaciones import revisar_vencimientos
+from .utils_importacion import importar_trabajadores, leer_csv
+from .utils_exportacion import exportar_trabajadores
+from .utils_asignaciones import aplicar_asignaciones
+from .utils_ocupacion import recalcular_ocupacion, trabajadores_desfasados
+from .utils_datos_sinteticos import digito_verificador, generar_datos
+from .utils_notificaciones import (
+    crear_notificaciones, iniciar_notificaciones_diferidas, vaciar_notificaciones_diferidas
+)
+
+
+FAST_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+
+def crear_trabajador(rut, **extra):
+    """Crea un Trabajador (y su User vía signals) para los tests."""
+    datos = {
+        'rut': rut,
+        'nombre': f'Nombre{rut[-3:]}',
+        'apellido': 'Prueba',
+        'email': f'{rut}@example.com',
+        'tipo_trabajador': 'trabajador',
+    }
+    datos.update(extra)
+    trabajador = Trabajador.objects.create(**datos)
+    trabajador.refresh_from_db()
+    return trabajador
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS)
+class EnriquecerTrabajadoresTest(TestCase):
+    """Tests del cálculo de disponibilidad por lotes."""
+
+    def setUp(self):
+        self.jefe = User.objects.create_user(username='jefe', password='pass')
+        self.proyecto = Proyecto.objects.create(
+            nombre='P1', fecha_inicio=timezone.localdate(), jefe=self.jefe
+        )
+        self.cuad_proyecto = Cuadrilla.objects.create(nombre='C1', proyecto=self.proyecto)
+        self.cuad_libre = Cuadrilla.objects.create(nombre='C2')
+
+        self.libre = crear_trabajador('100000001')
+        self.en_proyecto = crear_trabajador('100000002')
+        self.sin_proyecto = crear_trabajador('100000003')
+        self.manual = crear_trabajador('100000004', estado='vacaciones', manual_override=True)
+
+        Asignacion.objects.create(trabajador=self.en_proyecto.user, cuadrilla=self.cuad_proyecto)
+        Asignacion.objects.create(trabajador=self.sin_proyecto.user, cuadrilla=self.cuad_libre)
+        Asignacion.objects.create(trabajador=self.manual.user, cuadrilla=self.cuad_proyecto)
+        CertificacionTrabajador.objects.create(
+            trabajador=self.libre, nombre='Altura', fecha_emision=timezone.localdate()
+        )
+
+    def test_estados_calculados(self):
+        qs = Trabajador.objects.filter(pk__in=[
+            self.libre.pk, self.en_proyecto.pk, self.sin_proyecto.pk, self.manual.pk
+        ])
+        resultado = {t.pk: t for t in enriquecer_trabajadores_con_info(qs)}
+
+        libre = resultado[self.libre.pk]
+        self.assertFalse(libre.ocupado_visible)
+        self.assertEqual(libre.estado_real, 'disponible')
+        self.assertEqual(libre.certificacion_lista, ['Altura'])
+        self.assertTrue(libre.tiene_certificaciones)
+
+        self.assertTrue(resultado[self.en_proyecto.pk].ocupado_visible)
+        self.assertEqual(resultado[self.en_proyecto.pk].estado_real, 'ocupado')
+
+        # Asignado a cuadrilla sin proyecto: no ocupado, pero estado efectivo 'ocupado'
+        self.assertFalse(resultado[self.sin_proyecto.pk].ocupado_visible)
+        self.assertEqual(resultado[self.sin_proyecto.pk].estado_real, 'ocupado')
+
+        # El override manual tiene prioridad en lo que se muestra, pero no
+        # cambia el campo guardado
+        self.assertFalse(resultado[self.manual.pk].ocupado_visible)
+        self.assertTrue(resultado[self.manual.pk].ocupado)
+        self.assertEqual(resultado[self.manual.pk].estado_real, 'vacaciones')
+        self.assertFalse(resultado[self.manual.pk].tiene_certificaciones)
+
+    def test_crea_perfiles_faltantes(self):
+        TrabajadorPerfil.objects.filter(user=self.libre.user).delete()
+        enriquecer_trabajadores_con_info(Trabajador.objects.filter(pk=self.libre.pk))
+        self.assertTrue(TrabajadorPerfil.objects.filter(user=self.libre.user).exists())
+
+    def test_consultas_constantes(self):
+        for i in range(5, 15):
+            crear_trabajador(f'1000000{i:02d}')
+        # La primera pasada crea en bloque los perfiles que falten
+        enriquecer_trabajadores_con_info(Trabajador.objects.all())
+        # trabajadores + asignaciones + perfiles + certificaciones
+        with self.assertNumQueries(4):
+            enriquecer_trabajadores_con_info(Trabajador.objects.all())
+
+    def test_perfil_with_disponibilidad(self):
+        licencia = crear_trabajador('100000005')
+        for t in (self.libre, self.sin_proyecto, self.manual):
+            TrabajadorPerfil.objects.get_or_create(user=t.user)
+        TrabajadorPerfil.objects.create(user=licencia.user, estado_manual='licencia')
+
+        with self.assertNumQueries(1):
+            estados = {
+                p.user_id: p.estado_efectivo
+                for p in TrabajadorPerfil.objects.with_disponibilidad()
+            }
+        self.assertEqual(estados, {
+            self.libre.user_id: 'disponible',
+            self.sin_proyecto.user_id: 'ocupado',
+            self.manual.user_id: 'vacaciones',
+            licencia.user_id: 'licencia',
+        })
+
+        # Sin anotar: una consulta y el mismo resultado
+        perfil = TrabajadorPerfil.objects.get(user=self.manual.user)
+        with self.assertNumQueries(1):
+            self.assertEqual(perfil.estado_efectivo, 'vacaciones')
+
+        # Sin anotar no se guarda en la instancia: refleja los cambios posteriores
+        perfil = TrabajadorPerfil.objects.get(user=self.libre.user)
+        self.assertEqual(perfil.estado_efectivo, 'disponible')
+        Asignacion.objects.create(trabajador=self.libre.user, cuadrilla=Cuadrilla.objects.create(nombre='Nueva'))
+        self.assertEqual(perfil.estado_efectivo, 'ocupado')
+
+    def test_filtrar_por_disponibilidad(self):
+        licencia = crear_trabajador('100000005')
+        TrabajadorPerfil.objects.create(user=licencia.user, estado_manual='licencia')
+        qs = Trabajador.objects.filter(pk__in=[
+            self.libre.pk, self.en_proyecto.pk, self.manual.pk, licencia.pk
+        ])
+
+        self.assertEqual(
+            set(qs.asignables()), {self.libre}
+        )
+        self.assertEqual(
+            list(qs.with_disponibilidad().filter(disponibilidad='licencia')), [licencia]
+        )
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS)
+class AplicarAsignacionesTest(TestCase):
+    """Tests del servicio de asignación en bloque."""
+
+    def setUp(self):
+        self.jefe = User.objects.create_user(username='jefe', password='pass')
+        self.proyecto = Proyecto.objects.create(
+            nombre='P1', fecha_inicio=timezone.localdate(), jefe=self.jefe
+        )
+        self.cuadrilla = Cuadrilla.objects.create(nombre='C1', proyecto=self.proyecto)
+        self.otra = Cuadrilla.objects.create(nombre='C2', proyecto=self.proyecto)
+        self.trabajadores = [crear_trabajador(f'20000000{i}') for i in range(4)]
+        self.rol = Rol.objects.create(nombre='Operario')
+
+    def test_crea_asignaciones_y_roles(self):
+        t0, t1, t2, t3 = self.trabajadores
+        # t3 ya está ocupado en otra cuadrilla con proyecto
+        Asignacion.objects.create(trabajador=t3.user, cuadrilla=self.otra)
+        data = {
+            f'roles_{t0.user_id}': str(self.rol.id),
+            f'roles_custom_{t1.user_id}': 'Soldador',
+        }
+        ids = [str(t.user_id) for t in self.trabajadores]
+
+        agregados, removidos, cambios = aplicar_asignaciones(self.cuadrilla, ids, data)
+
+        self.assertEqual({u.id for u, _ in agregados}, {t0.user_id, t1.user_id, t2.user_id})
+        self.assertEqual(removidos, [])
+        self.assertEqual(cambios, [])
+        roles = dict(Asignacion.objects.filter(cuadrilla=self.cuadrilla).values_list('trabajador_id', 'rol__nombre'))
+        self.assertEqual(roles, {t0.user_id: 'Operario', t1.user_id: 'Soldador', t2.user_id: None})
+
+    def test_diff_edicion(self):
+        t0, t1, t2, _ = self.trabajadores
+        a0 = Asignacion.objects.create(trabajador=t0.user, cuadrilla=self.cuadrilla)
+        Asignacion.objects.create(trabajador=t1.user, cuadrilla=self.cuadrilla)
+        data = {f'roles_{t0.user_id}': str(self.rol.id)}
+
+        agregados, removidos, cambios = aplicar_asignaciones(
+            self.cuadrilla, [str(t0.user_id), str(t2.user_id)], data,
+            quitables=[t0.user_id, t1.user_id],
+        )
+
+        self.assertEqual([u.id for u, _ in agregados], [t2.user_id])
+        self.assertEqual([u.id for u in removidos], [t1.user_id])
+        self.assertEqual([(u.id, r) for u, _, r in cambios], [(t0.user_id, self.rol)])
+        a0.refresh_from_db()
+        self.assertEqual(a0.rol, self.rol)
+        self.assertEqual(
+            set(Asignacion.objects.filter(cuadrilla=self.cuadrilla).values_list('trabajador_id', flat=True)),
+            {t0.user_id, t2.user_id},
+        )
+
+    def test_editar_solo_quita_miembros_mostrados(self):
+        t0, t1, t2, _ = self.trabajadores
+        # t2 inactivo: el formulario no lo muestra y no debe perderse al guardar
+        Trabajador.objects.filter(pk=t2.pk).update(activo=False)
+        sin_ficha = User.objects.create_user(username='sin_ficha')
+        for user in (t0.user, t1.user, t2.user, sin_ficha):
+            Asignacion.objects.create(trabajador=user, cuadrilla=self.cuadrilla)
+        Group.objects.get_or_create(name='JefeProyecto')[0].user_set.add(self.jefe)
+        self.client.force_login(self.jefe)
+        url = reverse('personal:editar_cuadrilla', args=[self.cuadrilla.pk])
+        datos = {'nombre': 'C1', 'proyecto': str(self.proyecto.pk)}
+
+        self.client.post(url, {**datos, 'trabajadores': [str(t0.user_id)]})
+        miembros = lambda: set(
+            Asignacion.objects.filter(cuadrilla=self.cuadrilla).values_list('trabajador_id', flat=True)
+        )
+        self.assertEqual(miembros(), {t0.user_id, t2.user_id, sin_ficha.pk})
+
+        # Desmarcar a todos quita a los mostrados, igual que con selección
+        self.client.post(url, datos)
+        self.assertEqual(miembros(), {t2.user_id, sin_ficha.pk})
+
+    def test_respeta_estado_manual_del_perfil(self):
+        t0, t1, _, _ = self.trabajadores
+        TrabajadorPerfil.objects.create(user=t1.user, estado_manual='licencia')
+
+        agregados, _, _ = aplicar_asignaciones(
+            self.cuadrilla, [str(t0.user_id), str(t1.user_id)], {}
+        )
+
+        self.assertEqual([u.id for u, _ in agregados], [t0.user_id])
+
+
+class CrearNotificacionesTest(TestCase):
+    """Tests de la creación de notificaciones en bloque."""
+
+    def setUp(self):
+        self.users = [User.objects.create_user(username=f'n{i}') for i in range(5)]
+
+    def test_un_insert_por_lote(self):
+        with self.assertNumQueries(1):
+            crear_notificaciones([(u, 'Hola') for u in self.users] + [(None, 'Nadie')])
+        self.assertEqual(Notificacion.objects.count(), 5)
+
+    def test_modo_diferido(self):
+        iniciar_notificaciones_diferidas()
+        with self.assertNumQueries(1), self.captureOnCommitCallbacks(execute=True):
+            with self.assertNumQueries(0):
+                crear_notificaciones([(u, 'Uno') for u in self.users], diferido=True)
+                crear_notificaciones([(self.users[0], 'Dos')], diferido=True)
+                vaciar_notificaciones_diferidas()
+        self.assertEqual(Notificacion.objects.count(), 6)
+
+    def test_diferido_descarta_transaccion_revertida(self):
+        iniciar_notificaciones_diferidas()
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(ValueError), transaction.atomic():
+                crear_notificaciones([(self.users[0], 'Revertida')], diferido=True)
+                raise ValueError
+            crear_notificaciones([(self.users[1], 'Confirmada')], diferido=True)
+            vaciar_notificaciones_diferidas()
+        self.assertEqual(list(Notificacion.objects.values_list('mensaje', flat=True)), ['Confirmada'])
+
+    def test_diferido_no_arrastra_restos_de_otra_peticion(self):
+        iniciar_notificaciones_diferidas()
+        with self.captureOnCommitCallbacks(execute=True):
+            crear_notificaciones([(self.users[0], 'Anterior')], diferido=True)
+            # Nueva petición sin que la anterior vaciara su buffer
+            iniciar_notificaciones_diferidas()
+            vaciar_notificaciones_diferidas()
+        self.assertFalse(Notificacion.objects.exists())
+
+    def test_diferido_sin_buffer_escribe_al_momento(self):
+        crear_notificaciones([(self.users[0], 'Directa')], diferido=True)
+        self.assertEqual(Notificacion.objects.count(), 1)
+
+
+class DisponibilidadLideresTest(TestCase):
+    """Tests del cálculo de disponibilidad de líderes."""
+
+    def setUp(self):
+        grupo, _ = Group.objects.get_or_create(name='LiderCuadrilla')
+        self.jefe = User.objects.create_user(username='jefe')
+        self.proyecto = Proyecto.objects.create(
+            nombre='P1', fecha_inicio=timezone.localdate(), jefe=self.jefe
+        )
+        self.lideres = [User.objects.create_user(username=f'lider{i}') for i in range(4)]
+        for lider in self.lideres:
+            lider.groups.add(grupo)
+        self.cuadrilla = Cuadrilla.objects.create(
+            nombre='C1', proyecto=self.proyecto, lider=self.lideres[0]
+        )
+
+    def test_una_consulta(self):
+        with self.assertNumQueries(1):
+            info = {i['user'].id: i for i in preparar_lideres_disponibles()}
+        self.assertFalse(info[self.lideres[0].id]['selectable'])
+        self.assertTrue(info[self.lideres[1].id]['selectable'])
+
+    def test_lider_actual_seleccionable(self):
+        info = {i['user'].id: i for i in preparar_lideres_disponibles(self.cuadrilla)}
+        self.assertTrue(info[self.lideres[0].id]['selectable'])
+        self.assertFalse(info[self.lideres[0].id]['ocupado'])
+
+    def test_validar(self):
+        with self.assertNumQueries(1):
+            ok, error = validar_disponibilidad_lider(self.lideres[0].id)
+        self.assertFalse(ok)
+        self.assertTrue(validar_disponibilidad_lider(self.lideres[0].id, self.cuadrilla)[0])
+        self.assertTrue(validar_disponibilidad_lider(self.lideres[1].id)[0])
+        self.assertFalse(validar_disponibilidad_lider(self.jefe.id)[0])
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS)
+class AccesoUsuarioTest(TestCase):
+    """Tests del snapshot de roles y pertenencias por petición."""
+
+    def setUp(self):
+        Group.objects.get_or_create(name='LiderCuadrilla')
+        self.jefe = User.objects.create_user(username='jefe')
+        self.proyecto = Proyecto.objects.create(
+            nombre='P1', fecha_inicio=timezone.localdate(), jefe=self.jefe
+        )
+        self.trabajador = crear_trabajador('300000001', tipo_trabajador='lider')
+        self.lider = self.trabajador.user
+        TrabajadorPerfil.objects.get_or_create(user=self.lider)
+        self.propia = Cuadrilla.objects.create(nombre='C1', proyecto=self.proyecto, lider=self.lider)
+        self.vecina = Cuadrilla.objects.create(nombre='C2', proyecto=self.proyecto)
+        self.ajena = Cuadrilla.objects.create(
+            nombre='C3',
+            proyecto=Proyecto.objects.create(nombre='P2', fecha_inicio=timezone.localdate(), jefe=self.jefe),
+        )
+
+    def test_helpers_leen_el_snapshot(self):
+        user = User.objects.get(pk=self.lider.pk)
+        user._acceso = AccesoUsuario(user)
+        cuadrillas = list(Cuadrilla.objects.select_related('proyecto'))
+        # grupos + cuadrillas lideradas, sin importar cuántas comprobaciones
+        with self.assertNumQueries(2):
+            for _ in range(3):
+                self.assertFalse(es_jefe_proyecto(user))
+                self.assertTrue(es_lider_cuadrilla(user))
+                for c in cuadrillas:
+                    puede_ver_cuadrilla(user, c)
+                    puede_gestionar_cuadrilla(user, c)
+        self.assertTrue(puede_ver_cuadrilla(user, self.vecina))
+        self.assertFalse(puede_ver_cuadrilla(user, self.ajena))
+        self.assertFalse(puede_gestionar_cuadrilla(user, self.vecina))
+
+    def test_perfiles_en_una_consulta(self):
+        user = User.objects.get(pk=self.lider.pk)
+        acceso = AccesoUsuario(user)
+        with self.assertNumQueries(1):
+            self.assertEqual(acceso.trabajador, self.trabajador)
+            self.assertIsNotNone(acceso.perfil)
+            # La relación queda cacheada en el propio user
+            self.assertEqual(user.trabajador_profile, self.trabajador)
+
+    def test_middleware_adjunta_snapshot(self):
+        self.client.force_login(self.lider)
+        response = self.client.get('/')
+        acceso = response.wsgi_request.acceso
+        self.assertIs(response.wsgi_request.user._acceso, acceso)
+        self.assertEqual(acceso.cuadrillas_lideradas, {self.propia.pk: self.proyecto.pk})
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS)
+class SelectorTrabajadoresTest(TestCase):
+    """Tests de la API paginada del selector de trabajadores."""
+
+    def setUp(self):
+        grupo, _ = Group.objects.get_or_create(name='JefeProyecto')
+        self.jefe = User.objects.create_user(username='jefe', password='pass')
+        self.jefe.groups.add(grupo)
+        self.proyecto = Proyecto.objects.create(
+            nombre='P1', fecha_inicio=timezone.localdate(), jefe=self.jefe
+        )
+        self.cuadrilla = Cuadrilla.objects.create(nombre='C1', proyecto=self.proyecto)
+        # Ejecutar la indexación diferida (on_commit) para la búsqueda por texto
+        with self.captureOnCommitCallbacks(execute=True):
+            self.trabajadores = [
+                crear_trabajador(f'40000000{i}', especialidad='Soldador' if i % 2 else 'Electricista')
+                for i in range(7)
+            ]
+        Asignacion.objects.create(trabajador=self.trabajadores[0].user, cuadrilla=self.cuadrilla)
+        perfil, _ = TrabajadorPerfil.objects.get_or_create(user=self.trabajadores[1].user)
+        perfil.estado_manual = 'licencia'
+        perfil.save()
+        CertificacionTrabajador.objects.create(
+            trabajador=self.trabajadores[2], nombre='Altura', fecha_emision=timezone.localdate()
+        )
+
+    def test_anotacion_coincide_con_enriquecer(self):
+        qs = Trabajador.objects.order_by('id')
+        enriquecidos = {t.pk: t for t in enriquecer_trabajadores_con_info(qs)}
+        for t in qs.with_disponibilidad():
+            self.assertEqual(t.esta_ocupado, enriquecidos[t.pk].ocupado_visible)
+            self.assertEqual(t.estado_real, enriquecidos[t.pk].estado_real)
+
+    def test_filtros(self):
+        def ids(**params):
+            return [r['id'] for r in pagina_trabajadores(params)['resultados']]
+
+        t = self.trabajadores
+        self.assertEqual(ids(disponibilidad='ocupado'), [t[0].pk])
+        self.assertEqual(ids(disponibilidad='licencia'), [t[1].pk])
+        self.assertEqual(ids(certificacion='Altura'), [t[2].pk])
+        self.assertEqual(ids(certificacion='tiene'), [t[2].pk])
+        self.assertEqual(ids(especialidad='soldador'), [t[1].pk, t[3].pk, t[5].pk])
+        self.assertEqual(ids(q='400000004'), [t[4].pk])
+        self.assertNotIn(t[0].pk, [
+            r['id'] for r in pagina_trabajadores({}, excluir_cuadrilla=self.cuadrilla.pk)['resultados']
+        ])
+
+    def test_paginacion_keyset(self):
+        vistos = []
+        params = {'limite': '3'}
+        while True:
+            pagina = pagina_trabajadores(params)
+            self.assertLessEqual(len(pagina['resultados']), 3)
+            vistos += [r['id'] for r in pagina['resultados']]
+            if pagina['siguiente'] is None:
+                break
+            params['cursor'] = str(pagina['siguiente'])
+        self.assertEqual(vistos, [t.pk for t in self.trabajadores])
+
+        primera = pagina_trabajadores({'limite': '3'})['resultados']
+        self.assertFalse(primera[0]['seleccionable'])   # ocupado
+        self.assertFalse(primera[1]['seleccionable'])   # licencia
+        self.assertTrue(primera[2]['seleccionable'])
+        self.assertEqual(primera[2]['certificaciones'], ['Altura'])
+
+    def test_endpoint(self):
+        url = reverse('personal:api_trabajadores')
+        self.client.force_login(User.objects.create_user(username='sin_rol'))
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+        self.client.force_login(self.jefe)
+        data = self.client.get(url, {'limite': 2, 'cuadrilla': self.cuadrilla.pk}).json()
+        self.assertEqual([r['id'] for r in data['resultados']], [self.trabajadores[1].pk, self.trabajadores[2].pk])
+        self.assertEqual(data['siguiente'], self.trabajadores[2].pk)
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS)
+class BusquedaTrabajadoresTest(TestCase):
+    """Tests del índice de búsqueda de texto completo."""
+
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.ana = crear_trabajador('500000001', nombre='Ana', apellido='Muñoz', especialidad='Electricista')
+            self.beto = crear_trabajador('500000002', nombre='Beto', apellido='Pérez', especialidad='Soldador')
+            CompetenciaTrabajador.objects.create(trabajador=self.beto, nombre='Soldadura TIG', nivel='experto')
+
+    def ids(self, texto):
+        return list(
+            Trabajador.objects.filter(filtro_busqueda(texto)).order_by('id').values_list('pk', flat=True)
+        )
+
+    def test_usa_fts5_en_sqlite(self):
+        self.assertEqual(fts_disponible(), connection.vendor == 'sqlite')
+
+    def test_busqueda_normalizada_y_por_prefijo(self):
+        self.assertEqual(self.ids('munoz'), [self.ana.pk])
+        self.assertEqual(self.ids('PÉREZ sold'), [self.beto.pk])
+        self.assertEqual(self.ids('tig experto'), [self.beto.pk])
+        self.assertEqual(self.ids('50000000'), [self.ana.pk, self.beto.pk])
+        # Sin palabras no se filtra
+        self.assertEqual(self.ids('"'), [self.ana.pk, self.beto.pk])
+
+    def test_puntuacion_no_rompe_la_consulta(self):
+        # Caracteres con significado en MATCH (FTS5) y en tsquery (PostgreSQL)
+        self.assertEqual(_palabras("o'brien (jefe) a|b !x c:* d&e \"f\""), [
+            'o', 'brien', 'jefe', 'a', 'b', 'x', 'c', 'd', 'e', 'f',
+        ])
+        self.assertEqual(_palabras('12.345.678-k'), ['12345678k'])
+        self.assertEqual(self.ids("(muñoz) | !ana:*"), [self.ana.pk])
+        self.assertEqual(self.ids("o'brien (jefe) a|b !x"), [])
+        self.assertEqual(_palabras("' ( ) | ! & :"), [])
+
+    def test_actualizacion_incremental(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            CertificacionTrabajador.objects.create(
+                trabajador=self.ana, nombre='Trabajo en altura', entidad='Mutual',
+                fecha_emision=timezone.localdate(),
+            )
+        self.assertEqual(self.ids('mutual'), [self.ana.pk])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.ana.apellido = 'Rojas'
+            self.ana.save()
+        self.assertEqual(self.ids('munoz'), [])
+        self.assertEqual(self.ids('rojas'), [self.ana.pk])
+
+        self.beto.delete()
+        self.assertEqual(self.ids('soldador'), [])
+
+    def test_reconstruir(self):
+        TrabajadorBusqueda.objects.all().delete()
+        self.assertEqual(self.ids('ana'), [])
+        self.assertEqual(reconstruir_indice(tamano_lote=1), 2)
+        self.assertEqual(self.ids('ana'), [self.ana.pk])
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS)
+class RecomendacionTest(TestCase):
+    """Tests del motor de recomendación vectorizado."""
+
+    def setUp(self):
+        grupo, _ = Group.objects.get_or_create(name='JefeProyecto')
+        self.jefe = User.objects.create_user(username='jefe')
+        self.jefe.groups.add(grupo)
+        self.proyecto = Proyecto.objects.create(
+            nombre='P1', fecha_inicio=timezone.localdate(), jefe=self.jefe,
+            tipo='construccion', complejidad='alta',
+        )
+        hoy = timezone.localdate()
+
+        self.experto = crear_trabajador('600000001', especialidad='Soldador', anos_experiencia=15)
+        CompetenciaTrabajador.objects.create(trabajador=self.experto, nombre='Soldadura', nivel='experto')
+        CertificacionTrabajador.objects.create(
+            trabajador=self.experto, nombre='Altura', fecha_emision=hoy, fecha_expiracion=hoy + timedelta(days=30)
+        )
+        ExperienciaTrabajador.objects.create(trabajador=self.experto, calificacion='muy_recomendado')
+
+        self.novato = crear_trabajador('600000002', especialidad='Administrativo', anos_experiencia=1)
+        CertificacionTrabajador.objects.create(
+            trabajador=self.novato, nombre='Vencida', fecha_emision=hoy, fecha_expiracion=hoy - timedelta(days=1)
+        )
+
+        self.ocupado = crear_trabajador('600000003', anos_experiencia=30)
+        cuadrilla = Cuadrilla.objects.create(nombre='C1', proyecto=self.proyecto)
+        Asignacion.objects.create(trabajador=self.ocupado.user, cuadrilla=cuadrilla)
+
+        self.licencia = crear_trabajador('600000004', anos_experiencia=30)
+        TrabajadorPerfil.objects.update_or_create(user=self.licencia.user, defaults={'estado_manual': 'licencia'})
+
+    def test_ranking_y_motivos(self):
+        resultado = recomendar_trabajadores('construccion', 'alta', n=10)
+        self.assertEqual([r['trabajador_id'] for r in resultado], [self.experto.pk, self.novato.pk])
+        self.assertGreater(resultado[0]['puntaje'], resultado[1]['puntaje'])
+
+        motivos = [m['motivo'] for m in resultado[0]['motivos']]
+        self.assertIn('1 certificación(es) vigente(s)', motivos)
+        self.assertIn('Perfil afín a proyectos de construccion', motivos)
+        self.assertIn('1 certificación(es) vencida(s)', [m['motivo'] for m in resultado[1]['motivos']])
+
+    def test_top_n_y_exclusiones(self):
+        self.assertEqual(len(recomendar_trabajadores('otro', 'media', n=1)), 1)
+        resultado = recomendar_trabajadores('otro', 'media', excluir_ids=[self.experto.pk])
+        self.assertEqual([r['trabajador_id'] for r in resultado], [self.novato.pk])
+
+    def test_invalidacion_por_senales(self):
+        datos = obtener_datos()
+        self.assertIs(obtener_datos(), datos)
+        CompetenciaTrabajador.objects.create(trabajador=self.novato, nombre='Carpintería', nivel='avanzado')
+        nuevos = obtener_datos()
+        self.assertIsNot(nuevos, datos)
+        fila = list(nuevos.ids).index(self.novato.pk)
+        self.assertEqual(nuevos.nivel_max[fila], 3)
+
+    def test_endpoint(self):
+        self.client.force_login(self.jefe)
+        data = self.client.get(
+            reverse('personal:api_recomendaciones'), {'proyecto': self.proyecto.pk, 'n': 1}
+        ).json()
+        self.assertEqual(data['tipo'], 'construccion')
+        self.assertEqual(len(data['resultados']), 1)
+        fila = data['resultados'][0]
+        self.assertEqual(fila['id'], self.experto.pk)
+        self.assertTrue(fila['seleccionable'])
+        self.assertIn('motivos', fila)
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS)
+class VencimientoCertificacionesTest(TestCase):
+    """Tests de los filtros de vigencia y del barrido de vencimientos."""
+
+    def setUp(self):
+        self.hoy = timezone.localdate()
+        self.lider = User.objects.create_user(username='lider')
+        self.jefe = User.objects.create_user(username='jefe')
+        proyecto = Proyecto.objects.create(nombre='P1', fecha_inicio=self.hoy, jefe=self.jefe)
+        cuadrilla = Cuadrilla.objects.create(nombre='C1', proyecto=proyecto, lider=self.lider)
+
+        self.trabajador = crear_trabajador('700000001')
+        Asignacion.objects.create(trabajador=self.trabajador.user, cuadrilla=cuadrilla)
+        self.otro = crear_trabajador('700000002')
+
+        def cert(trabajador, nombre, dias):
+            return CertificacionTrabajador.objects.create(
+                trabajador=trabajador, nombre=nombre, fecha_emision=self.hoy,
+                fecha_expiracion=None if dias is None else self.hoy + timedelta(days=dias),
+            )
+
+        self.por_vencer = cert(self.trabajador, 'Altura', 10)
+        self.vencida = cert(self.trabajador, 'Eléctrica', -5)
+        cert(self.trabajador, 'Primeros auxilios', 90)
+        cert(self.otro, 'Permanente', None)
+
+    def test_filtros_por_vigencia(self):
+        certs = CertificacionTrabajador.objects
+        self.assertEqual(certs.vigentes().count(), 3)
+        self.assertEqual(list(certs.vencidas()), [self.vencida])
+        self.assertEqual(list(certs.por_vencer(30)), [self.por_vencer])
+        self.assertEqual(
+            certs.vigentes().count(), sum(1 for c in certs.all() if c.vigente())
+        )
+
+    def test_barrido_notifica_una_vez(self):
+        resultado = revisar_vencimientos(dias=30, tamano_lote=1)
+        self.assertEqual(resultado['por_vencer'], 1)
+        self.assertEqual(resultado['vencidas'], 1)
+        # Trabajador, líder y jefe: un aviso por estado
+        self.assertEqual(resultado['notificaciones'], 6)
+        for user in (self.trabajador.user, self.lider, self.jefe):
+            self.assertEqual(Notificacion.objects.filter(user=user).count(), 2)
+        self.assertFalse(Notificacion.objects.filter(user=self.otro.user).exists())
+        mensajes = ' '.join(Notificacion.objects.filter(user=self.lider).values_list('mensaje', flat=True))
+        self.assertIn('Altura', mensajes)
+        self.assertIn('Eléctrica', mensajes)
+
+        self.assertEqual(revisar_vencimientos(dias=30)['notificaciones'], 0)
+
+    def test_renovacion_restablece_aviso(self):
+        revisar_vencimientos(dias=30)
+        self.por_vencer.refresh_from_db()
+        self.assertEqual(self.por_vencer.aviso_vencimiento, 'por_vencer')
+        self.por_vencer.fecha_expiracion = self.hoy + timedelta(days=365)
+        self.por_vencer.save()
+        resultado = revisar_vencimientos(dias=30)
+        self.assertEqual(resultado['restablecidas'], 1)
+        self.assertEqual(resultado['notificaciones'], 0)
+        self.por_vencer.refresh_from_db()
+        self.assertEqual(self.por_vencer.aviso_vencimiento, '')
+
+    def test_selector_filtra_vigentes(self):
+        CertificacionTrabajador.objects.filter(trabajador=self.trabajador).vigentes().delete()
+        ids = [t['id'] for t in pagina_trabajadores({'certificacion': 'vigente'})['resultados']]
+        self.assertEqual(ids, [self.otro.pk])
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS)
+class ImportacionTrabajadoresTest(TestCase):
+    """Tests de la importación masiva de trabajadores."""
+
+    def setUp(self):
+        for nombre in ('Trabajador', 'LiderCuadrilla', 'JefeProyecto'):
+            Group.objects.get_or_create(name=nombre)
+        crear_trabajador('800000009')
+
+    def _csv(self, lineas):
+        contenido = 'RUT;Nombre;Apellido;Email;Tipo Trabajador;Especialidad;Años Experiencia\n'
+        return io.BytesIO((contenido + '\n'.join(lineas) + '\n').encode('utf-8-sig'))
+
+    def test_importa_y_reporta_errores(self):
+        archivo = self._csv([
+            '800000001;Ana;Pérez;ana@example.com;trabajador;Soldadura;4',
+            '800000002;Luis;Soto;luis@example.com;lider;;',
+            '',
+            '123;Mal;Rut;mal@example.com;;;',
+            '800000001;Ana;Repetida;ana2@example.com;;;',
+            '800000009;Ya;Existe;ya@example.com;;;',
+            '800000003;Sin;Correo;no-es-email;;;',
+        ])
+        with self.captureOnCommitCallbacks(execute=True):
+            resultado = importar_trabajadores(leer_csv(archivo), tamano_lote=2, procesos=1)
+
+        self.assertEqual(resultado.creados, 2)
+        self.assertEqual([n for n, _ in resultado.errores], [5, 6, 7, 8])
+
+        ana = Trabajador.objects.get(rut='800000001')
+        self.assertTrue(ana.password_inicial)
+        self.assertEqual(ana.anos_experiencia, 4)
+        self.assertTrue(ana.user.check_password('800000001'))
+        self.assertEqual(list(ana.user.groups.values_list('name', flat=True)), ['Trabajador'])
+        self.assertTrue(TrabajadorPerfil.objects.filter(user=ana.user).exists())
+        self.assertEqual(
+            list(Trabajador.objects.get(rut='800000002').user.groups.values_list('name', flat=True)),
+            ['LiderCuadrilla'],
+        )
+        self.assertEqual(
+            list(Trabajador.objects.filter(filtro_busqueda('soldadura')).values_list('pk', flat=True)), [ana.pk]
+        )
+
+    def test_hash_en_pool_de_procesos(self):
+        lineas = [f'9{i:08d};N{i};A{i};n{i}@example.com;;;' for i in range(70)]
+        resultado = importar_trabajadores(leer_csv(self._csv(lineas)), procesos=2)
+        self.assertEqual(resultado.creados, 70)
+        self.assertEqual(resultado.errores, [])
+        self.assertTrue(User.objects.get(username='900000069').check_password('900000069'))
+
+    def test_carga_desde_admin(self):
+        admin = User.objects.create_superuser(username='admin', password='x')
+        self.client.force_login(admin)
+        url = reverse('admin:personal_trabajador_importar')
+        self.assertContains(self.client.get(reverse('admin:personal_trabajador_changelist')), url)
+
+        archivo = self._csv(['800000004;Eva;Rojas;eva@example.com;;;', '1;Mal;Rut;mal@example.com;;;'])
+        archivo.name = 'trabajadores.csv'
+        with tempfile.TemporaryDirectory() as directorio, \
+                override_settings(PERSONAL_DIR_IMPORTACIONES=directorio), \
+                mock.patch('personal.utils_importacion.subprocess.Popen') as popen:
+            respuesta = self.client.post(url, {'archivo': archivo})
+            trabajo = respuesta.url.rstrip('/').rsplit('/', 1)[-1]
+            estado = reverse('admin:personal_trabajador_importar_estado', args=[trabajo])
+            self.assertRedirects(respuesta, estado)
+            self.assertFalse(Trabajador.objects.filter(rut='800000004').exists())
+            self.assertContains(self.client.get(estado), 'sigue en curso')
+
+            # El proceso lanzado: manage.py importar_trabajadores <archivo> ...
+            comando = popen.call_args.args[0]
+            self.assertEqual(comando[2], 'importar_trabajadores')
+            call_command(*comando[2:], '--procesos', '1', stdout=io.StringIO(), stderr=io.StringIO())
+            self.assertTrue(Trabajador.objects.filter(rut='800000004', user__isnull=False).exists())
+            # El archivo subido se borra al terminar
+            self.assertEqual(sorted(os.listdir(directorio)), [trabajo + '.json', trabajo + '.log'])
+
+            respuesta = self.client.get(estado)
+            self.assertContains(respuesta, 'Trabajadores creados: 1.')
+            self.assertEqual([n for n, _ in respuesta.context['errores']], [3])
+
+        self.assertEqual(self.client.get(reverse(
+            'admin:personal_trabajador_importar_estado', args=['no-existe'],
+        )).status_code, 404)
+
+    def test_csv_mal_formado_desde_admin(self):
+        self.client.force_login(User.objects.create_superuser(username='admin', password='x'))
+        # Un campo mayor que csv.field_size_limit() falla a mitad de la lectura
+        archivo = self._csv(['800000005;Eva;Rojas;eva@example.com;;;', '800000006;' + 'x' * 200000 + ';;;;;'])
+        archivo.name = 'trabajadores.csv'
+        respuesta = self.client.post(reverse('admin:personal_trabajador_importar'), {'archivo': archivo})
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertIn('línea 3', respuesta.context['form'].errors['archivo'][0])
+        self.assertFalse(Trabajador.objects.filter(rut='800000005').exists())
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS)
+class ExportacionTest(TestCase):
+    """Tests de las exportaciones en streaming."""
+
+    def setUp(self):
+        grupo, _ = Group.objects.get_or_create(name='JefeProyecto')
+        self.jefe = User.objects.create_user(username='jefe')
+        self.jefe.groups.add(grupo)
+        proyecto = Proyecto.objects.create(nombre='P1', fecha_inicio=timezone.localdate(), jefe=self.jefe)
+        self.cuadrilla = Cuadrilla.objects.create(nombre='C1', proyecto=proyecto)
+        rol = Rol.objects.create(nombre='Soldador')
+
+        self.trabajadores = [crear_trabajador(f'90000000{i}') for i in range(1, 6)]
+        primero = self.trabajadores[0]
+        CompetenciaTrabajador.objects.create(trabajador=primero, nombre='Soldadura', nivel='experto')
+        CertificacionTrabajador.objects.create(
+            trabajador=primero, nombre='Altura', fecha_emision=timezone.localdate()
+        )
+        for t in self.trabajadores[:2]:
+            Asignacion.objects.create(trabajador=t.user, cuadrilla=self.cuadrilla, rol=rol)
+
+    def test_trabajadores_csv_en_streaming(self):
+        self.client.force_login(self.jefe)
+        respuesta = self.client.get(reverse('personal:exportar_datos', args=['trabajadores']))
+        self.assertTrue(respuesta.streaming)
+        self.assertIn('attachment', respuesta['Content-Disposition'])
+
+        filas = list(csv.DictReader(io.StringIO(b''.join(respuesta.streaming_content).decode())))
+        self.assertEqual(len(filas), 5)
+        self.assertEqual(filas[0]['competencias'], 'Soldadura (experto)')
+        self.assertEqual(filas[0]['certificaciones'], 'Altura')
+        self.assertEqual(filas[0]['cuadrillas'], 'C1')
+        self.assertEqual(filas[0]['proyectos'], 'P1')
+        self.assertEqual(filas[4]['cuadrillas'], '')
+
+    def test_consultas_por_bloque(self):
+        # 1 consulta de trabajadores + 3 por bloque (5 filas en bloques de 2)
+        with self.assertNumQueries(1 + 3 * 3):
+            self.assertEqual(len(list(exportar_trabajadores(tamano_bloque=2))), 5)
+
+    def test_asignaciones_y_proyectos_jsonl(self):
+        salida = io.StringIO()
+        call_command('exportar_datos', 'asignaciones', formato='jsonl', stdout=salida)
+        filas = [json.loads(linea) for linea in salida.getvalue().splitlines()]
+        self.assertEqual(len(filas), 2)
+        self.assertEqual(filas[0]['rol_nombre'], 'Soldador')
+        self.assertEqual(filas[0]['trabajador_rut'], '900000001')
+
+        salida = io.StringIO()
+        call_command('exportar_datos', 'proyectos', formato='jsonl', stdout=salida)
+        proyecto = json.loads(salida.getvalue())
+        self.assertEqual((proyecto['num_cuadrillas'], proyecto['num_trabajadores']), (1, 2))
+        self.assertEqual(proyecto['jefe_username'], 'jefe')
+
+    def test_requiere_jefe(self):
+        self.client.force_login(User.objects.create_user(username='otro'))
+        respuesta = self.client.get(reverse('personal:exportar_datos', args=['trabajadores']))
+        self.assertEqual(respuesta.status_code, 403)
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS)
+class OcupacionTest(TestCase):
+    """Tests de la columna desnormalizada Trabajador.ocupado."""
+
+    def setUp(self):
+        self.jefe = User.objects.create_user(username='jefe', password='pass')
+        self.proyecto = Proyecto.objects.create(
+            nombre='P1', fecha_inicio=timezone.localdate(), jefe=self.jefe
+        )
+        self.cuadrilla = Cuadrilla.objects.create(nombre='C1', proyecto=self.proyecto)
+        self.libre = Cuadrilla.objects.create(nombre='C2')
+        self.trabajador = crear_trabajador('300000001')
+
+    def _ocupado(self):
+        return Trabajador.objects.values_list('ocupado', flat=True).get(pk=self.trabajador.pk)
+
+    def test_senales_mantienen_la_columna(self):
+        asignacion = Asignacion.objects.create(trabajador=self.trabajador.user, cuadrilla=self.libre)
+        self.assertFalse(self._ocupado())
+
+        self.libre.proyecto = self.proyecto
+        self.libre.save()
+        self.assertTrue(self._ocupado())
+
+        # Igual que `_lider_ocupado`: sigue ocupado mientras la cuadrilla
+        # conserve el proyecto, aunque este se desactive
+        self.proyecto.activo = False
+        self.proyecto.save()
+        self.assertTrue(self._ocupado())
+
+        self.proyecto.activo = True
+        self.proyecto.save()
+        asignacion.delete()
+        self.assertFalse(self._ocupado())
+
+    def test_finalizar_proyecto_libera(self):
+        Asignacion.objects.create(trabajador=self.trabajador.user, cuadrilla=self.cuadrilla)
+        self.assertTrue(self._ocupado())
+
+        Group.objects.get_or_create(name='JefeProyecto')[0].user_set.add(self.jefe)
+        self.client.force_login(self.jefe)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('proyectos:finalizar', args=[self.proyecto.id]))
+        self.assertFalse(self._ocupado())
+        # Aviso diferido: lo escribe el middleware al terminar la vista
+        self.assertTrue(Notificacion.objects.filter(user=self.trabajador.user).exists())
+
+    def test_save_de_instancia_desactualizada(self):
+        obsoleto = Trabajador.objects.get(pk=self.trabajador.pk)
+        Asignacion.objects.create(trabajador=self.trabajador.user, cuadrilla=self.cuadrilla)
+        obsoleto.telefono = '123'
+        obsoleto.save()
+        self.assertTrue(self._ocupado())
+
+    def test_operaciones_en_bloque(self):
+        aplicar_asignaciones(self.libre, [str(self.trabajador.user_id)], {})
+        self.assertFalse(self._ocupado())
+
+        Group.objects.get_or_create(name='JefeProyecto')[0].user_set.add(self.jefe)
+        self.client.force_login(self.jefe)
+        self.client.post(
+            reverse('proyectos:asignar_cuadrillas', args=[self.proyecto.id]),
+            {'cuadrillas': [str(self.libre.id)]},
+        )
+        self.assertTrue(self._ocupado())
+
+    def test_reconciliacion(self):
+        Trabajador.objects.filter(pk=self.trabajador.pk).update(ocupado=True)
+        self.assertEqual(trabajadores_desfasados().count(), 1)
+
+        salida = io.StringIO()
+        call_command('reconciliar_ocupacion', '--solo-verificar', stdout=salida)
+        self.assertIn('desfasados: 1', salida.getvalue())
+        self.assertTrue(self._ocupado())
+
+        call_command('reconciliar_ocupacion', stdout=io.StringIO())
+        self.assertFalse(self._ocupado())
+        self.assertEqual(recalcular_ocupacion(), 0)
+
+    def test_lectura_sin_consultas(self):
+        Asignacion.objects.create(trabajador=self.trabajador.user, cuadrilla=self.cuadrilla)
+        trabajador = Trabajador.objects.get(pk=self.trabajador.pk)
+        with self.assertNumQueries(0):
+            self.assertTrue(esta_trabajador_ocupado(trabajador))
+
+
+class DatosSinteticosTest(TestCase):
+    """Tests del generador de datos para pruebas de carga."""
+
+    PARAMETROS = {
+        'proyectos': 3, 'cuadrillas': 2, 'trabajadores': 60, 'mensajes': 400,
+        'semilla': 7, 'tamano_lote': 25,
+    }
+
+    def _huella(self):
+        return (
+            list(Trabajador.objects.order_by('id').values_list('rut', 'nombre', 'tipo_trabajador', 'ocupado')),
+            list(Cuadrilla.objects.order_by('id').annotate(n=Count('asignaciones')).values_list('lider__username', 'n')),
+            list(Message.objects.order_by('id').values_list('sender__username', 'content')),
+        )
+
+    def _borrar(self):
+        IncidentNotice.objects.all().delete()
+        Conversation.objects.all().delete()
+        Proyecto.objects.all().delete()
+        Trabajador.objects.all().delete()
+        User.objects.all().delete()
+
+    def test_genera_datos_coherentes_y_deterministas(self):
+        conteos = generar_datos(**self.PARAMETROS)
+
+        self.assertEqual(conteos['trabajadores'], 60)
+        self.assertEqual(conteos['cuadrillas'], 6)
+        self.assertEqual(Message.objects.count(), 400)
+        self.assertEqual(Notificacion.objects.count(), 120)
+        self.assertEqual(WorkerRequest.objects.count(), 6)
+        self.assertEqual(IncidentNotice.objects.count(), 12)
+        self.assertEqual(TrabajadorBusqueda.objects.count(), 60)
+        self.assertEqual(trabajadores_desfasados().count(), 0)
+
+        for rut in Trabajador.objects.values_list('rut', flat=True):
+            self.assertEqual(len(rut), 9)
+            self.assertEqual(digito_verificador(rut[:-1]), rut[-1])
+
+        # Mismos participantes que dejaría la sincronización de chats
+        for cuadrilla in Cuadrilla.objects.all():
+            conversacion = Conversation.objects.get(cuadrilla=cuadrilla, is_group=True)
+            esperados = set(cuadrilla.asignaciones.values_list('trabajador_id', flat=True)) | {cuadrilla.lider_id}
+            self.assertEqual(set(conversacion.participants.values_list('id', flat=True)), esperados)
+
+        lider = Cuadrilla.objects.first().lider
+        self.assertTrue(lider.groups.filter(name='LiderCuadrilla').exists())
+        self.assertTrue(self.client.login(username=lider.username, password='carga1234'))
+
+        huella = self._huella()
+        self._borrar()
+        generar_datos(**self.PARAMETROS)
+        self.assertEqual(self._huella(), huella)
+
+    def test_faltan_trabajadores(self):
+        with self.assertRaises(ValueError):
+            generar_datos(proyectos=5, cuadrillas=4, trabajadores=10)
@@ -57,6 +57,32 @@ urlpatterns = [
         name='disolver_cuadrilla'
     ),
 
+    # ============================================================
+    # API del selector de trabajadores (formularios de cuadrilla)
+    # ============================================================
+
+    path(
+        'api/trabajadores/',
+        views.api_trabajadores,
+        name='api_trabajadores'
+    ),
+
+    path(
+        'api/recomendaciones/',
+        views.api_recomendaciones,
+        name='api_recomendaciones'
+    ),
+
+    # ============================================================
+    # Exportaciones (CSV / JSONL)
+    # ============================================================
+
+    path(
+        'exportar/<slug:conjunto>/',
+        views.exportar_datos,
+        name='exportar_datos'
+    ),
+
     # ============================================================
     # Vista trabajador: Mi Cuadrilla
     # ============================================================
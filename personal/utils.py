@@ -6,11 +6,13 @@ el código DRY y facilitan el testing unitario.
 """
 
 from django.contrib.auth.models import User
+from django.db.models import Exists, OuterRef
 from .models import (
     Cuadrilla, Asignacion, Trabajador, TrabajadorPerfil,
     CertificacionTrabajador
 )
 from .constants import UserGroups, EstadosTrabajador
+from .utils_acceso import obtener_acceso
 
 
 # ===================================================================
@@ -26,6 +28,9 @@ def obtener_disponibilidad_trabajador(trabajador, perfil=None):
     Returns:
         str: Estado de disponibilidad del trabajador o '—' si no disponible
     """
+    # Trabajador obtenido con `with_disponibilidad()`: ya viene resuelto
+    if trabajador is not None and 'estado_real' in trabajador.__dict__:
+        return trabajador.estado_real
     if trabajador and getattr(trabajador, 'manual_override', False):
         return trabajador.estado
     elif perfil:
@@ -49,7 +54,7 @@ def es_jefe_proyecto(user):
     Returns:
         bool: True si el usuario es Jefe de Proyecto
     """
-    return user.groups.filter(name=UserGroups.JEFE_PROYECTO).exists()
+    return obtener_acceso(user).es_jefe
 
 
 def es_lider_cuadrilla(user):
@@ -62,7 +67,7 @@ def es_lider_cuadrilla(user):
     Returns:
         bool: True si el usuario es Líder de Cuadrilla
     """
-    return user.groups.filter(name=UserGroups.LIDER_CUADRILLA).exists()
+    return obtener_acceso(user).es_lider
 
 
 def puede_gestionar_cuadrilla(user, cuadrilla):
@@ -76,12 +81,13 @@ def puede_gestionar_cuadrilla(user, cuadrilla):
     Returns:
         bool: True si el usuario puede gestionar la cuadrilla
     """
-    if es_jefe_proyecto(user):
+    acceso = obtener_acceso(user)
+    if acceso.es_jefe:
         # Jefe puede gestionar cuadrillas de sus proyectos o sin proyecto
-        return (not cuadrilla.proyecto or 
-                (cuadrilla.proyecto and cuadrilla.proyecto.jefe_id == user.id))
+        return (not cuadrilla.proyecto_id or 
+                cuadrilla.proyecto.jefe_id == user.id)
     
-    if es_lider_cuadrilla(user):
+    if acceso.es_lider:
         # Líder solo puede gestionar su propia cuadrilla
         return cuadrilla.lider_id == user.id
     
@@ -101,25 +107,20 @@ def puede_ver_cuadrilla(user, cuadrilla):
     """
     if not user.is_authenticated:
         return False
+    acceso = obtener_acceso(user)
     
     # Jefes de proyecto pueden ver todas las cuadrillas
-    if es_jefe_proyecto(user):
+    if acceso.es_jefe:
         return True
     
     # Líderes pueden ver cuadrillas del mismo proyecto
-    if es_lider_cuadrilla(user):
-        if cuadrilla.proyecto:
-            return Cuadrilla.objects.filter(
-                proyecto=cuadrilla.proyecto, 
-                lider=user
-            ).exists()
+    if acceso.es_lider:
+        if cuadrilla.proyecto_id:
+            return acceso.lidera_en_proyecto(cuadrilla.proyecto_id)
         return False
     
     # Trabajadores solo pueden ver si están asignados a la cuadrilla
-    return Asignacion.objects.filter(
-        trabajador=user, 
-        cuadrilla=cuadrilla
-    ).exists()
+    return cuadrilla.pk in acceso.cuadrillas_asignadas
 
 
 # ===================================================================
@@ -130,6 +131,9 @@ def esta_trabajador_ocupado(trabajador):
     """
     Verifica si un trabajador está ocupado (asignado a cuadrilla con proyecto).
     
+    Lee la columna desnormalizada `Trabajador.ocupado` (ver utils_ocupacion),
+    sin consultas adicionales.
+    
     Args:
         trabajador: Instancia de Trabajador
         
@@ -139,44 +143,93 @@ def esta_trabajador_ocupado(trabajador):
     if getattr(trabajador, 'manual_override', False):
         return False
     
-    if trabajador.user:
-        return Asignacion.objects.filter(
-            trabajador=trabajador.user,
-            cuadrilla__proyecto__isnull=False
-        ).exists()
-    
-    return False
+    return trabajador.ocupado
 
 
-def enriquecer_trabajador_con_info(trabajador):
+def enriquecer_trabajadores_con_info(trabajadores):
     """
-    Enriquece un objeto Trabajador con información adicional.
+    Enriquece un conjunto de Trabajadores con información adicional.
     
-    Agrega atributos dinámicos:
-    - ocupado: bool
+    Versión por lotes de la lógica de disponibilidad: resuelve asignaciones,
+    perfiles y certificaciones de todo el conjunto con un número constante
+    de consultas, en lugar de varias consultas por trabajador.
+    
+    Agrega atributos dinámicos (sin tocar el campo `ocupado`):
+    - ocupado_visible: bool (`ocupado` salvo override manual)
     - estado_real: str
     - certificacion_lista: list
     - tiene_certificaciones: bool
     
     Args:
-        trabajador: Instancia de Trabajador (modificada in-place)
+        trabajadores: QuerySet o iterable de instancias de Trabajador
+        
+    Returns:
+        list: Los mismos trabajadores (modificados in-place) como lista
     """
-    # Determinar si está ocupado
-    trabajador.ocupado = esta_trabajador_ocupado(trabajador)
-    
-    # Obtener perfil y estado real
-    perfil = None
-    if trabajador.user:
-        perfil, _ = TrabajadorPerfil.objects.get_or_create(
-            user=trabajador.user,
-            defaults={'estado_manual': 'disponible'}
+    trabajadores = list(trabajadores)
+    if not trabajadores:
+        return trabajadores
+
+    user_ids = {t.user_id for t in trabajadores if t.user_id}
+
+    # Asignados a cualquier cuadrilla (estado_efectivo); la ocupación en
+    # proyectos activos ya viene en la columna `ocupado`
+    asignados = set()
+    if user_ids:
+        asignados = set(
+            Asignacion.objects.filter(trabajador_id__in=user_ids)
+            .values_list('trabajador_id', flat=True)
         )
-    trabajador.estado_real = obtener_disponibilidad_trabajador(trabajador, perfil)
-    
-    # Obtener certificaciones
-    certificaciones = CertificacionTrabajador.objects.filter(trabajador=trabajador)
-    trabajador.certificacion_lista = [cert.nombre for cert in certificaciones]
-    trabajador.tiene_certificaciones = certificaciones.exists()
+
+    # Perfiles: crear en bloque los que falten (equivalente a get_or_create)
+    perfiles = {}
+    if user_ids:
+        perfiles = {
+            p.user_id: p
+            for p in TrabajadorPerfil.objects.filter(user_id__in=user_ids)
+        }
+        faltantes = [
+            TrabajadorPerfil(user_id=user_id, estado_manual='disponible')
+            for user_id in user_ids - perfiles.keys()
+        ]
+        if faltantes:
+            TrabajadorPerfil.objects.bulk_create(faltantes, ignore_conflicts=True)
+            perfiles.update({
+                p.user_id: p
+                for p in TrabajadorPerfil.objects.filter(
+                    user_id__in=[p.user_id for p in faltantes]
+                )
+            })
+
+    # Certificaciones agrupadas por trabajador
+    certificaciones = {}
+    filas = CertificacionTrabajador.objects.filter(
+        trabajador_id__in=[t.pk for t in trabajadores]
+    ).values_list('trabajador_id', 'nombre')
+    for trabajador_id, nombre in filas:
+        certificaciones.setdefault(trabajador_id, []).append(nombre)
+
+    for trabajador in trabajadores:
+        manual = getattr(trabajador, 'manual_override', False)
+
+        # Mismas reglas que esta_trabajador_ocupado()
+        trabajador.ocupado_visible = not manual and trabajador.ocupado
+
+        # Mismas reglas que obtener_disponibilidad_trabajador() + estado_efectivo
+        perfil = perfiles.get(trabajador.user_id)
+        if manual:
+            trabajador.estado_real = trabajador.estado
+        elif perfil:
+            trabajador.estado_real = (
+                'ocupado' if trabajador.user_id in asignados else perfil.estado_manual
+            )
+        else:
+            trabajador.estado_real = '—'
+
+        trabajador.certificacion_lista = certificaciones.get(trabajador.pk, [])
+        trabajador.tiene_certificaciones = bool(trabajador.certificacion_lista)
+
+    return trabajadores
 
 
 def puede_asignarse_trabajador(trabajador):
@@ -196,21 +249,47 @@ def puede_asignarse_trabajador(trabajador):
         return False
     
     # No permitir si ya está asignado a una cuadrilla con proyecto
-    if trabajador.user:
-        ya_asignado = Asignacion.objects.filter(
-            trabajador=trabajador.user,
-            cuadrilla__proyecto__isnull=False
-        ).exists()
-        if ya_asignado:
-            return False
-    
-    return True
+    return not trabajador.ocupado
 
 
 # ===================================================================
 # UTILIDADES DE LÍDERES
 # ===================================================================
 
+def _lider_ocupado(cuadrilla_actual=None):
+    """
+    Expresión `Exists` que indica si el líder (OuterRef 'pk') lidera alguna
+    cuadrilla asociada a proyecto, sin contar `cuadrilla_actual`.
+    """
+    cuadrillas_ocupadas = Cuadrilla.objects.filter(
+        lider=OuterRef('pk'),
+        proyecto__isnull=False
+    )
+    if cuadrilla_actual:
+        cuadrillas_ocupadas = cuadrillas_ocupadas.exclude(id=cuadrilla_actual.id)
+    return Exists(cuadrillas_ocupadas)
+
+
+def lideres_con_ocupacion(cuadrilla_actual=None):
+    """
+    QuerySet de líderes activos anotado con su ocupación.
+    
+    La ocupación se calcula con una subconsulta `Exists`, por lo que listar
+    todos los líderes cuesta una única consulta.
+    
+    Args:
+        cuadrilla_actual: Instancia de Cuadrilla (opcional) a excluir del
+                         cálculo de ocupación (edición).
+    
+    Returns:
+        QuerySet: Users con el atributo booleano `ocupado`
+    """
+    return User.objects.filter(
+        groups__name=UserGroups.LIDER_CUADRILLA,
+        is_active=True
+    ).annotate(ocupado=_lider_ocupado(cuadrilla_actual)).distinct()
+
+
 def preparar_lideres_disponibles(cuadrilla_actual=None):
     """
     Prepara una lista de líderes disponibles para asignar a una cuadrilla.
@@ -224,37 +303,18 @@ def preparar_lideres_disponibles(cuadrilla_actual=None):
         list: Lista de diccionarios con información de líderes
               [{'user': User, 'ocupado': bool, 'selectable': bool}, ...]
     """
-    lideres_qs = User.objects.filter(
-        groups__name=UserGroups.LIDER_CUADRILLA,
-        is_active=True
-    ).distinct()
+    lider_actual_id = cuadrilla_actual.lider_id if cuadrilla_actual else None
     
     lideres_info = []
     
-    for usuario in lideres_qs:
-        # Verificar si el líder está ocupado
-        query_ocupado = Cuadrilla.objects.filter(
-            lider=usuario,
-            proyecto__isnull=False
-        )
-        
-        # Excluir la cuadrilla actual si se está editando
-        if cuadrilla_actual:
-            query_ocupado = query_ocupado.exclude(id=cuadrilla_actual.id)
-        
-        ocupado = query_ocupado.exists()
-        
+    for usuario in lideres_con_ocupacion(cuadrilla_actual):
         # El líder actual de la cuadrilla siempre es seleccionable
-        es_lider_actual = (cuadrilla_actual and 
-                          cuadrilla_actual.lider and 
-                          usuario.id == cuadrilla_actual.lider.id)
-        
-        selectable = not ocupado or es_lider_actual
+        es_lider_actual = lider_actual_id is not None and usuario.id == lider_actual_id
         
         lideres_info.append({
             'user': usuario,
-            'ocupado': ocupado and not es_lider_actual,
-            'selectable': selectable,
+            'ocupado': usuario.ocupado and not es_lider_actual,
+            'selectable': not usuario.ocupado or es_lider_actual,
         })
     
     return lideres_info
@@ -274,25 +334,17 @@ def validar_disponibilidad_lider(lider_id, cuadrilla_actual=None):
     if not lider_id or not str(lider_id).isdigit():
         return True, None
     
-    # Verificar que pertenezca al grupo de líderes
+    # Verificar que pertenezca al grupo de líderes y que no lidere otra
+    # cuadrilla activa, en una sola consulta
     lider = User.objects.filter(
         id=lider_id,
         groups__name=UserGroups.LIDER_CUADRILLA
-    ).first()
+    ).annotate(ocupado=_lider_ocupado(cuadrilla_actual)).first()
     
     if not lider:
         return False, "El usuario seleccionado no es un líder válido."
     
-    # Verificar que no lidere otra cuadrilla activa
-    query_conflicto = Cuadrilla.objects.filter(
-        lider=lider,
-        proyecto__isnull=False
-    )
-    
-    if cuadrilla_actual:
-        query_conflicto = query_conflicto.exclude(id=cuadrilla_actual.id)
-    
-    if query_conflicto.exists():
+    if lider.ocupado:
         from .constants import MensajesError
         return False, MensajesError.LIDER_YA_OCUPADO
     
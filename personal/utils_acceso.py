@@ -0,0 +1,142 @@
+"""
+Snapshot de roles y pertenencias del usuario para la petición en curso.
+
+Los helpers de permisos (`es_jefe_proyecto`, `puede_ver_cuadrilla`, ...) se
+llaman varias veces por página desde vistas, middleware y plantillas. En vez
+de consultar `user.groups` o `Asignacion` en cada llamada, `AccesoUsuario`
+carga cada dato una única vez (de forma perezosa) y lo reutiliza durante
+toda la petición. `AccesoUsuarioMiddleware` crea el snapshot y lo deja en
+`request.acceso` y en `request.user`.
+
+El snapshot refleja el estado al momento de la primera lectura: si una vista
+modifica grupos o asignaciones del propio usuario, los helpers seguirán
+viendo el estado anterior hasta la siguiente petición.
+"""
+
+from django.contrib.auth.models import User
+from django.utils.functional import cached_property
+
+from .models import Asignacion, Cuadrilla
+from .constants import UserGroups
+
+
+class AccesoUsuario:
+    """
+    Roles y pertenencias de un usuario, cargados una vez por petición.
+
+    Atributos (perezosos, una consulta cada uno como máximo):
+    - grupos: frozenset con los nombres de grupo del usuario
+    - trabajador: Trabajador vinculado (`trabajador_profile`) o None
+    - perfil: TrabajadorPerfil (`perfil_trabajador`) o None
+    - cuadrillas_lideradas: dict {cuadrilla_id: proyecto_id} de las que es líder
+    - cuadrillas_asignadas: dict {cuadrilla_id: proyecto_id} en las que está asignado
+    """
+
+    def __init__(self, user):
+        self.user = user
+        self.autenticado = bool(user and user.is_authenticated)
+
+    # ---------------------------------------------------------------
+    # Grupos
+    # ---------------------------------------------------------------
+    @cached_property
+    def grupos(self):
+        if not self.autenticado:
+            return frozenset()
+        return frozenset(self.user.groups.values_list('name', flat=True))
+
+    def tiene_grupo(self, nombre):
+        return nombre in self.grupos
+
+    @property
+    def es_jefe(self):
+        return UserGroups.JEFE_PROYECTO in self.grupos
+
+    @property
+    def es_lider(self):
+        return UserGroups.LIDER_CUADRILLA in self.grupos
+
+    @property
+    def es_trabajador(self):
+        return UserGroups.TRABAJADOR in self.grupos
+
+    # ---------------------------------------------------------------
+    # Perfiles (una consulta para ambas relaciones uno a uno)
+    # ---------------------------------------------------------------
+    @cached_property
+    def _perfiles(self):
+        if not self.autenticado:
+            return None, None
+        fila = (
+            User.objects
+            .select_related('trabajador_profile', 'perfil_trabajador')
+            .filter(pk=self.user.pk)
+            .first()
+        )
+        trabajador = getattr(fila, 'trabajador_profile', None)
+        perfil = getattr(fila, 'perfil_trabajador', None)
+        # Dejar las relaciones cacheadas en el propio user, para que
+        # `request.user.trabajador_profile` no vuelva a consultar.
+        User.trabajador_profile.related.set_cached_value(self.user, trabajador)
+        User.perfil_trabajador.related.set_cached_value(self.user, perfil)
+        return trabajador, perfil
+
+    @property
+    def trabajador(self):
+        return self._perfiles[0]
+
+    @property
+    def perfil(self):
+        return self._perfiles[1]
+
+    # ---------------------------------------------------------------
+    # Cuadrillas
+    # ---------------------------------------------------------------
+    @cached_property
+    def cuadrillas_lideradas(self):
+        if not self.autenticado:
+            return {}
+        return dict(
+            Cuadrilla.objects.filter(lider_id=self.user.pk).values_list('id', 'proyecto_id')
+        )
+
+    @cached_property
+    def cuadrillas_asignadas(self):
+        if not self.autenticado:
+            return {}
+        return dict(
+            Asignacion.objects.filter(trabajador_id=self.user.pk)
+            .values_list('cuadrilla_id', 'cuadrilla__proyecto_id')
+        )
+
+    @property
+    def cuadrillas(self):
+        """IDs de todas las cuadrillas asociadas (lideradas o asignadas)."""
+        return set(self.cuadrillas_lideradas) | set(self.cuadrillas_asignadas)
+
+    @property
+    def lidera_alguna(self):
+        return bool(self.cuadrillas_lideradas)
+
+    def lidera_en_proyecto(self, proyecto_id):
+        """True si el usuario lidera alguna cuadrilla del proyecto indicado."""
+        return proyecto_id is not None and proyecto_id in self.cuadrillas_lideradas.values()
+
+
+def obtener_acceso(user):
+    """
+    Devuelve el snapshot de acceso del usuario.
+
+    Usa el snapshot de la petición si `AccesoUsuarioMiddleware` lo adjuntó;
+    en otro caso (comandos, tests, señales) crea uno nuevo.
+
+    Args:
+        user: Instancia de User (o AnonymousUser)
+
+    Returns:
+        AccesoUsuario: Snapshot de roles y pertenencias
+    """
+    acceso = getattr(user, '_acceso', None)
+    if acceso is None:
+        acceso = AccesoUsuario(user)
+    return acceso
@@ -0,0 +1,193 @@
+"""
+Servicio de asignación en bloque de trabajadores a cuadrillas.
+
+Resuelve trabajadores, disponibilidad y roles de todos los IDs enviados
+desde el formulario con un número fijo de consultas, calcula el diff
+(agregados / removidos / cambios de rol) con operaciones de conjuntos y lo
+aplica con `bulk_create`, `bulk_update` y un único `delete`.
+"""
+
+from django.db.models import Q
+
+from comunicacion.sync import schedule_group_sync
+from .models import Asignacion, Rol, Trabajador
+from .constants import EstadosTrabajador
+from .utils import obtener_disponibilidad_trabajador, actualizar_estado_trabajador_al_quitar
+from .utils_ocupacion import recalcular_ocupacion
+
+
+def _ids_validos(ids):
+    """Normaliza los IDs recibidos por POST a un set de enteros."""
+    return {int(i) for i in ids if str(i).isdigit()}
+
+
+def resolver_roles(data, user_ids):
+    """
+    Resuelve el rol elegido para cada usuario a partir de los datos del POST.
+
+    Para cada usuario se usa `roles_custom_<id>` (nombre de rol nuevo, se crea
+    si no existe) o, en su defecto, `roles_<id>` (ID de un rol existente).
+
+    Args:
+        data: QueryDict (request.POST) o dict
+        user_ids: Iterable de IDs de usuario (int)
+
+    Returns:
+        dict: {user_id: Rol o None}
+    """
+    nombres = {}
+    ids_rol = {}
+    for user_id in user_ids:
+        nombre = (data.get(f"roles_custom_{user_id}") or '').strip()
+        if nombre:
+            nombres[user_id] = nombre
+            continue
+        rol_id = data.get(f"roles_{user_id}")
+        if rol_id and str(rol_id).isdigit():
+            ids_rol[user_id] = int(rol_id)
+
+    if not nombres and not ids_rol:
+        return {user_id: None for user_id in user_ids}
+
+    # Una sola consulta para roles por nombre y por ID
+    por_id = {}
+    por_nombre = {}
+    for rol in Rol.objects.filter(
+        Q(nombre__in=set(nombres.values())) | Q(id__in=set(ids_rol.values()))
+    ).order_by('id'):
+        por_id[rol.id] = rol
+        por_nombre.setdefault(rol.nombre, rol)
+
+    # Crear en bloque los roles personalizados que no existan
+    faltantes = sorted(set(nombres.values()) - por_nombre.keys())
+    if faltantes:
+        creados = Rol.objects.bulk_create([Rol(nombre=n) for n in faltantes])
+        if any(r.pk is None for r in creados):
+            creados = Rol.objects.filter(nombre__in=faltantes).order_by('id')
+        for rol in creados:
+            por_nombre.setdefault(rol.nombre, rol)
+
+    roles = {}
+    for user_id in user_ids:
+        if user_id in nombres:
+            roles[user_id] = por_nombre.get(nombres[user_id])
+        else:
+            roles[user_id] = por_id.get(ids_rol.get(user_id))
+    return roles
+
+
+def trabajadores_asignables(cuadrilla, user_ids):
+    """
+    Filtra los usuarios que pueden asignarse a una cuadrilla.
+
+    Aplica las mismas reglas que `puede_asignarse_trabajador` para todo el
+    conjunto en dos consultas (la disponibilidad viene anotada con
+    `with_disponibilidad()`, incluido el estado manual del perfil). Las
+    asignaciones a la propia cuadrilla no cuentan como ocupación (permite
+    editar roles de los miembros actuales).
+
+    Args:
+        cuadrilla: Instancia de Cuadrilla
+        user_ids: Iterable de IDs de usuario (int)
+
+    Returns:
+        dict: {user_id: Trabajador} de los trabajadores asignables
+    """
+    trabajadores = {
+        t.user_id: t
+        for t in Trabajador.objects.filter(user_id__in=user_ids).select_related('user').with_disponibilidad()
+    }
+    if not trabajadores:
+        return {}
+
+    ocupados = set(
+        Asignacion.objects
+        .filter(trabajador_id__in=trabajadores.keys(), cuadrilla__proyecto__isnull=False)
+        .exclude(cuadrilla_id=cuadrilla.pk)
+        .values_list('trabajador_id', flat=True)
+    )
+
+    return {
+        user_id: t
+        for user_id, t in trabajadores.items()
+        if user_id not in ocupados
+        and obtener_disponibilidad_trabajador(t) not in EstadosTrabajador.ESTADOS_NO_ASIGNABLES
+    }
+
+
+def aplicar_asignaciones(cuadrilla, seleccionados, data, asignaciones_actuales=None,
+                         quitables=None):
+    """
+    Sincroniza las asignaciones de una cuadrilla con la selección del formulario.
+
+    Args:
+        cuadrilla: Instancia de Cuadrilla
+        seleccionados: Iterable de IDs de usuario seleccionados (str o int)
+        data: request.POST con los roles (`roles_<id>` / `roles_custom_<id>`)
+        asignaciones_actuales: Dict {str(user_id): Asignacion} (opcional; si no
+                               se indica se consulta)
+        quitables: IDs de usuario que el formulario mostró como miembros; los
+                   que no vienen en la selección se quitan de la cuadrilla.
+                   Los miembros no mostrados nunca se quitan (por defecto, ninguno)
+
+    Returns:
+        tuple: (agregados, removidos, cambios_rol)
+            - agregados: Lista de tuplas (user, rol)
+            - removidos: Lista de users
+            - cambios_rol: Lista de tuplas (user, cuadrilla, rol)
+    """
+    seleccionados = _ids_validos(seleccionados)
+    if asignaciones_actuales is None:
+        asignaciones_actuales = {
+            str(a.trabajador_id): a
+            for a in Asignacion.objects.filter(cuadrilla=cuadrilla).select_related('trabajador', 'rol')
+        }
+    actuales = {int(k): a for k, a in asignaciones_actuales.items()}
+
+    asignables = trabajadores_asignables(cuadrilla, seleccionados)
+    roles = resolver_roles(data, asignables.keys())
+
+    # Diff con operaciones de conjuntos
+    ids_nuevos = asignables.keys() - actuales.keys()
+    ids_existentes = asignables.keys() & actuales.keys()
+    ids_removidos = (actuales.keys() & _ids_validos(quitables or ())) - seleccionados
+
+    agregados = []
+    nuevas = []
+    for user_id in sorted(ids_nuevos):
+        user = asignables[user_id].user
+        rol = roles.get(user_id)
+        nuevas.append(Asignacion(trabajador=user, cuadrilla=cuadrilla, rol=rol))
+        agregados.append((user, rol))
+
+    cambios_rol = []
+    modificadas = []
+    for user_id in sorted(ids_existentes):
+        asignacion = actuales[user_id]
+        rol = roles.get(user_id)
+        if asignacion.rol_id != (rol.pk if rol else None):
+            asignacion.rol = rol
+            modificadas.append(asignacion)
+            cambios_rol.append((asignables[user_id].user, cuadrilla, rol))
+
+    removidos = [actuales[user_id].trabajador for user_id in sorted(ids_removidos)]
+
+    # Aplicar el diff
+    if nuevas:
+        Asignacion.objects.bulk_create(nuevas)
+        # bulk_create no emite señales: actualizar la ocupación en bloque
+        recalcular_ocupacion(user_ids=[a.trabajador_id for a in nuevas])
+    if modificadas:
+        Asignacion.objects.bulk_update(modificadas, ['rol'])
+    if ids_removidos:
+        Asignacion.objects.filter(
+            pk__in=[actuales[user_id].pk for user_id in ids_removidos]
+        ).delete()
+        for user in removidos:
+            actualizar_estado_trabajador_al_quitar(user)
+
+    # bulk_create/bulk_update no emiten señales: sincronizar el chat grupal
+    if nuevas or ids_removidos:
+        schedule_group_sync(cuadrilla.pk)
+
+    return agregados, removidos, cambios_rol
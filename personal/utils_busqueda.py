@@ -0,0 +1,272 @@
+"""
+Índice de búsqueda de texto completo de trabajadores.
+
+Cada trabajador tiene un documento normalizado (`TrabajadorBusqueda`) con su
+nombre, RUT, email, especialidad, competencias (nombre y nivel) y
+certificaciones (nombre y entidad). Según el motor de base de datos:
+
+- SQLite: la tabla virtual FTS5 `personal_trabajador_fts` (external content
+  sobre `personal_trabajadorbusqueda`, mantenida con triggers) resuelve
+  `MATCH` con prefijos.
+- PostgreSQL: `SearchVector`/`SearchQuery` sobre el documento (índice GIN
+  creado en la migración).
+- Otros motores: `icontains` por palabra sobre el documento.
+
+El selector de trabajadores y la búsqueda del admin filtran con
+`filtro_busqueda` y mantienen su propio orden.
+
+El índice se mantiene al día con señales (`programar_indexacion`) y se puede
+reconstruir con `python manage.py reconstruir_indice_busqueda`.
+"""
+
+import re
+import threading
+import unicodedata
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+
+TABLA_FTS = 'personal_trabajador_fts'
+TAMANO_LOTE = 2000
+
+_estado = threading.local()
+
+
+# ===================================================================
+# DOCUMENTOS
+# ===================================================================
+
+def normalizar(texto):
+    """Minúsculas y sin tildes (NFKD), para indexar y buscar igual."""
+    texto = unicodedata.normalize('NFKD', str(texto or ''))
+    return ''.join(ch for ch in texto if not unicodedata.combining(ch)).lower()
+
+
+def documento_trabajador(fila, competencias=(), certificaciones=()):
+    """
+    Arma el texto indexable de un trabajador.
+
+    Args:
+        fila: dict con nombre, apellido, rut, email y especialidad
+        competencias: Iterable de tuplas (nombre, nivel)
+        certificaciones: Iterable de tuplas (nombre, entidad)
+
+    Returns:
+        str: Documento normalizado
+    """
+    rut = fila.get('rut') or ''
+    partes = [
+        fila.get('nombre'), fila.get('apellido'), rut,
+        ''.join(ch for ch in rut if ch.isalnum()),
+        fila.get('email'), fila.get('especialidad'),
+    ]
+    for nombre, nivel in competencias:
+        partes += [nombre, nivel]
+    for nombre, entidad in certificaciones:
+        partes += [nombre, entidad]
+    return normalizar(' '.join(p for p in partes if p))
+
+
+def construir_documentos(trabajador_ids, modelos=None):
+    """
+    Construye los documentos de varios trabajadores con tres consultas.
+
+    Args:
+        trabajador_ids: Iterable de IDs de Trabajador
+        modelos: Tupla opcional (Trabajador, CompetenciaTrabajador,
+                 CertificacionTrabajador); permite usarla desde migraciones
+                 con los modelos históricos
+
+    Returns:
+        dict: {trabajador_id: documento}
+    """
+    if modelos is None:
+        from .models import Trabajador, CompetenciaTrabajador, CertificacionTrabajador
+        modelos = (Trabajador, CompetenciaTrabajador, CertificacionTrabajador)
+    Trabajador, CompetenciaTrabajador, CertificacionTrabajador = modelos
+
+    ids = list(trabajador_ids)
+    competencias = {}
+    for tid, nombre, nivel in CompetenciaTrabajador.objects.filter(
+        trabajador_id__in=ids
+    ).values_list('trabajador_id', 'nombre', 'nivel'):
+        competencias.setdefault(tid, []).append((nombre, nivel))
+
+    certificaciones = {}
+    for tid, nombre, entidad in CertificacionTrabajador.objects.filter(
+        trabajador_id__in=ids
+    ).values_list('trabajador_id', 'nombre', 'entidad'):
+        certificaciones.setdefault(tid, []).append((nombre, entidad))
+
+    return {
+        fila['id']: documento_trabajador(
+            fila, competencias.get(fila['id'], ()), certificaciones.get(fila['id'], ())
+        )
+        for fila in Trabajador.objects.filter(id__in=ids).values(
+            'id', 'nombre', 'apellido', 'rut', 'email', 'especialidad'
+        )
+    }
+
+
+def indexar_trabajadores(trabajador_ids):
+    """
+    Inserta o actualiza el documento de los trabajadores indicados.
+
+    Los IDs que ya no existen se ignoran (el borrado del trabajador elimina
+    su documento en cascada).
+
+    Args:
+        trabajador_ids: Iterable de IDs de Trabajador
+
+    Returns:
+        int: Cantidad de documentos escritos
+    """
+    from .models import TrabajadorBusqueda
+
+    documentos = construir_documentos(trabajador_ids)
+    if not documentos:
+        return 0
+    TrabajadorBusqueda.objects.bulk_create(
+        [TrabajadorBusqueda(trabajador_id=tid, documento=doc) for tid, doc in documentos.items()],
+        update_conflicts=True,
+        unique_fields=['trabajador'],
+        update_fields=['documento', 'actualizado'],
+    )
+    return len(documentos)
+
+
+def reconstruir_indice(tamano_lote=TAMANO_LOTE):
+    """
+    Regenera el índice completo recorriendo los trabajadores por lotes.
+
+    Args:
+        tamano_lote: Trabajadores por lote (paginación por keyset sobre el ID)
+
+    Returns:
+        int: Cantidad de documentos escritos
+    """
+    from .models import Trabajador, TrabajadorBusqueda
+
+    total = 0
+    ultimo = 0
+    with transaction.atomic():
+        TrabajadorBusqueda.objects.all().delete()
+        while True:
+            ids = list(
+                Trabajador.objects.filter(id__gt=ultimo)
+                .order_by('id').values_list('id', flat=True)[:tamano_lote]
+            )
+            if not ids:
+                break
+            total += indexar_trabajadores(ids)
+            ultimo = ids[-1]
+        if fts_disponible():
+            with connection.cursor() as cursor:
+                cursor.execute(f"INSERT INTO {TABLA_FTS}({TABLA_FTS}) VALUES ('rebuild')")
+    return total
+
+
+# ===================================================================
+# ACTUALIZACIÓN INCREMENTAL
+# ===================================================================
+
+def _indexar_pendientes():
+    pendientes = getattr(_estado, 'pendientes', None)
+    _estado.pendientes = None
+    if pendientes:
+        indexar_trabajadores(pendientes)
+
+
+def programar_indexacion(trabajador_id):
+    """
+    Marca un trabajador para reindexar cuando se confirme la transacción.
+
+    Varios cambios (del mismo o de distintos trabajadores) dentro de una
+    transacción se indexan juntos: el primer callback `on_commit` indexa
+    todo lo pendiente y los siguientes no encuentran nada que hacer.
+    """
+    if trabajador_id is None:
+        return
+    pendientes = getattr(_estado, 'pendientes', None)
+    if pendientes is None:
+        pendientes = _estado.pendientes = set()
+    pendientes.add(trabajador_id)
+    transaction.on_commit(_indexar_pendientes)
+
+
+# ===================================================================
+# BÚSQUEDA
+# ===================================================================
+
+def fts_disponible(conn=None):
+    """True si la base de datos usa el índice FTS5 (solo SQLite)."""
+    conn = conn or connection
+    if conn.vendor != 'sqlite':
+        return False
+    # Solo se recuerda el resultado positivo: la tabla puede aparecer al migrar
+    if not getattr(conn, '_fts_trabajadores', False):
+        conn._fts_trabajadores = TABLA_FTS in conn.introspection.table_names()
+    return conn._fts_trabajadores
+
+
+def _palabras(texto):
+    """
+    Palabras a buscar: solo letras y dígitos.
+
+    La puntuación separa palabras, igual que al tokenizar el documento
+    (FTS5 y `to_tsvector`), y así nunca llega a la sintaxis de MATCH o de
+    tsquery (`' ( ) | ! & :`). Un RUT con puntos o guión se busca contra su
+    versión sin formato.
+    """
+    palabras = []
+    for palabra in normalizar(texto).split():
+        if any(ch.isdigit() for ch in palabra):
+            palabras.append(''.join(ch for ch in palabra if ch.isalnum()))
+        else:
+            palabras += re.findall(r'[^\W_]+', palabra)
+    return [p for p in palabras if p]
+
+
+def _consulta_fts(palabras):
+    # Cada palabra como prefijo entre comillas
+    return ' '.join(f'"{p}"*' for p in palabras)
+
+
+def filtro_busqueda(texto):
+    """
+    Condición para filtrar un QuerySet de Trabajador por el índice.
+
+    Todas las palabras deben aparecer (como prefijo en SQLite). La
+    subconsulta se resuelve en la base de datos, sin materializar IDs.
+
+    Args:
+        texto: Texto libre (nombre, RUT, especialidad, competencia, ...)
+
+    Returns:
+        Q: Condición sobre `Trabajador.id` (vacía si no hay palabras)
+    """
+    palabras = _palabras(texto)
+    if not palabras:
+        return Q()
+
+    if fts_disponible():
+        return Q(id__in=RawSQL(
+            f"SELECT rowid FROM {TABLA_FTS} WHERE {TABLA_FTS} MATCH %s",
+            [_consulta_fts(palabras)],
+        ))
+
+    from .models import TrabajadorBusqueda
+    if connection.vendor == 'postgresql':
+        from django.contrib.postgres.search import SearchQuery, SearchVector
+        indice = TrabajadorBusqueda.objects.annotate(
+            vector=SearchVector('documento', config='simple')
+        ).filter(vector=SearchQuery(
+            ' & '.join(f'{p}:*' for p in palabras), config='simple', search_type='raw'
+        ))
+    else:
+        indice = TrabajadorBusqueda.objects.all()
+        for palabra in palabras:
+            indice = indice.filter(documento__icontains=palabra)
+    return Q(id__in=indice.values('trabajador_id'))
@@ -0,0 +1,129 @@
+"""
+Barrido de vencimiento de certificaciones de trabajadores.
+
+`revisar_vencimientos` recorre por lotes (keyset sobre el ID) las
+certificaciones por vencer y vencidas usando los filtros SQL de
+`CertificacionTrabajador.objects` (índice sobre fecha_expiracion) y avisa con
+notificaciones internas al trabajador, al líder de su cuadrilla y al jefe del
+proyecto. Cada destinatario recibe una sola notificación por lote y estado, y
+todas se escriben con un único `bulk_create` por lote.
+
+El aviso enviado queda registrado en `aviso_vencimiento`, de modo que el
+barrido se puede ejecutar a diario (`python manage.py revisar_certificaciones`)
+sin repetir notificaciones. Si la certificación se renueva fuera de la
+ventana de aviso, el registro se limpia y volverá a avisarse en el futuro.
+"""
+
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .constants import AvisosCertificacion, MensajesNotificacion
+from .models import Asignacion, CertificacionTrabajador
+from .utils_notificaciones import crear_notificaciones
+
+
+TAMANO_LOTE = 1000
+
+
+def _responsables(user_ids):
+    """
+    Líderes de cuadrilla y jefes de proyecto de los usuarios indicados.
+
+    Returns:
+        dict: {user_id: set(IDs de usuarios responsables)}
+    """
+    responsables = {}
+    for user_id, lider_id, jefe_id in Asignacion.objects.filter(
+        trabajador_id__in=user_ids
+    ).values_list('trabajador_id', 'cuadrilla__lider_id', 'cuadrilla__proyecto__jefe_id'):
+        ids = responsables.setdefault(user_id, set())
+        ids.update(i for i in (lider_id, jefe_id) if i and i != user_id)
+    return responsables
+
+
+def _notificaciones_lote(filas, aviso):
+    """Arma los pares (user_id, mensaje), uno por destinatario, de un lote de certificaciones."""
+    propias = {}
+    equipo = {}
+    responsables = _responsables({f['trabajador__user_id'] for f in filas if f['trabajador__user_id']})
+
+    for fila in filas:
+        user_id = fila['trabajador__user_id']
+        if not user_id:
+            continue
+        propias.setdefault(user_id, []).append((fila['nombre'], fila['fecha_expiracion']))
+        detalle = (
+            f"{fila['trabajador__nombre']} {fila['trabajador__apellido']}: "
+            f"{fila['nombre']} ({fila['fecha_expiracion']:%d/%m/%Y})"
+        )
+        for responsable_id in responsables.get(user_id, ()):
+            equipo.setdefault(responsable_id, []).append(detalle)
+
+    pares = [
+        (user_id, MensajesNotificacion.certificaciones_propias(aviso, certs))
+        for user_id, certs in propias.items()
+    ]
+    pares += [
+        (user_id, MensajesNotificacion.certificaciones_equipo(aviso, detalle))
+        for user_id, detalle in equipo.items()
+    ]
+    return pares
+
+
+def _barrer(queryset, aviso, tamano_lote):
+    """Avisa y marca por lotes las certificaciones del QuerySet. Devuelve (certificaciones, notificaciones)."""
+    pendientes = queryset.exclude(aviso_vencimiento=aviso).order_by('id')
+    total_certificaciones = 0
+    total_notificaciones = 0
+    ultimo = 0
+    while True:
+        filas = list(pendientes.filter(id__gt=ultimo).values(
+            'id', 'nombre', 'fecha_expiracion',
+            'trabajador__user_id', 'trabajador__nombre', 'trabajador__apellido',
+        )[:tamano_lote])
+        if not filas:
+            break
+        ids = [f['id'] for f in filas]
+        with transaction.atomic():
+            notificaciones = crear_notificaciones(_notificaciones_lote(filas, aviso))
+            CertificacionTrabajador.objects.filter(id__in=ids).update(aviso_vencimiento=aviso)
+        total_certificaciones += len(ids)
+        total_notificaciones += len(notificaciones)
+        ultimo = ids[-1]
+    return total_certificaciones, total_notificaciones
+
+
+def revisar_vencimientos(dias=AvisosCertificacion.DIAS_ANTICIPACION, tamano_lote=TAMANO_LOTE, hoy=None):
+    """
+    Avisa de las certificaciones por vencer y vencidas que aún no se avisaron.
+
+    Args:
+        dias: Anticipación (en días) del aviso de vencimiento próximo
+        tamano_lote: Certificaciones por lote
+        hoy: Fecha de referencia (por defecto la fecha local actual)
+
+    Returns:
+        dict: Conteos 'por_vencer', 'vencidas', 'notificaciones' y 'restablecidas'
+    """
+    hoy = hoy or timezone.localdate()
+    certificaciones = CertificacionTrabajador.objects
+
+    # Renovadas: vuelven a quedar fuera de la ventana de aviso
+    restablecidas = certificaciones.vigentes(hoy + timedelta(days=dias + 1)).exclude(
+        aviso_vencimiento=''
+    ).update(aviso_vencimiento='')
+
+    por_vencer, notif_por_vencer = _barrer(
+        certificaciones.por_vencer(dias, hoy), AvisosCertificacion.POR_VENCER, tamano_lote
+    )
+    vencidas, notif_vencidas = _barrer(
+        certificaciones.vencidas(hoy), AvisosCertificacion.VENCIDA, tamano_lote
+    )
+    return {
+        'por_vencer': por_vencer,
+        'vencidas': vencidas,
+        'notificaciones': notif_por_vencer + notif_vencidas,
+        'restablecidas': restablecidas,
+    }
@@ -0,0 +1,657 @@
+"""
+Generador de datos sintéticos para pruebas de carga y benchmarks.
+
+A partir de una semilla genera de forma determinista proyectos, cuadrillas,
+trabajadores (con competencias y certificaciones), chats de cuadrilla y
+privados con sus mensajes, chats archivados, notificaciones, solicitudes e
+incidentes. Con la
+misma semilla, los mismos parámetros y la misma base de partida el resultado
+es idéntico (salvo los IDs).
+
+Todo se inserta con `bulk_create` por lotes, sin emitir señales, así que el
+estado derivado que normalmente mantienen las señales se escribe aquí:
+
+- `Trabajador.ocupado` se calcula al armar las cuadrillas.
+- Los chats grupales se crean con los mismos participantes que dejaría
+  `Conversation.sync_groups_for_cuadrillas` (asignaciones + líder).
+- Cada lote de trabajadores se indexa para la búsqueda
+  (`indexar_trabajadores`) y al terminar se invalida el motor de
+  recomendación y se reconstruyen los contadores del dashboard y de las
+  insignias.
+
+Todos los usuarios comparten una contraseña, hasheada una sola vez.
+Los `read_by` de los mensajes no se generan. Los chats archivados son
+snapshots de conversaciones privadas ya eliminadas (`conversation=None`),
+con el mismo formato JSON y el mismo índice de acceso (`participantes`) que
+escribe `archive_conversation`.
+
+Uso: `python manage.py generar_datos_carga --trabajadores 100000 --mensajes 1000000`.
+"""
+
+import json
+import math
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group, User
+from django.db import transaction
+from django.utils import timezone
+
+from comunicacion.models import ChatArchivado, Conversation, IncidentNotice, Message, WorkerRequest
+from core.utils_contadores import CONTADOR_ARCHIVADOS, CONTADOR_NOTIFICACIONES, invalidar_contadores
+from core.utils_estadisticas import reconstruir_estadisticas
+from proyectos.models import Proyecto
+from .constants import EstadosTrabajador, TiposTrabajador
+from .models import (
+    Asignacion, CertificacionTrabajador, CompetenciaTrabajador, Cuadrilla, Notificacion,
+    Rol, Trabajador, TrabajadorPerfil,
+)
+from .utils_busqueda import indexar_trabajadores, normalizar
+from .utils_importacion import GRUPO_POR_TIPO
+from .utils_recomendacion import invalidar_recomendaciones
+
+
+TAMANO_LOTE = 5000
+PASSWORD = 'carga1234'
+
+# Días hacia atrás que abarcan mensajes, notificaciones, solicitudes e incidentes
+DIAS_HISTORIA = 180
+# Fracción de trabajadores (tipo 'trabajador') asignados a alguna cuadrilla
+FRACCION_ASIGNADOS = 0.75
+# Un proyecto cada tantos tiene su propio jefe
+PROYECTOS_POR_JEFE = 3
+
+
+# ===================================================================
+# CATÁLOGOS
+# ===================================================================
+
+NOMBRES = (
+    'José', 'Juan', 'Luis', 'Carlos', 'Jorge', 'Manuel', 'Pedro', 'Francisco',
+    'Miguel', 'Cristián', 'Diego', 'Felipe', 'Rodrigo', 'Sebastián', 'Matías',
+    'María', 'Ana', 'Carolina', 'Francisca', 'Camila', 'Valentina', 'Javiera',
+    'Paula', 'Daniela', 'Constanza', 'Claudia', 'Patricia', 'Sofía', 'Isidora', 'Fernanda',
+)
+
+APELLIDOS = (
+    'González', 'Muñoz', 'Rojas', 'Díaz', 'Pérez', 'Soto', 'Contreras', 'Silva',
+    'Martínez', 'Sepúlveda', 'Morales', 'Rodríguez', 'López', 'Fuentes', 'Hernández',
+    'Torres', 'Araya', 'Flores', 'Espinoza', 'Valenzuela', 'Castillo', 'Tapia',
+    'Reyes', 'Gutiérrez', 'Castro', 'Pizarro', 'Álvarez', 'Vásquez', 'Sánchez', 'Fernández',
+)
+
+# (especialidad, peso): pocas especialidades concentran a la mayoría
+ESPECIALIDADES = (
+    ('Albañilería', 20), ('Carpintería', 14), ('Electricidad', 12), ('Gasfitería', 9),
+    ('Soldadura', 8), ('Pintura', 7), ('Enfierradura', 6), ('Mecánica', 5),
+    ('Climatización', 4), ('Montaje industrial', 3), ('Redes y cableado', 3),
+    ('Topografía', 2), ('Prevención de riesgos', 2),
+)
+
+COMPETENCIAS = (
+    'Trabajo en altura', 'Lectura de planos', 'Hormigonado', 'Soldadura al arco',
+    'Instalaciones eléctricas', 'Instalaciones sanitarias', 'Operación de grúa',
+    'Armado de andamios', 'Terminaciones', 'Mantención preventiva', 'Cableado estructurado',
+    'Montaje de estructuras', 'Pintura industrial', 'Primeros auxilios', 'Manejo de extintores',
+)
+NIVELES = (('basico', 35), ('intermedio', 35), ('avanzado', 22), ('experto', 8))
+
+# (nombre, entidad, años de vigencia; None = sin vencimiento)
+CERTIFICACIONES = (
+    ('Curso trabajo en altura', 'Mutual de Seguridad', 2),
+    ('Licencia SEC clase D', 'SEC', 4),
+    ('Soldador calificado AWS', 'AWS', 3),
+    ('Operador de grúa horquilla', 'OTEC Capacita', 4),
+    ('Primeros auxilios', 'Cruz Roja', 2),
+    ('Prevención de riesgos', 'ACHS', 3),
+    ('Instalador de gas clase 3', 'SEC', 5),
+    ('Maestro de obra', 'OTEC Construye', None),
+)
+
+ESTADOS_LIBRES = (
+    (EstadosTrabajador.DISPONIBLE, 88), (EstadosTrabajador.VACACIONES, 6),
+    (EstadosTrabajador.LICENCIA, 5), (EstadosTrabajador.INACTIVO, 1),
+)
+
+TIPOS_PROYECTO = (('construccion', 45), ('mantenimiento', 25), ('instalacion', 20), ('otro', 10))
+COMPLEJIDADES = (('baja', 30), ('media', 50), ('alta', 20))
+LUGARES = (
+    'Santiago', 'Valparaíso', 'Concepción', 'Antofagasta', 'La Serena', 'Temuco',
+    'Rancagua', 'Talca', 'Puerto Montt', 'Iquique',
+)
+OBRAS = (
+    'Edificio', 'Bodega', 'Colegio', 'Planta', 'Condominio', 'Hospital', 'Centro comercial',
+    'Puente', 'Subestación', 'Oficinas',
+)
+
+MENSAJES = (
+    'Buenos días, ¿a qué hora partimos hoy?', 'Llegó el material a la obra.',
+    'Falta cemento para terminar la losa.', 'Mañana hay inspección, dejen todo ordenado.',
+    'Ok, entendido.', 'Voy en camino.', '¿Alguien tiene la llave de la bodega?',
+    'Terminamos el tramo norte.', 'Se cortó la luz en el sector 2.', 'Recuerden usar arnés.',
+    'Hoy salimos a las 18:00.', 'Necesito apoyo en el segundo piso.',
+    'Se reprogramó la entrega para el jueves.', 'Listo, quedó instalado.', 'Gracias a todos.',
+)
+TIPOS_MENSAJE = (('text', 95), ('request', 3), ('incident', 2))
+
+NOTIFICACIONES = (
+    'Fuiste asignado a la cuadrilla {cuadrilla}.', 'Tu solicitud fue revisada.',
+    'Tienes mensajes nuevos en {cuadrilla}.', 'Tu certificación vence pronto.',
+    'Se actualizó el proyecto {proyecto}.', 'Nuevo incidente reportado en {cuadrilla}.',
+)
+
+ASUNTOS_SOLICITUD = (
+    'Cambio de cuadrilla', 'Permiso administrativo', 'Solicitud de vacaciones',
+    'Reposición de EPP', 'Cambio de turno', 'Anticipo de sueldo',
+)
+ESTADOS_SOLICITUD = (('pending', 30), ('accepted', 50), ('rejected', 20))
+
+INCIDENTES = (
+    'Caída de material desde altura.', 'Corte eléctrico en faena.',
+    'Trabajador con lesión menor en la mano.', 'Falla de herramienta eléctrica.',
+    'Filtración de agua en bodega.', 'Vehículo mal estacionado en acceso.',
+)
+SEVERIDADES = (('low', 60), ('medium', 30), ('high', 10))
+
+
+# ===================================================================
+# UTILIDADES
+# ===================================================================
+
+def digito_verificador(cuerpo):
+    """
+    Dígito verificador (módulo 11) del cuerpo de un RUT.
+
+    Args:
+        cuerpo: int con el RUT sin dígito verificador
+
+    Returns:
+        str: '0'-'9' o 'K'
+    """
+    suma, factor = 0, 2
+    for digito in reversed(str(cuerpo)):
+        suma += int(digito) * factor
+        factor = 2 if factor == 7 else factor + 1
+    resto = 11 - suma % 11
+    return {11: '0', 10: 'K'}.get(resto, str(resto))
+
+
+def _elegir(rng, opciones, k=1):
+    """Elige k valores de una tupla de pares (valor, peso)."""
+    valores, pesos = zip(*opciones)
+    return rng.choices(valores, weights=pesos, k=k)
+
+
+def _en_lotes(secuencia, tamano):
+    for inicio in range(0, len(secuencia), tamano):
+        yield secuencia[inicio:inicio + tamano]
+
+
+@contextmanager
+def _fechas_manuales(*campos):
+    """
+    Desactiva `auto_now_add` en los campos indicados mientras dura el bloque,
+    para que `bulk_create` respete las fechas generadas.
+
+    Args:
+        campos: Tuplas (modelo, nombre del campo)
+    """
+    originales = [(campo, campo.auto_now_add) for campo in (m._meta.get_field(n) for m, n in campos)]
+    for campo, _ in originales:
+        campo.auto_now_add = False
+    try:
+        yield
+    finally:
+        for campo, valor in originales:
+            campo.auto_now_add = valor
+
+
+# ===================================================================
+# GENERADOR
+# ===================================================================
+
+class GeneradorDatos:
+    """
+    Genera un conjunto de datos sintéticos reproducible.
+
+    Args:
+        proyectos: Cantidad de proyectos
+        cuadrillas: Cuadrillas por proyecto (cada una con su propio líder)
+        trabajadores: Total de trabajadores, incluidos jefes y líderes
+        mensajes: Total de mensajes repartidos entre los chats
+        notificaciones: Total de notificaciones (por defecto, 2 por trabajador)
+        solicitudes: Total de solicitudes (por defecto, 1 cada 10 trabajadores)
+        incidentes: Total de incidentes (por defecto, 2 por cuadrilla)
+        archivados: Total de chats archivados (por defecto, 1 por cuadrilla)
+        semilla: Semilla del generador aleatorio
+        tamano_lote: Filas por `bulk_create` (y por transacción)
+        ahora: Fecha de referencia (por defecto, `timezone.now()`)
+        progreso: Callable opcional que recibe un texto por cada etapa
+    """
+
+    def __init__(self, proyectos=10, cuadrillas=3, trabajadores=300, mensajes=5000,
+                 notificaciones=None, solicitudes=None, incidentes=None, archivados=None, semilla=1,
+                 tamano_lote=TAMANO_LOTE, ahora=None, progreso=None):
+        self.num_jefes = max(1, math.ceil(proyectos / PROYECTOS_POR_JEFE)) if proyectos else 0
+        self.num_lideres = proyectos * cuadrillas
+        if trabajadores < self.num_jefes + self.num_lideres:
+            raise ValueError(
+                f'Se necesitan al menos {self.num_jefes + self.num_lideres} trabajadores '
+                f'({self.num_jefes} jefes y {self.num_lideres} líderes).'
+            )
+        self.num_proyectos = proyectos
+        self.cuadrillas_por_proyecto = cuadrillas
+        self.num_trabajadores = trabajadores
+        self.num_mensajes = mensajes
+        self.num_notificaciones = 2 * trabajadores if notificaciones is None else notificaciones
+        self.num_solicitudes = trabajadores // 10 if solicitudes is None else solicitudes
+        self.num_incidentes = 2 * self.num_lideres if incidentes is None else incidentes
+        self.num_archivados = self.num_lideres if archivados is None else archivados
+        self.rng = random.Random(semilla)
+        self.tamano_lote = tamano_lote
+        self.ahora = ahora or timezone.now()
+        self.inicio = self.ahora - timedelta(days=DIAS_HISTORIA)
+        self.progreso = progreso or (lambda texto: None)
+        self.conteos = {}
+
+    def _fecha(self, fraccion=None):
+        """Instante entre `inicio` y `ahora` (al azar si no se da la fracción)."""
+        fraccion = self.rng.random() if fraccion is None else fraccion
+        return self.inicio + (self.ahora - self.inicio) * fraccion
+
+    def _contar(self, clave, cantidad):
+        self.conteos[clave] = self.conteos.get(clave, 0) + cantidad
+
+    # ---------------------------------------------------------------
+    # Plan en memoria
+    # ---------------------------------------------------------------
+
+    def _planificar(self):
+        """Decide tipos, proyectos activos, miembros de cada cuadrilla y estados."""
+        rng = self.rng
+        n = self.num_trabajadores
+        # Índices: primero jefes, luego líderes (uno por cuadrilla) y el resto trabajadores
+        self.tipos = (
+            [TiposTrabajador.JEFE] * self.num_jefes
+            + [TiposTrabajador.LIDER] * self.num_lideres
+            + [TiposTrabajador.TRABAJADOR] * (n - self.num_jefes - self.num_lideres)
+        )
+        self.proyectos_activos = [rng.random() < 0.7 for _ in range(self.num_proyectos)]
+
+        libres = list(range(self.num_jefes + self.num_lideres, n))
+        rng.shuffle(libres)
+        por_asignar = libres[:int(len(libres) * FRACCION_ASIGNADOS)]
+        # Tamaños de cuadrilla con variación alrededor de la media
+        self.miembros = []
+        if self.num_lideres:
+            media = len(por_asignar) / self.num_lideres
+            pesos = [max(0.2, rng.gauss(1, 0.35)) for _ in range(self.num_lideres)]
+            escala = media / (sum(pesos) / len(pesos))
+            cortes = [0] + [round(p) for p in accumulate(w * escala for w in pesos)]
+            cortes[-1] = len(por_asignar)
+            self.miembros = [por_asignar[a:b] for a, b in zip(cortes, cortes[1:])]
+
+        # Todas las cuadrillas generadas tienen proyecto: sus miembros están ocupados
+        asignados = {i for miembros in self.miembros for i in miembros}
+        self.ocupados = asignados
+        self.estados = [
+            EstadosTrabajador.DISPONIBLE if i in asignados or i < self.num_jefes + self.num_lideres
+            else _elegir(rng, ESTADOS_LIBRES)[0]
+            for i in range(n)
+        ]
+
+    def _nuevo_rut(self, usados):
+        while True:
+            cuerpo = self.rng.randint(10_000_000, 29_999_999)
+            dv = digito_verificador(cuerpo)
+            rut = f'{cuerpo}{dv}'
+            if dv != 'K' and rut not in usados:
+                usados.add(rut)
+                return rut
+
+    # ---------------------------------------------------------------
+    # Etapas
+    # ---------------------------------------------------------------
+
+    def _crear_trabajadores(self):
+        rng = self.rng
+        usados = set(Trabajador.objects.values_list('rut', flat=True))
+        usados |= set(User.objects.values_list('username', flat=True))
+        password = make_password(PASSWORD)
+        grupos = {
+            tipo: Group.objects.get_or_create(name=nombre)[0].pk
+            for tipo, nombre in GRUPO_POR_TIPO.items()
+        }
+        especialidades = [e for e, _ in ESPECIALIDADES]
+        pesos_especialidad = [p for _, p in ESPECIALIDADES]
+        hoy = self.ahora.date()
+        Membresia = User.groups.through
+
+        self.user_ids = []
+        for lote in _en_lotes(range(self.num_trabajadores), self.tamano_lote):
+            datos = []
+            for i in lote:
+                nombre, apellido = rng.choice(NOMBRES), rng.choice(APELLIDOS)
+                rut = self._nuevo_rut(usados)
+                anos = min(40, int(rng.expovariate(1 / 7)))
+                datos.append({
+                    'rut': rut,
+                    'nombre': nombre,
+                    'apellido': f'{apellido} {rng.choice(APELLIDOS)}',
+                    'email': f'{normalizar(nombre)}.{normalizar(apellido)}.{rut[-4:]}@carga.local',
+                    'telefono': f'+569{rng.randint(10_000_000, 99_999_999)}',
+                    'fecha_nacimiento': hoy - timedelta(days=rng.randint(19 * 365, 62 * 365)),
+                    'tipo_trabajador': self.tipos[i],
+                    'especialidad': rng.choices(especialidades, weights=pesos_especialidad)[0],
+                    'estado': self.estados[i],
+                    'activo': self.estados[i] != EstadosTrabajador.INACTIVO,
+                    'fecha_ingreso': hoy - timedelta(days=rng.randint(30, 365 * (anos + 1))),
+                    'anos_experiencia': anos,
+                    'ocupado': i in self.ocupados,
+                })
+
+            with transaction.atomic():
+                users = User.objects.bulk_create([
+                    User(
+                        username=d['rut'], password=password, email=d['email'],
+                        first_name=d['nombre'], last_name=d['apellido'], is_active=d['activo'],
+                    )
+                    for d in datos
+                ])
+                trabajadores = Trabajador.objects.bulk_create([
+                    Trabajador(user=user, password_inicial=False, **d)
+                    for user, d in zip(users, datos)
+                ])
+                TrabajadorPerfil.objects.bulk_create([
+                    TrabajadorPerfil(user=user, especialidad=d['especialidad'])
+                    for user, d in zip(users, datos)
+                ])
+                Membresia.objects.bulk_create([
+                    Membresia(user_id=user.pk, group_id=grupos[d['tipo_trabajador']])
+                    for user, d in zip(users, datos)
+                ])
+                self._crear_competencias(trabajadores)
+                indexar_trabajadores([t.pk for t in trabajadores])
+
+            self.user_ids.extend(u.pk for u in users)
+            self._contar('trabajadores', len(trabajadores))
+            self.progreso(f'Trabajadores: {len(self.user_ids)}/{self.num_trabajadores}')
+
+    def _crear_competencias(self, trabajadores):
+        """Entre 0 y 5 competencias y entre 0 y 3 certificaciones por trabajador."""
+        rng = self.rng
+        hoy = self.ahora.date()
+        competencias, certificaciones = [], []
+        for t in trabajadores:
+            cantidad = _elegir(rng, ((0, 10), (1, 25), (2, 30), (3, 20), (4, 10), (5, 5)))[0]
+            for nombre, nivel in zip(rng.sample(COMPETENCIAS, cantidad), _elegir(rng, NIVELES, cantidad)):
+                competencias.append(CompetenciaTrabajador(
+                    trabajador=t, nombre=nombre, nivel=nivel,
+                    fecha_adquisicion=hoy - timedelta(days=rng.randint(30, 3650)),
+                ))
+            cantidad = _elegir(rng, ((0, 35), (1, 35), (2, 20), (3, 10)))[0]
+            for nombre, entidad, vigencia in rng.sample(CERTIFICACIONES, cantidad):
+                emision = hoy - timedelta(days=rng.randint(0, 6 * 365))
+                certificaciones.append(CertificacionTrabajador(
+                    trabajador=t, nombre=nombre, entidad=entidad, fecha_emision=emision,
+                    fecha_expiracion=emision + timedelta(days=365 * vigencia) if vigencia else None,
+                ))
+        CompetenciaTrabajador.objects.bulk_create(competencias)
+        CertificacionTrabajador.objects.bulk_create(certificaciones)
+        self._contar('competencias', len(competencias))
+        self._contar('certificaciones', len(certificaciones))
+
+    def _crear_proyectos(self):
+        rng = self.rng
+        hoy = self.ahora.date()
+        jefes = self.user_ids[:self.num_jefes]
+        proyectos = []
+        for p in range(self.num_proyectos):
+            jefe = jefes[p % len(jefes)]
+            inicio = hoy - timedelta(days=rng.randint(0, 2 * 365))
+            activo = self.proyectos_activos[p]
+            proyectos.append(Proyecto(
+                nombre=f'{rng.choice(OBRAS)} {rng.choice(LUGARES)} {p + 1}',
+                descripcion='Proyecto generado para pruebas de carga',
+                tipo=_elegir(rng, TIPOS_PROYECTO)[0],
+                complejidad=_elegir(rng, COMPLEJIDADES)[0],
+                fecha_inicio=inicio,
+                fecha_termino=None if activo else inicio + timedelta(days=rng.randint(60, 540)),
+                jefe_id=jefe, created_by_id=jefe, activo=activo,
+                created_at=self._fecha(),
+            ))
+        with _fechas_manuales((Proyecto, 'created_at')):
+            self.proyectos = Proyecto.objects.bulk_create(proyectos)
+        self._contar('proyectos', len(self.proyectos))
+
+    def _crear_cuadrillas(self):
+        lideres = self.user_ids[self.num_jefes:self.num_jefes + self.num_lideres]
+        self.cuadrillas = Cuadrilla.objects.bulk_create([
+            Cuadrilla(
+                nombre=f'Cuadrilla {proyecto.pk}-{c + 1}',
+                proyecto=proyecto,
+                lider_id=lideres[p * self.cuadrillas_por_proyecto + c],
+            )
+            for p, proyecto in enumerate(self.proyectos)
+            for c in range(self.cuadrillas_por_proyecto)
+        ])
+        rol, _ = Rol.objects.get_or_create(nombre='Operario')
+        asignaciones = [
+            Asignacion(trabajador_id=self.user_ids[i], cuadrilla=cuadrilla, rol=rol)
+            for cuadrilla, miembros in zip(self.cuadrillas, self.miembros)
+            for i in miembros
+        ]
+        for lote in _en_lotes(asignaciones, self.tamano_lote):
+            Asignacion.objects.bulk_create(lote)
+        self._contar('cuadrillas', len(self.cuadrillas))
+        self._contar('asignaciones', len(asignaciones))
+
+    def _crear_conversaciones(self):
+        """Un chat grupal por cuadrilla y un chat privado líder-miembro por cuadrilla."""
+        rng = self.rng
+        conversaciones, participantes = [], []
+        for cuadrilla, miembros in zip(self.cuadrillas, self.miembros):
+            usuarios = [self.user_ids[i] for i in miembros] + [cuadrilla.lider_id]
+            if len(usuarios) < 2:
+                continue
+            conversaciones.append(Conversation(
+                nombre=cuadrilla.nombre, is_group=True, cuadrilla=cuadrilla, created_at=self.inicio,
+            ))
+            participantes.append(usuarios)
+            conversaciones.append(Conversation(is_group=False, created_at=self.inicio))
+            participantes.append([cuadrilla.lider_id, rng.choice(usuarios[:-1])])
+
+        with _fechas_manuales((Conversation, 'created_at')):
+            conversaciones = Conversation.objects.bulk_create(conversaciones)
+        Participante = Conversation.participants.through
+        filas = [
+            Participante(conversation_id=conversacion.pk, user_id=user_id)
+            for conversacion, usuarios in zip(conversaciones, participantes)
+            for user_id in usuarios
+        ]
+        for lote in _en_lotes(filas, self.tamano_lote):
+            Participante.objects.bulk_create(lote)
+        self.conversaciones = [c.pk for c in conversaciones]
+        self.participantes = participantes
+        self._contar('conversaciones', len(conversaciones))
+
+    def _crear_mensajes(self):
+        """Mensajes en orden cronológico; pocas conversaciones concentran la mayoría."""
+        if not self.conversaciones or not self.num_mensajes:
+            return
+        rng = self.rng
+        acumulados = list(accumulate(rng.paretovariate(1.2) for _ in self.conversaciones))
+        indices = range(len(self.conversaciones))
+        total = self.num_mensajes
+        creados = 0
+        with _fechas_manuales((Message, 'created_at')):
+            for lote in _en_lotes(range(total), self.tamano_lote):
+                elegidas = rng.choices(indices, cum_weights=acumulados, k=len(lote))
+                tipos = _elegir(rng, TIPOS_MENSAJE, len(lote))
+                mensajes = [
+                    Message(
+                        conversation_id=self.conversaciones[c],
+                        sender_id=rng.choice(self.participantes[c]),
+                        content=rng.choice(MENSAJES),
+                        message_type=tipo,
+                        created_at=self._fecha((i + rng.random()) / total),
+                    )
+                    for i, c, tipo in zip(lote, elegidas, tipos)
+                ]
+                with transaction.atomic():
+                    Message.objects.bulk_create(mensajes)
+                creados += len(mensajes)
+                self.progreso(f'Mensajes: {creados}/{total}')
+        self._contar('mensajes', creados)
+
+    def _crear_notificaciones(self):
+        rng = self.rng
+        cuadrilla_de = {}
+        for cuadrilla, miembros in zip(self.cuadrillas, self.miembros):
+            for i in miembros:
+                cuadrilla_de[self.user_ids[i]] = cuadrilla
+        total = self.num_notificaciones
+        with _fechas_manuales((Notificacion, 'fecha')):
+            for lote in _en_lotes(range(total), self.tamano_lote):
+                notificaciones = []
+                for i in lote:
+                    user_id = rng.choice(self.user_ids)
+                    cuadrilla = cuadrilla_de.get(user_id)
+                    fecha = self._fecha((i + rng.random()) / total)
+                    notificaciones.append(Notificacion(
+                        user_id=user_id,
+                        mensaje=rng.choice(NOTIFICACIONES).format(
+                            cuadrilla=cuadrilla.nombre if cuadrilla else 'tu cuadrilla',
+                            proyecto=cuadrilla.proyecto.nombre if cuadrilla else 'asignado',
+                        ),
+                        fecha=fecha,
+                        # Las más antiguas casi siempre están leídas
+                        leida=rng.random() < 0.3 + 0.65 * (1 - i / total),
+                    ))
+                Notificacion.objects.bulk_create(notificaciones)
+        self._contar('notificaciones', total)
+
+    def _crear_solicitudes_e_incidentes(self):
+        rng = self.rng
+        if not self.cuadrillas:
+            return
+        con_miembros = [(c, m) for c, m in zip(self.cuadrillas, self.miembros) if m]
+        solicitudes = []
+        for _ in range(self.num_solicitudes if con_miembros else 0):
+            cuadrilla, miembros = rng.choice(con_miembros)
+            solicitudes.append(WorkerRequest(
+                trabajador_id=self.user_ids[rng.choice(miembros)],
+                cuadrilla=cuadrilla,
+                asunto=rng.choice(ASUNTOS_SOLICITUD),
+                descripcion='Solicitud generada para pruebas de carga',
+                estado=_elegir(rng, ESTADOS_SOLICITUD)[0],
+                created_at=self._fecha(),
+            ))
+        incidentes = []
+        for _ in range(self.num_incidentes):
+            indice = rng.randrange(len(self.cuadrillas))
+            cuadrilla, miembros = self.cuadrillas[indice], self.miembros[indice]
+            reportantes = [self.user_ids[i] for i in miembros] + [cuadrilla.lider_id]
+            incidentes.append(IncidentNotice(
+                cuadrilla=cuadrilla,
+                reporter_id=rng.choice(reportantes),
+                descripcion=rng.choice(INCIDENTES),
+                severidad=_elegir(rng, SEVERIDADES)[0],
+                acknowledged=rng.random() < 0.7,
+                created_at=self._fecha(),
+            ))
+        with _fechas_manuales((WorkerRequest, 'created_at'), (IncidentNotice, 'created_at')):
+            for lote in _en_lotes(solicitudes, self.tamano_lote):
+                WorkerRequest.objects.bulk_create(lote)
+            for lote in _en_lotes(incidentes, self.tamano_lote):
+                IncidentNotice.objects.bulk_create(lote)
+        self._contar('solicitudes', len(solicitudes))
+        self._contar('incidentes', len(incidentes))
+
+    def _crear_archivados(self):
+        """Snapshots de chats privados líder-miembro, de 2 a 30 mensajes cada uno."""
+        rng = self.rng
+        con_miembros = [(c, m) for c, m in zip(self.cuadrillas, self.miembros) if m]
+        if not con_miembros:
+            return
+        archivos = []
+        for _ in range(self.num_archivados):
+            cuadrilla, miembros = rng.choice(con_miembros)
+            participantes = [cuadrilla.lider_id, self.user_ids[rng.choice(miembros)]]
+            archivado = self._fecha()
+            cantidad = rng.randint(2, 30)
+            mensajes = []
+            for j in range(cantidad):
+                sender = rng.choice(participantes)
+                mensajes.append({
+                    'sender_id': sender,
+                    'sender_username': None,
+                    'content': rng.choice(MENSAJES),
+                    'message_type': 'text',
+                    'created_at': (archivado - timedelta(hours=cantidad - j)).isoformat(),
+                })
+            archivos.append((mensajes, ChatArchivado(
+                archived_at=archivado,
+                archived_by_id=cuadrilla.lider_id,
+                reason='Generado para pruebas de carga',
+                participants_snapshot=json.dumps(participantes),
+            )))
+        usernames = dict(User.objects.filter(
+            pk__in={m['sender_id'] for mensajes, _ in archivos for m in mensajes}
+        ).values_list('pk', 'username'))
+        for mensajes, archivo in archivos:
+            for m in mensajes:
+                m['sender_username'] = usernames[m['sender_id']]
+            archivo.messages_snapshot = json.dumps(mensajes, ensure_ascii=False)
+        for lote in _en_lotes([a for _, a in archivos], self.tamano_lote):
+            ChatArchivado.objects.bulk_create(lote)
+        # Índice de acceso: los dos participantes (el líder es además quien archiva)
+        Acceso = ChatArchivado.participantes.through
+        filas = [
+            Acceso(chatarchivado_id=archivo.pk, user_id=user_id)
+            for _, archivo in archivos
+            for user_id in set(json.loads(archivo.participants_snapshot))
+        ]
+        for lote in _en_lotes(filas, self.tamano_lote):
+            Acceso.objects.bulk_create(lote)
+        self._contar('archivados', len(archivos))
+
+    def generar(self):
+        """
+        Ejecuta todas las etapas.
+
+        Returns:
+            dict: {entidad: cantidad de filas creadas}
+        """
+        self._planificar()
+        self._crear_trabajadores()
+        with transaction.atomic():
+            self._crear_proyectos()
+            self._crear_cuadrillas()
+            self._crear_conversaciones()
+        self.progreso('Proyectos, cuadrillas y chats creados')
+        self._crear_mensajes()
+        self._crear_notificaciones()
+        self._crear_solicitudes_e_incidentes()
+        self._crear_archivados()
+        invalidar_recomendaciones()
+        reconstruir_estadisticas()
+        invalidar_contadores(CONTADOR_NOTIFICACIONES)
+        invalidar_contadores(CONTADOR_ARCHIVADOS)
+        return self.conteos
+
+
+def generar_datos(**parametros):
+    """
+    Genera un conjunto de datos sintéticos (ver `GeneradorDatos`).
+
+    Returns:
+        dict: {entidad: cantidad de filas creadas}
+
+    Raises:
+        ValueError: Si no hay trabajadores suficientes para jefes y líderes
+    """
+    return GeneradorDatos(**parametros).generar()
@@ -0,0 +1,216 @@
+"""
+Exportación en streaming de trabajadores, asignaciones y proyectos.
+
+Cada conjunto es un generador de dicts construido con `values()` e
+`.iterator(chunk_size=...)`: las filas se leen de la base de datos por
+bloques (cursor del lado del servidor en PostgreSQL) y los datos
+relacionados (competencias, certificaciones, cuadrillas) se cargan con una
+consulta por bloque. La memoria se mantiene constante aunque se exporten
+cientos de miles de filas.
+
+Los generadores `a_csv` y `a_jsonl` convierten las filas en texto línea a
+línea, listos para `StreamingHttpResponse` (vista `personal:exportar`) o
+para escribir a un archivo (`python manage.py exportar_datos`).
+"""
+
+import csv
+import json
+from itertools import islice
+
+from django.db.models import Count, F
+from django.utils import timezone
+
+from proyectos.models import Proyecto
+from .models import Asignacion, CertificacionTrabajador, CompetenciaTrabajador, Trabajador
+
+
+TAMANO_BLOQUE = 2000
+
+FORMATOS = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+}
+
+
+# ===================================================================
+# CONJUNTOS
+# ===================================================================
+
+COLUMNAS_TRABAJADORES = (
+    'id', 'rut', 'nombre', 'apellido', 'email', 'telefono', 'tipo_trabajador',
+    'especialidad', 'estado', 'activo', 'fecha_ingreso', 'anos_experiencia',
+    'competencias', 'certificaciones', 'cuadrillas', 'proyectos',
+)
+
+
+def _en_bloques(iterable, tamano):
+    iterador = iter(iterable)
+    while True:
+        bloque = list(islice(iterador, tamano))
+        if not bloque:
+            return
+        yield bloque
+
+
+def exportar_trabajadores(tamano_bloque=TAMANO_BLOQUE):
+    """
+    Trabajadores con sus competencias, certificaciones y cuadrilla actual.
+
+    Hace una consulta para los trabajadores y tres por bloque para los datos
+    relacionados.
+
+    Yields:
+        dict: Fila con las claves de COLUMNAS_TRABAJADORES (las columnas
+              relacionadas son listas de textos)
+    """
+    hoy = timezone.localdate()
+    filas = Trabajador.objects.order_by('id').values(
+        'id', 'rut', 'nombre', 'apellido', 'email', 'telefono', 'tipo_trabajador',
+        'especialidad', 'estado', 'activo', 'fecha_ingreso', 'anos_experiencia', 'user_id',
+    ).iterator(chunk_size=tamano_bloque)
+
+    for bloque in _en_bloques(filas, tamano_bloque):
+        ids = [f['id'] for f in bloque]
+        user_ids = [f['user_id'] for f in bloque if f['user_id']]
+
+        competencias = {}
+        for tid, nombre, nivel in CompetenciaTrabajador.objects.filter(
+            trabajador_id__in=ids
+        ).order_by('id').values_list('trabajador_id', 'nombre', 'nivel'):
+            competencias.setdefault(tid, []).append(f'{nombre} ({nivel})')
+
+        certificaciones = {}
+        for tid, nombre, expira in CertificacionTrabajador.objects.filter(
+            trabajador_id__in=ids
+        ).order_by('id').values_list('trabajador_id', 'nombre', 'fecha_expiracion'):
+            if expira is None:
+                texto = nombre
+            else:
+                texto = f"{nombre} ({'vence' if expira >= hoy else 'vencida'} {expira.isoformat()})"
+            certificaciones.setdefault(tid, []).append(texto)
+
+        cuadrillas = {}
+        for user_id, cuadrilla, proyecto in Asignacion.objects.filter(
+            trabajador_id__in=user_ids
+        ).order_by('id').values_list('trabajador_id', 'cuadrilla__nombre', 'cuadrilla__proyecto__nombre'):
+            actual = cuadrillas.setdefault(user_id, ([], []))
+            actual[0].append(cuadrilla)
+            if proyecto and proyecto not in actual[1]:
+                actual[1].append(proyecto)
+
+        for fila in bloque:
+            user_id = fila.pop('user_id')
+            fila['competencias'] = competencias.get(fila['id'], [])
+            fila['certificaciones'] = certificaciones.get(fila['id'], [])
+            fila['cuadrillas'], fila['proyectos'] = cuadrillas.get(user_id, ([], []))
+            yield fila
+
+
+COLUMNAS_ASIGNACIONES = (
+    'cuadrilla_id', 'cuadrilla_nombre', 'proyecto_nombre', 'lider_username',
+    'trabajador_rut', 'trabajador_nombre', 'trabajador_apellido',
+    'trabajador_username', 'rol_nombre',
+)
+
+
+def exportar_asignaciones(tamano_bloque=TAMANO_BLOQUE):
+    """
+    Nómina de cuadrillas: una fila por asignación, ordenadas por cuadrilla.
+
+    Yields:
+        dict: Fila con las claves de COLUMNAS_ASIGNACIONES
+    """
+    return Asignacion.objects.order_by('cuadrilla_id', 'id').values(
+        'cuadrilla_id',
+        cuadrilla_nombre=F('cuadrilla__nombre'),
+        proyecto_nombre=F('cuadrilla__proyecto__nombre'),
+        lider_username=F('cuadrilla__lider__username'),
+        trabajador_rut=F('trabajador__trabajador_profile__rut'),
+        trabajador_nombre=F('trabajador__first_name'),
+        trabajador_apellido=F('trabajador__last_name'),
+        trabajador_username=F('trabajador__username'),
+        rol_nombre=F('rol__nombre'),
+    ).iterator(chunk_size=tamano_bloque)
+
+
+COLUMNAS_PROYECTOS = (
+    'id', 'nombre', 'tipo', 'complejidad', 'fecha_inicio', 'fecha_termino',
+    'activo', 'jefe_username', 'num_cuadrillas', 'num_lideres', 'num_trabajadores',
+)
+
+
+def exportar_proyectos(tamano_bloque=TAMANO_BLOQUE):
+    """
+    Dotación por proyecto: cantidad de cuadrillas, líderes y trabajadores asignados.
+
+    Yields:
+        dict: Fila con las claves de COLUMNAS_PROYECTOS
+    """
+    return Proyecto.objects.order_by('id').values(
+        'id', 'nombre', 'tipo', 'complejidad', 'fecha_inicio', 'fecha_termino', 'activo',
+        jefe_username=F('jefe__username'),
+        num_cuadrillas=Count('cuadrillas', distinct=True),
+        num_lideres=Count('cuadrillas__lider', distinct=True),
+        num_trabajadores=Count('cuadrillas__asignaciones__trabajador', distinct=True),
+    ).iterator(chunk_size=tamano_bloque)
+
+
+# Conjunto -> (columnas, generador de filas)
+CONJUNTOS = {
+    'trabajadores': (COLUMNAS_TRABAJADORES, exportar_trabajadores),
+    'asignaciones': (COLUMNAS_ASIGNACIONES, exportar_asignaciones),
+    'proyectos': (COLUMNAS_PROYECTOS, exportar_proyectos),
+}
+
+
+# ===================================================================
+# FORMATOS
+# ===================================================================
+
+class _Eco:
+    """Pseudo-archivo: `csv.writer` devuelve la línea en vez de escribirla."""
+
+    def write(self, valor):
+        return valor
+
+
+def _celda(valor):
+    if isinstance(valor, list):
+        return ' | '.join(valor)
+    if valor is None:
+        return ''
+    return valor
+
+
+def a_csv(columnas, filas):
+    """Genera las líneas CSV (con encabezado) de un iterable de dicts."""
+    escritor = csv.writer(_Eco())
+    yield escritor.writerow(columnas)
+    for fila in filas:
+        yield escritor.writerow([_celda(fila[c]) for c in columnas])
+
+
+def a_jsonl(columnas, filas):
+    """Genera un objeto JSON por línea (JSON Lines)."""
+    for fila in filas:
+        yield json.dumps({c: fila[c] for c in columnas}, ensure_ascii=False, default=str) + '\n'
+
+
+def exportar(conjunto, formato='csv', tamano_bloque=TAMANO_BLOQUE):
+    """
+    Genera el texto de un conjunto en el formato pedido.
+
+    Args:
+        conjunto: 'trabajadores', 'asignaciones' o 'proyectos'
+        formato: 'csv' o 'jsonl'
+        tamano_bloque: Filas por bloque leído de la base de datos
+
+    Returns:
+        generator: Líneas de texto
+
+    Raises:
+        KeyError: Si el conjunto o el formato no existen
+    """
+    columnas, generador = CONJUNTOS[conjunto]
+    serializador = {'csv': a_csv, 'jsonl': a_jsonl}[formato]
+    return serializador(columnas, generador(tamano_bloque))
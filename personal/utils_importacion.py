@@ -0,0 +1,415 @@
+"""
+Importación masiva de trabajadores desde CSV o XLSX.
+
+Crear trabajadores uno a uno (admin o `Trabajador.objects.create`) dispara
+`crear_usuario_automatico` y `sincronizar_usuario` por fila: un hash PBKDF2
+completo en el hilo de la petición y varias escrituras de grupos. Aquí las
+filas se leen en streaming y se procesan por lotes:
+
+1. Se validan (RUT, campos obligatorios, tipo, fechas) y se descartan los RUT
+   repetidos en el archivo o ya registrados (una consulta por lote).
+2. Las contraseñas iniciales (= RUT, igual que `Trabajador.crear_usuario`) se
+   hashean en un pool de procesos (`utils_passwords`).
+3. Se insertan con `bulk_create` los User, Trabajador, TrabajadorPerfil y la
+   pertenencia a grupos, dentro de una transacción por lote.
+
+`bulk_create` no emite señales, así que cada lote reindexa sus trabajadores
+(`indexar_trabajadores`) y programa los contadores del dashboard, y al
+terminar se invalida el motor de recomendación, igual que harían las señales.
+
+Desde el admin la importación corre en un proceso aparte que ejecuta el
+comando `importar_trabajadores` (ver `lanzar_importacion`).
+
+La lectura de XLSX usa `openpyxl` (dependencia opcional).
+"""
+
+import csv
+import io
+import json
+import os
+import re
+import subprocess
+import sys
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth.models import Group, User
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+
+from core.utils_estadisticas import programar_actualizacion
+from .constants import TiposTrabajador, UserGroups
+from .models import Trabajador, TrabajadorPerfil, rut_valido
+from .utils_busqueda import indexar_trabajadores, normalizar
+from .utils_passwords import hashear_passwords
+from .utils_recomendacion import invalidar_recomendaciones
+
+
+TAMANO_LOTE = 500
+
+COLUMNAS = (
+    'rut', 'nombre', 'apellido', 'email', 'telefono', 'direccion',
+    'fecha_nacimiento', 'tipo_trabajador', 'especialidad', 'fecha_ingreso',
+    'anos_experiencia',
+)
+OBLIGATORIAS = ('rut', 'nombre', 'apellido', 'email')
+
+# Mismo criterio que la señal `sincronizar_usuario`
+GRUPO_POR_TIPO = {
+    TiposTrabajador.TRABAJADOR: UserGroups.TRABAJADOR,
+    TiposTrabajador.LIDER: UserGroups.LIDER_CUADRILLA,
+    TiposTrabajador.JEFE: UserGroups.JEFE_PROYECTO,
+}
+
+
+@dataclass
+class ResultadoImportacion:
+    """Resumen de una importación."""
+    creados: int = 0
+    # Lista de tuplas (número de fila, mensaje)
+    errores: list = field(default_factory=list)
+
+
+# ===================================================================
+# LECTURA
+# ===================================================================
+
+def _columna(encabezado):
+    # "Años Experiencia" -> "anos_experiencia"
+    return normalizar(encabezado).strip().replace(' ', '_')
+
+
+def leer_csv(archivo):
+    """
+    Genera dicts por fila de un CSV (binario o texto). Detecta ',' o ';'.
+
+    Raises:
+        ValueError: Si el archivo no es UTF-8 o no se puede leer como CSV
+                    (indica la línea)
+    """
+    texto = archivo
+    if isinstance(archivo.read(0), bytes):
+        texto = io.TextIOWrapper(archivo, encoding='utf-8-sig', newline='')
+    lector = None
+    try:
+        muestra = texto.read(4096)
+        texto.seek(0)
+        try:
+            dialecto = csv.Sniffer().sniff(muestra, delimiters=',;')
+        except csv.Error:
+            dialecto = csv.excel
+        lector = csv.reader(texto, dialecto)
+        encabezados = [_columna(c) for c in next(lector, [])]
+        for valores in lector:
+            if any(v.strip() for v in valores):
+                yield dict(zip(encabezados, valores))
+            else:
+                yield None
+    except UnicodeDecodeError as e:
+        raise ValueError('El archivo CSV debe estar codificado en UTF-8.') from e
+    except csv.Error as e:
+        raise ValueError(f'CSV inválido en la línea {lector.line_num}: {e}') from e
+    finally:
+        if texto is not archivo:
+            # Soltar el archivo sin cerrarlo (p. ej. para volver a leerlo)
+            texto.detach()
+
+
+def leer_xlsx(archivo):
+    """Genera dicts por fila de la primera hoja de un XLSX (modo solo lectura)."""
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ValueError('Para importar archivos XLSX instale openpyxl (pip install openpyxl).')
+
+    libro = load_workbook(archivo, read_only=True, data_only=True)
+    try:
+        filas = libro.worksheets[0].iter_rows(values_only=True)
+        encabezados = [_columna(c or '') for c in next(filas, ())]
+        for valores in filas:
+            if any(v not in (None, '') for v in valores):
+                yield dict(zip(encabezados, valores))
+            else:
+                yield None
+    finally:
+        libro.close()
+
+
+def leer_filas(archivo, nombre):
+    """Elige el lector según la extensión del nombre de archivo."""
+    if nombre.lower().endswith(('.xlsx', '.xlsm')):
+        return leer_xlsx(archivo)
+    return leer_csv(archivo)
+
+
+# ===================================================================
+# VALIDACIÓN
+# ===================================================================
+
+def _texto(valor):
+    if valor is None:
+        return ''
+    if isinstance(valor, float) and valor.is_integer():
+        valor = int(valor)
+    return str(valor).strip()
+
+
+def _fecha(valor):
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    texto = _texto(valor)
+    if not texto:
+        return None
+    for formato in ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y'):
+        try:
+            return datetime.strptime(texto, formato).date()
+        except ValueError:
+            continue
+    raise ValidationError(f"Fecha inválida: '{texto}'")
+
+
+def validar_fila(fila):
+    """
+    Valida y normaliza una fila leída del archivo.
+
+    Args:
+        fila: dict {columna: valor}
+
+    Returns:
+        dict: Campos de Trabajador listos para construir la instancia
+
+    Raises:
+        ValidationError: Si algún campo es inválido
+    """
+    datos = {c: _texto(fila.get(c)) for c in COLUMNAS}
+    faltantes = [c for c in OBLIGATORIAS if not datos[c]]
+    if faltantes:
+        raise ValidationError(f"Faltan campos obligatorios: {', '.join(faltantes)}")
+
+    rut_valido(datos['rut'])
+    validate_email(datos['email'])
+
+    tipo = datos['tipo_trabajador'].lower() or TiposTrabajador.TRABAJADOR
+    if tipo == 'líder':
+        tipo = TiposTrabajador.LIDER
+    if tipo not in GRUPO_POR_TIPO:
+        raise ValidationError(f"Tipo de trabajador inválido: '{datos['tipo_trabajador']}'")
+
+    anos = datos['anos_experiencia'] or '0'
+    if not anos.isdigit():
+        raise ValidationError(f"Años de experiencia inválidos: '{anos}'")
+
+    return {
+        'rut': datos['rut'],
+        'nombre': datos['nombre'],
+        'apellido': datos['apellido'],
+        'email': datos['email'],
+        'telefono': datos['telefono'] or None,
+        'direccion': datos['direccion'] or None,
+        'fecha_nacimiento': _fecha(fila.get('fecha_nacimiento')),
+        'tipo_trabajador': tipo,
+        'especialidad': datos['especialidad'] or None,
+        'fecha_ingreso': _fecha(fila.get('fecha_ingreso')),
+        'anos_experiencia': int(anos),
+    }
+
+
+def _mensaje_error(error):
+    return '; '.join(error.messages) if hasattr(error, 'messages') else str(error)
+
+
+# ===================================================================
+# IMPORTACIÓN
+# ===================================================================
+
+def _importar_lote(lote, resultado, vistos, grupos, pool):
+    """Valida e inserta un lote de tuplas (número de fila, fila)."""
+    validas = []
+    for numero, fila in lote:
+        try:
+            datos = validar_fila(fila)
+        except ValidationError as e:
+            resultado.errores.append((numero, _mensaje_error(e)))
+            continue
+        username = ''.join(ch for ch in datos['rut'] if ch.isalnum())
+        if username in vistos:
+            resultado.errores.append((numero, f"RUT repetido en el archivo: {datos['rut']}"))
+            continue
+        vistos.add(username)
+        validas.append((numero, username, datos))
+
+    if not validas:
+        return
+
+    # RUT ya registrados (como Trabajador o como User) con dos consultas
+    usernames = [u for _, u, _ in validas]
+    existentes = set(User.objects.filter(username__in=usernames).values_list('username', flat=True))
+    existentes |= {
+        ''.join(ch for ch in rut if ch.isalnum())
+        for rut in Trabajador.objects.filter(
+            rut__in=[d['rut'] for _, _, d in validas] + usernames
+        ).values_list('rut', flat=True)
+    }
+    nuevas = []
+    for numero, username, datos in validas:
+        if username in existentes:
+            resultado.errores.append((numero, f"RUT ya registrado: {datos['rut']}"))
+        else:
+            nuevas.append((username, datos))
+    if not nuevas:
+        return
+
+    hashes = hashear_passwords([d['rut'] for _, d in nuevas], pool)
+
+    with transaction.atomic():
+        users = User.objects.bulk_create([
+            User(
+                username=username, password=password, email=datos['email'],
+                first_name=datos['nombre'], last_name=datos['apellido'],
+            )
+            for (username, datos), password in zip(nuevas, hashes)
+        ])
+        trabajadores = Trabajador.objects.bulk_create([
+            Trabajador(user=user, password_inicial=True, **datos)
+            for user, (_, datos) in zip(users, nuevas)
+        ])
+        TrabajadorPerfil.objects.bulk_create([
+            TrabajadorPerfil(user=user, especialidad=datos['especialidad'])
+            for user, (_, datos) in zip(users, nuevas)
+        ])
+        Membresia = User.groups.through
+        Membresia.objects.bulk_create([
+            Membresia(user_id=user.pk, group_id=grupos[datos['tipo_trabajador']])
+            for user, (_, datos) in zip(users, nuevas)
+            if datos['tipo_trabajador'] in grupos
+        ])
+        indexar_trabajadores([t.pk for t in trabajadores])
+        programar_actualizacion('trabajadores')
+
+    resultado.creados += len(trabajadores)
+
+
+def importar_trabajadores(filas, tamano_lote=TAMANO_LOTE, procesos=None):
+    """
+    Importa trabajadores por lotes desde un iterable de filas.
+
+    Args:
+        filas: Iterable de dicts (ver `leer_filas`); None representa una
+               fila vacía del archivo y se omite
+        tamano_lote: Filas por lote (y por transacción)
+        procesos: Procesos para hashear contraseñas (por defecto, uno por
+                  CPU; 1 hashea en el proceso actual)
+
+    Returns:
+        ResultadoImportacion: Cantidad creada y errores por número de fila
+    """
+    resultado = ResultadoImportacion()
+    procesos = procesos or os.cpu_count() or 1
+    grupos = {
+        tipo: pk
+        for tipo, nombre in GRUPO_POR_TIPO.items()
+        for pk in Group.objects.filter(name=nombre).values_list('pk', flat=True)
+    }
+    vistos = set()
+
+    # Fila 1 = encabezados
+    numeradas = (
+        (numero, fila) for numero, fila in enumerate(filas, start=2) if fila is not None
+    )
+    pool = ProcessPoolExecutor(max_workers=procesos) if procesos > 1 else None
+    try:
+        while True:
+            lote = list(islice(numeradas, tamano_lote))
+            if not lote:
+                break
+            _importar_lote(lote, resultado, vistos, grupos, pool)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    resultado.errores.sort()
+    if resultado.creados:
+        invalidar_recomendaciones()
+    return resultado
+
+
+# ===================================================================
+# IMPORTACIÓN EN SEGUNDO PLANO (ADMIN)
+# ===================================================================
+# Hashear miles de contraseñas tarda minutos: el admin guarda el archivo en
+# PERSONAL_DIR_IMPORTACIONES y lanza el comando `importar_trabajadores` (con
+# su pool de procesos) en un proceso aparte. El comando deja el resultado en
+# <trabajo>.json, que la página de estado consulta.
+
+def _ruta_trabajo(trabajo, extension):
+    if not re.fullmatch(r'[0-9a-f]{32}', trabajo or ''):
+        raise ValueError(f'Importación desconocida: {trabajo}')
+    return os.path.join(settings.PERSONAL_DIR_IMPORTACIONES, trabajo + extension)
+
+
+def lanzar_importacion(archivo):
+    """
+    Guarda un archivo subido y lo importa en un proceso aparte.
+
+    Args:
+        archivo: UploadedFile (.csv, .xlsx o .xlsm)
+
+    Returns:
+        str: Identificador del trabajo (ver `resultado_importacion`)
+    """
+    os.makedirs(settings.PERSONAL_DIR_IMPORTACIONES, exist_ok=True)
+    trabajo = uuid.uuid4().hex
+    extension = '.xlsx' if archivo.name.lower().endswith(('.xlsx', '.xlsm')) else '.csv'
+    ruta = _ruta_trabajo(trabajo, extension)
+    with open(ruta, 'wb') as destino:
+        for trozo in archivo.chunks():
+            destino.write(trozo)
+
+    with open(_ruta_trabajo(trabajo, '.log'), 'wb') as log:
+        subprocess.Popen(
+            [
+                sys.executable, os.path.join(settings.BASE_DIR, 'manage.py'),
+                'importar_trabajadores', ruta,
+                '--resultado', _ruta_trabajo(trabajo, '.json'), '--borrar',
+            ],
+            stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT,
+            # Sigue aunque el worker que atendió la petición se recicle
+            start_new_session=True,
+        )
+    return trabajo
+
+
+def guardar_resultado(ruta, resultado=None, error=None):
+    """Escribe el resultado de una importación de forma atómica (ver `resultado_importacion`)."""
+    datos = {'error': error} if error else {
+        'creados': resultado.creados,
+        'errores': resultado.errores,
+    }
+    temporal = ruta + '.tmp'
+    with open(temporal, 'w', encoding='utf-8') as salida:
+        json.dump(datos, salida)
+    os.replace(temporal, ruta)
+
+
+def resultado_importacion(trabajo):
+    """
+    Resultado de una importación lanzada con `lanzar_importacion`.
+
+    Returns:
+        dict | None: {'creados', 'errores'} o {'error'}; None si sigue en curso
+
+    Raises:
+        ValueError: Si el identificador no es válido
+    """
+    try:
+        with open(_ruta_trabajo(trabajo, '.json'), encoding='utf-8') as entrada:
+            return json.load(entrada)
+    except FileNotFoundError:
+        return None
@@ -1,10 +1,91 @@
+import threading
+
+from django.db import transaction
+
+from core.utils_contadores import CONTADOR_NOTIFICACIONES, invalidar_contadores
 from .models import Notificacion
 
-def crear_notificacion(user, mensaje: str):
+
+# Buffer de notificaciones diferidas de la petición en curso (por hilo).
+# Lo abre `NotificacionesDiferidasMiddleware` y lo escribe antes de devolver la respuesta.
+_estado = threading.local()
+
+
+def crear_notificaciones(pares, diferido=False):
+    """
+    Crea notificaciones internas para varios usuarios con un único INSERT.
+
+    Args:
+        pares: Iterable de tuplas (user, mensaje); user puede ser un User o
+               su ID. Se ignoran los user None.
+        diferido: Si True y hay un buffer de petición activo, las
+                  notificaciones se acumulan al confirmarse la transacción
+                  en curso (si se revierte, se descartan) y se escriben
+                  todas juntas (un solo `bulk_create`) al terminar la vista.
+                  Sin buffer activo (p. ej. comandos) se escriben al momento.
+
+    Returns:
+        list: Instancias de Notificacion creadas (o pendientes de crear)
+    """
+    notificaciones = [
+        Notificacion(user_id=getattr(user, 'pk', user), mensaje=mensaje)
+        for user, mensaje in pares
+        if user
+    ]
+    if not notificaciones:
+        return []
+
+    pendientes = getattr(_estado, 'pendientes', None)
+    if diferido and pendientes is not None:
+        transaction.on_commit(lambda: pendientes.extend(notificaciones))
+        return notificaciones
+
+    return _escribir(notificaciones)
+
+
+def _escribir(notificaciones):
+    # bulk_create no emite señales: invalidar aquí los contadores de no leídas
+    creadas = Notificacion.objects.bulk_create(notificaciones)
+    invalidar_contadores(CONTADOR_NOTIFICACIONES, [n.user_id for n in creadas])
+    return creadas
+
+
+def crear_notificacion(user, mensaje: str, diferido=False):
     """
     Crea una notificación interna para un usuario.
     No deberia hacer nada si user es None.
     """
-    if not user:
+    crear_notificaciones([(user, mensaje)], diferido=diferido)
+
+
+def iniciar_notificaciones_diferidas():
+    """
+    Abre un buffer vacío para la petición actual. Lo que haya quedado de una
+    petición anterior se descarta: no pertenece a esta.
+    """
+    _estado.pendientes = []
+
+
+def vaciar_notificaciones_diferidas():
+    """
+    Cierra el buffer y escribe lo acumulado con un único `bulk_create` al
+    confirmarse la transacción en curso (fuera de una transacción, al
+    momento). Los errores de escritura se propagan como en el modo directo.
+    """
+    pendientes = getattr(_estado, 'pendientes', None)
+    _estado.pendientes = None
+    if pendientes is None:
         return
-    Notificacion.objects.create(user=user, mensaje=mensaje)
+
+    def escribir():
+        if pendientes:
+            _escribir(pendientes)
+
+    # Se registra después de las confirmaciones de `crear_notificaciones`,
+    # por lo que corre cuando ya se sumaron al buffer
+    transaction.on_commit(escribir)
+
+
+def descartar_notificaciones_diferidas():
+    """Cierra el buffer sin escribir (p. ej. si la vista lanzó una excepción)."""
+    _estado.pendientes = None
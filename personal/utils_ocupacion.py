@@ -0,0 +1,87 @@
+"""
+Ocupación desnormalizada de trabajadores (`Trabajador.ocupado`).
+
+Un trabajador está ocupado si tiene alguna asignación a una cuadrilla
+asociada a un proyecto (la misma regla que `_lider_ocupado` para líderes).
+Desactivar el proyecto no libera a sus trabajadores; sí lo hace quitar el
+proyecto de la cuadrilla (p. ej. `finalizar_proyecto`). En vez de calcularlo con un JOIN sobre `Asignacion`,
+`Cuadrilla` y `Proyecto` en cada lectura, la columna indexada
+`Trabajador.ocupado` se mantiene al día:
+
+- Las señales (`personal/signals.py`, sección 6) la recalculan al guardar o
+  borrar una `Asignacion`, al guardar una `Cuadrilla` (cambio de proyecto) y
+  tras guardar un `Trabajador` (un `save()` completo podría escribir un valor
+  leído antes del cambio).
+- Las operaciones en bloque que no emiten señales (`bulk_create`,
+  `QuerySet.update`) llaman a `recalcular_ocupacion` explícitamente.
+
+Cada recálculo es un único UPDATE con subconsulta dentro de la transacción
+en curso, y solo escribe las filas cuyo valor cambia. El comando
+`python manage.py reconciliar_ocupacion` detecta y corrige desfases en bloque.
+Si alguna fila cambia, se programa el recálculo de los contadores de
+trabajadores del dashboard (`core.utils_estadisticas`).
+
+El override manual no se guarda en la columna: `esta_trabajador_ocupado` y
+`with_disponibilidad()` lo siguen aplicando al leer.
+"""
+
+from django.db.models import Exists, F, OuterRef, Q
+
+from core.utils_estadisticas import programar_actualizacion
+from .models import Asignacion, Trabajador
+
+
+def ocupado_real():
+    """Expresión SQL con el valor correcto de `ocupado` para cada Trabajador."""
+    return Exists(Asignacion.objects.filter(
+        trabajador_id=OuterRef('user_id'),
+        cuadrilla__proyecto__isnull=False,
+    ))
+
+
+def trabajadores_desfasados(queryset=None):
+    """
+    Trabajadores cuya columna `ocupado` no coincide con sus asignaciones.
+
+    Args:
+        queryset: QuerySet de Trabajador a revisar (por defecto, todos)
+
+    Returns:
+        QuerySet: Trabajadores con la columna desfasada
+    """
+    queryset = Trabajador.objects.all() if queryset is None else queryset
+    return queryset.alias(ocupado_calculado=ocupado_real()).exclude(
+        ocupado=F('ocupado_calculado')
+    )
+
+
+def recalcular_ocupacion(user_ids=None, cuadrilla_ids=None, trabajador_ids=None):
+    """
+    Recalcula `Trabajador.ocupado` con un único UPDATE.
+
+    Args:
+        user_ids: IDs de User cuyos trabajadores recalcular
+        cuadrilla_ids: IDs (o subconsulta) de cuadrillas cuyos miembros recalcular
+        trabajador_ids: IDs de Trabajador a recalcular
+        Sin ningún filtro se recalculan todos los trabajadores.
+
+    Returns:
+        int: Cantidad de trabajadores cuyo valor cambió
+    """
+    queryset = Trabajador.objects.all()
+    filtros = (user_ids, cuadrilla_ids, trabajador_ids)
+    if any(f is not None for f in filtros):
+        condicion = Q()
+        if trabajador_ids is not None:
+            condicion |= Q(pk__in=trabajador_ids)
+        if user_ids is not None:
+            condicion |= Q(user_id__in=user_ids)
+        if cuadrilla_ids is not None:
+            condicion |= Q(user_id__in=Asignacion.objects.filter(
+                cuadrilla_id__in=cuadrilla_ids
+            ).values('trabajador_id'))
+        queryset = queryset.filter(condicion)
+    cambiados = trabajadores_desfasados(queryset).update(ocupado=ocupado_real())
+    if cambiados:
+        programar_actualizacion('trabajadores')
+    return cambiados
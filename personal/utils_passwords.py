@@ -0,0 +1,41 @@
+"""
+Hash de contraseñas en paralelo para cargas masivas.
+
+Este módulo no importa modelos: los procesos hijos del pool (que en Windows y
+macOS arrancan con "spawn" y sin `django.setup()`) solo necesitan importar
+el hasher. Por la misma razón se les pasa la ruta de la clase del hasher en
+vez de leer `PASSWORD_HASHERS` en el proceso hijo.
+"""
+
+from django.contrib.auth.hashers import get_hasher
+from django.utils.module_loading import import_string
+
+
+# Bajo este número de contraseñas no compensa repartir el trabajo en procesos
+MINIMO_PARALELO = 64
+
+
+def _hashear(argumentos):
+    ruta, password = argumentos
+    hasher = import_string(ruta)()
+    return hasher.encode(password, hasher.salt())
+
+
+def hashear_passwords(passwords, pool=None):
+    """
+    Calcula los hashes de varias contraseñas con el hasher por defecto.
+
+    Args:
+        passwords: Lista de contraseñas en texto plano
+        pool: ProcessPoolExecutor opcional; sin pool (o con pocas
+              contraseñas) se hashea en el proceso actual
+
+    Returns:
+        list: Hashes en el mismo orden, listos para `User.password`
+    """
+    hasher = get_hasher('default')
+    ruta = f'{type(hasher).__module__}.{type(hasher).__qualname__}'
+    argumentos = [(ruta, p) for p in passwords]
+    if pool is None or len(argumentos) < MINIMO_PARALELO:
+        return [_hashear(a) for a in argumentos]
+    return list(pool.map(_hashear, argumentos, chunksize=max(1, len(argumentos) // 32)))
@@ -0,0 +1,347 @@
+"""
+Motor de recomendación de trabajadores para armar cuadrillas.
+
+Carga una sola vez (por proceso) los datos de todo el personal en arreglos
+NumPy — nivel de competencias, vencimiento de certificaciones, años de
+experiencia, calificaciones de experiencias previas y afinidad con cada tipo
+de proyecto — y puntúa a todos los candidatos en una pasada vectorizada.
+
+- Los datos cargados se invalidan con señales (`invalidar_recomendaciones`)
+  mediante una versión guardada en la caché de Django, de modo que todos los
+  procesos que compartan caché recargan; además expiran tras
+  `VIGENCIA_SEGUNDOS` como red de seguridad.
+- La disponibilidad (asignaciones y estados) no se guarda en caché: se
+  consulta en cada recomendación con tres consultas de IDs.
+- La vigencia de las certificaciones se evalúa contra la fecha del día en
+  cada consulta, sin recargar.
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+
+import numpy as np
+from django.utils import timezone
+
+from core.utils_cache import subir_version_cache, version_cache
+
+from .models import (
+    Trabajador, CompetenciaTrabajador, CertificacionTrabajador, ExperienciaTrabajador,
+)
+from .constants import TiposTrabajador
+from .utils_busqueda import normalizar
+
+
+CLAVE_VERSION = 'personal:recomendaciones:version'
+VIGENCIA_SEGUNDOS = 300
+
+NIVELES = {'basico': 1, 'intermedio': 2, 'avanzado': 3, 'experto': 4}
+NOMBRES_NIVEL = {v: k for k, v in NIVELES.items()}
+CALIFICACIONES = {'no_recomendado': -1.0, 'recomendado': 1.0, 'muy_recomendado': 2.0}
+
+# Palabras (normalizadas, como prefijo) que indican afinidad con cada tipo
+# de proyecto en especialidad, competencias o certificaciones.
+AFINIDAD_TIPO = {
+    'construccion': ('albanil', 'carpinter', 'construc', 'obra', 'hormig', 'enfierr',
+                     'estructur', 'soldad', 'maestro', 'altura', 'andamio'),
+    'mantenimiento': ('manten', 'mecanic', 'electric', 'gasfiter', 'pintur', 'reparac',
+                      'lubric', 'climatiz'),
+    'instalacion': ('instal', 'electric', 'gasfiter', 'sanitar', 'redes', 'clima',
+                    'cableado', 'montaj', 'tuber'),
+}
+
+# Peso de cada componente según la complejidad del proyecto
+PESOS = {
+    'baja':  {'nivel': 0.20, 'certificaciones': 0.15, 'experiencia': 0.15, 'calificacion': 0.20, 'afinidad': 0.30},
+    'media': {'nivel': 0.25, 'certificaciones': 0.20, 'experiencia': 0.20, 'calificacion': 0.15, 'afinidad': 0.20},
+    'alta':  {'nivel': 0.30, 'certificaciones': 0.25, 'experiencia': 0.25, 'calificacion': 0.10, 'afinidad': 0.10},
+}
+# Penalización por certificación vencida (máx. 2) según complejidad
+PENALIZACION_VENCIDA = {'baja': 0.0, 'media': 0.02, 'alta': 0.05}
+
+TOPE_ANOS = 20
+TOPE_CERTIFICACIONES = 3
+CALIFICACION_SIN_DATOS = 0.4
+
+
+@dataclass
+class DatosRecomendacion:
+    """Arreglos alineados por fila (un trabajador candidato por fila)."""
+    ids: np.ndarray                # ID de Trabajador
+    anos: np.ndarray
+    nivel_max: np.ndarray          # 0..4
+    n_competencias: np.ndarray
+    calificacion_media: np.ndarray  # NaN si no tiene experiencias calificadas
+    n_calificaciones: np.ndarray
+    cert_fila: np.ndarray          # fila del trabajador de cada certificación
+    cert_expira: np.ndarray        # ordinal de fecha de expiración (max int si no expira)
+    afinidad: dict                 # {tipo: ndarray bool}
+    cargado: float                 # time.monotonic() de la carga
+    version: int
+
+
+_estado = {'datos': None}
+_lock = threading.Lock()
+
+
+# ===================================================================
+# CARGA E INVALIDACIÓN
+# ===================================================================
+
+def _version_actual():
+    return version_cache(CLAVE_VERSION)
+
+
+def invalidar_recomendaciones():
+    """Marca como obsoletos los datos cargados (en todos los procesos que comparten caché)."""
+    subir_version_cache(CLAVE_VERSION)
+    _estado['datos'] = None
+
+
+def cargar_datos(version=None):
+    """
+    Lee de la base de datos el personal candidato y arma los arreglos.
+
+    Solo trabajadores activos de tipo 'trabajador' (los mismos que muestra
+    el selector de los formularios de cuadrilla).
+
+    Returns:
+        DatosRecomendacion
+    """
+    filas = list(
+        Trabajador.objects
+        .filter(activo=True, tipo_trabajador=TiposTrabajador.TRABAJADOR)
+        .order_by('id')
+        .values_list('id', 'anos_experiencia', 'especialidad')
+    )
+    n = len(filas)
+    ids = np.fromiter((f[0] for f in filas), dtype=np.int64, count=n)
+    fila_de = {tid: i for i, tid in enumerate(ids.tolist())}
+
+    textos = [[normalizar(f[2])] if f[2] else [] for f in filas]
+
+    # Competencias: nivel máximo y cantidad
+    comp_fila, comp_nivel = [], []
+    for tid, nombre, nivel in CompetenciaTrabajador.objects.values_list(
+        'trabajador_id', 'nombre', 'nivel'
+    ):
+        i = fila_de.get(tid)
+        if i is None:
+            continue
+        comp_fila.append(i)
+        comp_nivel.append(NIVELES.get(nivel, 1))
+        textos[i].append(normalizar(nombre))
+    comp_fila = np.asarray(comp_fila, dtype=np.int64)
+    nivel_max = np.zeros(n, dtype=np.int8)
+    if comp_fila.size:
+        np.maximum.at(nivel_max, comp_fila, np.asarray(comp_nivel, dtype=np.int8))
+    n_competencias = np.bincount(comp_fila, minlength=n)
+
+    # Certificaciones: fila y fecha de expiración (ordinal)
+    sin_vencimiento = np.iinfo(np.int64).max
+    cert_fila, cert_expira = [], []
+    for tid, nombre, expira in CertificacionTrabajador.objects.values_list(
+        'trabajador_id', 'nombre', 'fecha_expiracion'
+    ):
+        i = fila_de.get(tid)
+        if i is None:
+            continue
+        cert_fila.append(i)
+        cert_expira.append(expira.toordinal() if expira else sin_vencimiento)
+        textos[i].append(normalizar(nombre))
+
+    # Experiencias: calificación media
+    calif_suma = np.zeros(n, dtype=np.float64)
+    calif_n = np.zeros(n, dtype=np.int64)
+    exp_fila, exp_valor = [], []
+    for tid, calificacion in ExperienciaTrabajador.objects.exclude(
+        calificacion__isnull=True
+    ).values_list('trabajador_id', 'calificacion'):
+        i = fila_de.get(tid)
+        if i is None or calificacion not in CALIFICACIONES:
+            continue
+        exp_fila.append(i)
+        exp_valor.append(CALIFICACIONES[calificacion])
+    if exp_fila:
+        exp_fila = np.asarray(exp_fila, dtype=np.int64)
+        np.add.at(calif_suma, exp_fila, np.asarray(exp_valor))
+        np.add.at(calif_n, exp_fila, 1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        calificacion_media = np.where(calif_n > 0, calif_suma / np.maximum(calif_n, 1), np.nan)
+
+    # Afinidad por tipo de proyecto (una vez por trabajador y tipo)
+    afinidad = {}
+    palabras = [' '.join(t).split() for t in textos]
+    for tipo, prefijos in AFINIDAD_TIPO.items():
+        afinidad[tipo] = np.fromiter(
+            (any(p.startswith(prefijos) for p in ps) for ps in palabras), dtype=bool, count=n
+        )
+
+    return DatosRecomendacion(
+        ids=ids,
+        anos=np.fromiter((f[1] or 0 for f in filas), dtype=np.int64, count=n),
+        nivel_max=nivel_max,
+        n_competencias=n_competencias,
+        calificacion_media=calificacion_media,
+        n_calificaciones=calif_n,
+        cert_fila=np.asarray(cert_fila, dtype=np.int64),
+        cert_expira=np.asarray(cert_expira, dtype=np.int64),
+        afinidad=afinidad,
+        cargado=time.monotonic(),
+        version=version if version is not None else _version_actual(),
+    )
+
+
+def obtener_datos():
+    """Datos cargados del proceso, recargando si cambió la versión o expiraron."""
+    version = _version_actual()
+    datos = _estado['datos']
+    if (datos is None or datos.version != version
+            or time.monotonic() - datos.cargado > VIGENCIA_SEGUNDOS):
+        with _lock:
+            datos = _estado['datos']
+            if (datos is None or datos.version != version
+                    or time.monotonic() - datos.cargado > VIGENCIA_SEGUNDOS):
+                datos = _estado['datos'] = cargar_datos(version)
+    return datos
+
+
+# ===================================================================
+# DISPONIBILIDAD Y PUNTAJE
+# ===================================================================
+
+def mascara_disponibles(datos):
+    """
+    Candidatos asignables ahora mismo (mismas reglas que el selector).
+
+    La disponibilidad cambia con cada asignación, así que no se guarda en
+    los arreglos: se resuelve con una consulta de IDs sobre
+    `Trabajador.objects.with_disponibilidad()`.
+    """
+    asignables = np.fromiter(
+        Trabajador.objects.with_disponibilidad()
+        .filter(activo=True, tipo_trabajador=TiposTrabajador.TRABAJADOR, user__isnull=False)
+        .asignables()
+        .values_list('id', flat=True),
+        dtype=np.int64,
+    )
+    return np.isin(datos.ids, asignables)
+
+
+def puntuar(datos, tipo, complejidad, hoy=None):
+    """
+    Puntúa a todos los candidatos en una pasada vectorizada.
+
+    Args:
+        datos: DatosRecomendacion
+        tipo: Proyecto.tipo
+        complejidad: Proyecto.complejidad
+        hoy: Fecha de referencia para la vigencia de certificaciones
+
+    Returns:
+        tuple: (puntaje total [0, 1], dict de componentes ya ponderados,
+                certificaciones vigentes, certificaciones vencidas)
+    """
+    hoy = hoy or timezone.localdate()
+    n = datos.ids.size
+    pesos = PESOS.get(complejidad, PESOS['media'])
+
+    vigente = datos.cert_expira >= hoy.toordinal()
+    vigentes = np.bincount(datos.cert_fila[vigente], minlength=n)
+    vencidas = np.bincount(datos.cert_fila[~vigente], minlength=n)
+
+    calificacion = np.where(
+        np.isnan(datos.calificacion_media),
+        CALIFICACION_SIN_DATOS,
+        (np.nan_to_num(datos.calificacion_media) + 1.0) / 3.0,
+    )
+    afinidad = datos.afinidad.get(tipo)
+    afinidad = afinidad.astype(np.float64) if afinidad is not None else np.full(n, 0.5)
+
+    componentes = {
+        'nivel': pesos['nivel'] * (datos.nivel_max / 4.0),
+        'certificaciones': pesos['certificaciones'] * (np.minimum(vigentes, TOPE_CERTIFICACIONES) / TOPE_CERTIFICACIONES),
+        'experiencia': pesos['experiencia'] * (np.minimum(datos.anos, TOPE_ANOS) / TOPE_ANOS),
+        'calificacion': pesos['calificacion'] * np.clip(calificacion, 0.0, 1.0),
+        'afinidad': pesos['afinidad'] * afinidad,
+    }
+    penalizacion = PENALIZACION_VENCIDA.get(complejidad, 0.0) * np.minimum(vencidas, 2)
+    total = np.clip(sum(componentes.values()) - penalizacion, 0.0, 1.0)
+    return total, componentes, vigentes, vencidas
+
+
+def _motivos(datos, i, tipo, componentes, vigentes, vencidas):
+    """Explica el puntaje de un candidato, de mayor a menor aporte."""
+    textos = {
+        'nivel': (
+            f"Competencia de nivel {NOMBRES_NIVEL[int(datos.nivel_max[i])]} "
+            f"({int(datos.n_competencias[i])} registradas)"
+            if datos.nivel_max[i] else 'Sin competencias registradas'
+        ),
+        'certificaciones': f"{int(vigentes[i])} certificación(es) vigente(s)",
+        'experiencia': f"{int(datos.anos[i])} año(s) de experiencia",
+        'calificacion': (
+            f"Calificación promedio {datos.calificacion_media[i]:+.1f} "
+            f"en {int(datos.n_calificaciones[i])} experiencia(s)"
+            if datos.n_calificaciones[i] else 'Sin experiencias calificadas'
+        ),
+        'afinidad': (
+            f"Perfil afín a proyectos de {tipo}"
+            if datos.afinidad.get(tipo) is not None and datos.afinidad[tipo][i]
+            else f"Sin afinidad específica con {tipo}"
+        ),
+    }
+    orden = sorted(componentes, key=lambda c: componentes[c][i], reverse=True)
+    motivos = [
+        {'motivo': textos[c], 'componente': c, 'aporte': round(float(componentes[c][i]) * 100, 1)}
+        for c in orden
+    ]
+    if vencidas[i]:
+        motivos.append({
+            'motivo': f"{int(vencidas[i])} certificación(es) vencida(s)",
+            'componente': 'vencidas',
+            'aporte': 0.0,
+        })
+    return motivos
+
+
+def recomendar_trabajadores(tipo, complejidad, n=10, excluir_ids=(), datos=None):
+    """
+    Devuelve los N mejores candidatos disponibles para un tipo de proyecto.
+
+    Args:
+        tipo: Tipo de proyecto ('construccion', 'mantenimiento', ...)
+        complejidad: 'baja', 'media' o 'alta'
+        n: Cantidad de recomendaciones
+        excluir_ids: IDs de Trabajador a excluir (p. ej. miembros actuales)
+        datos: DatosRecomendacion (por defecto los cargados del proceso)
+
+    Returns:
+        list: [{'trabajador_id', 'puntaje' (0-100), 'motivos'}], de mayor a menor
+    """
+    datos = datos or obtener_datos()
+    if not datos.ids.size or n <= 0:
+        return []
+
+    total, componentes, vigentes, vencidas = puntuar(datos, tipo, complejidad)
+    candidatos = mascara_disponibles(datos)
+    if excluir_ids:
+        candidatos &= ~np.isin(datos.ids, np.fromiter(excluir_ids, dtype=np.int64))
+
+    indices = np.flatnonzero(candidatos)
+    if not indices.size:
+        return []
+    k = min(n, indices.size)
+    puntajes = total[indices]
+    # Top-k sin ordenar todo el arreglo; desempate estable por ID
+    mejores = indices[np.argpartition(-puntajes, k - 1)[:k]] if k < indices.size else indices
+    mejores = mejores[np.lexsort((datos.ids[mejores], -total[mejores]))]
+
+    return [
+        {
+            'trabajador_id': int(datos.ids[i]),
+            'puntaje': round(float(total[i]) * 100, 1),
+            'motivos': _motivos(datos, i, tipo, componentes, vigentes, vencidas),
+        }
+        for i in mejores
+    ]
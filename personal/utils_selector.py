@@ -0,0 +1,164 @@
+"""
+Selector de trabajadores para los formularios de cuadrilla.
+
+Los formularios de creación y edición de cuadrillas ya no renderizan todo el
+personal: el navegador pide páginas a `api_trabajadores`, que filtra en la
+base de datos (nombre/RUT, especialidad, certificación y disponibilidad) y
+pagina por keyset sobre el ID (`cursor` = último ID entregado), de modo que
+el costo de cada página no depende de cuántas páginas se hayan leído antes.
+"""
+
+from django.db.models import Exists, OuterRef
+
+from .models import Asignacion, CertificacionTrabajador, Trabajador
+from .constants import EstadosTrabajador, TiposTrabajador
+from .utils_busqueda import filtro_busqueda
+
+
+TAMANO_PAGINA = 50
+TAMANO_PAGINA_MAX = 200
+
+
+def filtrar_trabajadores(params, excluir_cuadrilla=None):
+    """
+    Construye el QuerySet del selector a partir de los filtros recibidos.
+
+    Args:
+        params: QueryDict (request.GET) o dict con los filtros opcionales:
+            - q: texto a buscar en el índice (nombre, RUT, especialidad,
+                 competencias y certificaciones; todas las palabras)
+            - especialidad: especialidad exacta (sin distinguir mayúsculas)
+            - certificacion: 'tiene', 'sin', 'vigente' o el nombre de una certificación
+            - disponibilidad: 'disponible', 'ocupado', 'vacaciones', ...
+        excluir_cuadrilla: ID de cuadrilla cuyos miembros se excluyen
+                           (el formulario de edición ya los muestra)
+
+    Returns:
+        QuerySet: Trabajadores anotados con `with_disponibilidad`, por ID
+    """
+    qs = Trabajador.objects.filter(
+        activo=True, tipo_trabajador=TiposTrabajador.TRABAJADOR
+    )
+
+    texto = (params.get('q') or '').strip()
+    if texto:
+        # Índice de texto completo: nombre, RUT, especialidad, competencias
+        # y certificaciones (ver `utils_busqueda`)
+        qs = qs.filter(filtro_busqueda(texto))
+
+    especialidad = (params.get('especialidad') or '').strip()
+    if especialidad and especialidad != 'todas':
+        qs = qs.filter(especialidad__iexact=especialidad)
+
+    if excluir_cuadrilla:
+        qs = qs.exclude(Exists(Asignacion.objects.filter(
+            trabajador_id=OuterRef('user_id'), cuadrilla_id=excluir_cuadrilla
+        )))
+
+    qs = qs.with_disponibilidad()
+
+    certificacion = (params.get('certificacion') or '').strip()
+    if certificacion == 'tiene':
+        qs = qs.filter(tiene_certificaciones=True)
+    elif certificacion == 'sin':
+        qs = qs.filter(tiene_certificaciones=False)
+    elif certificacion == 'vigente':
+        qs = qs.filter(tiene_certificaciones_vigentes=True)
+    elif certificacion and certificacion != 'todas':
+        qs = qs.filter(Exists(CertificacionTrabajador.objects.filter(
+            trabajador_id=OuterRef('pk'), nombre__iexact=certificacion
+        )))
+
+    disponibilidad = (params.get('disponibilidad') or '').strip()
+    if disponibilidad and disponibilidad != 'todas':
+        qs = qs.filter(disponibilidad=disponibilidad)
+
+    return qs.order_by('id')
+
+
+def _entero(valor, defecto=None):
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        return defecto
+
+
+def pagina_trabajadores(params, excluir_cuadrilla=None):
+    """
+    Obtiene una página del selector con paginación por keyset.
+
+    Args:
+        params: QueryDict (request.GET) con los filtros de `filtrar_trabajadores`
+                y, opcionalmente, `cursor` (último ID recibido) y `limite`
+        excluir_cuadrilla: ID de cuadrilla cuyos miembros se excluyen
+
+    Returns:
+        dict: {'resultados': [filas], 'siguiente': cursor o None}
+    """
+    limite = _entero(params.get('limite'), TAMANO_PAGINA)
+    limite = max(1, min(limite, TAMANO_PAGINA_MAX))
+
+    qs = filtrar_trabajadores(params, excluir_cuadrilla=excluir_cuadrilla)
+    cursor = _entero(params.get('cursor'))
+    if cursor is not None:
+        qs = qs.filter(id__gt=cursor)
+
+    # Se pide una fila extra para saber si hay más páginas
+    trabajadores = list(qs.values(*CAMPOS_FILA)[:limite + 1])
+    hay_mas = len(trabajadores) > limite
+    trabajadores = trabajadores[:limite]
+
+    return {
+        'resultados': _filas(trabajadores),
+        'siguiente': trabajadores[-1]['id'] if hay_mas else None,
+    }
+
+
+def filas_por_ids(trabajador_ids):
+    """
+    Filas del selector para trabajadores concretos, en el orden indicado.
+
+    Args:
+        trabajador_ids: Lista de IDs de Trabajador
+
+    Returns:
+        list: Filas con el mismo formato que `pagina_trabajadores`
+    """
+    qs = Trabajador.objects.filter(id__in=trabajador_ids).with_disponibilidad()
+    por_id = {t['id']: t for t in qs.values(*CAMPOS_FILA)}
+    return _filas([por_id[i] for i in trabajador_ids if i in por_id])
+
+
+CAMPOS_FILA = (
+    'id', 'user_id', 'nombre', 'apellido', 'rut', 'especialidad',
+    'esta_ocupado', 'estado_real', 'disponibilidad', 'tiene_certificaciones',
+)
+
+
+def _filas(trabajadores):
+    """Convierte dicts de `values(*CAMPOS_FILA)` en filas compactas para el JSON."""
+    # Nombres de certificaciones solo para los trabajadores entregados
+    certificaciones = {}
+    con_cert = [t['id'] for t in trabajadores if t['tiene_certificaciones']]
+    if con_cert:
+        filas = CertificacionTrabajador.objects.filter(
+            trabajador_id__in=con_cert
+        ).values_list('trabajador_id', 'nombre')
+        for trabajador_id, nombre in filas:
+            certificaciones.setdefault(trabajador_id, []).append(nombre)
+
+    return [
+        {
+            'id': t['id'],
+            'user_id': t['user_id'],
+            'nombre': f"{t['nombre']} {t['apellido']}",
+            'rut': t['rut'],
+            'especialidad': t['especialidad'] or '',
+            'disponibilidad': t['disponibilidad'],
+            'seleccionable': bool(t['user_id'])
+            and not t['esta_ocupado']
+            and t['estado_real'] not in EstadosTrabajador.ESTADOS_NO_ASIGNABLES,
+            'certificaciones': certificaciones.get(t['id'], []),
+        }
+        for t in trabajadores
+    ]
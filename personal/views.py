@@ -4,21 +4,29 @@ from django.contrib.auth.models import User
 from django.contrib.auth.views import PasswordChangeView
 from django.contrib.auth import update_session_auth_hash
 from django.db import transaction
+from django.http import Http404, HttpResponseForbidden, JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.views.decorators.http import require_GET
 
 from proyectos.models import Proyecto
+from core.utils_contadores import CONTADOR_NOTIFICACIONES, invalidar_contadores
 from .models import (
     Cuadrilla, Asignacion, Rol, Trabajador, TrabajadorPerfil,
     CompetenciaTrabajador, CertificacionTrabajador, ExperienciaTrabajador,
     Notificacion,
 )
-from .utils_notificaciones import crear_notificacion
+from .utils_notificaciones import crear_notificacion, crear_notificaciones
+from .utils_asignaciones import aplicar_asignaciones
+from .utils_selector import pagina_trabajadores, filas_por_ids
+from .utils_recomendacion import recomendar_trabajadores
+from .utils_exportacion import CONJUNTOS, FORMATOS, exportar
 from .constants import (
     UserGroups, EstadosTrabajador, TiposTrabajador, MensajesNotificacion, MensajesError
 )
 from .utils import (
     es_jefe_proyecto, es_lider_cuadrilla, puede_gestionar_cuadrilla,
-    puede_ver_cuadrilla, enriquecer_trabajador_con_info,
-    puede_asignarse_trabajador, preparar_lideres_disponibles,
+    puede_ver_cuadrilla, enriquecer_trabajadores_con_info,
+    preparar_lideres_disponibles,
     validar_disponibilidad_lider, actualizar_estado_trabajador_al_quitar,
     preparar_contexto_especialidades, preparar_contexto_certificaciones,
     obtener_disponibilidad_trabajador
@@ -27,6 +35,7 @@ from comunicacion.models import (
     Conversation, Message, WorkerRequest, IncidentNotice
 )
 from comunicacion.models import archive_conversation
+from comunicacion.sync import schedule_group_sync
 
 
 # ===================================================================
@@ -45,42 +54,10 @@ def _procesar_asignacion_trabajadores(request, cuadrilla, trabajadores_ids):
     Returns:
         list: Lista de tuplas (user, rol) de trabajadores asignados exitosamente
     """
-    trabajadores_asignados = []
-    
-    for trabajador_user_id in trabajadores_ids:
-        trabajador = Trabajador.objects.filter(user__id=trabajador_user_id).first()
-        
-        if not trabajador:
-            continue
-        
-        # Verificar si puede ser asignado
-        if not puede_asignarse_trabajador(trabajador):
-            continue
-        
-        # Crear usuario si no existe
-        if not trabajador.user:
-            user = trabajador.crear_usuario()
-            Trabajador.objects.filter(pk=trabajador.pk).update(user_id=user.id)
-            trabajador.user = user
-        
-        # Obtener o crear rol
-        rol_custom = (request.POST.get(f"roles_custom_{trabajador_user_id}") or '').strip()
-        if rol_custom:
-            rol, _ = Rol.objects.get_or_create(nombre=rol_custom)
-        else:
-            rol_id = request.POST.get(f"roles_{trabajador_user_id}")
-            rol = Rol.objects.filter(id=rol_id).first() if rol_id and str(rol_id).isdigit() else None
-        
-        # Crear asignación
-        Asignacion.objects.create(
-            trabajador=trabajador.user,
-            cuadrilla=cuadrilla,
-            rol=rol
-        )
-        
-        trabajadores_asignados.append((trabajador.user, rol))
-    
-    return trabajadores_asignados
+    agregados, _, _ = aplicar_asignaciones(
+        cuadrilla, trabajadores_ids, request.POST, asignaciones_actuales={}
+    )
+    return agregados
 
 
 def _enviar_notificaciones_creacion_cuadrilla(cuadrilla, trabajadores_asignados):
@@ -91,92 +68,56 @@ def _enviar_notificaciones_creacion_cuadrilla(cuadrilla, trabajadores_asignados)
         cuadrilla: Instancia de Cuadrilla creada
         trabajadores_asignados: Lista de tuplas (user, rol)
     """
+    nombre_proyecto = cuadrilla.proyecto.nombre if cuadrilla.proyecto else None
+
     # Notificar a trabajadores asignados
-    for user, rol in trabajadores_asignados:
-        mensaje = MensajesNotificacion.asignado_cuadrilla(
+    pares = [
+        (user, MensajesNotificacion.asignado_cuadrilla(
             nombre_cuadrilla=cuadrilla.nombre,
-            nombre_proyecto=cuadrilla.proyecto.nombre if cuadrilla.proyecto else None,
+            nombre_proyecto=nombre_proyecto,
             nombre_rol=rol.nombre if rol else None
-        )
-        crear_notificacion(user, mensaje)
+        ))
+        for user, rol in trabajadores_asignados
+    ]
     
     # Notificar al líder
     if cuadrilla.lider:
-        mensaje = MensajesNotificacion.lider_nueva_cuadrilla(cuadrilla.nombre)
-        crear_notificacion(cuadrilla.lider, mensaje)
+        pares.append((cuadrilla.lider, MensajesNotificacion.lider_nueva_cuadrilla(cuadrilla.nombre)))
+
+    crear_notificaciones(pares, diferido=True)
 
 
-def _procesar_edicion_asignaciones(request, cuadrilla, seleccionados, asignaciones_actuales):
+def _procesar_edicion_asignaciones(request, cuadrilla, seleccionados, asignaciones_actuales, mostrados):
     """
     Procesa la edición de asignaciones de trabajadores a una cuadrilla.
     
+    Los miembros que el formulario mostró y que no vienen en la selección se
+    quitan de la cuadrilla. Los que no se mostraron (inactivos, de otro tipo
+    o sin ficha de Trabajador) se conservan.
+    
     Args:
         request: HttpRequest
         cuadrilla: Instancia de Cuadrilla
         seleccionados: Set de IDs de trabajadores seleccionados
         asignaciones_actuales: Dict de asignaciones actuales {user_id: Asignacion}
+        mostrados: IDs de usuario de los miembros renderizados en el formulario
         
     Returns:
-        tuple: (agregados, cambios_rol)
+        tuple: (agregados, removidos, cambios_rol)
             - agregados: Lista de tuplas (user, rol)
+            - removidos: Lista de users
             - cambios_rol: Lista de tuplas (user, cuadrilla, rol)
     """
-    agregados = []
-    cambios_rol = []
-    restantes = asignaciones_actuales.copy()
-    
-    for trabajador_user_id in seleccionados:
-        trabajador_obj = Trabajador.objects.filter(user__id=trabajador_user_id).first()
-        
-        if not trabajador_obj:
-            continue
-        
-        # Validar si puede ser asignado
-        if not puede_asignarse_trabajador(trabajador_obj):
-            continue
-        
-        # Crear usuario si no existe
-        if not trabajador_obj.user:
-            user = trabajador_obj.crear_usuario()
-            Trabajador.objects.filter(pk=trabajador_obj.pk).update(user_id=user.id)
-            trabajador_obj.user = user
-        
-        user = trabajador_obj.user
-        clave = str(user.id)
-        
-        # Obtener o crear rol
-        rol_custom = (request.POST.get(f"roles_custom_{trabajador_user_id}") or '').strip()
-        if rol_custom:
-            rol, _ = Rol.objects.get_or_create(nombre=rol_custom)
-        else:
-            rol_id = request.POST.get(f"roles_{trabajador_user_id}")
-            rol = Rol.objects.filter(id=rol_id).first() if rol_id and str(rol_id).isdigit() else None
-        
-        # Actualizar o crear asignación
-        if clave in restantes:
-            # Trabajador ya estaba asignado - actualizar rol si cambió
-            asignacion = restantes.pop(clave)
-            rol_anterior = asignacion.rol
-            
-            if rol_anterior != rol:
-                cambios_rol.append((user, cuadrilla, rol))
-            
-            asignacion.rol = rol
-            asignacion.save()
-        else:
-            # Nuevo trabajador - crear asignación
-            Asignacion.objects.create(
-                trabajador=user,
-                cuadrilla=cuadrilla,
-                rol=rol
-            )
-            agregados.append((user, rol))
-    
-    return agregados, cambios_rol
+    return aplicar_asignaciones(
+        cuadrilla, seleccionados, request.POST,
+        asignaciones_actuales=asignaciones_actuales,
+        quitables=mostrados,
+    )
 
 
 def _enviar_notificaciones_edicion_cuadrilla(cuadrilla, lider_anterior, 
-                                             proyecto_anterior, agregados, cambios_rol):
+                                             proyecto_anterior, agregados, cambios_rol,
+                                             removidos=()):
     """
     Envía notificaciones al editar una cuadrilla.
     
@@ -186,41 +127,46 @@ def _enviar_notificaciones_edicion_cuadrilla(cuadrilla, lider_anterior,
         proyecto_anterior: Proyecto anterior (o None)
         agregados: Lista de tuplas (user, rol) de trabajadores agregados
         cambios_rol: Lista de tuplas (user, cuadrilla, rol) con cambios de rol
+        removidos: Lista de users quitados de la cuadrilla
     """
+    pares = []
+
     # Notificar cambio de liderazgo
     if lider_anterior != cuadrilla.lider:
         if lider_anterior:
-            mensaje = MensajesNotificacion.removido_liderazgo(cuadrilla.nombre)
-            crear_notificacion(lider_anterior, mensaje)
+            pares.append((lider_anterior, MensajesNotificacion.removido_liderazgo(cuadrilla.nombre)))
         
         if cuadrilla.lider:
-            mensaje = MensajesNotificacion.asignado_liderazgo(cuadrilla.nombre)
-            crear_notificacion(cuadrilla.lider, mensaje)
+            pares.append((cuadrilla.lider, MensajesNotificacion.asignado_liderazgo(cuadrilla.nombre)))
     
     # Notificar cambio de proyecto
     if proyecto_anterior != cuadrilla.proyecto:
-        for asignacion in Asignacion.objects.filter(cuadrilla=cuadrilla):
-            mensaje = MensajesNotificacion.cambio_proyecto_cuadrilla(
-                nombre_cuadrilla=cuadrilla.nombre,
-                nombre_proyecto=cuadrilla.proyecto.nombre if cuadrilla.proyecto else None
-            )
-            crear_notificacion(asignacion.trabajador, mensaje)
+        mensaje = MensajesNotificacion.cambio_proyecto_cuadrilla(
+            nombre_cuadrilla=cuadrilla.nombre,
+            nombre_proyecto=cuadrilla.proyecto.nombre if cuadrilla.proyecto else None
+        )
+        for asignacion in Asignacion.objects.filter(cuadrilla=cuadrilla).select_related('trabajador'):
+            pares.append((asignacion.trabajador, mensaje))
     
     # Notificar trabajadores agregados
     for user, rol in agregados:
-        mensaje = MensajesNotificacion.agregado_cuadrilla(
+        pares.append((user, MensajesNotificacion.agregado_cuadrilla(
             nombre_cuadrilla=cuadrilla.nombre,
             nombre_rol=rol.nombre if rol else None
-        )
-        crear_notificacion(user, mensaje)
+        )))
     
     # Notificar cambios de rol
     for user, cuad, rol in cambios_rol:
-        mensaje = MensajesNotificacion.cambio_rol(
+        pares.append((user, MensajesNotificacion.cambio_rol(
             nombre_cuadrilla=cuad.nombre,
             nombre_rol=rol.nombre if rol else None
-        )
-        crear_notificacion(user, mensaje)
+        )))
+
+    # Notificar trabajadores quitados
+    for user in removidos:
+        pares.append((user, MensajesNotificacion.removido_de_cuadrilla(cuadrilla.nombre)))
+
+    crear_notificaciones(pares, diferido=True)
 
 
 # ===================================================================
@@ -238,23 +184,14 @@ def crear_cuadrilla(request):
     # Obtener proyectos activos del jefe
     proyectos = Proyecto.objects.filter(jefe=request.user, activo=True)
 
-    # Obtener trabajadores activos (excluir líderes y jefes)
-    trabajadores = (
-        Trabajador.objects
-        .filter(activo=True, tipo_trabajador=TiposTrabajador.TRABAJADOR)
-        .select_related("user")
-        .prefetch_related("certificaciones_trabajador", "user__perfil_trabajador")
-    )
-
+    # Los trabajadores no se renderizan aquí: el selector los pide por
+    # páginas a `api_trabajadores` con los filtros aplicados en el servidor.
     roles = Rol.objects.all()
+    roles_json = list(roles.values('id', 'nombre'))
 
     # Preparar lista de líderes disponibles
     posibles_lideres = preparar_lideres_disponibles()
 
-    # Enriquecer trabajadores con información adicional
-    for trabajador in trabajadores:
-        enriquecer_trabajador_con_info(trabajador)
-
     # Obtener especialidades y certificaciones únicas
     especialidades = preparar_contexto_especialidades()
     certificaciones = preparar_contexto_certificaciones()
@@ -287,8 +224,8 @@ def crear_cuadrilla(request):
             if not es_valido:
                 return render(request, 'cuadrilla_form.html', {
                     'proyectos': proyectos,
-                    'trabajadores': trabajadores,
                     'roles': roles,
+                    'roles_json': roles_json,
                     'especialidades': especialidades,
                     'certificaciones': certificaciones,
                     'posibles_lideres': posibles_lideres,
@@ -318,8 +255,8 @@ def crear_cuadrilla(request):
 
     return render(request, "cuadrilla_form.html", {
         "proyectos": proyectos,
-        "trabajadores": trabajadores,
         "roles": roles,
+        "roles_json": roles_json,
         "especialidades": especialidades,
         "certificaciones": certificaciones,
         "posibles_lideres": posibles_lideres,
@@ -346,13 +283,9 @@ def editar_cuadrilla(request, cuadrilla_id):
     else:
         return redirect('proyectos:panel')
 
-    # Preparar contexto
-    trabajadores = Trabajador.objects.filter(
-        activo=True,
-        tipo_trabajador=TiposTrabajador.TRABAJADOR
-    ).select_related("user")
-    
     roles = Rol.objects.all()
+    roles_json = list(roles.values('id', 'nombre'))
+    especialidades = preparar_contexto_especialidades()
     posibles_lideres = preparar_lideres_disponibles(cuadrilla_actual=cuadrilla)
     
     # Proyectos permitidos según rol
@@ -364,20 +297,26 @@ def editar_cuadrilla(request, cuadrilla_id):
 
     # Obtener asignaciones actuales
     asignaciones_actuales = {
-        str(a.trabajador.id): a 
-        for a in Asignacion.objects.filter(cuadrilla=cuadrilla)
+        str(a.trabajador_id): a 
+        for a in Asignacion.objects.filter(cuadrilla=cuadrilla).select_related('trabajador', 'rol')
     }
 
-    # Enriquecer trabajadores
+    # Permisos para mostrar botón 'Quitar' (iguales para todas las filas)
+    can_remove = puede_gestionar_cuadrilla(user, cuadrilla)
+
+    # Solo se renderizan los miembros actuales; el resto del personal lo
+    # carga el selector desde `api_trabajadores`.
+    trabajadores = Trabajador.objects.filter(
+        activo=True,
+        tipo_trabajador=TiposTrabajador.TRABAJADOR,
+        user_id__in=[a.trabajador_id for a in asignaciones_actuales.values()],
+    ).select_related("user")
+    trabajadores = enriquecer_trabajadores_con_info(trabajadores)
     for trabajador in trabajadores:
         trabajador.asignacion = asignaciones_actuales.get(
-            str(trabajador.user.id)
-        ) if trabajador.user else None
-        
-        enriquecer_trabajador_con_info(trabajador)
-        
-        # Permisos para mostrar botón 'Quitar'
-        trabajador.can_remove = puede_gestionar_cuadrilla(user, cuadrilla)
+            str(trabajador.user_id)
+        ) if trabajador.user_id else None
+        trabajador.can_remove = can_remove
 
     if request.method == "POST":
         lider_anterior = cuadrilla.lider
@@ -406,6 +345,8 @@ def editar_cuadrilla(request, cuadrilla_id):
                         'cuadrilla': cuadrilla,
                         'trabajadores': trabajadores,
                         'roles': roles,
+                        'roles_json': roles_json,
+                        'especialidades': especialidades,
                         'proyectos': proyectos,
                         'posibles_lideres': posibles_lideres,
                         'errors': [mensaje_error],
@@ -420,18 +361,20 @@ def editar_cuadrilla(request, cuadrilla_id):
             activo=True
         ).first() if proyecto_id and proyecto_id.isdigit() else None
 
-        cuadrilla.save()
+        with transaction.atomic():
+            cuadrilla.save()
 
-        # Procesar asignaciones
-        raw_seleccionados = request.POST.getlist("trabajadores")
-        if raw_seleccionados:
-            agregados, cambios_rol = _procesar_edicion_asignaciones(
-                request, cuadrilla, set(raw_seleccionados), asignaciones_actuales
+            # Procesar asignaciones
+            # (también sin selección: desmarcar a todos quita a los mostrados)
+            agregados, removidos, cambios_rol = _procesar_edicion_asignaciones(
+                request, cuadrilla, set(request.POST.getlist("trabajadores")), asignaciones_actuales,
+                mostrados={t.user_id for t in trabajadores},
             )
             
             # Enviar notificaciones
             _enviar_notificaciones_edicion_cuadrilla(
-                cuadrilla, lider_anterior, proyecto_anterior, agregados, cambios_rol
+                cuadrilla, lider_anterior, proyecto_anterior, agregados, cambios_rol,
+                removidos=removidos,
             )
 
         return redirect("proyectos:panel")
@@ -440,6 +383,8 @@ def editar_cuadrilla(request, cuadrilla_id):
         "cuadrilla": cuadrilla,
         "trabajadores": trabajadores,
         "roles": roles,
+        "roles_json": roles_json,
+        "especialidades": especialidades,
         "proyectos": proyectos,
         "posibles_lideres": posibles_lideres,
         "can_manage": True,
@@ -454,7 +399,7 @@ def editar_cuadrilla(request, cuadrilla_id):
 # =====================================================
 def detalle_cuadrilla(request, cuadrilla_id):
     """Vista de detalle de una cuadrilla con trabajadores asignados."""
-    cuadrilla = get_object_or_404(Cuadrilla, id=cuadrilla_id)
+    cuadrilla = get_object_or_404(Cuadrilla.objects.select_related('proyecto', 'lider'), id=cuadrilla_id)
 
     # Verificar permisos
     if not puede_ver_cuadrilla(request.user, cuadrilla):
@@ -463,21 +408,17 @@ def detalle_cuadrilla(request, cuadrilla_id):
     # Optimizar queries con select_related y prefetch_related
     asignaciones = (Asignacion.objects
                    .filter(cuadrilla=cuadrilla)
-                   .select_related('trabajador', 'rol')
+                   .select_related('trabajador', 'trabajador__trabajador_profile', 'rol')
                    .order_by('trabajador__username'))
 
     users = [a.trabajador for a in asignaciones]
     
-    # Prefetch relacionados
+    # Prefetch relacionados (disponibilidad anotada en la misma consulta)
     trabajadores = (Trabajador.objects
                    .filter(user__in=users)
-                   .select_related('user'))
-    
-    perfiles = (TrabajadorPerfil.objects
-               .filter(user__in=users)
-               .select_related('user'))
+                   .select_related('user')
+                   .with_disponibilidad())
     
-    perfil_map = {p.user_id: p for p in perfiles}
     trabajador_map = {t.user_id: t for t in trabajadores}
 
     # Construir lista enriquecida
@@ -485,9 +426,8 @@ def detalle_cuadrilla(request, cuadrilla_id):
     for asignacion in asignaciones:
         user = asignacion.trabajador
         trabajador = trabajador_map.get(user.id)
-        perfil = perfil_map.get(user.id)
         
-        disponibilidad = obtener_disponibilidad_trabajador(trabajador, perfil)
+        disponibilidad = obtener_disponibilidad_trabajador(trabajador)
         especialidad = trabajador.especialidad if trabajador and trabajador.especialidad else '—'
         
         trabajadores_detalle.append({
@@ -536,7 +476,7 @@ def detalle_cuadrilla(request, cuadrilla_id):
         "cert_map": cert_map,
         "exp_map": exp_map,
         "can_manage": can_manage,
-        "cuadrillas": Cuadrilla.objects.all(),
+        "cuadrillas": Cuadrilla.objects.select_related('proyecto'),
     })
 
 
@@ -603,23 +543,24 @@ def mover_trabajador(request):
     # Realizar movimiento
     asign.cuadrilla = nueva
     asign.save()
+    # La señal de guardado solo cubre la cuadrilla destino
+    schedule_group_sync(antigua.id)
 
     # Notificaciones
-    mensaje = MensajesNotificacion.movido_cuadrilla(antigua.nombre, nueva.nombre)
-    crear_notificacion(trabajador_user, mensaje)
+    pares = [(trabajador_user, MensajesNotificacion.movido_cuadrilla(antigua.nombre, nueva.nombre))]
 
     # Notificar líderes si aplicable
     if antigua.lider and antigua.lider != trabajador_user:
-        mensaje_lider = MensajesNotificacion.trabajador_removido_cuadrilla(
+        pares.append((antigua.lider, MensajesNotificacion.trabajador_removido_cuadrilla(
             trabajador_user.get_full_name(), antigua.nombre
-        )
-        crear_notificacion(antigua.lider, mensaje_lider)
+        )))
     
     if nueva.lider and nueva.lider != trabajador_user:
-        mensaje_lider = MensajesNotificacion.trabajador_agregado_cuadrilla(
+        pares.append((nueva.lider, MensajesNotificacion.trabajador_agregado_cuadrilla(
             trabajador_user.get_full_name(), nueva.nombre
-        )
-        crear_notificacion(nueva.lider, mensaje_lider)
+        )))
+
+    crear_notificaciones(pares, diferido=True)
 
     return redirect('personal:detalle_cuadrilla', nueva.id)
 
@@ -672,24 +613,20 @@ def disolver_cuadrilla(request, cuadrilla_id):
         traceback.print_exc()
 
     # Capturar datos antes de eliminar
-    asignaciones = list(Asignacion.objects.filter(cuadrilla=cuad))
+    asignaciones = list(Asignacion.objects.filter(cuadrilla=cuad).select_related('trabajador'))
     lider = cuad.lider
 
     # Eliminar cuadrilla
     cuad.delete()
 
     # Notificaciones
-    for a in asignaciones:
-        crear_notificacion(
-            a.trabajador,
-            MensajesNotificacion.cuadrilla_disuelta(nombre_cuadrilla)
-        )
+    mensaje = MensajesNotificacion.cuadrilla_disuelta(nombre_cuadrilla)
+    pares = [(a.trabajador, mensaje) for a in asignaciones]
 
     if lider:
-        crear_notificacion(
-            lider,
-            MensajesNotificacion.cuadrilla_disuelta_lider(nombre_cuadrilla)
-        )
+        pares.append((lider, MensajesNotificacion.cuadrilla_disuelta_lider(nombre_cuadrilla)))
+
+    crear_notificaciones(pares, diferido=True)
 
     return redirect('proyectos:panel')
 
@@ -734,16 +671,14 @@ def quitar_trabajador(request):
     actualizar_estado_trabajador_al_quitar(trabajador_user)
 
     # Notificaciones
-    crear_notificacion(
-        trabajador_user,
-        MensajesNotificacion.removido_de_cuadrilla(cuadrilla.nombre)
-    )
+    pares = [(trabajador_user, MensajesNotificacion.removido_de_cuadrilla(cuadrilla.nombre))]
 
     if cuadrilla.lider and cuadrilla.lider != trabajador_user:
-        mensaje_lider = MensajesNotificacion.trabajador_removido_cuadrilla(
+        pares.append((cuadrilla.lider, MensajesNotificacion.trabajador_removido_cuadrilla(
             trabajador_user.get_full_name(), cuadrilla.nombre
-        )
-        crear_notificacion(cuadrilla.lider, mensaje_lider)
+        )))
+
+    crear_notificaciones(pares, diferido=True)
 
     return redirect('personal:detalle_cuadrilla', cuadrilla.id)
 
@@ -753,7 +688,7 @@ def quitar_trabajador(request):
 # =====================================================
 def detalle_trabajador(request, trabajador_id):
 
-    trabajador = get_object_or_404(Trabajador, id=trabajador_id)
+    trabajador = get_object_or_404(Trabajador.objects.with_disponibilidad(), id=trabajador_id)
 
     perfil = TrabajadorPerfil.objects.filter(user=trabajador.user).first()
     competencias = CompetenciaTrabajador.objects.filter(trabajador=trabajador)
@@ -762,14 +697,9 @@ def detalle_trabajador(request, trabajador_id):
 
     asignaciones = Asignacion.objects.filter(trabajador=trabajador.user)
 
-    # Calcular disponibilidad: si el trabajador tiene override manual, usar su estado;
-    # en otro caso usar el estado efectivo calculado en el perfil.
-    if getattr(trabajador, 'manual_override', False):
-        disponibilidad = trabajador.estado
-    elif perfil:
-        disponibilidad = perfil.estado_efectivo
-    else:
-        disponibilidad = '—'
+    # Disponibilidad anotada por with_disponibilidad() (override manual,
+    # asignaciones y estado del perfil)
+    disponibilidad = trabajador.estado_real
 
     return render(request, "detalle_trabajador.html", {
         "trabajador": trabajador,
@@ -831,7 +761,8 @@ def editar_estado_trabajador(request, trabajador_id):
             if trabajador.user:
                 crear_notificacion(
                     trabajador.user,
-                    MensajesNotificacion.estado_laboral_cambiado(nuevo_estado)
+                    MensajesNotificacion.estado_laboral_cambiado(nuevo_estado),
+                    diferido=True,
                 )
 
         return redirect("personal:detalle_trabajador", trabajador.id)
@@ -857,7 +788,8 @@ def mis_notificaciones(request):
 @login_required
 def marcar_todas_leidas(request):
 
-    request.user.notificaciones.filter(leida=False).update(leida=True)
+    if request.user.notificaciones.filter(leida=False).update(leida=True):
+        invalidar_contadores(CONTADOR_NOTIFICACIONES, [request.user.pk])
     return redirect("personal:mis_notificaciones")
 
 
@@ -873,7 +805,10 @@ def mi_cuadrilla(request):
     user = request.user
     
     # Buscar asignación del trabajador
-    asignacion = Asignacion.objects.filter(trabajador=user).select_related('cuadrilla', 'cuadrilla__proyecto', 'rol').first()
+    asignacion = (Asignacion.objects
+                  .filter(trabajador=user)
+                  .select_related('cuadrilla__lider', 'cuadrilla__proyecto__jefe', 'rol')
+                  .first())
     
     if not asignacion:
         # Trabajador no tiene cuadrilla asignada
@@ -885,16 +820,18 @@ def mi_cuadrilla(request):
     proyecto = cuadrilla.proyecto
     
     # Obtener todos los miembros de la cuadrilla
-    asignaciones = Asignacion.objects.filter(cuadrilla=cuadrilla).select_related('trabajador', 'rol').order_by('trabajador__username')
+    asignaciones = (Asignacion.objects
+                    .filter(cuadrilla=cuadrilla)
+                    .select_related('trabajador', 'trabajador__trabajador_profile', 'rol')
+                    .order_by('trabajador__username'))
     
     miembros = []
     for asig in asignaciones:
-        trabajador_obj = Trabajador.objects.filter(user=asig.trabajador).first()
         miembros.append({
             'user': asig.trabajador,
             'rol': asig.rol,
-            'trabajador': trabajador_obj,
-            'es_lider': cuadrilla.lider == asig.trabajador,
+            'trabajador': getattr(asig.trabajador, 'trabajador_profile', None),
+            'es_lider': cuadrilla.lider_id == asig.trabajador_id,
         })
     
     return render(request, 'personal/mi_cuadrilla.html', {
@@ -921,3 +858,100 @@ class TrabajadorPasswordChangeView(PasswordChangeView):
 
         update_session_auth_hash(self.request, form.user)
         return response
+
+
+# =====================================================
+# 9. API: SELECTOR DE TRABAJADORES
+# =====================================================
+@login_required
+@require_GET
+def api_trabajadores(request):
+    """
+    Devuelve una página de trabajadores para el selector de los formularios
+    de cuadrilla, filtrada en el servidor (ver `utils_selector`).
+
+    Parámetros GET: q, especialidad, certificacion, disponibilidad, cursor,
+    limite y cuadrilla (excluye a sus miembros actuales).
+    """
+    if not (es_jefe_proyecto(request.user) or es_lider_cuadrilla(request.user)):
+        return JsonResponse({'error': 'No autorizado'}, status=403)
+
+    cuadrilla_id = request.GET.get('cuadrilla')
+    excluir = int(cuadrilla_id) if cuadrilla_id and cuadrilla_id.isdigit() else None
+
+    return JsonResponse(pagina_trabajadores(request.GET, excluir_cuadrilla=excluir))
+
+
+# =====================================================
+# 10. API: RECOMENDACIÓN DE TRABAJADORES
+# =====================================================
+@login_required
+@require_GET
+def api_recomendaciones(request):
+    """
+    Devuelve los trabajadores disponibles mejor puntuados para un proyecto
+    (ver `utils_recomendacion`), con el motivo de cada puntaje.
+
+    Parámetros GET: proyecto (ID) o tipo + complejidad, n (máx. 50) y
+    cuadrilla (excluye a sus miembros actuales).
+    """
+    if not (es_jefe_proyecto(request.user) or es_lider_cuadrilla(request.user)):
+        return JsonResponse({'error': 'No autorizado'}, status=403)
+
+    proyecto_id = request.GET.get('proyecto')
+    if proyecto_id and proyecto_id.isdigit():
+        proyecto = get_object_or_404(Proyecto, id=proyecto_id)
+        tipo, complejidad = proyecto.tipo, proyecto.complejidad
+    else:
+        tipo = request.GET.get('tipo') or 'otro'
+        complejidad = request.GET.get('complejidad') or 'media'
+    if tipo not in dict(Proyecto.TIPO_CHOICES) or complejidad not in dict(Proyecto.COMPLEJIDAD_CHOICES):
+        return JsonResponse({'error': 'Tipo o complejidad no válidos'}, status=400)
+
+    n = request.GET.get('n', '10')
+    n = min(int(n), 50) if n.isdigit() else 10
+
+    excluir = ()
+    cuadrilla_id = request.GET.get('cuadrilla')
+    if cuadrilla_id and cuadrilla_id.isdigit():
+        excluir = Trabajador.objects.filter(
+            user__asignacion__cuadrilla_id=cuadrilla_id
+        ).values_list('id', flat=True)
+
+    recomendaciones = recomendar_trabajadores(tipo, complejidad, n=n, excluir_ids=list(excluir))
+    filas = {f['id']: f for f in filas_por_ids([r['trabajador_id'] for r in recomendaciones])}
+
+    return JsonResponse({
+        'tipo': tipo,
+        'complejidad': complejidad,
+        'resultados': [
+            dict(filas[r['trabajador_id']], puntaje=r['puntaje'], motivos=r['motivos'])
+            for r in recomendaciones
+            if r['trabajador_id'] in filas
+        ],
+    })
+
+
+# =====================================================
+# 11. EXPORTACIONES (CSV / JSONL EN STREAMING)
+# =====================================================
+@login_required
+@require_GET
+def exportar_datos(request, conjunto):
+    """
+    Descarga un conjunto completo (trabajadores, asignaciones o proyectos)
+    como CSV o JSON Lines, generado fila a fila (ver `utils_exportacion`).
+
+    Parámetro GET: formato ('csv' por defecto o 'jsonl').
+    """
+    if not (es_jefe_proyecto(request.user) or request.user.is_staff):
+        return HttpResponseForbidden('No autorizado')
+
+    formato = request.GET.get('formato', 'csv')
+    if conjunto not in CONJUNTOS or formato not in FORMATOS:
+        raise Http404('Exportación no disponible')
+
+    respuesta = StreamingHttpResponse(exportar(conjunto, formato), content_type=FORMATOS[formato])
+    nombre = f"{conjunto}-{timezone.localdate():%Y%m%d}.{formato}"
+    respuesta['Content-Disposition'] = f'attachment; filename="{nombre}"'
+    return respuesta
@@ -3,12 +3,20 @@ from django.contrib.auth.models import User, Group
 from django.utils import timezone
 from proyectos.models import Proyecto
 from personal.models import Cuadrilla, Asignacion, Rol as RolCuadrilla, Trabajador
+from comunicacion.sync import group_sync_batch
 
 
 class Command(BaseCommand):
     help = "Genera datos de demo: 5 proyectos, 2 cuadrillas por proyecto y 4 trabajadores por cuadrilla."
 
     def handle(self, *args, **options):
+        # Sincronizar los chats de cuadrilla una sola vez al final
+        with group_sync_batch():
+            self._generar()
+
+        self.stdout.write(self.style.SUCCESS('Datos de demo generados correctamente.'))
+
+    def _generar(self):
         # Obtener o crear grupos
         jefe_group, _ = Group.objects.get_or_create(name='JefeProyecto')
         lider_group, _ = Group.objects.get_or_create(name='LiderCuadrilla')
@@ -110,6 +118,4 @@ class Command(BaseCommand):
                         trabajador=t.user,
                         cuadrilla=cuadrilla,
                         rol=rol_trabajador,
-                    )
-
-        self.stdout.write(self.style.SUCCESS('Datos de demo generados correctamente.'))
\ No newline at end of file
+                    )
\ No newline at end of file
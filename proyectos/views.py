@@ -3,12 +3,28 @@ from django.contrib.auth.decorators import login_required, user_passes_test
 from .models import Proyecto
 from .forms import ProyectoForm
 from personal.models import Cuadrilla
-from django.db.models import Q
-from personal.utils_notificaciones import crear_notificacion
+from django.db.models import Count, Prefetch, Q
+from personal.utils import es_jefe_proyecto, es_lider_cuadrilla
+from personal.utils_notificaciones import crear_notificaciones
+from personal.utils_ocupacion import recalcular_ocupacion
+from core.utils_estadisticas import programar_actualizacion
+from core.utils_replicas import solo_lectura
 from django.contrib import messages
 
 def es_jefe(user):
-    return user.groups.filter(name='JefeProyecto').exists()
+    return es_jefe_proyecto(user)
+
+
+def _cuadrillas_panel():
+    """Cuadrillas con su líder y cantidad de trabajadores, sin consultas por fila."""
+    return Cuadrilla.objects.select_related('lider').annotate(num_asignaciones=Count('asignaciones'))
+
+
+def _proyectos_panel(proyectos):
+    """Proyectos con jefe, creador y cuadrillas (ver `_cuadrillas_panel`) precargados."""
+    return proyectos.select_related('jefe', 'created_by').prefetch_related(
+        Prefetch('cuadrillas', queryset=_cuadrillas_panel())
+    )
 
 
 @login_required
@@ -57,6 +73,7 @@ def editar_proyecto(request, proyecto_id):
 
 
 @login_required
+@solo_lectura
 def panel_proyectos(request):
     """Panel de proyectos con visibilidad según rol:
 
@@ -68,13 +85,13 @@ def panel_proyectos(request):
 
     # JefeProyecto: ver todos los proyectos y sus cuadrillas (lectura completa).
     # Las acciones de edición/creación siguen restringidas por otras vistas.
-    if user.groups.filter(name='JefeProyecto').exists():
-        proyectos_activos = Proyecto.objects.filter(activo=True).prefetch_related('cuadrillas')
-        proyectos_finalizados = Proyecto.objects.filter(activo=False).prefetch_related('cuadrillas')
+    if es_jefe_proyecto(user):
+        proyectos_activos = _proyectos_panel(Proyecto.objects.filter(activo=True))
+        proyectos_finalizados = _proyectos_panel(Proyecto.objects.filter(activo=False))
 
         data = []
         for p in proyectos_activos:
-            cuadrillas = Cuadrilla.objects.filter(proyecto=p)
+            cuadrillas = p.cuadrillas.all()
             # Construir lista de cuadrillas con permisos por item
             cuad_list = []
             for c in cuadrillas:
@@ -94,7 +111,7 @@ def panel_proyectos(request):
 
         finalizados = []
         for p in proyectos_finalizados:
-            cuadrillas = Cuadrilla.objects.filter(proyecto=p)
+            cuadrillas = p.cuadrillas.all()
             cuad_list = []
             for c in cuadrillas:
                 cuad_list.append({
@@ -105,7 +122,7 @@ def panel_proyectos(request):
 
         # Mostrar todas las cuadrillas sin proyecto
         cuadrillas_sin_proyecto = []
-        for c in Cuadrilla.objects.filter(proyecto__isnull=True):
+        for c in _cuadrillas_panel().filter(proyecto__isnull=True):
             cuadrillas_sin_proyecto.append({
                 'cuadrilla': c,
                 'can_edit': (c.lider_id == user.id),
@@ -136,15 +153,15 @@ def panel_proyectos(request):
         
 
     # LiderCuadrilla: ver proyectos donde tiene cuadrillas asignadas
-    if user.groups.filter(name='LiderCuadrilla').exists():
+    if es_lider_cuadrilla(user):
         # Obtener proyectos donde el líder tiene cuadrillas asignadas (activos y finalizados)
-        proyectos_activos = Proyecto.objects.filter(cuadrillas__lider=user, activo=True).distinct().prefetch_related('cuadrillas')
-        proyectos_finalizados = Proyecto.objects.filter(cuadrillas__lider=user, activo=False).distinct().prefetch_related('cuadrillas')
+        proyectos_activos = _proyectos_panel(Proyecto.objects.filter(cuadrillas__lider=user, activo=True).distinct())
+        proyectos_finalizados = _proyectos_panel(Proyecto.objects.filter(cuadrillas__lider=user, activo=False).distinct())
 
         data = []
         for p in proyectos_activos:
             # Mostrar TODAS las cuadrillas del proyecto (lectura)
-            cuadrillas = Cuadrilla.objects.filter(proyecto=p)
+            cuadrillas = p.cuadrillas.all()
             cuad_list = []
             for c in cuadrillas:
                 cuad_list.append({
@@ -165,7 +182,7 @@ def panel_proyectos(request):
 
         finalizados = []
         for p in proyectos_finalizados:
-            cuadrillas = Cuadrilla.objects.filter(proyecto=p)
+            cuadrillas = p.cuadrillas.all()
             cuad_list = []
             for c in cuadrillas:
                 cuad_list.append({
@@ -176,7 +193,7 @@ def panel_proyectos(request):
 
         # Líder también puede ver sus cuadrillas sin proyecto asignado
         cuadrillas_sin_proyecto = []
-        for c in Cuadrilla.objects.filter(proyecto__isnull=True, lider=user):
+        for c in _cuadrillas_panel().filter(proyecto__isnull=True, lider=user):
             cuadrillas_sin_proyecto.append({
                 'cuadrilla': c,
                 'can_edit': True,
@@ -192,11 +209,12 @@ def panel_proyectos(request):
 
     # Trabajador: mostrar solo el proyecto de su cuadrilla actual (si tiene)
     from personal.models import Asignacion
-    asign = Asignacion.objects.filter(trabajador=user).select_related('cuadrilla__proyecto').first()
-    if asign and asign.cuadrilla and asign.cuadrilla.proyecto:
-        p = asign.cuadrilla.proyecto
+    asign = Asignacion.objects.filter(trabajador=user).values('cuadrilla_id', 'cuadrilla__proyecto_id').first()
+    if asign and asign['cuadrilla__proyecto_id']:
+        p = Proyecto.objects.select_related('jefe').get(pk=asign['cuadrilla__proyecto_id'])
+        cuadrilla = _cuadrillas_panel().get(pk=asign['cuadrilla_id'])
         # Enviar data simplificada para la plantilla
-        data = [{'proyecto': p, 'cuadrillas': [asign.cuadrilla]}]
+        data = [{'proyecto': p, 'cuadrillas': [{'cuadrilla': cuadrilla, 'can_edit': False}]}]
         return render(request, 'panel.html', {'data': data, 'basic': True})
 
     # Por defecto mostrar mensaje vacío
@@ -208,21 +226,32 @@ def asignar_cuadrillas(request, proyecto_id):
     proyecto = Proyecto.objects.get(id=proyecto_id, jefe=request.user)
     # Limpiar asociaciones con proyectos finalizados: si una cuadrilla aún apunta
     # a un proyecto que ya fue marcado como inactivo, la desasignamos.
-    Cuadrilla.objects.filter(proyecto__activo=False).update(proyecto=None)
+    finalizadas = list(Cuadrilla.objects.filter(proyecto__activo=False).values_list('id', flat=True))
+    if finalizadas:
+        Cuadrilla.objects.filter(id__in=finalizadas).update(proyecto=None)
+        programar_actualizacion('cuadrillas')
+        recalcular_ocupacion(cuadrilla_ids=finalizadas)
 
     # Cuadrillas disponibles son aquellas sin proyecto, con proyecto inactivo
     # (ya limpiadas arriba) o que ya pertenecen a este proyecto.
-    cuadrillas_disponibles = Cuadrilla.objects.filter(Q(proyecto__isnull=True) | Q(proyecto=proyecto))
+    cuadrillas_disponibles = Cuadrilla.objects.filter(Q(proyecto__isnull=True) | Q(proyecto=proyecto)).select_related('lider')
 
     if request.method == 'POST':
         seleccionadas = request.POST.getlist('cuadrillas')
         
+        anteriores = list(Cuadrilla.objects.filter(proyecto=proyecto).values_list('id', flat=True))
+
         # Desasignar cuadrillas anteriores
         Cuadrilla.objects.filter(proyecto=proyecto).update(proyecto=None)
         
         # Asignar nuevas
         Cuadrilla.objects.filter(id__in=seleccionadas).update(proyecto=proyecto)
 
+        # update() no emite señales: recalcular la ocupación de los miembros
+        # y los contadores de cuadrillas del dashboard
+        programar_actualizacion('cuadrillas')
+        recalcular_ocupacion(cuadrilla_ids=anteriores + [int(c) for c in seleccionadas if c.isdigit()])
+
         messages.success(request, f"Se actualizaron las cuadrillas para el proyecto '{proyecto.nombre}'.")
         return redirect('proyectos:panel')
 
@@ -246,20 +275,28 @@ def finalizar_proyecto(request, proyecto_id):
         proyecto.save()
 
         # Liberar cuadrillas asignadas y notificar a trabajadores
-        cuadrillas = Cuadrilla.objects.filter(proyecto=proyecto)
+        cuadrillas = (Cuadrilla.objects
+                      .filter(proyecto=proyecto)
+                      .select_related('lider')
+                      .prefetch_related('asignaciones__trabajador'))
+        pares = []
         for c in cuadrillas:
             # Notificar a cada trabajador asignado
+            msg = f"El proyecto '{proyecto.nombre}' ha sido finalizado. Has sido liberado de la cuadrilla '{c.nombre}'."
             for asig in c.asignaciones.all():
-                msg = f"El proyecto '{proyecto.nombre}' ha sido finalizado. Has sido liberado de la cuadrilla '{c.nombre}'."
-                crear_notificacion(asig.trabajador, msg)
+                pares.append((asig.trabajador, msg))
 
             # Notificar al líder si existe
             if c.lider:
-                crear_notificacion(c.lider, f"La cuadrilla '{c.nombre}' ha sido liberada porque el proyecto '{proyecto.nombre}' finalizó.")
+                pares.append((c.lider, f"La cuadrilla '{c.nombre}' ha sido liberada porque el proyecto '{proyecto.nombre}' finalizó."))
+
+        crear_notificaciones(pares, diferido=True)
 
-            # Desasignar la cuadrilla del proyecto
-            c.proyecto = None
-            c.save()
+        # Desasignar las cuadrillas del proyecto (update() no emite señales)
+        liberadas = [c.id for c in cuadrillas]
+        Cuadrilla.objects.filter(id__in=liberadas).update(proyecto=None)
+        programar_actualizacion('cuadrillas')
+        recalcular_ocupacion(cuadrilla_ids=liberadas)
 
         messages.success(request, f"El proyecto '{proyecto.nombre}' ha sido finalizado y las cuadrillas han sido liberadas.")
         return redirect('proyectos:panel')
@@ -0,0 +1,245 @@
+// Selector de trabajadores para los formularios de cuadrilla.
+//
+// Pide páginas a la API `personal:api_trabajadores` (filtros en el servidor,
+// paginación por keyset con `cursor`) y agrega filas a la tabla a medida que
+// se hace scroll o se pulsa "Cargar más", en vez de renderizar todo el personal.
+//
+// Configuración (atributos data-* del contenedor #selector-trabajadores):
+//   data-url        URL de la API
+//   data-ficha-url  URL de ficha con "0" como ID de ejemplo
+//   data-cuadrilla  (opcional) ID de cuadrilla: sus miembros no se piden
+//   data-modo       "crear" o "editar" (columnas de la tabla)
+// Los roles se leen del <script type="application/json" id="roles-data">.
+(function () {
+  'use strict';
+
+  function el(tag, attrs, children) {
+    const node = document.createElement(tag);
+    Object.entries(attrs || {}).forEach(([k, v]) => {
+      if (v === false || v === null || v === undefined) return;
+      if (k === 'text') node.textContent = v;
+      else if (k === 'className') node.className = v;
+      else node.setAttribute(k, v === true ? '' : v);
+    });
+    (children || []).forEach(c => node.appendChild(c));
+    return node;
+  }
+
+  function badge(disponibilidad) {
+    if (disponibilidad === 'ocupado') return el('span', {className: 'badge bg-danger', text: 'Ocupado'});
+    if (disponibilidad === 'vacaciones') return el('span', {className: 'badge bg-warning text-dark', text: 'Vacaciones'});
+    if (disponibilidad === 'licencia') return el('span', {className: 'badge bg-warning text-dark', text: 'Licencia'});
+    if (disponibilidad === 'disponible') return el('span', {className: 'badge bg-success', text: 'Disponible'});
+    if (disponibilidad && disponibilidad !== '—') return el('span', {className: 'badge bg-success', text: disponibilidad});
+    return el('span', {className: 'badge bg-secondary', text: '—'});
+  }
+
+  function init() {
+    const root = document.getElementById('selector-trabajadores');
+    if (!root) return;
+
+    const url = root.dataset.url;
+    const fichaUrl = root.dataset.fichaUrl;
+    const cuadrilla = root.dataset.cuadrilla || '';
+    const modo = root.dataset.modo || 'crear';
+    const tbody = document.getElementById('tabla-trabajadores');
+    const botonMas = document.getElementById('cargar-mas');
+    const estado = document.getElementById('selector-estado');
+    const rolesNode = document.getElementById('roles-data');
+    const roles = rolesNode ? JSON.parse(rolesNode.textContent) : [];
+
+    const filtros = {
+      q: document.getElementById('filtro-nombre'),
+      especialidad: document.getElementById('filtro-especialidad'),
+      disponibilidad: document.getElementById('filtro-disponibilidad'),
+      certificacion: document.getElementById('filtro-certificacion'),
+    };
+
+    let cursor = null;
+    let hayMas = true;
+    let cargando = false;
+    let controlador = null;
+    let peticion = 0;
+
+    // IDs de usuario ya presentes (filas del servidor o páginas previas)
+    const presentes = new Set();
+    tbody.querySelectorAll('tr[data-user-id]').forEach(tr => presentes.add(tr.dataset.userId));
+
+    function celdaRol(t) {
+      if (!t.seleccionable) {
+        return el('td', {}, [
+          el('select', {className: 'form-control', disabled: true}, [el('option', {text: '—'})]),
+          el('input', {type: 'text', className: 'form-control mt-1', disabled: true, placeholder: 'Nuevo rol (opcional)'}),
+        ]);
+      }
+      const opciones = [el('option', {value: '', text: '-- Rol --'})].concat(
+        roles.map(r => el('option', {value: r.id, text: r.nombre}))
+      );
+      return el('td', {}, [
+        el('select', {name: 'roles_' + t.user_id, className: 'form-control rol-select', disabled: true}, opciones),
+        el('input', {type: 'text', name: 'roles_custom_' + t.user_id, className: 'form-control mt-1', placeholder: 'Nuevo rol (opcional)'}),
+      ]);
+    }
+
+    function fila(t) {
+      const clases = ['fila-trabajador', 'fila-remota'];
+      if (t.disponibilidad === 'ocupado') clases.push('table-danger');
+      else if (t.disponibilidad === 'licencia' || t.disponibilidad === 'vacaciones') clases.push('table-warning');
+
+      let check;
+      if (t.seleccionable) {
+        check = el('input', {className: 'trabajador-checkbox', type: 'checkbox', name: 'trabajadores', value: t.user_id});
+      } else {
+        check = el('input', {type: 'checkbox', disabled: true});
+      }
+
+      const celdas = [
+        el('td', {}, [check]),
+        el('td', {}, [
+          document.createTextNode(t.nombre),
+          el('br'),
+          el('small', {className: 'text-muted', text: t.rut}),
+        ]),
+        el('td', {}, [badge(t.disponibilidad)]),
+      ];
+      if (modo === 'editar') celdas.push(el('td', {text: t.especialidad || '—'}));
+      celdas.push(t.certificaciones.length
+        ? el('td', {}, [el('ul', {className: 'mb-0'}, t.certificaciones.map(c => el('li', {text: c})))])
+        : el('td', {text: '—'}));
+      if (modo === 'editar') celdas.push(el('td', {text: '—'}));
+      celdas.push(celdaRol(t));
+      celdas.push(t.user_id
+        ? el('td', {}, [el('a', {href: fichaUrl.replace(/\/0\//, '/' + t.id + '/'), className: 'btn btn-info btn-sm', text: 'Ver ficha'})])
+        : el('td', {}, [el('em', {text: 'Sin usuario'})]));
+      if (modo === 'editar') celdas.push(el('td', {text: '—'}));
+
+      const tr = el('tr', {className: clases.join(' '), 'data-user-id': t.user_id || ''}, celdas);
+      if (t.seleccionable) {
+        const sel = tr.querySelector('select.rol-select');
+        check.addEventListener('change', () => { sel.disabled = !check.checked; });
+      }
+      return tr;
+    }
+
+    function parametros() {
+      const params = new URLSearchParams();
+      Object.entries(filtros).forEach(([k, input]) => {
+        if (input && input.value && input.value !== 'todas') params.set(k, input.value.trim());
+      });
+      if (cuadrilla) params.set('cuadrilla', cuadrilla);
+      if (cursor !== null) params.set('cursor', cursor);
+      return params;
+    }
+
+    function actualizarEstado() {
+      if (botonMas) botonMas.hidden = !hayMas;
+      if (estado) {
+        const remotas = tbody.querySelectorAll('tr.fila-remota').length;
+        estado.textContent = remotas ? '' : (cargando ? 'Cargando…' : 'Sin resultados para los filtros.');
+      }
+    }
+
+    function cargar() {
+      if (cargando || !hayMas) return;
+      cargando = true;
+      const mia = ++peticion;
+      controlador = new AbortController();
+      actualizarEstado();
+
+      fetch(url + '?' + parametros().toString(), {
+        credentials: 'same-origin',
+        signal: controlador.signal,
+        headers: {'Accept': 'application/json'},
+      })
+        .then(resp => {
+          if (!resp.ok) throw new Error('HTTP ' + resp.status);
+          return resp.json();
+        })
+        .then(data => {
+          if (mia !== peticion) return;
+          data.resultados.forEach(t => {
+            const clave = String(t.user_id || '');
+            if (clave && presentes.has(clave)) return;
+            if (clave) presentes.add(clave);
+            tbody.appendChild(fila(t));
+          });
+          cursor = data.siguiente;
+          hayMas = data.siguiente !== null;
+        })
+        .catch(err => {
+          if (err.name !== 'AbortError') {
+            console.error(err);
+            hayMas = false;
+          }
+        })
+        .finally(() => {
+          // Una petición abortada por un cambio de filtro no debe tocar el estado
+          if (mia !== peticion) return;
+          cargando = false;
+          actualizarEstado();
+        });
+    }
+
+    function reiniciar() {
+      if (controlador) controlador.abort();
+      peticion++;
+      cargando = false;
+      cursor = null;
+      hayMas = true;
+      // Conservar las filas ya marcadas para no perder la selección
+      tbody.querySelectorAll('tr.fila-remota').forEach(tr => {
+        const chk = tr.querySelector('input.trabajador-checkbox');
+        if (chk && chk.checked) return;
+        presentes.delete(tr.dataset.userId);
+        tr.remove();
+      });
+      cargar();
+    }
+
+    let espera = null;
+    Object.values(filtros).forEach(input => {
+      if (!input) return;
+      input.addEventListener('input', () => {
+        clearTimeout(espera);
+        espera = setTimeout(reiniciar, 250);
+      });
+    });
+
+    if (botonMas) botonMas.addEventListener('click', cargar);
+
+    // Carga automática al acercarse al final de la tabla
+    const centinela = document.getElementById('selector-centinela');
+    if (centinela && 'IntersectionObserver' in window) {
+      new IntersectionObserver(entradas => {
+        if (entradas.some(e => e.isIntersecting)) cargar();
+      }, {rootMargin: '200px'}).observe(centinela);
+    }
+
+    // Permite a otros componentes (p. ej. las recomendaciones) agregar y
+    // marcar trabajadores en la tabla del selector.
+    window.selectorTrabajadores = {
+      agregar: function (filas, marcar) {
+        filas.forEach(t => {
+          const clave = String(t.user_id || '');
+          let tr = clave ? tbody.querySelector('tr[data-user-id="' + clave + '"]') : null;
+          if (!tr) {
+            tr = fila(t);
+            if (clave) presentes.add(clave);
+            tbody.insertBefore(tr, tbody.firstChild);
+          }
+          const chk = tr.querySelector('input.trabajador-checkbox');
+          if (marcar && chk && !chk.disabled && !chk.checked) {
+            chk.checked = true;
+            chk.dispatchEvent(new Event('change'));
+          }
+        });
+        actualizarEstado();
+      },
+    };
+
+    cargar();
+  }
+
+  if (document.readyState === 'loading') document.addEventListener('DOMContentLoaded', init);
+  else init();
+})();
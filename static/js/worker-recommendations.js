@@ -0,0 +1,103 @@
+// Recomendaciones de trabajadores para los formularios de cuadrilla.
+//
+// Pide a la API `personal:api_recomendaciones` los candidatos disponibles
+// mejor puntuados para el proyecto elegido y permite agregarlos (marcados)
+// a la tabla del selector (`window.selectorTrabajadores`, worker-picker.js).
+//
+// Configuración (atributos data-* del contenedor #recomendaciones):
+//   data-url        URL de la API
+//   data-cuadrilla  (opcional) ID de cuadrilla: sus miembros no se recomiendan
+//   data-proyecto   (opcional) ID de proyecto fijo; si no, se lee de select[name=proyecto]
+(function () {
+  'use strict';
+
+  function init() {
+    const root = document.getElementById('recomendaciones');
+    if (!root) return;
+
+    const boton = document.getElementById('btn-recomendar');
+    const lista = document.getElementById('recomendaciones-lista');
+    const selectProyecto = document.querySelector('select[name="proyecto"]');
+
+    function proyectoActual() {
+      return (selectProyecto && selectProyecto.value) || root.dataset.proyecto || '';
+    }
+
+    function mensaje(texto) {
+      lista.replaceChildren();
+      const p = document.createElement('p');
+      p.className = 'text-muted mb-0';
+      p.textContent = texto;
+      lista.appendChild(p);
+    }
+
+    function item(t) {
+      const li = document.createElement('li');
+      li.className = 'list-group-item d-flex justify-content-between align-items-start';
+
+      const info = document.createElement('div');
+      const titulo = document.createElement('strong');
+      titulo.textContent = t.nombre + ' — ' + t.puntaje + ' pts';
+      info.appendChild(titulo);
+      const motivos = document.createElement('ul');
+      motivos.className = 'small text-muted mb-0';
+      t.motivos.forEach(m => {
+        const mli = document.createElement('li');
+        mli.textContent = m.motivo;
+        motivos.appendChild(mli);
+      });
+      info.appendChild(motivos);
+
+      const agregar = document.createElement('button');
+      agregar.type = 'button';
+      agregar.className = 'btn btn-sm btn-outline-primary';
+      agregar.textContent = 'Agregar';
+      agregar.addEventListener('click', () => {
+        if (window.selectorTrabajadores) window.selectorTrabajadores.agregar([t], true);
+        agregar.disabled = true;
+        agregar.textContent = 'Agregado';
+      });
+
+      li.appendChild(info);
+      li.appendChild(agregar);
+      return li;
+    }
+
+    boton.addEventListener('click', () => {
+      const proyecto = proyectoActual();
+      if (!proyecto) {
+        mensaje('Selecciona un proyecto para obtener recomendaciones.');
+        return;
+      }
+      const params = new URLSearchParams({proyecto: proyecto, n: '10'});
+      if (root.dataset.cuadrilla) params.set('cuadrilla', root.dataset.cuadrilla);
+
+      mensaje('Calculando recomendaciones…');
+      fetch(root.dataset.url + '?' + params.toString(), {
+        credentials: 'same-origin',
+        headers: {'Accept': 'application/json'},
+      })
+        .then(resp => {
+          if (!resp.ok) throw new Error('HTTP ' + resp.status);
+          return resp.json();
+        })
+        .then(data => {
+          if (!data.resultados.length) {
+            mensaje('No hay trabajadores disponibles para recomendar.');
+            return;
+          }
+          const ul = document.createElement('ul');
+          ul.className = 'list-group';
+          data.resultados.forEach(t => ul.appendChild(item(t)));
+          lista.replaceChildren(ul);
+        })
+        .catch(err => {
+          console.error(err);
+          mensaje('No se pudieron obtener recomendaciones.');
+        });
+    });
+  }
+
+  if (document.readyState === 'loading') document.addEventListener('DOMContentLoaded', init);
+  else init();
+})();